@@ -6,21 +6,26 @@ from PIL import Image
 import io
 import re
 import sqlite3
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import json
 import html as html_escape
 
 # 모듈화된 유틸리티 임포트
 from database_utils import (
-    init_database, get_children, add_child, delete_child, 
-    update_child_name, save_event, get_events, delete_event, 
+    init_database, add_child, delete_child, 
+    update_child_name, save_event, save_events, get_events_page, get_event_checklist, delete_event, 
+    archive_old_events, get_archived_events_page, search_events,
     update_checklist_item, update_event, add_checklist_item, 
-    delete_checklist_item, update_checklist_item_name, reset_all_data
+    delete_checklist_item, update_checklist_item_name, reset_all_data, get_cache_stats, get_transport_stats,
+    get_replica_status, StorageUnavailableError
 )
 from ai_logic import analyze_with_gemini, parse_analysis_result, is_valid_checklist_item
 from ui_styles import STYLE_CSS, COLORS
+from shared.request_context import RequestContext
+from shared.calendar_export import calendar_chunks
+from shared.backup import export_chunks, import_lines, backup_filename, BACKUP_MEDIA_TYPE
 from subscription_manager import (
-    get_or_create_user_id, check_can_analyze, process_analysis_usage, 
+    get_or_create_user_id, reserve_analysis, cancel_analysis, 
     render_membership_sidebar, render_paywall
 )
 
@@ -52,6 +57,11 @@ ICON_EDIT = """<span class="custom-icon"><svg viewBox="0 0 24 24" xmlns="http://
 ICON_ARROW_RIGHT = """<span class="custom-icon"><svg viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg"><line x1="5" y1="12" x2="19" y2="12"/><polyline points="12 5 19 12 12 19"/></svg></span>"""
 ICON_LIST = """<span class="custom-icon"><svg viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg"><line x1="8" y1="6" x2="21" y2="6"/><line x1="8" y1="12" x2="21" y2="12"/><line x1="8" y1="18" x2="21" y2="18"/><line x1="3" y1="6" x2="3.01" y2="6"/><line x1="3" y1="12" x2="3.01" y2="12"/><line x1="3" y1="18" x2="3.01" y2="18"/></svg></span>"""
 
+# 전체 일정 보기에서 지난 일정을 한 번에 불러오는 개수
+PAST_EVENTS_PAGE_SIZE = 20
+# 일정 검색 결과를 한 번에 보여 주는 개수
+SEARCH_PAGE_SIZE = 10
+
 def calculate_dday(event_date_str):
     """D-day 계산"""
     try:
@@ -68,29 +78,33 @@ def calculate_dday(event_date_str):
         pass
     return "", "#D3D3D3"
 
-def calculate_progress(checklist_items):
-    """준비물 진행률 계산"""
-    if not checklist_items:
-        return 0, 0, 0
-    total = len(checklist_items)
-    checked = sum(1 for item in checklist_items if item.get('checked', False))
+def calculate_progress(event):
+    """준비물 진행률 계산 (DB가 관리하는 checked_count / total_count 사용, 체크리스트 항목을 불러오지 않음)"""
+    checked = event.get('checked_count') or 0
+    total = event.get('total_count') or 0
     percentage = int((checked / total) * 100) if total > 0 else 0
     return checked, total, percentage
 
-def render_dashboard():
+def render_dashboard(ctx):
     """대시보드 UI 렌더링"""
+    user_id = ctx.user_id
     st.markdown(f"""### {ICON_CALENDAR}나의 일정 (Dashboard)""", unsafe_allow_html=True)
     
     # 데이터베이스 초기화
     init_database()
     
+    # 보관 기간이 지난 일정은 세션마다 한 번 보관 테이블로 이동 (대시보드는 활성 일정만 조회)
+    if 'archive_checked' not in st.session_state:
+        archive_old_events(user_id)
+        st.session_state.archive_checked = True
+    
     # 선택된 이벤트 상태 초기화
     if 'selected_event_id' not in st.session_state:
         st.session_state.selected_event_id = None
     
     # 다가오는 이벤트 섹션
     st.markdown(f"""#### {ICON_ARROW_RIGHT}다가오는 이벤트""", unsafe_allow_html=True)
-    future_events = get_events(future_only=True)
+    future_events = ctx.future_events()
     
     # 아이 태그 색상 설정
     tag_colors = {
@@ -105,7 +119,7 @@ def render_dashboard():
         for event in future_events:
             tag_color = tag_colors.get(event.get('child_tag', '없음'), '#D3D3D3')
             dday_text, dday_color = calculate_dday(event.get('event_date', ''))
-            checked, total, progress = calculate_progress(event.get('checklist_with_status', []))
+            checked, total, progress = calculate_progress(event)
             
             # 선택된 이벤트인지 확인
             is_selected = st.session_state.selected_event_id == event['id']
@@ -188,53 +202,120 @@ def render_dashboard():
     
     st.markdown("---")
     
+    # 일정 검색 (보관된 일정 포함)
+    render_event_search(user_id)
+    
+    st.markdown("---")
+    
     # 전체 일정 (접을 수 있는 섹션)
     with st.expander("📚 전체 일정 보기", expanded=False):
-        all_events = get_events(future_only=False)
+        # 지난 일정은 페이지 단위로 조회 (전체 이벤트를 한 번에 불러오지 않음)
+        if 'past_event_pages' not in st.session_state:
+            st.session_state.past_event_pages = 1
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        past_events = []
+        cursor = None
+        for _ in range(st.session_state.past_event_pages):
+            page = get_events_page(user_id, date_to=yesterday, page_size=PAST_EVENTS_PAGE_SIZE, cursor=cursor, checklists=False, details=False)
+            past_events.extend(page['events'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
         
-        if all_events:
-            # 지난 일정과 미래 일정 분리
-            past_events = []
-            upcoming_events = []
-            
-            for event in all_events:
-                is_past = False
-                if event.get('event_date'):
-                    try:
-                        date_str = event['event_date']
-                        if '-' in date_str:
-                            event_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                            if event_date < date.today():
-                                is_past = True
-                    except:
-                        pass
-                
-                if is_past:
-                    past_events.append(event)
-                else:
-                    upcoming_events.append(event)
-            
-            # 미래 일정 (접을 수 있는 섹션)
-            if upcoming_events:
-                with st.expander(f"🔜 예정된 일정 ({len(upcoming_events)}개)", expanded=True):
-                    for event in upcoming_events:
+        if future_events or past_events:
+            # 미래 일정 (접을 수 있는 섹션) - 위에서 조회한 future_events 재사용
+            if future_events:
+                with st.expander(f"🔜 예정된 일정 ({len(future_events)}개)", expanded=True):
+                    for event in future_events:
                         render_event_compact_row(event, tag_colors, is_past=False, prefix="all")
             
             # 지난 일정 (접을 수 있는 섹션)
             if past_events:
-                with st.expander(f"📜 지난 일정 ({len(past_events)}개)", expanded=False):
+                more_label = "+" if cursor else ""
+                with st.expander(f"📜 지난 일정 ({len(past_events)}{more_label}개)", expanded=False):
                     for event in past_events:
                         render_event_compact_row(event, tag_colors, is_past=True, prefix="past")
+                    if cursor and st.button("더 보기", key="past_events_more"):
+                        st.session_state.past_event_pages += 1
+                        st.rerun()
         else:
             st.info("📭 저장된 일정이 없습니다.")
+        
+        # 보관된 일정 (버튼을 눌렀을 때만 페이지 단위로 조회)
+        if not st.session_state.get('archive_pages'):
+            if st.button("🗄️ 보관된 일정 불러오기", key="archive_load"):
+                st.session_state.archive_pages = 1
+                st.rerun()
+        else:
+            archived_events = []
+            archive_cursor = None
+            for _ in range(st.session_state.archive_pages):
+                page = get_archived_events_page(user_id, page_size=PAST_EVENTS_PAGE_SIZE, cursor=archive_cursor, checklists=False, details=False)
+                archived_events.extend(page['events'])
+                archive_cursor = page['next_cursor']
+                if archive_cursor is None:
+                    break
+            
+            if archived_events:
+                more_label = "+" if archive_cursor else ""
+                with st.expander(f"🗄️ 보관된 일정 ({len(archived_events)}{more_label}개)", expanded=True):
+                    for event in archived_events:
+                        render_event_compact_row(event, tag_colors, is_past=True, prefix="archive", archived=True)
+                    if archive_cursor and st.button("더 보기", key="archive_more"):
+                        st.session_state.archive_pages += 1
+                        st.rerun()
+            else:
+                st.info("🗄️ 보관된 일정이 없습니다.")
 
-def render_event_compact_row(event, tag_colors, is_past, prefix):
-    """컴팩트한 이벤트 행 렌더링 (개별 상세 정보 접기/펼치기 기능 포함)"""
+def render_event_search(user_id):
+    """일정 검색 (이름/번역/설명/팁/메모/준비물, 보관된 일정 포함) 결과 렌더링"""
+    st.markdown(f"""#### {ICON_SEARCH}일정 검색""", unsafe_allow_html=True)
+    query = st.text_input(
+        "일정 검색",
+        key="event_search_query",
+        placeholder="예: 신터클라스, 수영복, 소풍",
+        label_visibility="collapsed"
+    )
+    if not query.strip():
+        return
+    
+    # 검색어가 바뀌면 첫 페이지부터
+    if st.session_state.get('event_search_last') != query:
+        st.session_state.event_search_last = query
+        st.session_state.event_search_pages = 1
+    
+    results = []
+    next_offset = 0
+    for _ in range(st.session_state.event_search_pages):
+        page = search_events(user_id, query, page_size=SEARCH_PAGE_SIZE, offset=next_offset)
+        results.extend(page['results'])
+        next_offset = page['next_offset']
+        if next_offset is None:
+            break
+    
+    if not results:
+        st.info("🔍 검색 결과가 없습니다.")
+        return
+    
+    for result in results:
+        event = result['event']
+        archived_label = " · 🗄️ 보관됨" if result['archived'] else ""
+        event_time_display = f" {event.get('event_time', '')}" if event.get('event_time') else ""
+        st.markdown(
+            f"**{event['event_name']}** · 📅 {event['event_date']}{event_time_display} · 👶 {event.get('child_tag', '없음')}{archived_label}  \n"
+            f"{result['snippet']}"
+        )
+    if next_offset is not None and st.button("더 보기", key="event_search_more"):
+        st.session_state.event_search_pages += 1
+        st.rerun()
+
+def render_event_compact_row(event, tag_colors, is_past, prefix, archived=False):
+    """컴팩트한 이벤트 행 렌더링 (개별 상세 정보 접기/펼치기 기능 포함, 보관된 일정은 편집 불가)"""
     tag_color = tag_colors.get(event.get('child_tag', '없음'), '#D3D3D3')
     dday_text, dday_color = calculate_dday(event.get('event_date', ''))
     opacity = "0.5" if is_past else "1"
     past_label = " (지난 일정)" if is_past else ""
-    checked, total, progress = calculate_progress(event.get('checklist_with_status', []))
+    checked, total, progress = calculate_progress(event)
     
     # 일정 요약 정보 (상세보기 헤더로 사용)
     event_time_display = f" {event.get('event_time', '')}" if event.get('event_time') else ""
@@ -257,12 +338,13 @@ def render_event_compact_row(event, tag_colors, is_past, prefix):
     # 각 일정을 expander로 감싸서 상세 정보 접기/펼치기 가능하게 함
     with st.expander(summary_text, expanded=expanded_state):
         # 상세 정보 렌더링
-        render_event_compact_detail(event, tag_colors, is_past, prefix)
+        render_event_compact_detail(event, tag_colors, is_past, prefix, archived)
 
-def render_event_compact_detail(event, tag_colors, is_past, prefix):
+def render_event_compact_detail(event, tag_colors, is_past, prefix, archived=False):
     """일정 상세 정보 (컴팩트 버전) 렌더링"""
+    user_id = get_or_create_user_id()
     tag_color = tag_colors.get(event.get('child_tag', '없음'), '#D3D3D3')
-    checked, total, progress = calculate_progress(event.get('checklist_with_status', []))
+    checked, total, progress = calculate_progress(event)
     
     # 메모 내용
     memo_content = event.get('memo', '') or ''
@@ -317,12 +399,19 @@ def render_event_compact_detail(event, tag_colors, is_past, prefix):
     if total > 0:
         st.progress(progress / 100, text=f"준비물 진행률: {checked}/{total}")
     
-    # 준비물 체크리스트
-    if event.get('checklist_with_status'):
+    # 준비물 체크리스트 (expander 내용은 접혀 있어도 실행되므로, 버튼을 눌러 연 일정만 항목 조회)
+    checklist_key = f"checklist_open_{prefix}_{event['id']}"
+    expander_key = f"expanded_{prefix}_{event['id']}"
+    if total > 0 and not st.session_state.get(checklist_key, False):
+        if st.button(f"✅ 준비물 체크리스트 보기 ({checked}/{total})", key=f"show_checklist_{prefix}_{event['id']}"):
+            st.session_state[checklist_key] = True
+            st.session_state[expander_key] = True
+            st.rerun()
+    elif total > 0:
         st.markdown("**✅ 준비물 체크리스트:**")
         
         cols = st.columns(2)
-        for idx, item in enumerate(event['checklist_with_status']):
+        for idx, item in enumerate(get_event_checklist(user_id, event['id'])):
             with cols[idx % 2]:
                 checked = st.checkbox(
                     item['name'],
@@ -332,33 +421,33 @@ def render_event_compact_detail(event, tag_colors, is_past, prefix):
                 )
                 if not is_past and checked != item['checked']:
                     # 체크박스 클릭 시 expander 상태 유지 (expander 안에 있으므로 항상 열린 상태로)
-                    expander_key = f"expanded_{prefix}_{event['id']}"
                     st.session_state[expander_key] = True
                     
-                    update_checklist_item(item['id'], checked)
+                    update_checklist_item(user_id, item['id'], checked)
                     st.rerun()
     
-    # 편집/삭제 버튼
+    # 편집/삭제 버튼 (보관된 일정은 삭제만 가능)
     col_edit, col_delete = st.columns(2)
     
     with col_edit:
-        if st.button("✏️ 편집", key=f"edit_detail_{prefix}_{event['id']}", use_container_width=True):
+        if not archived and st.button("✏️ 편집", key=f"edit_detail_{prefix}_{event['id']}", use_container_width=True):
             st.session_state[f'editing_{event["id"]}'] = True
             st.rerun()
     
     with col_delete:
         if st.button("🗑️ 삭제", key=f"delete_detail_{prefix}_{event['id']}", use_container_width=True):
-            delete_event(event['id'])
+            delete_event(user_id, event['id'])
             st.success("이벤트가 삭제되었습니다.")
             st.rerun()
 
 def render_event_detail(event, tag_colors, is_past, prefix):
     """이벤트 상세 정보 렌더링"""
+    user_id = get_or_create_user_id()
     st.markdown("---")
     st.markdown("#### 📋 일정 상세")
     
     tag_color = tag_colors.get(event.get('child_tag', '없음'), '#D3D3D3')
-    checked, total, progress = calculate_progress(event.get('checklist_with_status', []))
+    checked, total, progress = calculate_progress(event)
     
     # 메모 내용
     memo_content = event.get('memo', '') or ''
@@ -408,12 +497,12 @@ def render_event_detail(event, tag_colors, is_past, prefix):
     if total > 0:
         st.progress(progress / 100, text=f"준비물 진행률: {checked}/{total}")
     
-    # 준비물 체크리스트
-    if event.get('checklist_with_status'):
+    # 준비물 체크리스트 (선택한 일정의 항목만 조회)
+    if total > 0:
         st.markdown("**✅ 준비물 체크리스트:**")
         
         cols = st.columns(2)
-        for idx, item in enumerate(event['checklist_with_status']):
+        for idx, item in enumerate(get_event_checklist(user_id, event['id'])):
             with cols[idx % 2]:
                 checked = st.checkbox(
                     item['name'],
@@ -422,7 +511,7 @@ def render_event_detail(event, tag_colors, is_past, prefix):
                     disabled=is_past
                 )
                 if not is_past and checked != item['checked']:
-                    update_checklist_item(item['id'], checked)
+                    update_checklist_item(user_id, item['id'], checked)
                     st.rerun()
     
     # 버튼 영역
@@ -435,7 +524,7 @@ def render_event_detail(event, tag_colors, is_past, prefix):
     
     with col_delete:
         if st.button("🗑️ 삭제", key=f"delete_{prefix}_{event['id']}", use_container_width=True):
-            delete_event(event['id'])
+            delete_event(user_id, event['id'])
             st.session_state.selected_event_id = None
             st.success("이벤트가 삭제되었습니다.")
             st.rerun()
@@ -451,6 +540,7 @@ def render_event_detail(event, tag_colors, is_past, prefix):
 
 def render_edit_mode(event, prefix):
     """편집 모드 UI 렌더링"""
+    user_id = get_or_create_user_id()
     st.markdown("---")
     st.markdown(f"#### ✏️ 일정 편집: {event['event_name']}")
     
@@ -481,7 +571,7 @@ def render_edit_mode(event, prefix):
     
     # 준비물 편집
     st.markdown("**✅ 준비물 관리:**")
-    checklist_items = event.get('checklist_with_status', [])
+    checklist_items = get_event_checklist(user_id, event['id'])
     
     for idx, item in enumerate(checklist_items):
         col_name, col_del = st.columns([5, 1])
@@ -499,7 +589,7 @@ def render_edit_mode(event, prefix):
         
         with col_del:
             if st.button("🗑️", key=f"del_item_{prefix}_{event['id']}_{item['id']}", help="삭제"):
-                delete_checklist_item(item['id'])
+                delete_checklist_item(user_id, item['id'])
                 st.rerun()
     
     # 새 준비물 추가
@@ -515,7 +605,7 @@ def render_edit_mode(event, prefix):
                         st.warning("⚠️ 유효하지 않은 준비물입니다. 실제 필요한 준비물(예: 도시락, 운동화 등)을 입력해주세요.")
                         st.info("💡 다음 항목은 추가할 수 없습니다: '-', '없음', 2자 이하, 대시만 있는 항목 등")
                     else:
-                        add_checklist_item(event['id'], new_item.strip())
+                        add_checklist_item(user_id, event['id'], new_item.strip())
                         st.success(f"✅ '{new_item.strip()}'가 추가되었습니다!")
                         st.rerun()
                 except ValueError as e:
@@ -533,7 +623,7 @@ def render_edit_mode(event, prefix):
             
             saved_date_str = saved_date.strftime('%Y-%m-%d') if saved_date else current_date
             
-            update_event(event['id'], {
+            update_event(user_id, event['id'], {
                 'event_name': event['event_name'],
                 'event_date': saved_date_str,
                 'event_time': saved_time if saved_time else '',
@@ -549,7 +639,7 @@ def render_edit_mode(event, prefix):
                     if new_name and new_name.strip():
                         try:
                             if is_valid_checklist_item(new_name.strip()):
-                                update_checklist_item_name(item_id, new_name.strip())
+                                update_checklist_item_name(user_id, item_id, new_name.strip())
                             else:
                                 validation_errors.append(f"'{new_name.strip()}' - 유효하지 않은 준비물입니다.")
                         except ValueError as e:
@@ -576,9 +666,8 @@ def render_edit_mode(event, prefix):
             st.session_state[f'editing_{event["id"]}'] = False
             st.rerun()
 
-def main():
-    # 데이터베이스 초기화
-    init_database()
+def main(ctx):
+    user_id = ctx.user_id
     
     # 사이드바
     with st.sidebar:
@@ -629,7 +718,7 @@ def main():
         # 아이 관리 섹션 (자연스러운 구분선과 간격)
         st.markdown("<div style='margin-top: 2rem; padding-top: 1.5rem; border-top: 2px solid #e8e8e8;'></div>", unsafe_allow_html=True)
         st.markdown(f"""### {ICON_USER}아이 관리""", unsafe_allow_html=True)
-        children_list = get_children()
+        children_list = ctx.children()
         
         if children_list:
             st.markdown("**등록된 아이:**")
@@ -666,7 +755,7 @@ def main():
                     with col_delete:
                         # 삭제 버튼
                         if st.button("🗑️", key=f"delete_child_{child}", help="삭제", use_container_width=True, type="secondary"):
-                            delete_child(child)
+                            delete_child(user_id, child)
                             st.success(f"✅ '{child}'가 삭제되었습니다.")
                             st.rerun()
                 else:
@@ -694,7 +783,7 @@ def main():
                     with col_save_edit:
                         if st.button("💾 저장", key=f"save_edit_{child}", use_container_width=True, type="primary"):
                             if new_name and new_name.strip() and new_name.strip() != child:
-                                if update_child_name(child, new_name.strip()):
+                                if update_child_name(user_id, child, new_name.strip()):
                                     st.success(f"✅ '{child}'이(가) '{new_name.strip()}'으로 변경되었습니다.")
                                     # 이전 상태 삭제 및 새 상태로 업데이트
                                     del st.session_state[f'editing_child_{child}']
@@ -727,7 +816,7 @@ def main():
         )
         if st.button("➕ 아이 추가", use_container_width=True):
             if new_child_name and new_child_name.strip():
-                if add_child(new_child_name.strip()):
+                if add_child(user_id, new_child_name.strip()):
                     st.success(f"✅ '{new_child_name.strip()}'이(가) 추가되었습니다!")
                     st.rerun()
                 else:
@@ -736,7 +825,7 @@ def main():
                 st.warning("⚠️ 아이 이름을 입력해주세요.")
         
         # 멤버십 정보 표시
-        render_membership_sidebar()
+        render_membership_sidebar(ctx)
         
         # 데이터 관리 섹션 (스토어 규정 준수)
         st.markdown("<div style='margin-top: 2rem; padding-top: 1rem; border-top: 1px solid #ffcccc;'></div>", unsafe_allow_html=True)
@@ -744,9 +833,49 @@ def main():
         with st.expander("데이터 초기화", expanded=False):
             st.warning("이 작업을 수행하면 모든 일정과 아이 정보가 영구적으로 삭제됩니다.")
             if st.button("🚨 모든 데이터 초기화", use_container_width=True):
-                reset_all_data()
+                reset_all_data(user_id)
                 st.success("✅ 모든 데이터가 초기화되었습니다.")
                 st.rerun()
+        with st.expander("📅 캘린더 내보내기", expanded=False):
+            st.caption("일정을 .ics 파일로 받아 구글/애플 캘린더에 가져올 수 있습니다. (보관된 일정 제외)")
+            # 펼치지 않아도 본문이 실행되므로 버튼을 누른 뒤에만 파일을 만듦 (같은 데이터면 캐시된 파일 사용)
+            if st.button("📅 캘린더 파일 만들기", use_container_width=True):
+                st.session_state.calendar_export_ready = True
+            if st.session_state.get('calendar_export_ready'):
+                st.download_button(
+                    "⬇️ sense-coach.ics 다운로드", data=b''.join(calendar_chunks(user_id)),
+                    file_name="sense-coach.ics", mime="text/calendar", use_container_width=True
+                )
+        with st.expander("💾 백업 / 복원", expanded=False):
+            st.caption("아이, 일정(보관된 일정 포함), 준비물 체크 상태를 한 파일로 받아 두었다가 다시 넣을 수 있습니다.")
+            # st.download_button은 파일 내용을 한 번에 받으므로 조각을 합쳐서 전달 (API/CLI는 스트리밍)
+            if st.button("💾 백업 파일 만들기", use_container_width=True):
+                st.session_state.backup_file = (backup_filename(), b''.join(export_chunks(user_id)))
+            if st.session_state.get('backup_file'):
+                file_name, data = st.session_state.backup_file
+                st.download_button(f"⬇️ {file_name} 다운로드", data=data, file_name=file_name,
+                                   mime=BACKUP_MEDIA_TYPE, use_container_width=True)
+            uploaded_backup = st.file_uploader("백업 파일 복원", type=["jsonl"], key="backup_upload")
+            if uploaded_backup is not None and st.button("♻️ 복원하기", use_container_width=True):
+                try:
+                    result = import_lines(user_id, uploaded_backup)
+                    imported = result['imported']
+                    st.success(f"✅ 일정 {imported['events']}개, 준비물 {imported['checklist_items']}개, 아이 {imported['children']}명을 복원했습니다.")
+                    if result['resumed_from']:
+                        st.info("이전에 중단된 복원을 이어서 진행했습니다.")
+                    if not result['complete']:
+                        st.warning("백업 파일이 끝까지 있지 않습니다. 완전한 파일로 다시 복원하면 이어서 넣습니다.")
+                except ValueError as e:
+                    st.error(f"복원 실패: {e}")
+        with st.expander("📊 캐시 상태", expanded=False):
+            stats = get_cache_stats()
+            st.caption(f"적중 {stats['hits']} / 미스 {stats['misses']} (적중률 {stats['hit_rate']:.0%}) · 항목 {stats['entries']}개 · 무효화 {stats['invalidations']}회")
+            st.caption(f"이번 실행 DB 호출 (여기까지): {ctx.db_call_count()}회")
+            for name, call in get_transport_stats().items():
+                st.caption(f"Supabase {name}: {call['calls']}회 · p50 {call['p50_ms']:.0f}ms / p95 {call['p95_ms']:.0f}ms · 재시도 {call['retries']} · 오류 {call['errors']}")
+            replica = get_replica_status()
+            if replica:
+                st.caption(f"읽기 복제본: 차단기 {replica['circuit']} · 동기화 {replica['syncs']}회 (전체 {replica['full_syncs']}) · 반영 {replica['rows_applied']}행 · 대기 중인 쓰기 {replica['queued_writes']}개")
         
         # 하단 법적 고지 및 지원 (사이드바 최하단)
         st.markdown("<div style='margin-top: 3rem; padding-top: 1rem; border-top: 1px solid #e0e0e0; font-size: 0.8rem; color: #888;'></div>", unsafe_allow_html=True)
@@ -826,17 +955,6 @@ def main():
         
         # 분석 실행
         if analyze_button:
-            # 사용량 제한 확인
-            can_analyze, current, max_val, tier = check_can_analyze()
-            if not can_analyze:
-                st.error(f"⚠️ 이번 달 분석 횟수({max_val}회)를 모두 사용하셨습니다.")
-                st.info("💎 무제한 분석을 위해 프리미엄으로 업그레이드하세요!")
-                if st.button("🚀 프리미엄 혜택 보기", key="paywall_btn_main"):
-                    st.session_state.show_paywall = True
-                    st.rerun()
-                st.stop()
-
-            # 입력 검증
             # 입력 검증
             if not text_input and not image_input:
                 st.error("⚠️ 텍스트 또는 이미지를 입력해주세요.")
@@ -847,6 +965,16 @@ def main():
                 st.error("💡 `.env` 파일에 `GEMINI_API_KEY=your_api_key`를 추가하거나 Streamlit Secrets에 설정해주세요.")
                 st.stop()
             
+            # 사용량 제한 확인 + 차감 (분석이 실패하면 아래에서 되돌림)
+            usage = reserve_analysis()
+            if not usage['allowed']:
+                st.error(f"⚠️ 이번 달 분석 횟수({usage['limit']}회)를 모두 사용하셨습니다.")
+                st.info("💎 무제한 분석을 위해 프리미엄으로 업그레이드하세요!")
+                if st.button("🚀 프리미엄 혜택 보기", key="paywall_btn_main"):
+                    st.session_state.show_paywall = True
+                    st.rerun()
+                st.stop()
+            
             # 로딩 메시지 (이미지 여부에 따라 다르게 표시)
             if image_input:
                 loading_msg = "🔍 이미지에서 텍스트를 추출하고 분석 중... 잠시만 기다려주세요!"
@@ -862,21 +990,21 @@ def main():
                     
                     # 결과가 에러 메시지인지 확인
                     if not result:
+                        cancel_analysis()
                         st.error("❌ 분석 결과를 받을 수 없습니다. 다시 시도해주세요.")
                         st.stop()
                     
                     if result.startswith("❌"):
+                        cancel_analysis()
                         st.error(result)
                         st.stop()
                     
-                    # 분석 성공 시 사용량 기록
-                    process_analysis_usage()
-                    
                     # 분석 결과를 session_state에 저장 (rerun 시에도 유지)
                     st.session_state['last_analysis_result'] = result
                     st.session_state['last_analysis_parsed'] = parse_analysis_result(result, country)
                     
             except Exception as e:
+                cancel_analysis()
                 st.error(f"❌ 분석 중 오류가 발생했습니다: {str(e)}")
                 st.info("💡 문제가 계속되면 페이지를 새로고침하고 다시 시도해주세요.")
         
@@ -1062,7 +1190,8 @@ def main():
             
             st.markdown("---")
 
-            # 2. 각 일정별 카드 렌더링
+            # 2. 각 일정별 카드 렌더링 (카드별 입력값은 '모두 저장하기'에서 함께 사용)
+            edited_events = []
             for i, event_data in enumerate(parsed_events):
                 # 카드로 시각적 구분
                 st.markdown(f"""
@@ -1121,8 +1250,8 @@ def main():
                     )
                 
                 # 아이 선택 및 저장 버튼
-                # 데이터베이스에서 아이 목록 가져오기
-                children_list = get_children()
+                # 아이 목록 (사이드바에서 불러온 목록 재사용)
+                children_list = ctx.children()
                 child_options = ['없음'] + children_list + ['둘 다'] if len(children_list) > 1 else ['없음'] + children_list
                 
                 col_child, col_save = st.columns([2, 1])
@@ -1134,6 +1263,9 @@ def main():
                         index=0 # 기본값
                     )
                 
+                edited_events.append((event_data, manual_event_name, manual_event_date, manual_event_time, child_tag,
+                                      st.session_state.get(f"checklist_{i}", "")))
+                
                 with col_save:
                     st.markdown("<br>", unsafe_allow_html=True)
                     if st.button("💾 저장하기", key=f"save_btn_{i}", use_container_width=True, type="primary"):
@@ -1152,7 +1284,7 @@ def main():
                                 event_data['child_tag'] = child_tag
                                 event_data['checklist_items'] = updated_checklist
                                 
-                                save_event(event_data)
+                                save_event(user_id, event_data)
                                 st.toast(f"✅ '{manual_event_name}' 저장 완료!", icon="🎉")
                                 # 저장 완료 표시를 위해 아이콘 추가 등 UI 업데이트 가능
                             except Exception as e:
@@ -1184,6 +1316,27 @@ def main():
                         st.markdown("**💡 팁:**")
                         st.info(event_data['tips'])
 
+            # 3. 모든 일정을 한 번에 저장 (하나의 트랜잭션)
+            if len(parsed_events) > 1:
+                if st.button(f"💾 {len(parsed_events)}개 일정 모두 저장하기", key="save_all_btn", use_container_width=True, type="primary"):
+                    if all(name and event_date for _, name, event_date, _, _, _ in edited_events):
+                        try:
+                            events_to_save = []
+                            for event_data, name, event_date, event_time, tag, checklist_str in edited_events:
+                                event_data['event_name'] = name
+                                event_data['event_date'] = event_date
+                                event_data['event_time'] = event_time
+                                event_data['child_tag'] = tag
+                                event_data['checklist_items'] = [item.strip() for item in checklist_str.split('\n') if item.strip()]
+                                events_to_save.append(event_data)
+                            
+                            save_events(user_id, events_to_save)
+                            st.toast(f"✅ {len(events_to_save)}개 일정 저장 완료!", icon="🎉")
+                        except Exception as e:
+                            st.error(f"❌ 저장 실패: {str(e)}")
+                    else:
+                        st.warning("⚠️ 모든 일정의 행사명과 날짜를 입력해주세요.")
+
             if not parsed_events:
                 st.info("💡 표시할 일정이 없습니다. '일정 직접 추가하기' 버튼을 눌러보세요.")
             
@@ -1192,10 +1345,19 @@ def main():
     
     with tab2:
         try:
-            render_dashboard()
+            render_dashboard(ctx)
         except Exception as e:
             st.error(f"❌ 대시보드 로드 중 오류가 발생했습니다: {str(e)}")
             st.info("💡 문제가 계속되면 페이지를 새로고침하고 다시 시도해주세요.")
 
 if __name__ == "__main__":
-    main()
+    # 데이터베이스 초기화
+    init_database()
+    # 사용자별 데이터 (uid는 주소창에 유지되어 새로고침/북마크 후에도 같은 데이터를 봄)
+    # 재실행마다 아이/등급/사용량/다가오는 일정을 한 번씩만 불러오고 DB 호출 수를 집계
+    # 저장소 조회 실패는 on_error(st.error)로 이미 표시됨 - 빈 화면/기본 등급으로 계속 그리지 않음
+    try:
+        with RequestContext(get_or_create_user_id()) as ctx:
+            main(ctx)
+    except StorageUnavailableError:
+        st.info("잠시 후 새로고침해 주세요.")
@@ -0,0 +1,151 @@
+"""
+이벤트 보관(archive) 벤치마크
+
+몇 년 치 가정통신문이 쌓인 사용자(과거 이벤트가 대부분)를 만들고, 보관 전/후의
+- 대시보드 재실행 조회 (다가오는 일정 전체 + 지난 일정 첫 페이지)
+- 전체 이벤트 조회 (get_events, 필터 없음)
+- events 테이블 행 수
+를 비교합니다. 보관은 ARCHIVE_BATCH_SIZE개씩 각자의 트랜잭션으로 진행되며,
+보관된 이벤트를 페이지 단위로 끝까지 읽어 빠짐/중복 없이 최근 날짜부터 나오는지 확인합니다.
+마지막으로 memory / sqlite_sharded 저장소에서도 같은 동작(보관, 페이지 조회, 삭제, 초기화)을 확인합니다.
+
+실행: python benchmarks/bench_archive.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+USER_ID = 'bench_user'
+PAST_DAYS = 5 * 365          # 5년 치 지난 일정
+FUTURE_DAYS = 60
+EVENTS_PER_DAY = 4
+ITEMS_PER_EVENT = 4
+PAGE_SIZE = 20
+REPEAT = 20
+
+
+def seed(database_utils, user_id=USER_ID, past_days=PAST_DAYS, future_days=FUTURE_DAYS, per_day=EVENTS_PER_DAY):
+    today = date.today()
+    database_utils.save_events(user_id, [{
+        'event_name': f'행사 {offset}-{n}', 'event_date': (today + timedelta(days=offset)).isoformat(),
+        'event_time': f'{9 + n:02d}:00', 'country': '네덜란드', 'child_tag': '첫째',
+        'translation': '번역 ' * 10, 'cultural_context': '문화 ' * 10, 'tips': '팁 ' * 10,
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for offset in range(-past_days, future_days) for n in range(per_day)])
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def dashboard_rerun(repository):
+    """app.py render_dashboard가 읽는 데이터 (캐시 없이 저장소 직접 호출)"""
+    today = date.today()
+    repository.get_events(USER_ID, date_from=today.isoformat())
+    repository.get_events(USER_ID, date_to=(today - timedelta(days=1)).isoformat(), limit=PAGE_SIZE + 1)
+
+
+def report(label, repository, conn):
+    rows = conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+    dashboard_ms = best_of(lambda: dashboard_rerun(repository))
+    all_ms = best_of(lambda: repository.get_events(USER_ID))
+    print(f'{label:>16} | {rows:>11} | {dashboard_ms:>12.2f} | {all_ms:>15.1f}')
+
+
+def read_all_archived(database_utils, user_id):
+    events, cursor, pages = [], None, 0
+    while True:
+        page = database_utils.get_archived_events_page(user_id, page_size=PAGE_SIZE, cursor=cursor)
+        events.extend(page['events'])
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            return events, pages
+
+
+def check_archive(database_utils, user_id, expected):
+    """보관된 이벤트를 페이지 단위로 모두 읽어 최근 날짜부터, 빠짐/중복 없이 나오는지 확인"""
+    archived, pages = read_all_archived(database_utils, user_id)
+    keys = [(e['event_date'], e['event_time'], e['id']) for e in archived]
+    assert len(archived) == expected, (len(archived), expected)
+    assert keys == sorted(keys, reverse=True) and len(set(keys)) == len(keys)
+    assert all(len(e['checklist_with_status']) == ITEMS_PER_EVENT for e in archived)
+    horizon = database_utils.archive_horizon()
+    assert all(e['event_date'] < horizon for e in archived)
+    assert all(e['event_date'] >= horizon for e in database_utils.get_events(user_id))
+    return archived, pages
+
+
+def check_backend(database_utils, storage):
+    """저장소별 동작 확인: 보관, 페이지 조회, 보관된 이벤트 삭제, 초기화"""
+    database_utils.configure(storage=storage)
+    database_utils.init_database()
+    user_id = f'{storage}_user'
+    seed(database_utils, user_id, past_days=400, future_days=10, per_day=1)
+    expected = sum(1 for e in database_utils.get_events(user_id) if e['event_date'] < database_utils.archive_horizon())
+    moved = database_utils.archive_old_events(user_id, batch_size=50)
+    assert moved == expected, (storage, moved, expected)
+    assert database_utils.archive_old_events(user_id) == 0
+    archived, _ = check_archive(database_utils, user_id, expected)
+    # 다른 사용자에게는 보이지 않음
+    assert database_utils.get_archived_events_page('someone_else')['events'] == []
+
+    database_utils.delete_event(user_id, archived[0]['id'])
+    assert len(read_all_archived(database_utils, user_id)[0]) == expected - 1
+    database_utils.reset_all_data(user_id)
+    assert read_all_archived(database_utils, user_id)[0] == [] and database_utils.get_events(user_id) == []
+    print(f'{storage:>14}: archived {moved} events in batches of 50, paging/delete/reset OK')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        database_utils.init_database()
+        repository = database_utils.get_repository()
+        seed(database_utils)
+        total = (PAST_DAYS + FUTURE_DAYS) * EVENTS_PER_DAY
+        print(f'{total} events ({PAST_DAYS // 365} years of past notices), archive after '
+              f'{database_utils.ARCHIVE_AFTER_DAYS} days, batch {database_utils.ARCHIVE_BATCH_SIZE}')
+        print(f"{'':>16} | {'events rows':>11} | {'dashboard ms':>12} | {'get_events ms':>15}")
+        print('-' * 64)
+        with repository.db.reader() as conn:
+            report('before archive', repository, conn)
+
+        start = time.perf_counter()
+        moved = database_utils.archive_old_events(USER_ID)
+        archive_ms = (time.perf_counter() - start) * 1000
+        with repository.db.reader() as conn:
+            report('after archive', repository, conn)
+
+        expected = (PAST_DAYS - database_utils.ARCHIVE_AFTER_DAYS) * EVENTS_PER_DAY
+        batches = -(-moved // database_utils.ARCHIVE_BATCH_SIZE)
+        print(f'\narchived {moved} events in {batches} transactions: {archive_ms:.0f} ms '
+              f'({archive_ms / batches:.1f} ms per batch)')
+        database_utils.query_cache.clear()
+        start = time.perf_counter()
+        _, pages = check_archive(database_utils, USER_ID, expected)
+        print(f'read archive lazily: {pages} pages of {PAGE_SIZE} in {(time.perf_counter() - start) * 1000:.0f} ms, '
+              f'first page {best_of(lambda: repository.get_archived_events(USER_ID, PAGE_SIZE + 1)):.2f} ms\n')
+
+        for storage in ('memory', 'sqlite_sharded'):
+            check_backend(database_utils, storage)
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
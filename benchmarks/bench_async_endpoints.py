@@ -0,0 +1,109 @@
+"""
+async 엔드포인트 동시성 벤치마크 (50개 병렬 클라이언트의 p50/p99 지연 시간)
+
+FastAPI 핸들러와 같은 방식으로 async 함수 안에서 DB 함수를 호출할 때,
+동기 함수를 직접 호출하는 기존 방식과 async_database_utils(스레드 풀)를 await 하는 방식을 비교합니다.
+- memory: 메모리 저장소 (I/O 없는 기준선 - 캐시와 스레드 풀 자체의 비용)
+- sqlite: 로컬 SQLite 그대로
+- remote: 매 호출에 SIMULATED_LATENCY_MS만큼 네트워크 대기를 추가해 Supabase HTTP 호출을 흉내
+
+실행: python benchmarks/bench_async_endpoints.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 Supabase 대신 로컬 저장소로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+CLIENTS = 50
+REQUESTS_PER_CLIENT = 20
+N_EVENTS = 1000
+SIMULATED_LATENCY_MS = 20
+USER_ID = 'bench_user'
+
+
+def seed(database_utils):
+    for i in range(N_EVENTS):
+        database_utils.save_event(USER_ID, {
+            'event_name': f'행사 {i}', 'event_date': f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}',
+            'event_time': '10:00', 'country': '네덜란드', 'child_tag': '첫째',
+            'checklist_items': [f'준비물 {j}' for j in range(4)],
+        })
+
+
+def with_latency(func):
+    """원격 DB 왕복 시간을 흉내 내는 래퍼 (time.sleep은 호출한 스레드만 멈춤)"""
+    def wrapper(*args, **kwargs):
+        time.sleep(SIMULATED_LATENCY_MS / 1000)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run_clients(handler):
+    """CLIENTS개의 클라이언트가 각자 REQUESTS_PER_CLIENT번 순차 요청, 요청별 지연 시간(ms) 반환"""
+    latencies = []
+
+    async def client(client_id):
+        for i in range(REQUESTS_PER_CLIENT):
+            # 요청을 별도 태스크로 보내고 보낸 시점부터 측정 (이벤트 루프가 막혀 대기한 시간 포함)
+            start = time.perf_counter()
+            await asyncio.create_task(handler(1 + (client_id * REQUESTS_PER_CLIENT + i) % N_EVENTS))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(CLIENTS)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+        from shared import async_database_utils
+
+        print(f'{CLIENTS} clients x {REQUESTS_PER_CLIENT} requests (GET /api/events/{{id}} + membership)')
+        print(f"{'backend':>8} | {'mode':>8} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'req/s':>8}")
+        print('-' * 54)
+        for backend in ('memory', 'sqlite', 'remote'):
+            if backend != 'remote':
+                database_utils.configure(storage=backend)
+                database_utils.init_database()
+                seed(database_utils)
+            wrap = with_latency if backend == 'remote' else (lambda f: f)
+            get_event_by_id = wrap(database_utils.get_event_by_id)
+            get_user_tier = wrap(database_utils.get_user_tier)
+
+            # 기존 방식: async 핸들러에서 동기 함수를 바로 호출 (이벤트 루프 블로킹)
+            async def blocking_handler(event_id):
+                get_user_tier(USER_ID)
+                return get_event_by_id(USER_ID, event_id)
+
+            # 변경 후: DB 스레드 풀에서 실행하고 await
+            async def executor_handler(event_id):
+                await async_database_utils.run_db(get_user_tier, USER_ID)
+                return await async_database_utils.run_db(get_event_by_id, USER_ID, event_id)
+
+            for mode, handler in (('blocking', blocking_handler), ('executor', executor_handler)):
+                # 두 방식 모두 같은 조건(캐시 비어 있음)에서 측정
+                database_utils.query_cache.clear()
+                latencies, elapsed = asyncio.run(run_clients(handler))
+                print(f'{backend:>8} | {mode:>8} | {percentile(latencies, 50):>9.2f} | '
+                      f'{percentile(latencies, 99):>9.2f} | {len(latencies) / elapsed:>8.0f}')
+
+        async_database_utils.shutdown_executor()
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
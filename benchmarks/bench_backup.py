@@ -0,0 +1,191 @@
+"""
+백업 / 복원 벤치마크
+
+한 사용자에게 N_EVENTS개 이벤트(체크리스트 ITEMS_PER_EVENT개씩, 일부는 보관)를 만들고
+- 내보내기: 전체 목록을 불러와 한 번에 직렬화 vs 페이지 단위 스트리밍 (시간, 최대 메모리)
+- 복원: 묶음 단위 트랜잭션으로 파일을 한 줄씩 읽어 넣기 (시간, 최대 메모리)
+를 비교합니다.
+
+함께 확인하는 것:
+- 복원한 데이터가 원본과 같은지 (체크 상태, 보관 여부, 메타데이터, 아이, 사용량)
+- 복원 도중 실패 후 같은 파일로 다시 복원하면 이어서 넣고 중복이 없는지, 끝난 파일을 다시 넣으면 아무것도 넣지 않는지
+- 사용량은 줄어들지 않는지, 잘린 파일은 complete=False인지
+- sqlite 백업을 memory / sqlite_sharded 저장소로 옮겼을 때도 같은지
+
+실행: python benchmarks/bench_backup.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+USER_ID = 'bench_user'
+N_EVENTS = 20000
+ITEMS_PER_EVENT = 5
+
+
+def events_data(n):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=i // 20 - 365)).isoformat(),
+        'event_time': ['09:00', '13시', ''][i % 3], 'country': '네덜란드', 'child_tag': ['첫째', '둘째', '없음'][i % 3],
+        'translation': '번역 ' * 20, 'cultural_context': '문화 ' * 20, 'tips': '팁 ' * 10, 'memo': '메모' if i % 5 == 0 else '',
+        'checklist_items': [f'준비물 {j}' if j else {'name': '실내화', 'metadata': {'qty': i % 4}} for j in range(ITEMS_PER_EVENT)],
+    } for i in range(n)]
+
+
+def populate(database_utils, user_id, n):
+    database_utils.add_child(user_id, '첫째')
+    database_utils.add_child(user_id, '둘째')
+    event_ids = database_utils.save_events(user_id, events_data(n))
+    for event_id in event_ids[::7]:
+        item = database_utils.get_event_checklist(user_id, event_id)[1]
+        database_utils.update_checklist_item(user_id, item['id'], True)
+    database_utils.archive_old_events(user_id, after_days=180)
+    for _ in range(3):
+        database_utils.increment_usage(user_id)
+
+
+def snapshot(database_utils, user_id):
+    """비교용 사용자 데이터 (id와 생성 시각 제외)"""
+    def events(archived):
+        return sorted(
+            (event['event_name'], event['event_date'], event['event_time'], event['child_tag'], event['memo'],
+             event['checked_count'], event['total_count'],
+             tuple((item['name'], item['checked'], json.dumps(item.get('metadata'))) for item in event['checklist_with_status']))
+            for page in database_utils.iter_events(user_id, 500, archived=archived) for event in page
+        )
+    return (database_utils.get_children(user_id), events(False), events(True),
+            database_utils.get_usage_history(user_id))
+
+
+def whole_export(database_utils, user_id):
+    """기존 방식이었다면: 전체 이벤트를 불러와 파일 내용을 한 번에 만듦"""
+    from shared import backup
+    repository = database_utils.get_repository()
+    records = [backup.event_record(event) for event in repository.get_events(user_id)]
+    records += [backup.event_record(event, True) for event in repository.get_archived_events(user_id)]
+    return ''.join(backup._line(record) for record in records).encode('utf-8')
+
+
+def timed(fn):
+    """(결과, 걸린 ms)"""
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def peak_mb(fn):
+    """최대 메모리 MB (tracemalloc은 실행을 느리게 하므로 시간과 따로 잼)"""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def export_to_file(backup, user_id, path):
+    size = 0
+    with open(path, 'wb') as out:
+        for chunk in backup.export_chunks(user_id):
+            out.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def import_file(backup, user_id, path, **kwargs):
+    with open(path, 'rb') as backup_file:
+        return backup.import_lines(user_id, backup_file, **kwargs)
+
+
+def check_resume(database_utils, backup, path, expected, user_id):
+    """세 번째 묶음에서 실패한 뒤 다시 복원 -> 이어서 넣어 원본과 같아짐, 한 번 더 넣으면 아무것도 넣지 않음"""
+    restore = database_utils.restore_backup_chunk
+    calls = []
+
+    def failing(*args):
+        calls.append(args[2])
+        if len(calls) == 3:
+            raise RuntimeError('connection lost')
+        restore(*args)
+
+    database_utils.restore_backup_chunk = failing
+    try:
+        import_file(backup, user_id, path)
+        raise AssertionError('복원이 실패해야 함')
+    except RuntimeError:
+        pass
+    finally:
+        database_utils.restore_backup_chunk = restore
+    resumed = import_file(backup, user_id, path)
+    assert resumed['resumed_from'] == calls[1] and resumed['complete']
+    assert snapshot(database_utils, user_id) == expected
+    again = import_file(backup, user_id, path)
+    assert not any(again['imported'].values())
+    assert snapshot(database_utils, user_id) == expected
+    return calls[1]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils, backup
+
+        database_utils.configure(storage='sqlite')
+        database_utils.init_database()
+        populate(database_utils, USER_ID, N_EVENTS)
+        expected = snapshot(database_utils, USER_ID)
+        archived = len(expected[2])
+        path = os.path.join(tmp_dir, 'backup.jsonl')
+
+        _, whole_ms = timed(lambda: whole_export(database_utils, USER_ID))
+        size, export_ms = timed(lambda: export_to_file(backup, USER_ID, path))
+        whole_mb = peak_mb(lambda: whole_export(database_utils, USER_ID))
+        export_mb = peak_mb(lambda: export_to_file(backup, USER_ID, path))
+        rows = N_EVENTS * (1 + ITEMS_PER_EVENT)
+        print(f'{N_EVENTS} events ({archived} archived) x {ITEMS_PER_EVENT} items = {rows} rows '
+              f'-> {size / 1024 / 1024:.1f} MB backup')
+        print(f"{'':>26} | {'ms':>6} | {'peak MB':>7}")
+        print('-' * 46)
+        print(f"{'export: load all':>26} | {whole_ms:>6.0f} | {whole_mb:>7.1f}")
+        print(f"{'export: streamed pages':>26} | {export_ms:>6.0f} | {export_mb:>7.1f}")
+
+        result, import_ms = timed(lambda: import_file(backup, 'restored', path))
+        import_mb = peak_mb(lambda: import_file(backup, 'restored_traced', path))
+        assert result['complete'] and result['imported']['events'] == N_EVENTS
+        assert result['imported']['checklist_items'] == N_EVENTS * ITEMS_PER_EVENT
+        print(f"{'import: chunked':>26} | {import_ms:>6.0f} | {import_mb:>7.1f}")
+        assert snapshot(database_utils, 'restored') == expected
+        print(f'\nrestored data equals original ({rows / import_ms * 1000:.0f} rows/s)')
+
+        resumed_from = check_resume(database_utils, backup, path, expected, 'resumed')
+        print(f'failure in 3rd chunk -> rerun resumed after line {resumed_from}, no duplicates; rerun of a finished file imports nothing')
+
+        # 사용량은 줄지 않음, 잘린 파일은 미완료로 표시
+        for _ in range(5):
+            database_utils.increment_usage('busy')
+        with open(path, 'rb') as backup_file:
+            lines = backup_file.readlines()
+        result = backup.import_lines('busy', lines[:len(lines) // 2])
+        assert not result['complete']
+        assert backup.import_lines('busy', lines)['complete']
+        assert database_utils.get_usage('busy') == 5
+        print('usage never lowered by a restore; truncated file reported incomplete and completed by rerun')
+
+        for storage in ('memory', 'sqlite_sharded'):
+            database_utils.configure(storage=storage)
+            database_utils.init_database()
+            result, ms = timed(lambda: import_file(backup, USER_ID, path))
+            assert result['complete'] and snapshot(database_utils, USER_ID) == expected
+            print(f'{storage:>14}: sqlite backup restored in {ms:.0f} ms, same data')
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
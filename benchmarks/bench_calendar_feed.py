@@ -0,0 +1,236 @@
+"""
+캘린더 피드(.ics) 벤치마크
+
+한 사용자에게 N_EVENTS개 이벤트(체크리스트 8개씩)를 만들고
+- 기존 방식: 이벤트를 모두 불러온 뒤 .ics 문자열 전체를 만들기
+- 스트리밍: CALENDAR_PAGE_SIZE개씩 페이지로 읽으며 조각을 내보내기 (첫 조각까지의 시간, 최대 메모리)
+- 캘린더 앱의 15분 주기 재요청: 조건부 요청(304) / 조건 없는 요청(캐시된 본문)
+을 비교합니다.
+
+함께 확인하는 것:
+- 만든 .ics가 RFC 5545 형식(CRLF, 75옥텟 줄 접기, VEVENT 개수)을 지키는지
+- 체크/이름 변경/추가/삭제/보관마다 데이터 변경 번호가 오르고 다른 사용자의 번호는 그대로인지 (sqlite, memory, sqlite_sharded)
+- 구독 토큰 서명 확인 (같은 키여도 앱 API 토큰으로는 쓸 수 없음)
+- 저장소 조회 실패가 첫 조각 전에 올라오고 빈 피드가 캐시되지 않는지
+- 마이그레이션 009 이전 DB와 비교한 save_events 시간 (변경 번호 트리거 비용)
+
+실행: python benchmarks/bench_calendar_feed.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('SENSE_COACH_CALENDAR_SECRET', 'bench-secret')
+os.environ.setdefault('SENSE_COACH_API_SECRET', os.environ['SENSE_COACH_CALENDAR_SECRET'])
+
+USER_ID = 'bench_user'
+N_EVENTS = 5000
+ITEMS_PER_EVENT = 8
+REPEAT = 20
+
+
+def events_data(n, start=-60):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=start + i // 4)).isoformat(),
+        'event_time': ['09:00', '13시', '', '오후 3:30'][i % 4], 'country': '네덜란드', 'child_tag': ['첫째', '둘째', '없음'][i % 3],
+        'translation': '번역 ' * 40, 'cultural_context': '문화 ' * 40, 'tips': '팁 ' * 20, 'memo': '메모' if i % 5 == 0 else '',
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for i in range(n)]
+
+
+def best_of(fn, repeat=REPEAT):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def whole_calendar(database_utils, calendar_export, user_id, version):
+    """기존 방식: 전체 목록을 한 번에 불러와 본문 전체를 만듦"""
+    return b''.join(calendar_export.render_calendar([database_utils.get_repository().get_events(user_id)], user_id, version))
+
+
+def streamed(database_utils, calendar_export, user_id, version):
+    """캐시를 비우고 스트리밍으로 만든 (첫 조각까지 ms, 전체 ms, 본문)"""
+    database_utils.query_cache.clear()
+    start = time.perf_counter()
+    chunks = calendar_export.calendar_chunks(user_id, version)
+    first = next(chunks)
+    first_ms = (time.perf_counter() - start) * 1000
+    body = first + b''.join(chunks)
+    return first_ms, (time.perf_counter() - start) * 1000, body
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def check_ics(body, expected_events):
+    text = body.decode('utf-8')
+    assert text.endswith('\r\n') and '\n' not in text.replace('\r\n', '')
+    lines = text.split('\r\n')[:-1]
+    assert all(len(line.encode('utf-8')) <= 75 for line in lines)
+    assert lines[0] == 'BEGIN:VCALENDAR' and lines[-1] == 'END:VCALENDAR'
+    assert text.count('BEGIN:VEVENT') == text.count('END:VEVENT') == expected_events
+
+
+def poll(database_utils, calendar_export, user_id, if_none_match=None):
+    """피드 요청 한 번의 서버 작업 (변경 번호 조회 + 304 판단, 아니면 본문)"""
+    version = database_utils.get_data_version(user_id)
+    if calendar_export.is_not_modified(version, if_none_match):
+        return None
+    return b''.join(calendar_export.calendar_chunks(user_id, version))
+
+
+def check_versions(database_utils, calendar_export, storage):
+    database_utils.configure(storage=storage)
+    database_utils.init_database()
+    user_id, other = f'{storage}_user', f'{storage}_other'
+    database_utils.save_events(other, events_data(2))
+    event_ids = database_utils.save_events(user_id, events_data(4, start=1) + events_data(2, start=-400))
+    items = database_utils.get_event_checklist(user_id, event_ids[0])
+    other_version = database_utils.get_data_version(other)
+
+    def bumped(action):
+        before = database_utils.get_data_version(user_id)['version']
+        action()
+        return database_utils.get_data_version(user_id)['version'] > before
+
+    assert bumped(lambda: database_utils.update_checklist_item(user_id, items[0]['id'], True))
+    assert not bumped(lambda: database_utils.update_checklist_item(user_id, items[0]['id'], True))   # 그대로
+    assert bumped(lambda: database_utils.update_checklist_item_name(user_id, items[1]['id'], '새 이름'))
+    assert bumped(lambda: database_utils.add_checklist_item(user_id, event_ids[1], '추가 준비물'))
+    assert bumped(lambda: database_utils.delete_checklist_item(user_id, items[2]['id']))
+    assert bumped(lambda: database_utils.update_event(user_id, event_ids[2], {'event_name': '바뀐 행사', 'event_date': '2030-01-01', 'child_tag': '첫째'}))
+    assert bumped(lambda: database_utils.archive_old_events(user_id, after_days=30))
+    assert bumped(lambda: database_utils.delete_event(user_id, event_ids[3]))
+    assert database_utils.get_data_version(other) == other_version
+
+    version = database_utils.get_data_version(user_id)
+    body = b''.join(calendar_export.calendar_chunks(user_id, version)).decode('utf-8').replace('\r\n ', '')  # 줄 접기 풀기
+    assert '[첫째] 바뀐 행사' in body and '☑ 준비물 0' in body and '새 이름' in body and '추가 준비물' in body
+    assert body.count('BEGIN:VEVENT') == 3   # 6개 중 보관 2개, 삭제 1개
+    database_utils.reset_all_data(user_id)
+    database_utils.reset_all_data(other)
+    print(f'{storage:>14}: data version bumps on check/rename/add/delete/update/archive, other users untouched')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils, migrations, calendar_export
+        from shared.sqlite_repository import SQLiteRepository
+        from shared.repository import StorageUnavailableError
+
+        database_utils.configure(storage='sqlite')
+        database_utils.init_database()
+        database_utils.save_events(USER_ID, events_data(N_EVENTS))
+        version = database_utils.get_data_version(USER_ID)
+
+        start = time.perf_counter()
+        whole = whole_calendar(database_utils, calendar_export, USER_ID, version)
+        whole_ms = (time.perf_counter() - start) * 1000
+        first_ms, stream_ms, body = streamed(database_utils, calendar_export, USER_ID, version)
+        assert body == whole
+        check_ics(body, N_EVENTS)
+        whole_mb = peak_mb(lambda: whole_calendar(database_utils, calendar_export, USER_ID, version))
+        stream_mb = peak_mb(lambda: [len(c) for c in calendar_export.render_calendar(
+            database_utils.iter_events(USER_ID, calendar_export.CALENDAR_PAGE_SIZE), USER_ID, version)])
+
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} items -> {len(body) / 1024:.0f} KB .ics')
+        print(f"{'':>24} | {'first byte ms':>13} | {'total ms':>8} | {'peak MB':>7}")
+        print('-' * 62)
+        print(f"{'load all, then render':>24} | {whole_ms:>13.0f} | {whole_ms:>8.0f} | {whole_mb:>7.1f}")
+        print(f"{'streamed pages':>24} | {first_ms:>13.1f} | {stream_ms:>8.0f} | {stream_mb:>7.1f}")
+
+        # 캘린더 앱 재요청 (변경 없음)
+        etag, _ = calendar_export.calendar_validators(version)
+        assert poll(database_utils, calendar_export, USER_ID, etag) is None
+        assert poll(database_utils, calendar_export, USER_ID) == body
+        not_modified_ms = best_of(lambda: poll(database_utils, calendar_export, USER_ID, etag))
+        cached_ms = best_of(lambda: poll(database_utils, calendar_export, USER_ID))
+        print(f'\nre-poll without changes: If-None-Match -> 304 in {not_modified_ms:.3f} ms, '
+              f'no validator -> cached body in {cached_ms:.3f} ms (vs {stream_ms:.0f} ms to build)')
+
+        # 체크 하나 바꾸면 새 ETag, 새 본문
+        event = database_utils.get_events(USER_ID, limit=1, checklists=False)[0]
+        item = database_utils.get_event_checklist(USER_ID, event['id'])[0]
+        database_utils.update_checklist_item(USER_ID, item['id'], True)
+        changed = database_utils.get_data_version(USER_ID)
+        assert calendar_export.calendar_validators(changed)[0] != etag
+        assert poll(database_utils, calendar_export, USER_ID, etag) not in (None, body)
+
+        token = calendar_export.calendar_token(USER_ID)
+        assert calendar_export.user_from_calendar_token(token) == USER_ID
+        assert calendar_export.user_from_calendar_token(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')) is None
+        assert calendar_export.user_from_calendar_token(calendar_export.calendar_token('someone_else').split('.')[0] + '.' + token.split('.')[1]) is None
+        for bad in ('é.x', token.split('.')[0] + '.é', 'é', '.'):   # URL의 잘못된 토큰: 예외 없이 None (404)
+            assert calendar_export.user_from_calendar_token(bad) is None
+        from shared import signed_tokens
+        assert signed_tokens.user_from_api_token(token) is None
+        assert signed_tokens.user_from_api_token(signed_tokens.api_token(USER_ID)) == USER_ID
+        for bad in ('é.x', 'eA.é', '.', ''):   # 헤더로 온 아무 문자열: 예외 없이 None (401)
+            assert signed_tokens.user_from_api_token(bad) is None
+        print('after one checklist change: new ETag and body; feed tokens verify and reject tampering and API use')
+
+        # 저장소 조회 실패: 첫 조각을 받을 때 예외 (응답 시작 전 503), 빈 피드를 캐시하지 않음
+        database_utils.update_checklist_item(USER_ID, item['id'], False)
+        failing = database_utils.get_data_version(USER_ID)
+        repository = database_utils.get_repository()
+
+        def unavailable(*args):
+            raise StorageUnavailableError('bench')
+
+        repository.get_events = unavailable
+        try:
+            next(calendar_export.calendar_chunks(USER_ID, failing))
+            raise AssertionError('저장소 조회 실패가 첫 조각 전에 올라오지 않음')
+        except StorageUnavailableError:
+            pass
+        del repository.get_events
+        assert database_utils.query_cache.peek(
+            ('calendar', USER_ID, calendar_export.CALENDAR_NAME, failing['version'], failing['updated_at'])) is None
+        check_ics(b''.join(calendar_export.calendar_chunks(USER_ID, failing)), N_EVENTS)
+        print('storage read failure: raised before the first chunk, nothing cached')
+
+        # 마이그레이션 009 이전 DB와 비교한 저장 시간 (번갈아 3번씩 저장해 가장 빠른 값)
+        old_repository = SQLiteRepository(os.path.join(tmp_dir, 'before_009.db'))
+        new_repository = SQLiteRepository(os.path.join(tmp_dir, 'current.db'))
+        new_repository.init()
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 9]
+        migrations.migrate(old_repository.db)
+        migrations.MIGRATIONS = all_migrations
+        save_ms = {'old': float('inf'), 'new': float('inf')}
+        for round_no in range(3):
+            for label, repository in (('old', old_repository), ('new', new_repository)):
+                start = time.perf_counter()
+                repository.save_events(f'user_{round_no}', events_data(2000))
+                save_ms[label] = min(save_ms[label], (time.perf_counter() - start) * 1000)
+        migrations.migrate(old_repository.db)
+        assert old_repository.get_data_version('user_0')['version'] == 1
+        old_repository.close()
+        new_repository.close()
+        print(f"save_events 2000 x {ITEMS_PER_EVENT}: {save_ms['old']:.0f} ms before migration 009, "
+              f"{save_ms['new']:.0f} ms with data version triggers\n")
+
+        for storage in ('sqlite', 'memory', 'sqlite_sharded'):
+            check_versions(database_utils, calendar_export, storage)
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+체크리스트 저장 방식 벤치마크
+
+마이그레이션 005 이전(체크리스트를 events.checklist_items JSON과 checklist_items 테이블에 이중 저장,
+조회 시 JSON을 매 행 파싱해 함께 반환)과 이후(checklist_items 테이블만 사용)를 같은 데이터로 비교합니다.
+- get_events 응답 시간, 응답 JSON 크기
+- events 테이블 크기 (dbstat 가상 테이블을 쓸 수 없으면 생략)
+
+실행: python benchmarks/bench_checklist_storage.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+N_EVENTS = 2000
+ITEMS_PER_EVENT = 6
+REPEAT = 5
+USER_ID = 'bench_user'
+
+
+def seed_v4(conn):
+    """005 이전 스키마에 이전 방식 그대로 저장 (JSON 컬럼 + 체크리스트 행)"""
+    c = conn.cursor()
+    for i in range(N_EVENTS):
+        items = [f'준비물 {j} (실내화, 물통, 도시락 등)' for j in range(ITEMS_PER_EVENT)]
+        c.execute('''
+            INSERT INTO events (user_id, event_name, event_date, event_time, country, child_tag,
+                                translation, cultural_context, tips, checklist_items, memo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (USER_ID, f'행사 {i}', f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}', '10:00', '네덜란드', '첫째',
+              '번역', '문화', '팁', json.dumps(items, ensure_ascii=False), ''))
+        event_id = c.lastrowid
+        c.executemany('INSERT INTO checklist_items (user_id, event_id, item_name, is_checked) VALUES (?, ?, ?, 0)',
+                      [(USER_ID, event_id, item) for item in items])
+
+
+def get_events_v4(conn):
+    """005 이전 get_events: JSON 컬럼을 읽고 파싱해 checklist_items로 함께 반환"""
+    c = conn.cursor()
+    c.execute('''
+        SELECT id, event_name, event_date, event_time, country, child_tag, translation,
+               cultural_context, tips, checklist_items, created_at, memo
+        FROM events WHERE user_id = ? ORDER BY event_date, event_time, id
+    ''', (USER_ID,))
+    events, by_id = [], {}
+    for row in c.fetchall():
+        event = {
+            'id': row[0], 'event_name': row[1], 'event_date': row[2], 'event_time': row[3],
+            'country': row[4], 'child_tag': row[5], 'translation': row[6], 'cultural_context': row[7],
+            'tips': row[8], 'checklist_items': json.loads(row[9]) if row[9] else [],
+            'created_at': row[10], 'memo': row[11] or '', 'checklist_with_status': [],
+        }
+        events.append(event)
+        by_id[event['id']] = event
+    ids = list(by_id)
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        c.execute(f'SELECT event_id, id, item_name, is_checked FROM checklist_items '
+                  f'WHERE event_id IN ({", ".join("?" * len(batch))}) ORDER BY event_id, id', batch)
+        for event_id, item_id, name, checked in c.fetchall():
+            by_id[event_id]['checklist_with_status'].append({'id': item_id, 'name': name, 'checked': bool(checked)})
+    return events
+
+
+def vacuum(path):
+    """공정한 크기 비교를 위해 빈 페이지 정리 (트랜잭션 밖에서 실행해야 하므로 별도 연결 사용)"""
+    conn = sqlite3.connect(path)
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def events_table_bytes(conn):
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = 'events'").fetchone()[0]
+    except Exception:
+        return None
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def report(label, fetch, table_bytes):
+    events = fetch()
+    payload = len(json.dumps([e if isinstance(e, dict) else e.to_dict() for e in events],
+                             ensure_ascii=False).encode('utf-8'))
+    table = f'{table_bytes / 1024:>9.0f}' if table_bytes else f"{'-':>9}"
+    print(f'{label:>22} | {best_of(fetch):>8.2f} | {payload / 1024:>12.0f} | {table}')
+    return events
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        from shared import migrations
+        from shared.sqlite_repository import SQLiteRepository
+
+        path = os.path.join(tmp_dir, 'bench.db')
+        repository = SQLiteRepository(path)
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 5]
+        migrations.migrate(repository.db)
+        migrations.MIGRATIONS = all_migrations
+        with repository.db.writer() as conn:
+            seed_v4(conn)
+        vacuum(path)
+
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} checklist items')
+        print(f"{'schema':>22} | {'get (ms)':>8} | {'payload (KB)':>12} | {'events KB':>9}")
+        print('-' * 62)
+        with repository.db.reader() as conn:
+            before = report('004 (JSON + rows)', lambda: get_events_v4(conn), events_table_bytes(conn))
+
+        migrations.migrate(repository.db)
+        vacuum(path)
+        with repository.db.reader() as conn:
+            table_bytes = events_table_bytes(conn)
+        after = report('005 (rows only)', lambda: repository.get_events(USER_ID), table_bytes)
+
+        # 체크리스트 내용은 그대로
+        assert [e['checklist_with_status'] for e in before] == [e['checklist_with_status'] for e in after]
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
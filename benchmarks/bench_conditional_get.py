@@ -0,0 +1,180 @@
+"""
+조건부 조회(ETag / If-None-Match) 벤치마크
+
+앱이 화면 포커스/새로고침마다 다시 요청하는 일정 목록 한 페이지, 아이 목록, 멤버십을
+- cold: 조회 캐시 없이 조회 + 직렬화
+- warm: 조회 캐시 적중 + 직렬화
+- 304: If-None-Match가 현재 ETag와 같음 (변경 번호 한 행만 읽고 목록과 캐시는 읽지 않음)
+으로 처리하는 시간과 DB 호출 수를 비교합니다. (백엔드 _conditional과 같은 순서: ETag를 먼저 만들고 조회)
+
+함께 확인하는 것:
+- database_utils의 쓰기 함수는 모두 그 사용자의 ETag만 바꾸고, 조회는 바꾸지 않음
+- 다른 프로세스가 같은 DB에 쓴 변경은 바로 다음 요청에서 새 ETag와 새 본문으로 보임 (조회 캐시 TTL과 무관)
+
+실행: python benchmarks/bench_conditional_get.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+USER_ID = 'bench_user'
+OTHER_USER = 'other_user'
+N_EVENTS = 500
+PAGE_SIZE = 50
+REPEAT = 200
+
+
+def events_data(n, start=0):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=start + i // 5)).isoformat(),
+        'translation': '알림장 원문 번역 문장입니다. ' * 30, 'tips': '준비할 때 참고할 팁입니다. ' * 10,
+        'checklist_items': ['실내화', '물통', '도시락'],
+    } for i in range(n)]
+
+
+def best_of(fn, repeat=REPEAT):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def endpoints(database_utils):
+    """(이름, ETag scope, 응답 본문 만들기) - 백엔드 엔드포인트와 같은 조회"""
+    def events():
+        page = database_utils.get_events_page(USER_ID, page_size=PAGE_SIZE)
+        return {"events": [event.to_dict() for event in page['events']], "next_cursor": page['next_cursor']}
+
+    def membership():
+        return {"user_id": USER_ID, "tier": database_utils.get_user_tier(USER_ID), "usage": database_utils.get_usage(USER_ID)}
+
+    return [
+        ('/api/events', ('/api/events', ''), events),
+        ('/api/children', ('/api/children', ''), lambda: {"children": database_utils.get_children(USER_ID)}),
+        ('/membership', (f'/api/user/{USER_ID}/membership', ''), membership),
+    ]
+
+
+def conditional_get(database_utils, scope, load, if_none_match=None, cold=False):
+    """(상태 코드, ETag, 본문, DB 호출 수)"""
+    from shared.request_context import RequestContext
+    if cold:
+        database_utils.query_cache.clear()
+    with RequestContext(USER_ID) as ctx:
+        etag = database_utils.user_etag(USER_ID, date.today().isoformat(), *scope)
+        if if_none_match == etag:
+            return 304, etag, b'', ctx.db_call_count()
+        body = json.dumps(load(), ensure_ascii=False).encode('utf-8')
+    return 200, etag, body, ctx.db_call_count()
+
+
+def check_writes(database_utils):
+    """모든 쓰기는 그 사용자의 ETag만 바꾸고 조회(등급 행을 처음 만드는 get_user_tier 포함)는 바꾸지 않음"""
+    def etags():
+        return database_utils.user_etag(USER_ID, 'scope'), database_utils.user_etag(OTHER_USER, 'scope')
+
+    event_id = database_utils.save_event(USER_ID, events_data(1)[0])
+    item_id = database_utils.get_event_checklist(USER_ID, event_id)[0].id
+    writes = [
+        ('add_child', lambda: database_utils.add_child(USER_ID, '셋째')),
+        ('update_child_name', lambda: database_utils.update_child_name(USER_ID, '셋째', '막내')),
+        ('delete_child', lambda: database_utils.delete_child(USER_ID, '막내')),
+        ('save_events', lambda: database_utils.save_events(USER_ID, events_data(2, start=-400))),
+        ('update_event', lambda: database_utils.update_event(USER_ID, event_id, {'memo': '메모'})),
+        ('update_checklist_item', lambda: database_utils.update_checklist_item(USER_ID, item_id, True)),
+        ('update_checklist_item_name', lambda: database_utils.update_checklist_item_name(USER_ID, item_id, '큰 물통')),
+        ('add_checklist_item', lambda: database_utils.add_checklist_item(USER_ID, event_id, '우비')),
+        ('delete_checklist_item', lambda: database_utils.delete_checklist_item(USER_ID, item_id)),
+        ('archive_old_events', lambda: database_utils.archive_old_events(USER_ID, after_days=30)),
+        ('delete_event', lambda: database_utils.delete_event(USER_ID, event_id)),
+        ('increment_usage', lambda: database_utils.increment_usage(USER_ID)),
+        ('consume_analysis', lambda: database_utils.consume_analysis(USER_ID)),
+        ('refund_analysis', lambda: database_utils.refund_analysis(USER_ID)),
+        ('update_user_tier', lambda: database_utils.update_user_tier(USER_ID, 'PREMIUM')),
+        ('reset_all_data', lambda: database_utils.reset_all_data(USER_ID)),
+    ]
+    reads = [
+        lambda: database_utils.get_events_page(USER_ID), lambda: database_utils.get_children(USER_ID),
+        lambda: database_utils.get_user_tier(USER_ID), lambda: database_utils.get_usage(USER_ID),
+        lambda: database_utils.search_events(USER_ID, '행사'), lambda: database_utils.get_data_version(USER_ID),
+    ]
+    for name, write in writes:
+        before = etags()
+        write()
+        after = etags()
+        assert after[0] != before[0], f'{name} should change the ETag'
+        assert after[1] == before[1], f'{name} should not change other users\' ETags'
+        for read in reads:
+            read()
+        assert etags() == after
+    print(f'{len(writes)} write functions change only their user\'s ETag, {len(reads)} reads change nothing')
+
+
+def check_other_process(database_utils, tmp_dir):
+    """다른 프로세스(Streamlit 앱)의 쓰기: 조회 캐시가 남아 있어도 다음 요청에서 바로 새 ETag와 새 본문"""
+    from shared.sqlite_repository import SQLiteRepository
+    scope, load = ('/api/children', ''), lambda: {"children": database_utils.get_children(USER_ID)}
+    before = ('/api/events', ''), lambda: {"events": [event.to_dict() for event in database_utils.get_events_page(USER_ID)['events']]}
+    database_utils.add_child(USER_ID, '첫째')
+    _, etag, body, _ = conditional_get(database_utils, scope, load)
+    _, events_etag, _, _ = conditional_get(database_utils, *before)
+    assert conditional_get(database_utils, scope, load, etag)[0] == 304
+    other = SQLiteRepository(os.path.join(tmp_dir, 'school_events.db'))
+    for write in (lambda: other.add_child(USER_ID, '둘째'), lambda: other.increment_usage(USER_ID, date.today().strftime('%Y-%m')),
+                  lambda: other.update_user_tier(USER_ID, 'FREE')):
+        write()
+        status, new_etag, new_body, _ = conditional_get(database_utils, scope, load, etag)
+        assert status == 200 and new_etag != etag
+        etag, body = new_etag, new_body
+    other.close()
+    assert '둘째' in json.loads(body)['children']
+    assert conditional_get(database_utils, *before, events_etag)[0] == 200   # 같은 사용자의 다른 조회도 새 ETag
+    print('write from another process (child, usage, tier): new ETag and body on the very next request')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        database_utils.init_database()
+        database_utils.add_child(USER_ID, '첫째')
+        database_utils.add_child(USER_ID, '둘째')
+        database_utils.save_events(USER_ID, events_data(N_EVENTS))
+        database_utils.increment_usage(USER_ID)
+
+        print(f'{N_EVENTS} events, one page of {PAGE_SIZE} (sqlite), best of {REPEAT}')
+        print(f"{'endpoint':>14} | {'cold ms':>8} | {'warm ms':>8} | {'304 ms':>8} | {'KB':>6} | {'DB calls':>13}")
+        print('-' * 74)
+        for name, scope, load in endpoints(database_utils):
+            status, etag, body, cold_calls = conditional_get(database_utils, scope, load, cold=True)
+            assert status == 200 and cold_calls > 0
+            assert conditional_get(database_utils, scope, load)[1] == etag   # 조회만으로는 ETag가 바뀌지 않음
+            cold_ms = best_of(lambda: conditional_get(database_utils, scope, load, cold=True), REPEAT // 10)
+            warm_ms = best_of(lambda: conditional_get(database_utils, scope, load))
+            not_modified_ms = best_of(lambda: conditional_get(database_utils, scope, load, etag))
+            status, _, _, calls = conditional_get(database_utils, scope, load, etag, cold=True)
+            assert status == 304 and calls == 1
+            print(f"{name:>14} | {cold_ms:>8.3f} | {warm_ms:>8.3f} | {not_modified_ms:>8.3f} | {len(body) / 1024:>6.1f} "
+                  f"| {cold_calls:>2} cold, 1 304")
+        print()
+
+        check_writes(database_utils)
+        check_other_process(database_utils, tmp_dir)
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+이벤트 표현 방식 메모리 벤치마크
+
+50,000개 이벤트(이벤트마다 체크리스트 4개)를 SQLite에서 읽어
+- dict: 행마다 이벤트 dict + 체크리스트 항목 dict를 만들던 기존 방식
+- models: shared.models의 __slots__ 기반 Event / ChecklistItem (현재 get_events)
+으로 만들었을 때 목록 하나가 차지하는 메모리(tracemalloc), 생성 시간,
+조회 캐시가 넣고 꺼낼 때마다 하는 deepcopy 시간과 API 응답용 to_dict() 변환 시간을 비교합니다.
+
+실행: python benchmarks/bench_event_models.py
+"""
+import copy
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+N_EVENTS = 50000
+ITEMS_PER_EVENT = 4
+USER_ID = 'bench_user'
+
+
+def seed(repository):
+    repository.save_events(USER_ID, [{
+        'event_name': f'행사 {i}', 'event_date': f'20{20 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+        'event_time': '10:00', 'country': '네덜란드', 'child_tag': '첫째',
+        'translation': f'번역 {i}', 'cultural_context': f'문화 {i}', 'tips': f'팁 {i}',
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for i in range(N_EVENTS)])
+
+
+def get_events_as_dicts(repository):
+    """기존 get_events: 같은 쿼리 결과로 이벤트/항목마다 dict 생성"""
+    from shared.sqlite_repository import SQL_SELECT_EVENTS, SQL_SELECT_EVENT_CHECKLISTS, SQLITE_MAX_IN_PARAMS
+    with repository.db.reader() as conn:
+        c = conn.cursor()
+        c.execute(SQL_SELECT_EVENTS.format(where='user_id = ?'), (USER_ID, -1))
+        events, by_id = [], {}
+        for row in c.fetchall():
+            event = {
+                'id': row[0], 'event_name': row[1], 'event_date': row[2], 'event_time': row[3],
+                'country': row[4], 'child_tag': row[5], 'translation': row[6], 'cultural_context': row[7],
+                'tips': row[8], 'created_at': row[9], 'memo': row[10] or '', 'checked_count': row[11], 'total_count': row[12],
+                'checklist_with_status': []
+            }
+            events.append(event)
+            by_id[event['id']] = event
+        ids = list(by_id)
+        for start in range(0, len(ids), SQLITE_MAX_IN_PARAMS):
+            batch = ids[start:start + SQLITE_MAX_IN_PARAMS]
+            c.execute(SQL_SELECT_EVENT_CHECKLISTS.format(placeholders=', '.join('?' * len(batch))), batch)
+            for event_id, item_id, name, checked, _ in c.fetchall():
+                by_id[event_id]['checklist_with_status'].append({'id': item_id, 'name': name, 'checked': bool(checked)})
+    return events
+
+
+def measure(build):
+    """build()가 만든 목록이 남기는 메모리(바이트)와 생성 시간(ms)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    events = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return events, retained, elapsed * 1000
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        from shared.sqlite_repository import SQLiteRepository
+
+        repository = SQLiteRepository(os.path.join(tmp_dir, 'bench.db'))
+        repository.init()
+        seed(repository)
+
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} checklist items')
+        print(f"{'representation':>14} | {'list MB':>7} | {'B/event':>7} | {'build ms':>8} | "
+              f"{'deepcopy ms':>11} | {'to_dict ms':>10}")
+        print('-' * 74)
+        results = {}
+        for label, build in (('dict', lambda: get_events_as_dicts(repository)),
+                             ('models', lambda: repository.get_events(USER_ID))):
+            events, retained, build_ms = measure(build)
+            copy_ms = timed(lambda: copy.deepcopy(events))
+            to_dict_ms = timed(lambda: [e.to_dict() for e in events]) if label == 'models' else 0.0
+            print(f'{label:>14} | {retained / 1024 / 1024:>7.1f} | {retained / N_EVENTS:>7.0f} | {build_ms:>8.0f} | '
+                  f'{copy_ms:>11.0f} | {to_dict_ms:>10.0f}')
+            results[label] = (events, retained)
+            del events
+
+        (dicts, dict_bytes), (models, model_bytes) = results['dict'], results['models']
+        # 같은 데이터, dict처럼 읽기 / API 경계의 to_dict()도 기존 dict와 같음
+        assert len(dicts) == len(models) == N_EVENTS
+        assert [e.to_dict() for e in models] == dicts
+        assert models[0]['checklist_with_status'][0]['name'] == dicts[0]['checklist_with_status'][0]['name']
+        assert model_bytes < dict_bytes * 0.75, (model_bytes, dict_bytes)
+        print(f'\nmodels use {100 * (1 - model_bytes / dict_bytes):.0f}% less memory per cached event list')
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+get_events(future_only=False) 지연 시간 벤치마크
+
+이벤트 수를 늘려가며 체크리스트를 이벤트마다 따로 조회하던 기존 방식(N+1)과
+현재 배치 조회 방식의 응답 시간을 비교합니다.
+
+기존 방식은 두 가지로 잽니다.
+- 체크리스트 인덱스 없이 (배치 조회를 도입할 때의 스키마, 이벤트마다 checklist_items 전체를 훑음)
+- 지금 스키마의 (event_id, position, id) 인덱스로 (이벤트마다 인덱스 조회 한 번)
+인덱스 없는 기존 방식과의 차이는 대부분 그 인덱스에서 나오며, 인덱스가 있으면 배치 조회로 줄어드는 것은
+이벤트마다의 쿼리 실행 비용뿐입니다.
+
+실행: python benchmarks/bench_get_events.py
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+EVENT_COUNTS = [100, 500, 1000, 2000, 5000]
+ITEMS_PER_EVENT = 4
+REPEAT = 5
+# 인덱스 없는 기존 방식은 이벤트 수의 제곱에 비례해 느리므로 반복 횟수를 줄임
+UNINDEXED_REPEAT = 2
+
+
+def seed(conn, n_events):
+    """테스트용 이벤트와 체크리스트 생성"""
+    c = conn.cursor()
+    c.execute('DELETE FROM checklist_items')
+    c.execute('DELETE FROM events')
+    for i in range(n_events):
+        items = [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)]
+        c.execute('''
+            INSERT INTO events (event_name, event_date, event_time, country, child_tag,
+                                translation, cultural_context, tips, memo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (f'행사 {i}', f'20{20 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}', '10:00', '네덜란드', '첫째',
+              '번역 ' * 20, '문화 ' * 20, '팁 ' * 20, ''))
+        event_id = c.lastrowid
+        c.executemany('INSERT INTO checklist_items (event_id, item_name, is_checked, position) VALUES (?, ?, 0, ?)',
+                      [(event_id, item, position) for position, item in enumerate(items)])
+
+
+def get_events_n_plus_one(conn, indexed=True):
+    """기존 구현: 이벤트마다 체크리스트를 별도 쿼리로 조회 (indexed=False이면 체크리스트 인덱스를 쓰지 않음)"""
+    c = conn.cursor()
+    # 새로 만든 DB는 memo 컬럼 위치가 다르므로 SELECT * 대신 컬럼 순서를 고정
+    c.execute('''
+        SELECT id, event_name, event_date, event_time, country, child_tag, translation,
+               cultural_context, tips, created_at, memo, checked_count, total_count
+        FROM events ORDER BY event_date ASC, event_time ASC, id ASC
+    ''')
+    events = []
+    for row in c.fetchall():
+        event = {
+            'id': row[0], 'event_name': row[1], 'event_date': row[2], 'event_time': row[3],
+            'country': row[4], 'child_tag': row[5], 'translation': row[6], 'cultural_context': row[7],
+            'tips': row[8], 'created_at': row[9], 'memo': row[10],
+            'checked_count': row[11], 'total_count': row[12]
+        }
+        c.execute(f"SELECT id, item_name, is_checked FROM checklist_items{'' if indexed else ' NOT INDEXED'} "
+                  'WHERE event_id = ? ORDER BY position ASC, id ASC', (event['id'],))
+        event['checklist_with_status'] = [
+            {'id': i_row[0], 'name': i_row[1], 'checked': bool(i_row[2])}
+            for i_row in c.fetchall()
+        ]
+        events.append(event)
+    return events
+
+
+def best_of(fn, repeat=REPEAT):
+    """repeat회 실행 중 가장 빠른 시간(ms)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        database_utils.init_database()
+        db = database_utils.get_db_connection()
+        # 조회 캐시를 거치지 않고 저장소의 배치 조회 자체를 측정
+        repository = database_utils.get_repository()
+        user_id = database_utils.DEFAULT_USER_ID  # seed()는 user_id 없이 넣으므로 기본 사용자 소유
+
+        print(f"{'':>8} | {'N+1 (ms)':^23} | {'':>12} | {'speedup vs N+1':^17}")
+        print(f"{'events':>8} | {'no index':>10} | {'indexed':>10} | {'batched (ms)':>12} | {'no index':>8} | {'indexed':>7}")
+        print('-' * 71)
+        for n_events in EVENT_COUNTS:
+            with db.writer() as conn:
+                seed(conn, n_events)
+            with db.reader() as conn:
+                unindexed = best_of(lambda: get_events_n_plus_one(conn, indexed=False), UNINDEXED_REPEAT)
+                indexed = best_of(lambda: get_events_n_plus_one(conn))
+                assert get_events_n_plus_one(conn) == get_events_n_plus_one(conn, indexed=False) == repository.get_events(user_id)
+            after = best_of(lambda: repository.get_events(user_id))
+            print(f'{n_events:>8} | {unindexed:>10.2f} | {indexed:>10.2f} | {after:>12.2f} | '
+                  f'{unindexed / after:>7.1f}x | {indexed / after:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
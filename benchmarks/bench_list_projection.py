@@ -0,0 +1,137 @@
+"""
+이벤트 목록 projection 벤치마크
+
+긴 번역/문화 설명/팁이 붙은 이벤트 N_EVENTS개(체크리스트 ITEMS_PER_EVENT개씩)를 가진 사용자의 목록 한 페이지를
+- detail: 전체 필드 + 체크리스트 (GET /api/events 기본값)
+- checklists=false: 체크리스트 항목 없이 (지금까지의 대시보드 요청)
+- summary: 목록 카드 필드만 (fields=summary, 긴 설명을 DB에서 읽지 않음)
+으로 조회해 JSON 응답 크기와 조회 + 직렬화 시간(캐시 없이)을 비교합니다.
+
+함께 확인하는 것:
+- summary 응답의 필드가 EVENT_PROJECTIONS['summary']와 같고 값이 detail 응답과 같은지 (sqlite, memory, sqlite_sharded)
+- 필드 이름 목록 / 모르는 필드 처리, Supabase select에 긴 설명 컬럼이 빠지는지
+
+실행: python benchmarks/bench_list_projection.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+USER_ID = 'bench_user'
+N_EVENTS = 2000
+ITEMS_PER_EVENT = 8
+PAGE_SIZE = 50
+REPEAT = 30
+
+
+def events_data(n, start=0):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=start + i // 10)).isoformat(),
+        'event_time': ['09:00', '13시', ''][i % 3], 'country': '네덜란드', 'child_tag': ['첫째', '둘째', '없음'][i % 3],
+        # 분석 결과의 번역/설명/팁은 이벤트 한 건에 수 KB
+        'translation': '알림장 원문 번역 문장입니다. ' * 60, 'cultural_context': '현지 학교 문화에 대한 설명입니다. ' * 40,
+        'tips': '준비할 때 참고할 팁입니다. ' * 20, 'memo': '메모' if i % 5 == 0 else '',
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for i in range(n)]
+
+
+def best_of(fn, repeat=REPEAT):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def list_response(database_utils, user_id, fields=None, checklists=True):
+    """GET /api/events 한 페이지의 JSON 본문 (백엔드 list_events와 같은 순서로 조회 + 변환, 캐시 없이)"""
+    from shared.models import event_projection
+    database_utils.query_cache.clear()
+    names, details = None, True
+    if fields is not None:
+        names, wants_checklists, details = event_projection(fields)
+        checklists = checklists and wants_checklists
+    page = database_utils.get_events_page(user_id, page_size=PAGE_SIZE, checklists=checklists, details=details)
+    return json.dumps({"events": [event.to_dict(names) for event in page['events']], "next_cursor": page['next_cursor']},
+                      ensure_ascii=False).encode('utf-8')
+
+
+def check_projection(database_utils, storage):
+    from shared.models import EVENT_PROJECTIONS
+    database_utils.configure(storage=storage)
+    database_utils.init_database()
+    user_id = f'{storage}_user'
+    database_utils.save_events(user_id, events_data(PAGE_SIZE * 2))
+    detail = json.loads(list_response(database_utils, user_id))['events']
+    summary = json.loads(list_response(database_utils, user_id, 'summary'))['events']
+    assert [event['id'] for event in summary] == [event['id'] for event in detail]
+    for full, short in zip(detail, summary):
+        assert tuple(short) == EVENT_PROJECTIONS['summary']
+        assert short == {field: full[field] for field in EVENT_PROJECTIONS['summary']}
+        assert full['translation'] and full['checklist_with_status']
+    assert json.loads(list_response(database_utils, user_id, 'detail'))['events'] == detail
+    named = json.loads(list_response(database_utils, user_id, 'tips, event_name'))['events']
+    assert named == [{'id': e['id'], 'event_name': e['event_name'], 'tips': e['tips']} for e in detail]
+
+    database_utils.save_events(user_id, events_data(PAGE_SIZE, start=-400))
+    assert database_utils.archive_old_events(user_id, after_days=30) == PAGE_SIZE
+    archived = [event for archived_page in database_utils.iter_events(user_id, PAGE_SIZE // 3, checklists=False,
+                                                                       archived=True, details=False)
+                for event in archived_page]
+    assert len(archived) == PAGE_SIZE
+    assert all(event.translation is None and event.cultural_context is None and event.tips is None
+               and event.total_count == ITEMS_PER_EVENT and event.checklist_with_status is None for event in archived)
+    database_utils.reset_all_data(user_id)
+    print(f'{storage:>14}: summary fields = projection, values equal detail response, archive list skips long text')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+        from shared.models import event_projection
+        from shared.supabase_repository import _list_select
+
+        database_utils.configure(storage='sqlite')
+        database_utils.init_database()
+        database_utils.save_events(USER_ID, events_data(N_EVENTS))
+
+        variants = [('detail', {}), ('checklists=false', {'checklists': False}), ('fields=summary', {'fields': 'summary'})]
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} items, one page of {PAGE_SIZE} (sqlite, no cache)')
+        print(f"{'':>18} | {'payload KB':>10} | {'ms':>6}")
+        print('-' * 42)
+        sizes = {}
+        for label, kwargs in variants:
+            sizes[label] = len(list_response(database_utils, USER_ID, **kwargs))
+            ms = best_of(lambda: list_response(database_utils, USER_ID, **kwargs))
+            print(f"{label:>18} | {sizes[label] / 1024:>10.1f} | {ms:>6.2f}")
+        assert sizes['fields=summary'] * 5 < sizes['detail']
+        print(f"\nsummary payload is {sizes['detail'] / sizes['fields=summary']:.0f}x smaller than detail\n")
+
+        assert event_projection('summary')[1:] == (False, False)
+        assert event_projection('detail')[1:] == (True, True)
+        assert event_projection('event_date,id , memo')[0] == ('id', 'event_date', 'memo')
+        for bad in ('password', 'summary,tips', ''):
+            try:
+                event_projection(bad)
+                raise AssertionError(f'{bad!r}는 거절되어야 함')
+            except ValueError:
+                pass
+        assert 'translation' not in _list_select(False, False) and 'checklist_rel' not in _list_select(False, False)
+        assert 'translation' in _list_select(True, True) and 'checklist_items_archive' in _list_select(True, False, archived=True)
+
+        for storage in ('sqlite', 'memory', 'sqlite_sharded'):
+            check_projection(database_utils, storage)
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
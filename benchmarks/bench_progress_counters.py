@@ -0,0 +1,158 @@
+"""
+준비물 진행률 카운터 벤치마크
+
+다가오는 일정이 많은 사용자(이벤트마다 체크리스트 8개)의 대시보드 카드 데이터를
+- checklists: 이벤트 + 체크리스트 행을 모두 읽고 항목 목록으로 진행률 계산 (기존 방식)
+- counters: 트리거가 관리하는 events.checked_count / total_count만 읽음 (checklists=False)
+로 조회했을 때의 시간을 비교합니다 (counters는 체크리스트 행을 읽지 않음).
+
+함께 확인하는 것:
+- 체크/해제/추가/삭제/보관 후에도 카운터가 실제 항목 수와 같은지
+- 캐시된 요약 목록이 항목 체크 후 바로 새 개수를 보여 주는지
+- 마이그레이션 008 이전 DB에 데이터를 넣고 마이그레이션했을 때 개수가 채워지는지
+- 트리거로 늘어난 저장(save_events) 시간
+
+실행: python benchmarks/bench_progress_counters.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+USER_ID = 'bench_user'
+ITEMS_PER_EVENT = 8
+SIZES = (50, 500, 2000)
+REPEAT = 20
+
+
+def events_data(n, start=1):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=start + i // 3)).isoformat(),
+        'event_time': f'{9 + i % 3:02d}:00', 'country': '네덜란드', 'child_tag': '첫째',
+        'translation': '번역', 'cultural_context': '문화', 'tips': '팁',
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for i in range(n)]
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def cards_from_checklists(repository):
+    """기존 대시보드: 체크리스트 항목 목록으로 진행률 계산"""
+    return [
+        (sum(1 for item in e['checklist_with_status'] if item['checked']), len(e['checklist_with_status']))
+        for e in repository.get_events(USER_ID, date_from=date.today().isoformat())
+    ]
+
+
+def cards_from_counters(repository):
+    return [
+        (e['checked_count'], e['total_count'])
+        for e in repository.get_events(USER_ID, date_from=date.today().isoformat(), checklists=False)
+    ]
+
+
+def check_counters(database_utils, user_id):
+    """요약 목록의 개수가 실제 체크리스트와 같은지 (보관된 이벤트 포함)"""
+    for event in database_utils.get_events(user_id, checklists=False):
+        items = database_utils.get_event_checklist(user_id, event['id'])
+        assert (event['checked_count'], event['total_count']) == (sum(i['checked'] for i in items), len(items)), event
+    for event in database_utils.get_archived_events_page(user_id, page_size=1000, checklists=False)['events']:
+        items = database_utils.get_event_checklist(user_id, event['id'])
+        assert (event['checked_count'], event['total_count']) == (sum(i['checked'] for i in items), len(items)), event
+
+
+def check_backend(database_utils, storage):
+    database_utils.configure(storage=storage)
+    database_utils.init_database()
+    user_id = f'{storage}_user'
+    event_ids = database_utils.save_events(user_id, events_data(5) + events_data(3, start=-400))
+    database_utils.get_events(user_id, checklists=False)   # 요약 목록 캐시
+    items = database_utils.get_event_checklist(user_id, event_ids[0])
+    database_utils.update_checklist_item(user_id, items[0]['id'], True)
+    database_utils.update_checklist_item(user_id, items[1]['id'], True)
+    database_utils.update_checklist_item(user_id, items[1]['id'], False)
+    database_utils.delete_checklist_item(user_id, items[2]['id'])
+    database_utils.add_checklist_item(user_id, event_ids[1], '추가 준비물')
+    # 캐시된 요약 목록도 바로 바뀜
+    first = database_utils.get_events(user_id, checklists=False)[3]
+    assert first['id'] == event_ids[0] and (first['checked_count'], first['total_count']) == (1, ITEMS_PER_EVENT - 1), first
+    archived = database_utils.archive_old_events(user_id, after_days=30)
+    assert archived == 3
+    check_counters(database_utils, user_id)
+    database_utils.reset_all_data(user_id)
+    print(f'{storage:>14}: counters match checklists after check/uncheck/add/delete/archive')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils, migrations
+        from shared.sqlite_repository import SQLiteRepository
+
+        print(f'dashboard cards (upcoming events x {ITEMS_PER_EVENT} items), best of {REPEAT}')
+        print(f"{'events':>7} | {'checklists ms':>13} | {'counters ms':>11} | {'speedup':>7} | checklist rows read")
+        print('-' * 70)
+        for n in SIZES:
+            repository = SQLiteRepository(os.path.join(tmp_dir, f'cards_{n}.db'))
+            repository.init()
+            repository.save_events(USER_ID, events_data(n) + events_data(n, start=-200))
+            assert cards_from_checklists(repository) == cards_from_counters(repository)
+            old_ms = best_of(lambda: cards_from_checklists(repository))
+            new_ms = best_of(lambda: cards_from_counters(repository))
+            # 요약 조회는 체크리스트를 채우지 않음 (= checklist_items를 읽지 않음)
+            assert all(e.checklist_with_status is None
+                       for e in repository.get_events(USER_ID, date_from=date.today().isoformat(), checklists=False))
+            print(f'{n:>7} | {old_ms:>13.2f} | {new_ms:>11.2f} | {old_ms / new_ms:>6.1f}x | {n * ITEMS_PER_EVENT} -> 0')
+            repository.close()
+
+        # 마이그레이션 008 이전 DB와 비교한 저장 시간 (번갈아 3번씩 저장해 가장 빠른 값)
+        old_repository = SQLiteRepository(os.path.join(tmp_dir, 'upgrade.db'))
+        new_repository = SQLiteRepository(os.path.join(tmp_dir, 'current.db'))
+        new_repository.init()
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 8]
+        migrations.migrate(old_repository.db)
+        migrations.MIGRATIONS = all_migrations
+        save_ms = {'old': float('inf'), 'new': float('inf')}
+        for round_no in range(3):
+            for label, repository in (('old', old_repository), ('new', new_repository)):
+                start = time.perf_counter()
+                repository.save_events(f'user_{round_no}', events_data(2000))
+                save_ms[label] = min(save_ms[label], (time.perf_counter() - start) * 1000)
+
+        # 기존 DB 업그레이드: 마이그레이션 008이 개수를 채움
+        with old_repository.db.writer() as conn:
+            conn.execute('UPDATE checklist_items SET is_checked = 1 WHERE id % 3 = 0')
+        start = time.perf_counter()
+        migrations.migrate(old_repository.db)
+        backfill_ms = (time.perf_counter() - start) * 1000
+        for round_no in range(3):
+            user = f'user_{round_no}'
+            events = old_repository.get_events(user)
+            assert [(sum(i['checked'] for i in e['checklist_with_status']), len(e['checklist_with_status'])) for e in events] \
+                == [(e['checked_count'], e['total_count']) for e in old_repository.get_events(user, checklists=False)]
+        old_repository.close()
+        new_repository.close()
+        print(f"\nsave_events 2000 x {ITEMS_PER_EVENT}: {save_ms['old']:.0f} ms before migration 008, "
+              f"{save_ms['new']:.0f} ms with counter triggers")
+        print(f'migration 008 on 6000 existing events: {backfill_ms:.0f} ms, counts match checklists\n')
+
+        for storage in ('sqlite', 'memory', 'sqlite_sharded'):
+            check_backend(database_utils, storage)
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+요청 컨텍스트 DB 호출 수 벤치마크
+
+app.py 재실행 한 번이 쓰는 데이터(사이드바 아이 목록, 멤버십 등급/사용량, 분석 결과 카드마다 아이 목록,
+대시보드 다가오는 일정)를 예전 방식(필요한 곳마다 조회)과 RequestContext(한 번씩만 조회)로 불러오며
+재실행당 조회 함수 호출 수, 실제 저장소(DB) 호출 수, 소요 시간을 비교합니다.
+조회 캐시가 비어 있는 경우(cold)와 TTL 안에서 다시 실행한 경우(warm)를 모두 측정합니다.
+
+마지막으로 async 버전(DB 스레드 풀)에서도 호출 수가 요청 컨텍스트에 합산되는지, 예산을 넘으면
+strict 모드에서 DBCallBudgetExceeded가 발생하는지 확인합니다.
+
+실행: python benchmarks/bench_request_context.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+USER_ID = 'bench_user'
+PARSED_EVENT_CARDS = 5
+REPEAT = 50
+# 재실행 한 번에 허용하는 DB 호출 수 (아이, 등급, 사용량, 다가오는 일정)
+RERUN_BUDGET = 4
+
+
+def rerun_without_context(database_utils):
+    """예전 app.py: 사이드바, 멤버십, 분석 카드, 대시보드가 각자 조회"""
+    database_utils.get_children(USER_ID)                 # 사이드바 아이 관리
+    database_utils.get_user_tier(USER_ID)                # render_membership_sidebar
+    database_utils.get_usage(USER_ID)
+    database_utils.get_user_tier(USER_ID)                # 분석 전 한도 확인
+    database_utils.get_usage(USER_ID)
+    for _ in range(PARSED_EVENT_CARDS):                  # 분석 결과 카드마다 아이 선택
+        database_utils.get_children(USER_ID)
+    database_utils.get_events(USER_ID, future_only=True)  # 대시보드
+
+
+def rerun_with_context(ctx):
+    """RequestContext: 같은 데이터는 재실행 안에서 한 번만 조회"""
+    ctx.children()
+    ctx.tier()
+    ctx.usage()
+    for _ in range(PARSED_EVENT_CARDS):
+        ctx.children()
+    ctx.future_events()
+
+
+def lookups(database_utils):
+    """지금까지 조회 캐시를 거친 조회 함수 호출 수 (적중 + 미스)"""
+    stats = database_utils.get_cache_stats()
+    return stats['hits'] + stats['misses']
+
+
+def measure(database_utils, RequestContext, with_context, warm):
+    calls, db_calls, elapsed = 0, 0, 0.0
+    for _ in range(REPEAT):
+        if not warm:
+            database_utils.query_cache.clear()
+        before = lookups(database_utils)
+        start = time.perf_counter()
+        with RequestContext(USER_ID) as ctx:
+            if with_context:
+                rerun_with_context(ctx)
+            else:
+                rerun_without_context(database_utils)
+        elapsed += time.perf_counter() - start
+        calls, db_calls = lookups(database_utils) - before, ctx.db_call_count()
+    return calls, db_calls, elapsed / REPEAT * 1000
+
+
+async def async_request(async_database_utils, RequestContext):
+    with RequestContext(USER_ID) as ctx:
+        await async_database_utils.get_children(USER_ID)
+        await async_database_utils.get_events(USER_ID, future_only=True)
+    return ctx.db_call_count()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils, async_database_utils
+        from shared.request_context import RequestContext, DBCallBudgetExceeded
+
+        database_utils.init_database()
+        database_utils.add_child(USER_ID, '첫째')
+        database_utils.add_child(USER_ID, '둘째')
+        database_utils.save_events(USER_ID, [{
+            'event_name': f'행사 {i}', 'event_date': f'2099-{1 + i % 12:02d}-{1 + i % 28:02d}',
+            'event_time': '10:00', 'checklist_items': ['준비물 1', '준비물 2'],
+        } for i in range(20)])
+
+        print(f'one rerun: sidebar + membership + {PARSED_EVENT_CARDS} parsed event cards + dashboard')
+        print(f"{'mode':>16} | {'cache':>5} | {'lookups':>7} | {'db calls':>8} | {'ms/rerun':>8}")
+        print('-' * 58)
+        for warm in (False, True):
+            for with_context in (False, True):
+                calls, db_calls, ms = measure(database_utils, RequestContext, with_context, warm)
+                mode = 'RequestContext' if with_context else 'per-call lookups'
+                print(f"{mode:>16} | {'warm' if warm else 'cold':>5} | {calls:>7} | {db_calls:>8} | {ms:>8.3f}")
+                if with_context and not warm:
+                    assert db_calls <= RERUN_BUDGET, db_calls
+
+        # async 버전도 요청 컨텍스트에 합산 (DB 스레드 풀로 contextvars 전달)
+        database_utils.query_cache.clear()
+        async_calls = asyncio.run(async_request(async_database_utils, RequestContext))
+        assert async_calls == 2, async_calls
+        print(f'\nasync request (thread pool): {async_calls} db calls recorded')
+
+        # strict 모드: 예산을 넘으면 컨텍스트가 끝날 때 예외
+        database_utils.query_cache.clear()
+        try:
+            with RequestContext(USER_ID, budget=1, strict=True) as ctx:
+                ctx.children()
+                ctx.tier()
+        except DBCallBudgetExceeded as e:
+            print(f'strict budget: {e}')
+        else:
+            raise AssertionError('budget not enforced')
+
+        async_database_utils.shutdown_executor()
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+일정 검색 벤치마크
+
+한 사용자에게 50,000개 이벤트(체크리스트 4개씩, 일부는 보관됨)를 만들고
+- FTS5 색인 검색 (search_events, 관련도 순 첫 페이지)
+- 기존 방식: 이벤트를 모두 불러와 Python에서 문자열 필터
+의 검색어별 지연 시간을 비교합니다. 두 방식이 찾은 이벤트 집합이 같은지도 확인합니다.
+FTS 검색 시간은 일치하는 이벤트 수에 비례합니다 (일치 항목마다 관련도 계산). 어휘가 적은 합성 데이터라
+흔한 단어는 수천~만여 개가 일치하는 최악의 경우에 가깝습니다.
+
+마지막으로 마이그레이션 007 이전 DB에 같은 데이터를 넣고 마이그레이션(색인 채우기)에 걸리는 시간과
+색인 행 수를 확인합니다.
+
+실행: python benchmarks/bench_search.py
+"""
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+N_EVENTS = 50000
+ITEMS_PER_EVENT = 4
+PAGE_SIZE = 20
+REPEAT = 30
+USER_ID = 'bench_user'
+
+EVENT_NAMES = ['현장학습', '학부모 상담', '수영 수업', '체육 대회', '신터클라스 축제', '왕의 날', '부활절 행사',
+               '사진 촬영', '독서 주간', '과학 박람회', '음악 발표회', '방학식', '개학식', '소풍', '건강 검진']
+TRANSLATION_WORDS = ['schoolreis', 'ouderavond', 'zwemles', 'sportdag', 'sinterklaas', 'koningsdag', 'pasen',
+                     'schoolfoto', 'kinderboekenweek', 'musical', 'vakantie', 'lunch', 'gymkleding', 'toestemming']
+ITEMS = ['도시락', '물통', '실내화', '수영복', '수건', '우비', '간식', '필통', '체육복', '동의서', '선물', '모자']
+# (검색어, 설명)
+QUERIES = [('축제 4999', 'one event'), ('신터클라스', 'event name'), ('zwemles', 'translation'), ('수영복 수건', 'two checklist items'),
+           ('kinder', 'prefix'), ('도시락', 'common item'), ('없는검색어', 'no match')]
+
+
+def random_event(rng, i):
+    return {
+        'event_name': f'{rng.choice(EVENT_NAMES)} {i}',
+        'event_date': f'20{15 + i % 12:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+        'event_time': '10:00', 'country': '네덜란드', 'child_tag': '첫째',
+        'translation': ' '.join(rng.sample(TRANSLATION_WORDS, 4)),
+        'cultural_context': '네덜란드 학교 문화 설명 ' * 3, 'tips': '미리 준비하세요',
+        'memo': rng.choice(['', '아빠가 데려다주기', '오후 3시 픽업']),
+        'checklist_items': rng.sample(ITEMS, ITEMS_PER_EVENT),
+    }
+
+
+def seed(database_utils, user_id=USER_ID):
+    rng = random.Random(42)
+    database_utils.save_events(user_id, [random_event(rng, i) for i in range(N_EVENTS)])
+
+
+def naive_search(repository, query):
+    """기존 방식: 이벤트 전체 + 보관된 이벤트를 불러와 Python에서 필터 (검색어마다 단어 앞부분 일치)"""
+    terms = re.findall(r'\w+', query.lower())
+    matched = []
+    for event in repository.get_events(USER_ID) + repository.get_archived_events(USER_ID):
+        text = ' '.join([event['event_name'], event['translation'] or '', event['cultural_context'] or '',
+                         event['tips'] or '', event['memo'] or ''] + [item['name'] for item in event['checklist_with_status']])
+        words = re.findall(r'\w+', text.lower())
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            matched.append(event)
+    return matched
+
+
+def timings(fn, repeat=REPEAT):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        from shared import database_utils, migrations
+        from shared.sqlite_repository import SQLiteRepository
+
+        # 마이그레이션 007 이전 DB에 데이터를 넣은 뒤 색인 생성 (기존 사용자 DB 업그레이드)
+        path = os.path.join(tmp_dir, 'bench.db')
+        repository = SQLiteRepository(path)
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 7]
+        migrations.migrate(repository.db)
+        migrations.MIGRATIONS = all_migrations
+        database_utils._repository = repository
+        seed(database_utils)
+        start = time.perf_counter()
+        migrations.migrate(repository.db)
+        backfill_ms = (time.perf_counter() - start) * 1000
+        archived = repository.archive_events(USER_ID, '2022-03-01', 500)
+        with repository.db.reader() as conn:
+            indexed = conn.execute('SELECT COUNT(*) FROM events_fts').fetchone()[0]
+        assert indexed == N_EVENTS, indexed
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} items ({archived} archived), '
+              f'migration 007 backfill: {backfill_ms:.0f} ms, {indexed} rows indexed\n')
+
+        print(f"{'query':>20} | {'matches':>7} | {'fts p50 ms':>10} | {'fts p95 ms':>10} | {'python scan ms':>14}")
+        print('-' * 74)
+        for query, label in QUERIES:
+            terms = database_utils.search_terms(query)
+            fts_all = repository.search_events(USER_ID, terms, N_EVENTS)
+            scan_ms = time.perf_counter()
+            scanned = naive_search(repository, query)
+            scan_ms = (time.perf_counter() - scan_ms) * 1000
+            assert {r['event']['id'] for r in fts_all} == {e['id'] for e in scanned}, query
+            assert all(r['archived'] == (r['event']['event_date'] < '2022-03-01') for r in fts_all), query
+
+            p50, p95 = timings(lambda: database_utils.search_events(USER_ID, query, page_size=PAGE_SIZE))
+            print(f'{label:>20} | {len(scanned):>7} | {p50:>10.2f} | {p95:>10.2f} | {scan_ms:>14.0f}')
+
+        # 페이지를 이어 붙이면 전체 결과와 같은 순서
+        pages, offset = [], 0
+        while offset is not None:
+            page = database_utils.search_events(USER_ID, '신터클라스', page_size=500, offset=offset)
+            pages.extend(r['event']['id'] for r in page['results'])
+            offset = page['next_offset']
+        assert pages == [r['event']['id'] for r in repository.search_events(USER_ID, ['신터클라스'], N_EVENTS)]
+        assert database_utils.search_events('someone_else', '신터클라스')['results'] == []
+        print(f'\npaged search returns the same ranked list ({len(pages)} hits); other users see nothing')
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+사용자별 SQLite 샤딩 쓰기 벤치마크
+
+여러 가족이 동시에 일정을 저장할 때, 하나의 school_events.db(쓰기 잠금 하나)와
+사용자별 파일(sqlite_sharded, 파일마다 쓰기 잠금)의 처리량과 p99 지연 시간을 비교합니다.
+각 스레드는 서로 다른 사용자로 이벤트 저장 + 체크리스트 체크를 반복합니다.
+
+실행: python benchmarks/bench_sharded_writes.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+THREAD_COUNTS = [1, 4, 16]
+WRITES_PER_THREAD = 200
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(repository, n_threads):
+    """n_threads명의 사용자가 동시에 쓰기, (요청별 지연 시간 목록, 전체 소요 시간) 반환"""
+    latencies = []
+    lock = threading.Lock()
+
+    def writer(user_id):
+        mine = []
+        for i in range(WRITES_PER_THREAD):
+            start = time.perf_counter()
+            event_id = repository.save_events(user_id, [{
+                'event_name': f'행사 {i}', 'event_date': f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}',
+                'event_time': '10:00', 'checklist_items': [f'준비물 {j}' for j in range(4)],
+            }])[0]
+            item_id = repository.get_event_by_id(user_id, event_id)['checklist_with_status'][0]['id']
+            repository.update_checklist_item(user_id, item_id, True)
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    user_ids = [f'family_{n_threads}_{t}' for t in range(n_threads)]
+    # 샤드 첫 생성(파일 + 마이그레이션)은 측정에서 제외
+    for user_id in user_ids:
+        repository.get_user_tier(user_id)
+    threads = [threading.Thread(target=writer, args=(user_id,)) for user_id in user_ids]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        print(f'{WRITES_PER_THREAD} x (save_events + get_event_by_id + update_checklist_item) per thread')
+        print(f"{'storage':>14} | {'threads':>7} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'writes/s':>8}")
+        print('-' * 60)
+        for storage in ('sqlite', 'sqlite_sharded'):
+            database_utils.configure(storage=storage)
+            database_utils.init_database()
+            # 조회 캐시를 거치지 않고 저장소 자체를 측정
+            repository = database_utils.get_repository()
+            for n_threads in THREAD_COUNTS:
+                latencies, elapsed = run(repository, n_threads)
+                print(f'{storage:>14} | {n_threads:>7} | {percentile(latencies, 50):>9.2f} | '
+                      f'{percentile(latencies, 99):>9.2f} | {len(latencies) / elapsed:>8.0f}')
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
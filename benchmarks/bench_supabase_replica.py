@@ -0,0 +1,166 @@
+"""
+Supabase 읽기 복제본 벤치마크 (로컬 PostgREST 대역 fake_postgrest 사용, 네트워크/Supabase 불필요)
+
+대시보드 한 번에 필요한 조회(아이, 이번 달 일정 목록, 일정 상세, 사용량, 등급)를
+- SupabaseRepository (매번 Supabase 왕복)
+- ReplicaRepository (로컬 SQLite 복제본, SENSE_COACH_STORAGE=supabase_replica)
+로 처리하는 시간을 비교하고, 두 결과가 같은지 확인합니다.
+
+함께 확인하는 것:
+- 다른 클라이언트가 Supabase를 바꾼 뒤 변경분 동기화 (체크, 이름 변경, 준비물/일정 삭제, 아이 추가) 후 결과가 같은지,
+  동기화가 받은 행 수가 전체 행 수보다 훨씬 적은지
+- Supabase 장애: 차단기가 열리고 조회는 복제본으로 계속, 다시 보낼 수 있는 쓰기는 큐에 쌓이고 나머지 쓰기는 ReadOnlyModeError
+- 회복: 큐의 쓰기를 순서대로 다시 보낸 뒤 Supabase와 복제본이 같은지
+
+실행: python benchmarks/bench_supabase_replica.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgREST
+from shared import supabase_transport
+from shared.replica_repository import ReplicaRepository, CircuitBreaker, ReadOnlyModeError
+from shared.supabase_repository import SupabaseRepository
+
+API_KEY = 'local.bench.key'
+USER_ID = 'bench_user'
+MONTH = '2030-03'
+EVENTS = 60
+LATENCY_MS = 20   # Supabase 왕복 지연 흉내
+ROUNDS = 20
+
+
+def make_client(url, **transport_kwargs):
+    transport = supabase_transport.ManagedTransport(metrics=supabase_transport.TransportMetrics(), **transport_kwargs)
+    return supabase_transport.create_client(url, API_KEY, transport=transport)
+
+
+def seed(repository):
+    repository.add_child(USER_ID, '첫째')
+    repository.add_child(USER_ID, '둘째')
+    repository.save_events(USER_ID, [{
+        'event_name': f'행사 {i}', 'event_date': f'2030-{3 + i // 28:02d}-{i % 28 + 1:02d}', 'translation': f'번역 {i}',
+        'checklist_items': ['실내화', '물통', {'name': '도시락', 'metadata': {'note': '수저'}}],
+    } for i in range(EVENTS)])
+    for _ in range(4):
+        repository.increment_usage(USER_ID, MONTH)
+
+
+def dashboard(repository):
+    """대시보드 조회 한 번 -> 비교할 수 있는 값"""
+    events = repository.get_events(USER_ID, date_from='2030-03-01', date_to='2030-03-31', checklists=False, details=False)
+    detail = repository.get_event_by_id(USER_ID, events[0].id)
+    return (repository.get_children(USER_ID), [event.to_dict() for event in events], detail.to_dict(),
+            repository.get_usage(USER_ID, MONTH), repository.get_user_tier(USER_ID))
+
+
+def snapshot(repository):
+    """전체 비교용 (아이, 모든 일정 + 체크리스트, 사용량)"""
+    return (repository.get_children(USER_ID), [event.to_dict() for event in repository.get_events(USER_ID)],
+            repository.get_usage(USER_ID, MONTH))
+
+
+def timed(repository):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = dashboard(repository)
+    return (time.perf_counter() - start) * 1000 / ROUNDS, result
+
+
+def main():
+    errors = []
+    with FakePostgREST(latency_ms=LATENCY_MS, watermark_overlap_ms=0) as fake, tempfile.TemporaryDirectory() as tmp:
+        remote = SupabaseRepository(make_client(fake.url))
+        seed(remote)
+        breaker = CircuitBreaker(failures=3, reset_timeout=0.5)
+        replica = ReplicaRepository(make_client(fake.url, retries=1, timeout=1), path=os.path.join(tmp, 'replica.db'),
+                                    sync_interval=0, breaker=breaker, on_error=errors.append)
+        replica.init()
+
+        # -------------------- 조회 지연 --------------------
+        start = time.perf_counter()
+        replica.get_children(USER_ID)   # 처음 읽는 사용자: 전체 동기화
+        first_sync_ms = (time.perf_counter() - start) * 1000
+        remote_ms, remote_result = timed(remote)
+        replica_ms, replica_result = timed(replica)
+        assert replica_result == remote_result
+        assert replica_ms * 10 < remote_ms
+        rows = sum(len(fake.tables[table]) for table in ('events', 'checklist_items'))
+        print(f"dashboard ({len(remote_result[1])} events in list, {LATENCY_MS} ms Supabase latency), avg of {ROUNDS}")
+        print(f"{'repository':>12} | {'ms':>7}")
+        print('-' * 23)
+        print(f"{'supabase':>12} | {remote_ms:>7.2f}")
+        print(f"{'replica':>12} | {replica_ms:>7.2f}")
+        print(f"first read (full sync of {rows} rows): {first_sync_ms:.0f} ms, then {remote_ms / replica_ms:.0f}x faster")
+
+        # -------------------- 다른 클라이언트의 변경 -> 변경분 동기화 --------------------
+        events = remote.get_events(USER_ID)
+        items = remote.get_checklist(USER_ID, events[0].id)
+        remote.update_checklist_item(USER_ID, items[0].id, True)
+        remote.update_checklist_item_name(USER_ID, items[1].id, '큰 물통')
+        remote.delete_checklist_item(USER_ID, items[2].id)
+        remote.update_event(USER_ID, events[1].id, {'memo': '우비 챙기기'})
+        remote.delete_event(USER_ID, events[2].id)
+        remote.add_child(USER_ID, '셋째')
+        remote.increment_usage(USER_ID, MONTH)
+        applied_before = replica.sync_stats['rows_applied']
+        changed = replica.sync_once()
+        assert changed and replica.sync_stats['rows_applied'] - applied_before < rows / 10
+        assert snapshot(replica) == snapshot(remote)
+        assert replica.get_event_by_id(USER_ID, events[0].id).progress()[:2] == (1, 2)
+        assert replica.sync_once() == 0
+        print(f"\ndelta sync after 8 remote writes: {changed} rows applied (of {rows}), replica matches Supabase")
+
+        # -------------------- 장애: 읽기 전용 --------------------
+        fake.drop_rate = 1.0
+        before = snapshot(replica)
+        replica.sync_once()
+        replica.sync_once()
+        assert snapshot(replica) == before   # 조회는 복제본으로 계속
+        assert replica.update_checklist_item(USER_ID, items[1].id, True) == events[0].id
+        assert replica.update_child_name(USER_ID, '셋째', '막내')
+        replica.delete_event(USER_ID, events[3].id)
+        assert breaker.state == CircuitBreaker.OPEN
+        sent = sum(fake.requests.values())
+        start = time.perf_counter()
+        try:
+            replica.save_events(USER_ID, [{'event_name': '장애 중 저장', 'event_date': '2030-03-20'}])
+            raise AssertionError('save_events should raise ReadOnlyModeError while Supabase is down')
+        except ReadOnlyModeError:
+            pass
+        rejected_ms = (time.perf_counter() - start) * 1000
+        assert sum(fake.requests.values()) == sent   # 차단기가 열려 있으면 요청을 보내지 않음
+        assert replica.status()['queued_writes'] == 3
+        assert replica.get_children(USER_ID) == ['첫째', '둘째', '막내']
+        assert replica.get_event_by_id(USER_ID, events[3].id) is None
+        print(f"outage: circuit {breaker.state}, reads served locally, 3 writes queued, "
+              f"save_events rejected in {rejected_ms:.2f} ms without a request")
+
+        # -------------------- 회복 --------------------
+        fake.drop_rate = 0.0
+        time.sleep(breaker.reset_timeout)
+        replica.sync_once()
+        status = replica.status()
+        assert status['queued_writes'] == 0 and status['replayed'] == 3 and status['dropped'] == 0
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert remote.get_children(USER_ID) == ['첫째', '둘째', '막내']
+        assert remote.get_event_by_id(USER_ID, events[3].id) is None
+        assert snapshot(replica) == snapshot(remote)
+        assert replica.save_events(USER_ID, [{'event_name': '회복 후 저장', 'event_date': '2030-03-21'}])
+        assert snapshot(replica) == snapshot(remote)
+        print(f"recovery: 3 queued writes replayed in order, replica matches Supabase "
+              f"(circuit opened {status['circuit_opened']}x, {status['syncs']} syncs, {status['full_syncs']} full)")
+        assert not errors, errors
+
+        replica.close()
+        remote.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Supabase 전송 계층 벤치마크 (로컬 PostgREST 대역 fake_postgrest 사용, 네트워크/Supabase 불필요)
+
+DB 작업 스레드 수(WORKERS)만큼 동시에 SupabaseRepository 읽기(get_children, get_usage, get_events)를 보내며
+- keep-alive 없음 (요청마다 새 연결) / supabase.create_client (기존) / supabase_transport.create_client
+- 깨끗한 네트워크 / 일시적 오류(503, 연결 끊김)가 섞인 네트워크
+에서 처리량, 새로 맺은 연결 수, 잘못된 결과 수와 조회 실패(재시도 후에도 실패해 StorageUnavailableError를 올린 호출) 수를 비교합니다.
+
+함께 확인하는 것:
+- 대역 서버를 통한 저장소 왕복 (아이, 이벤트 + 체크리스트, 사용량, 등급, 초기화)
+- 쓰기(insert)는 503에도 다시 보내지 않는지 (중복 저장 없음)
+- 응답이 없는 테이블: 기존 클라이언트는 서버가 답할 때까지 기다리고, 전송 계층은 타임아웃 후 오류로 끝나는지
+- 테이블별 왕복 시간 측정값
+
+실행: python benchmarks/bench_supabase_transport.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgREST
+from shared import supabase_transport
+from shared.repository import StorageUnavailableError
+from shared.supabase_repository import SupabaseRepository
+
+API_KEY = 'local.bench.key'
+USER_ID = 'bench_user'
+MONTH = '2026-01'
+WORKERS = 8
+CALLS_PER_WORKER = 150
+LATENCY_MS = 2
+HANDSHAKE_MS = 20   # 새 연결의 TCP + TLS 핸드셰이크 흉내
+
+
+def managed_client(url, **transport_kwargs):
+    metrics = supabase_transport.TransportMetrics()
+    transport = supabase_transport.ManagedTransport(metrics=metrics, **transport_kwargs)
+    return supabase_transport.create_client(url, API_KEY, transport=transport), metrics
+
+
+def postgrest_version():
+    from postgrest.version import __version__
+    return __version__
+
+
+def legacy_client(url):
+    from supabase import create_client
+    return create_client(url, API_KEY)
+
+
+def no_keepalive_client(url):
+    """요청마다 연결을 새로 맺는 클라이언트 (연결 풀이 없을 때의 기준선)"""
+    transport = httpx.HTTPTransport(limits=httpx.Limits(max_keepalive_connections=0))
+    return supabase_transport.create_client(url, API_KEY, transport=transport)
+
+
+def seed(fake):
+    repository = SupabaseRepository(supabase_transport.create_client(fake.url, API_KEY))
+    repository.add_child(USER_ID, '첫째')
+    repository.save_events(USER_ID, [{'event_name': f'행사 {i}', 'event_date': f'2030-01-{i + 1:02d}',
+                                      'checklist_items': ['실내화', '물통']} for i in range(20)])
+    for _ in range(3):
+        repository.increment_usage(USER_ID, MONTH)
+    repository.close()
+
+
+def read_mix(repository, i):
+    """읽기 한 번, 결과가 틀렸으면 True (조회 실패는 StorageUnavailableError)"""
+    kind = i % 3
+    if kind == 0:
+        return repository.get_children(USER_ID) != ['첫째']
+    if kind == 1:
+        return repository.get_usage(USER_ID, MONTH) != 3
+    return len(repository.get_events(USER_ID, limit=10, checklists=False, details=False)) != 10
+
+
+def load(fake, client):
+    """WORKERS개 스레드가 CALLS_PER_WORKER번씩 읽기 -> (초당 호출, 새 연결 수, 잘못된 결과 수, 예외 수)"""
+    repository = SupabaseRepository(client, on_error=lambda message: None)
+    connections = fake.connections
+    errors = []
+
+    def worker(worker_no):
+        wrong = 0
+        for i in range(CALLS_PER_WORKER):
+            try:
+                wrong += read_mix(repository, worker_no + i)
+            except Exception as e:
+                errors.append(e)
+        return wrong
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        wrong = sum(pool.map(worker, range(WORKERS)))
+    elapsed = time.perf_counter() - start
+    client.session.close() if hasattr(client, 'session') else client.postgrest.session.close()
+    return WORKERS * CALLS_PER_WORKER / elapsed, fake.connections - connections, wrong, len(errors)
+
+
+def check_round_trip():
+    with FakePostgREST() as fake:
+        client, metrics = managed_client(fake.url)
+        repository = SupabaseRepository(client)
+        assert repository.add_child(USER_ID, '첫째') and repository.add_child(USER_ID, '둘째')
+        assert repository.get_children(USER_ID) == ['첫째', '둘째']
+        event_ids = repository.save_events(USER_ID, [
+            {'event_name': '운동회', 'event_date': '2030-05-01', 'translation': '번역', 'checklist_items': ['물통', '모자']},
+            {'event_name': '소풍', 'event_date': '2030-06-01', 'checklist_items': []},
+        ])
+        events = repository.get_events(USER_ID)
+        assert [e.event_name for e in events] == ['운동회', '소풍']
+        assert [item.name for item in events[0].checklist_with_status] == ['물통', '모자']
+        summary = repository.get_events(USER_ID, checklists=False, details=False)[0]
+        assert summary.translation is None and summary.checklist_with_status is None
+        item_id = repository.get_checklist(USER_ID, event_ids[0])[0].id
+        assert repository.update_checklist_item(USER_ID, item_id, True) == event_ids[0]
+        assert repository.get_event_by_id(USER_ID, event_ids[0]).checklist_with_status[0].checked
+        assert [repository.increment_usage(USER_ID, MONTH) for _ in range(2)] == [1, 2]
+        assert repository.get_usage(USER_ID, MONTH) == 2 and repository.get_user_tier(USER_ID) == 'FREE'
+        repository.reset_all_data(USER_ID)
+        assert repository.get_events(USER_ID) == [] and not fake.tables['checklist_items']
+        repository.close()
+        assert fake.connections == 1
+        print(f"round trip through fake PostgREST OK ({sum(fake.requests.values())} requests on 1 keep-alive connection)")
+        return metrics
+
+
+def main():
+    check_round_trip()
+
+    print(f'\n{WORKERS} threads x {CALLS_PER_WORKER} reads, {LATENCY_MS} ms server latency, '
+          f'{HANDSHAKE_MS} ms per new connection')
+    print(f"{'network':>22} | {'client':>18} | {'calls/s':>7} | {'new conns':>9} | {'wrong':>5} | {'raised':>6}")
+    print('-' * 82)
+    results = {}
+    managed_metrics = None
+    for network, faults in (('clean', {}), ('10% 503 + 2% drops', {'fail_rate': 0.1, 'drop_rate': 0.02})):
+        for label in ('no keep-alive', 'supabase client', 'managed transport'):
+            with FakePostgREST(latency_ms=LATENCY_MS, handshake_ms=HANDSHAKE_MS) as fake:
+                seed(fake)
+                fake.fail_rate, fake.drop_rate = faults.get('fail_rate', 0.0), faults.get('drop_rate', 0.0)
+                if label == 'no keep-alive':
+                    client = no_keepalive_client(fake.url)
+                elif label == 'supabase client':
+                    client = legacy_client(fake.url)
+                else:
+                    client, metrics = managed_client(fake.url)
+                    managed_metrics = metrics if faults else managed_metrics
+                rate, connections, wrong, raised = load(fake, client)
+            results[(network, label)] = (rate, connections, wrong, raised)
+            print(f"{network:>22} | {label:>18} | {rate:>7.0f} | {connections:>9} | {wrong:>5} | {raised:>6}")
+
+    total = WORKERS * CALLS_PER_WORKER
+    assert results[('clean', 'managed transport')][1] <= WORKERS
+    assert results[('clean', 'managed transport')][0] > results[('clean', 'no keep-alive')][0] * 2
+    faulty_legacy = results[('10% 503 + 2% drops', 'supabase client')]
+    faulty_managed = results[('10% 503 + 2% drops', 'managed transport')]
+    # postgrest-py 2.2x부터는 GET 503을 1, 2, 4초 간격으로 다시 보내므로 기존 클라이언트도 일부는 맞지만 느리고,
+    # 끊긴 연결은 다시 보내지 않음
+    assert faulty_managed[2] + faulty_managed[3] <= total * 0.005
+    assert faulty_managed[2] + faulty_managed[3] < faulty_legacy[2] + faulty_legacy[3]
+    assert faulty_managed[0] > faulty_legacy[0] * 3
+    print(f"\nwith transient faults: {faulty_legacy[2] + faulty_legacy[3]} of {total} reads wrong or raised with the "
+          f"supabase client (postgrest {postgrest_version()}), {faulty_managed[2] + faulty_managed[3]} with the managed transport")
+
+    print(f"\n{'call (faulty run)':>22} | {'calls':>5} | {'retries':>7} | {'errors':>6} | {'p50 ms':>6} | {'p95 ms':>6} | {'max ms':>6}")
+    print('-' * 76)
+    for name, call in managed_metrics.stats().items():
+        print(f"{name:>22} | {call['calls']:>5} | {call['retries']:>7} | {call['errors']:>6} | "
+              f"{call['p50_ms']:>6.1f} | {call['p95_ms']:>6.1f} | {call['max_ms']:>6.1f}")
+
+    # 쓰기는 503이어도 다시 보내지 않음
+    with FakePostgREST(fail_rate=0.3, seed=7) as fake:
+        client, _ = managed_client(fake.url)
+        repository = SupabaseRepository(client, on_error=lambda message: None)
+        added = sum(repository.add_child(USER_ID, f'아이 {i}') for i in range(100))
+        assert fake.requests[('POST', 'children')] <= 100 and len(fake.tables['children']) == added
+        print(f"\nadd_child x100 at 30% 503: {added} stored, {fake.requests[('POST', 'children')]} inserts sent "
+              f"(writes not retried), {fake.requests[('GET', 'children')]} reads sent (retried)")
+        client.session.close()
+
+    # 응답 없는 테이블
+    with FakePostgREST(table_latency_ms={'usage_tracking': 3000}) as fake:
+        seed_client, _ = managed_client(fake.url)
+        SupabaseRepository(seed_client).get_children(USER_ID)   # 연결 준비
+        client, metrics = managed_client(fake.url, timeout=0.2, retries=1)
+        reported = []
+        start = time.perf_counter()
+        try:
+            SupabaseRepository(client, on_error=reported.append).get_usage(USER_ID, MONTH)
+            raise AssertionError('시간 초과가 0회로 바뀌어 돌아옴')
+        except StorageUnavailableError:
+            pass
+        managed_ms = (time.perf_counter() - start) * 1000
+        assert len(reported) == 1 and 'get_usage' in reported[0]
+        start = time.perf_counter()
+        try:
+            SupabaseRepository(legacy_client(fake.url), on_error=lambda message: None).get_usage(USER_ID, MONTH)
+        except StorageUnavailableError:
+            pass
+        legacy_ms = (time.perf_counter() - start) * 1000
+        assert managed_ms < 1000 < legacy_ms and metrics.stats()['usage_tracking']['errors'] == 1
+        print(f"stalled table (3 s): supabase client waits {legacy_ms:.0f} ms, "
+              f"managed transport gives up after {managed_ms:.0f} ms (0.2 s timeout, 1 retry)")
+
+
+if __name__ == '__main__':
+    main()
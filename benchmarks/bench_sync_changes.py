@@ -0,0 +1,261 @@
+"""
+앱 변경분 동기화(GET /api/sync) 벤치마크
+
+긴 번역/문화 설명/팁이 붙은 이벤트 N_EVENTS개(체크리스트 ITEMS_PER_EVENT개씩)를 가진 사용자가
+몇 건을 바꾼 뒤 앱이 다시 받아야 하는 데이터를
+- 전체 새로고침: GET /api/events를 마지막 페이지까지 (지금까지의 앱)
+- 변경분: 이전 응답의 token으로 GET /api/sync
+로 비교합니다 (JSON 응답 크기, 조회 + 직렬화 시간, 캐시 없이).
+
+함께 확인하는 것:
+- 체크/이름 변경/삭제/추가/수정/보관/아이 변경 뒤 변경분만 적용한 앱 데이터가 서버 전체 조회와 같은지
+  (sqlite, memory, sqlite_sharded, 로컬 PostgREST 대역으로 supabase)
+- 같은 token으로 다시 요청하면 삭제가 반복되지 않고, 다른 저장소의 token이면 전체(full), 잘못된 token은 ValueError
+- 보관 기간(TOMBSTONE_RETENTION_DAYS)이 지난 삭제 기록은 get_changes가 지우고, 그보다 오래된 token이면 전체 (sqlite, supabase)
+
+실행: python benchmarks/bench_sync_changes.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.repository import TOMBSTONE_RETENTION_DAYS
+
+USER_ID = 'bench_user'
+N_EVENTS = 1000
+ITEMS_PER_EVENT = 8
+PAGE_SIZE = 50
+REPEAT = 10
+
+
+def events_data(n, start=0):
+    today = date.today()
+    return [{
+        'event_name': f'행사 {i}', 'event_date': (today + timedelta(days=start + i // 10)).isoformat(),
+        'country': '네덜란드', 'child_tag': ['첫째', '둘째', '없음'][i % 3] if i < 30 else '없음',
+        'translation': '알림장 원문 번역 문장입니다. ' * 60, 'cultural_context': '현지 학교 문화에 대한 설명입니다. ' * 40,
+        'tips': '준비할 때 참고할 팁입니다. ' * 20,
+        'checklist_items': [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)],
+    } for i in range(n)]
+
+
+def best_of(fn, repeat=REPEAT):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def full_refresh(database_utils, user_id):
+    """GET /api/events를 next_cursor가 없을 때까지 (응답 본문 크기 합)"""
+    database_utils.query_cache.clear()
+    size, cursor = 0, None
+    while True:
+        page = database_utils.get_events_page(user_id, page_size=PAGE_SIZE, cursor=cursor)
+        size += len(json.dumps({"events": [event.to_dict() for event in page['events']], "next_cursor": page['next_cursor']},
+                               ensure_ascii=False).encode('utf-8'))
+        cursor = page['next_cursor']
+        if not cursor:
+            return size
+
+
+def sync_response(changes):
+    """GET /api/sync 본문 (백엔드 sync와 같은 변환)"""
+    body = dict(changes, events=[event.to_dict() for event in changes['events']])
+    body.pop('watermark', None)
+    return json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+
+class Client:
+    """앱의 로컬 저장소 흉내: 변경분을 id로 덮어쓰고 deleted는 지움 (일정이 지워지면 그 준비물도)"""
+
+    def __init__(self):
+        self.events, self.items, self.children = {}, {}, {}
+
+    def apply(self, changes):
+        if changes['full']:
+            self.__init__()
+        for event in changes['events']:
+            self.events[event.id] = event.to_dict()
+        for item in changes['checklist_items']:
+            self.items[item['id']] = item
+        for child in changes['children']:
+            self.children[child['id']] = child
+        deleted = changes['deleted']
+        for event_id in deleted['events']:
+            self.events.pop(event_id, None)
+        for item_id in deleted['checklist_items']:
+            self.items.pop(item_id, None)
+        for child_id in deleted['children']:
+            self.children.pop(child_id, None)
+        self.items = {item_id: item for item_id, item in self.items.items() if item['event_id'] in self.events}
+        return self
+
+    def state(self):
+        children = [child['name'] for child in sorted(self.children.values(), key=lambda child: (child['display_order'], child['id']))]
+        items = {item_id: {k: v for k, v in item.items() if k != 'position'} for item_id, item in self.items.items()}
+        return self.events, items, children
+
+
+def server_state(repository, user_id):
+    """서버 전체 조회를 Client.state()와 같은 모양으로"""
+    events, items = {}, {}
+    for event in repository.get_events(user_id):
+        for item in event.checklist_with_status:
+            items[item.id] = dict(item.to_dict(), event_id=event.id)
+        event.checklist_with_status = None
+        events[event.id] = event.to_dict()
+    return events, items, repository.get_children(user_id)
+
+
+def mutate(repository, user_id):
+    """앱 밖(다른 기기)에서 일어나는 변경들"""
+    events = repository.get_events(user_id)
+    items = events[0].checklist_with_status
+    repository.update_checklist_item(user_id, items[0].id, True)
+    repository.update_checklist_item_name(user_id, items[1].id, '큰 물통')
+    repository.delete_checklist_item(user_id, items[2].id)
+    repository.add_checklist_item(user_id, events[1].id, '우비')
+    repository.update_event(user_id, events[2].id, {'memo': '일찍 하교'})
+    repository.delete_event(user_id, events[3].id)
+    repository.add_child(user_id, '셋째')
+    repository.update_child_name(user_id, '둘째', '작은아이')
+    repository.delete_child(user_id, '첫째')
+    repository.save_events(user_id, events_data(2, start=40))
+
+
+def check_storage(label, repository, user_id, changes, archive=None):
+    """전체 -> 변경 -> 변경분 적용 결과가 서버 전체 조회와 같은지"""
+    repository.add_child(user_id, '첫째')
+    repository.add_child(user_id, '둘째')
+    repository.save_events(user_id, events_data(20) + events_data(5, start=-400))
+    first = changes(user_id, None)
+    assert first['full'] and not any(first['deleted'].values())
+    client = Client().apply(first)
+    assert client.state() == server_state(repository, user_id)
+
+    mutate(repository, user_id)
+    archived = archive(user_id) if archive else 0
+    delta = changes(user_id, first['watermark'])
+    assert not delta['full'] and delta['deleted']['children'] and delta['deleted']['events']
+    assert len(delta['deleted']['events']) == 1 + archived
+    client.apply(delta)
+    assert client.state() == server_state(repository, user_id)
+
+    # 같은 token으로 다시 받아도 (중복 적용) 결과가 같음
+    client.apply(changes(user_id, first['watermark']))
+    assert client.state() == server_state(repository, user_id)
+    print(f'{label:>14}: {len(delta["events"])} events, {len(delta["checklist_items"])} items, '
+          f'{sum(map(len, delta["deleted"].values()))} deletions -> client matches server')
+
+
+def check_retention(label, repository, user_id, age_tombstones, count_tombstones):
+    """보관 기간이 지난 삭제 기록은 get_changes가 지우고, 그보다 오래된 since는 전체"""
+    recent = repository.get_changes(user_id, None)['watermark']
+    assert count_tombstones(user_id) > 0
+    old_since = age_tombstones(user_id, TOMBSTONE_RETENTION_DAYS + 1)
+    assert repository.get_changes(user_id, old_since)['full']
+    assert count_tombstones(user_id) == 0
+    assert not repository.get_changes(user_id, recent)['full']
+    print(f'{label:>14}: tombstones older than {TOMBSTONE_RETENTION_DAYS} days purged by get_changes, older token -> full')
+
+
+def sqlite_tombstones(repository):
+    """(사용자의 삭제 기록을 days일 전으로 옮기고 그 시각을 돌려주는 함수, 삭제 기록 수를 세는 함수) - SQLite"""
+    def age(user_id, days):
+        with repository.db.writer() as conn:
+            since = conn.execute("SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', ?)", (f'-{days} days',)).fetchone()[0]
+            conn.execute('UPDATE tombstones SET deleted_at = ? WHERE user_id = ?', (since, user_id))
+        return since
+
+    def count(user_id):
+        with repository.db.reader() as conn:
+            return conn.execute('SELECT COUNT(*) FROM tombstones WHERE user_id = ?', (user_id,)).fetchone()[0]
+    return age, count
+
+
+def fake_tombstones(fake):
+    """sqlite_tombstones와 같은 두 함수 - 로컬 PostgREST 대역"""
+    def age(user_id, days):
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat(timespec='microseconds')
+        for row in fake.tables['tombstones']:
+            if row['user_id'] == user_id:
+                row['deleted_at'] = since
+        return since
+
+    def count(user_id):
+        return sum(row['user_id'] == user_id for row in fake.tables.get('tombstones', []))
+    return age, count
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from fake_postgrest import FakePostgREST
+        from shared import database_utils, supabase_transport
+        from shared.supabase_repository import SupabaseRepository
+
+        database_utils.configure(storage='sqlite')
+        database_utils.init_database()
+        database_utils.add_child(USER_ID, '첫째')
+        database_utils.add_child(USER_ID, '둘째')
+        database_utils.save_events(USER_ID, events_data(N_EVENTS))
+        # 앱이 몇 분 전에 동기화한 상황 (방금 저장한 행은 동기화 기준 시각의 5초 겹침 안에 있어 다시 내려감)
+        with database_utils.get_db_connection().writer() as conn:
+            for table in ('events', 'checklist_items', 'children'):
+                conn.execute(f"UPDATE {table} SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', '-10 minutes')")
+        token = database_utils.get_changes(USER_ID)['token']
+        mutate(database_utils, USER_ID)
+
+        full_size = full_refresh(database_utils, USER_ID)
+        full_ms = best_of(lambda: full_refresh(database_utils, USER_ID))
+        delta_size = len(sync_response(database_utils.get_changes(USER_ID, token)))
+        delta_ms = best_of(lambda: sync_response(database_utils.get_changes(USER_ID, token)))
+        print(f'{N_EVENTS} events x {ITEMS_PER_EVENT} items, 10 changes from another device (sqlite, no cache)')
+        print(f"{'':>14} | {'payload KB':>10} | {'ms':>7}")
+        print('-' * 38)
+        print(f"{'full refresh':>14} | {full_size / 1024:>10.1f} | {full_ms:>7.2f}")
+        print(f"{'sync delta':>14} | {delta_size / 1024:>10.1f} | {delta_ms:>7.2f}")
+        assert delta_size * 20 < full_size and delta_ms * 5 < full_ms
+        print(f"\ndelta payload is {full_size / delta_size:.0f}x smaller, {full_ms / delta_ms:.0f}x faster\n")
+
+        other = database_utils.encode_sync_token('2000-01-01 00:00:00.000')
+        database_utils.configure(storage='memory')
+        assert database_utils.get_changes(USER_ID, other)['full']   # 다른 저장소의 token -> 전체
+        for bad in ('not a token', database_utils.encode_sync_token(None)):
+            try:
+                database_utils.get_changes(USER_ID, bad)
+                raise AssertionError(f'{bad!r}는 거절되어야 함')
+            except ValueError:
+                pass
+
+        for storage in ('sqlite', 'memory', 'sqlite_sharded'):
+            database_utils.configure(storage=storage)
+            database_utils.init_database()
+            repository = database_utils.get_repository()
+            user_id = f'{storage}_user'
+            check_storage(storage, repository, user_id, repository.get_changes,
+                          archive=lambda user_id: database_utils.archive_old_events(user_id, after_days=30))
+            if storage == 'sqlite':
+                check_retention(storage, repository, user_id, *sqlite_tombstones(repository))
+        database_utils.close_db_connection()
+
+        with FakePostgREST(watermark_overlap_ms=0) as fake:
+            transport = supabase_transport.ManagedTransport(metrics=supabase_transport.TransportMetrics())
+            remote = SupabaseRepository(supabase_transport.create_client(fake.url, 'local.bench.key', transport=transport))
+            check_storage('supabase', remote, 'supabase_user', remote.get_changes)
+            check_retention('supabase', remote, 'supabase_user', *fake_tombstones(fake))
+            remote.close()
+
+
+if __name__ == '__main__':
+    main()
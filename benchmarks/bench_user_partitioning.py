@@ -0,0 +1,84 @@
+"""
+사용자별 데이터 분리 벤치마크
+
+한 가족(사용자)의 이벤트 수는 고정하고 전체 사용자 수만 늘려가며
+get_events(user_id) / get_children(user_id) 응답 시간을 측정합니다.
+user_id로 시작하는 인덱스를 타므로 전체 행 수와 관계없이 한 가족의 데이터 양만큼만 읽어야 합니다.
+
+실행: python benchmarks/bench_user_partitioning.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 SQLite로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+USER_COUNTS = [1, 10, 100, 1000]
+EVENTS_PER_USER = 50
+ITEMS_PER_EVENT = 4
+REPEAT = 20
+
+
+def seed(conn, first_user, last_user):
+    """user_{first_user} ~ user_{last_user - 1} 사용자의 이벤트, 체크리스트, 아이 생성"""
+    c = conn.cursor()
+    for u in range(first_user, last_user):
+        user_id = f'user_{u}'
+        c.executemany('INSERT INTO children (user_id, name, display_order) VALUES (?, ?, ?)',
+                      [(user_id, name, order) for order, name in enumerate(('첫째', '둘째'), 1)])
+        for i in range(EVENTS_PER_USER):
+            items = [f'준비물 {j}' for j in range(ITEMS_PER_EVENT)]
+            c.execute('''
+                INSERT INTO events (user_id, event_name, event_date, event_time, country, child_tag,
+                                    translation, cultural_context, tips, memo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, f'행사 {i}', f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}', '10:00', '네덜란드', '첫째',
+                  '번역', '문화', '팁', ''))
+            event_id = c.lastrowid
+            c.executemany('INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position) VALUES (?, ?, ?, 0, ?)',
+                          [(user_id, event_id, item, position) for position, item in enumerate(items)])
+
+
+def best_of(fn):
+    """REPEAT회 실행 중 가장 빠른 시간(ms)"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        database_utils.init_database()
+        db = database_utils.get_db_connection()
+        # 조회 캐시를 거치지 않고 저장소 조회 자체를 측정
+        repository = database_utils.get_repository()
+
+        print(f'{EVENTS_PER_USER} events x {ITEMS_PER_EVENT} items per user')
+        print(f"{'users':>6} | {'total events':>12} | {'get_events (ms)':>15} | {'get_children (ms)':>17}")
+        print('-' * 60)
+        seeded = 0
+        for n_users in USER_COUNTS:
+            with db.writer() as conn:
+                seed(conn, seeded, n_users)
+            seeded = n_users
+            assert len(repository.get_events('user_0')) == EVENTS_PER_USER
+            events_ms = best_of(lambda: repository.get_events('user_0'))
+            children_ms = best_of(lambda: repository.get_children('user_0'))
+            print(f'{n_users:>6} | {n_users * EVENTS_PER_USER:>12} | {events_ms:>15.2f} | {children_ms:>17.3f}')
+
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+"""
+로컬 PostgREST 대역 (Supabase 없이 SupabaseRepository / supabase_transport를 부하 테스트하기 위한 HTTP 서버)
+
+SupabaseRepository가 보내는 요청의 일부를 메모리 테이블로 처리합니다.
+- GET / POST(insert, upsert) / PATCH / DELETE: /rest/v1/<table>
+- 필터 eq, neq, gt, gte, lt, lte, in / order / limit / select 컬럼 목록과 체크리스트 embed (별칭:테이블(컬럼))
+- RPC: increment_usage, replica_changes, sync_changes (나머지 RPC와 or 필터는 404 / 400)
+- events 삭제 시 체크리스트도 삭제 (ON DELETE CASCADE)
+- 트리거 흉내: 이벤트/체크리스트 행의 updated_at (supabase_schema.sql 011), 체크리스트가 바뀌면 이벤트의 준비물 개수 (008),
+  아이의 updated_at과 이벤트/체크리스트/아이 삭제 기록 tombstones (012/014, 이벤트와 함께 지워진 체크리스트는 기록하지 않음)
+
+네트워크 상황 흉내:
+    latency_ms       - 모든 요청의 처리 지연
+    table_latency_ms - 테이블(RPC는 'rpc/<이름>')별 추가 지연 (응답 없는 서버 흉내)
+    handshake_ms     - 새 연결마다 첫 요청 전 지연 (TLS 핸드셰이크 흉내, keep-alive 효과 측정용)
+    fail_rate        - 처리하지 않고 fail_status(기본 503)로 응답하는 비율
+    drop_rate        - 응답 없이 연결을 끊는 비율
+    watermark_overlap_ms - replica_changes / sync_changes가 돌려주는 기준 시각을 현재보다 이만큼 앞당김 (스키마는 5초)
+
+사용:
+    with FakePostgREST(latency_ms=2) as fake:
+        client = supabase_transport.create_client(fake.url, 'local-key')
+"""
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+# id를 서버가 매기는 테이블 (나머지는 user_id 등 자연 키)
+SERIAL_TABLES = frozenset({'children', 'events', 'checklist_items', 'events_archive', 'checklist_items_archive', 'tombstones'})
+PRIMARY_KEYS = {
+    'users': ('user_id',),
+    'usage_tracking': ('user_id', 'month_year'),
+    'data_versions': ('user_id',),
+    'import_checkpoints': ('user_id', 'backup_id'),
+}
+EVENT_DEFAULTS = {'memo': '', 'checked_count': 0, 'total_count': 0}
+# embed할 자식 테이블의 외래 키, 부모 삭제 시 함께 삭제
+CHILD_TABLES = {'events': ('checklist_items', 'event_id'), 'events_archive': ('checklist_items_archive', 'event_id')}
+PARENT_TABLES = {child: parent for parent, (child, _) in CHILD_TABLES.items()}
+# updated_at을 유지하고 replica_changes로 변경분을 돌려주는 테이블
+REPLICA_TABLES = ('events', 'checklist_items', 'events_archive', 'checklist_items_archive')
+# 앱 동기화(sync_changes)가 변경분과 삭제 기록을 돌려주는 테이블
+SYNC_TABLES = ('events', 'checklist_items', 'children')
+UPDATED_AT_TABLES = frozenset(REPLICA_TABLES + SYNC_TABLES)
+
+
+class RequestFailed(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _split_top_level(text):
+    """괄호 밖의 쉼표로 나눔 ('id, rel:items(id, name)' -> ['id', 'rel:items(id, name)'])"""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current.append(char)
+    parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+
+def _parse_select(select):
+    """select 문자열 -> [(응답 키, 컬럼 이름 또는 (embed 테이블, 하위 select))]"""
+    columns = []
+    for part in _split_top_level(select or '*'):
+        if '(' in part:
+            head, inner = part.split('(', 1)
+            alias, _, table = head.partition(':')
+            columns.append((alias.strip(), (table.strip() or alias.strip(), _parse_select(inner[:-1]))))
+        else:
+            columns.append((part, part))
+    return columns
+
+
+def _match(row, column, operator, value):
+    current = row.get(column)
+    if operator == 'in':
+        return str(current) in [v.strip().strip('"') for v in value.strip('()').split(',')]
+    if operator == 'is':
+        return current is None if value == 'null' else str(current).lower() == value
+    if current is None:
+        return False
+    if isinstance(current, (int, float)) and not isinstance(current, bool):
+        try:
+            value = type(current)(value)
+        except ValueError:
+            return False
+    else:
+        current = str(current)
+    return {
+        'eq': current == value, 'neq': current != value, 'gt': current > value,
+        'gte': current >= value, 'lt': current < value, 'lte': current <= value,
+    }[operator]
+
+
+class FakePostgREST:
+    """메모리 테이블로 PostgREST 요청을 처리하는 로컬 HTTP 서버 (start()/stop() 또는 with 문)"""
+
+    def __init__(self, latency_ms=0, table_latency_ms=None, handshake_ms=0, fail_rate=0.0, fail_status=503,
+                 drop_rate=0.0, watermark_overlap_ms=5000, seed=0):
+        self.latency_ms = latency_ms
+        self.table_latency_ms = table_latency_ms or {}
+        self.handshake_ms = handshake_ms
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.drop_rate = drop_rate
+        self.watermark_overlap_ms = watermark_overlap_ms
+        self.tables = {}
+        self.connections = 0
+        self.requests = Counter()   # (method, 이름) -> 받은 요청 수
+        self._next_id = Counter()
+        self._random = random.Random(seed)
+        self._last_update = datetime.min.replace(tzinfo=timezone.utc)
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -------------------- 서버 --------------------
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # 헤더와 본문을 따로 쓰므로 Nagle + delayed ACK로 요청마다 40ms씩 늦어지지 않게
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with fake._lock:
+                    fake.connections += 1
+                self._new_connection = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if self._new_connection and fake.handshake_ms:
+                    time.sleep(fake.handshake_ms / 1000)
+                self._new_connection = False
+                status, payload = fake.handle(self.command, self.path, self.headers, body)
+                if status is None:   # 연결 끊기
+                    self.close_connection = True
+                    return
+                data = json.dumps(payload).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    if status == 503:
+                        self.send_header('Retry-After', '0')
+                    self.end_headers()
+                    self.wfile.write(data)
+                except ConnectionError:   # 타임아웃으로 클라이언트가 먼저 끊음
+                    self.close_connection = True
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    # -------------------- 요청 처리 --------------------
+
+    def handle(self, method, raw_path, headers, body):
+        """(상태 코드, JSON 응답) - 상태 코드가 None이면 응답 없이 연결을 끊음"""
+        parts = urlsplit(raw_path)
+        name = parts.path.split('/rest/v1/', 1)[-1].strip('/')
+        with self._lock:
+            self.requests[(method, name)] += 1
+            roll = self._random.random()
+        time.sleep((self.latency_ms + self.table_latency_ms.get(name, 0)) / 1000)
+        if roll < self.drop_rate:
+            return None, None
+        if roll < self.drop_rate + self.fail_rate:
+            return self.fail_status, {'message': 'service unavailable'}
+        if not headers.get('apikey'):
+            return 401, {'message': 'No API key found in request'}
+        try:
+            params = parse_qsl(parts.query, keep_blank_values=True)
+            payload = json.loads(body) if body else None
+            with self._lock:
+                if name.startswith('rpc/'):
+                    return 200, self._rpc(name[4:], payload or {})
+                return 200 if method != 'POST' else 201, self._table_request(method, name, params, headers, payload)
+        except RequestFailed as e:
+            return e.status, {'message': str(e)}
+
+    def _table_request(self, method, table, params, headers, payload):
+        rows = self.tables.setdefault(table, [])
+        select, order, limit, filters = '*', [], None, []
+        for key, value in params:
+            if key == 'select':
+                select = value
+            elif key == 'order':
+                order += value.split(',')
+            elif key == 'limit':
+                limit = int(value)
+            elif key in ('or', 'and', 'offset', 'on_conflict'):
+                if key != 'on_conflict':
+                    raise RequestFailed(400, f'{key} is not supported by the fake server')
+            else:
+                operator, _, value = value.partition('.')
+                filters.append((key, operator, value))
+        prefer = headers.get('Prefer') or ''
+
+        if method == 'POST':
+            new_rows = payload if isinstance(payload, list) else [payload]
+            written = [self._insert(table, row, 'merge-duplicates' in prefer) for row in new_rows]
+            return self._project(written, _parse_select(select)) if 'return=representation' in prefer else []
+
+        matched = [row for row in rows if all(_match(row, *f) for f in filters)]
+        if method == 'GET':
+            for spec in reversed(order):
+                column, _, direction = spec.partition('.')
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse='desc' in direction)
+            return self._project(matched[:limit] if limit is not None else matched, _parse_select(select))
+        if method == 'PATCH':
+            for row in matched:
+                row.update(payload)
+                if table in UPDATED_AT_TABLES:
+                    row['updated_at'] = self._timestamp()
+        elif method == 'DELETE':
+            ids = {id(row) for row in matched}
+            self.tables[table] = [row for row in rows if id(row) not in ids]
+            if table in SYNC_TABLES:
+                self._tombstone(table, matched)
+            if table in CHILD_TABLES:
+                child, key = CHILD_TABLES[table]
+                deleted = {row.get('id') for row in matched}
+                self.tables[child] = [row for row in self.tables.get(child, []) if row.get(key) not in deleted]
+        else:
+            raise RequestFailed(405, f'{method} is not supported')
+        if table in PARENT_TABLES:
+            for event_id in {row.get('event_id') for row in matched}:
+                self._recount(PARENT_TABLES[table], event_id)
+        return self._project(matched, _parse_select(select)) if 'return=representation' in prefer else []
+
+    def _timestamp(self):
+        """행의 updated_at (같은 마이크로초에 두 번 바뀌어도 뒤의 변경이 더 늦은 시각을 갖도록)"""
+        self._last_update = max(datetime.now(timezone.utc), self._last_update + timedelta(microseconds=1))
+        return self._last_update.isoformat(timespec='microseconds')
+
+    def _tombstone(self, table, rows):
+        """삭제 트리거 흉내: 지운 행의 id를 tombstones에 기록"""
+        deleted_at = self._timestamp()
+        for row in rows:
+            self._insert('tombstones', {'user_id': row.get('user_id'), 'entity': table, 'entity_id': row.get('id'),
+                                        'deleted_at': deleted_at}, False)
+
+    def _recount(self, table, event_id):
+        """체크리스트 트리거 흉내: 이벤트의 준비물 개수를 다시 세고 updated_at 갱신"""
+        event = next((row for row in self.tables.get(table, []) if row.get('id') == event_id), None)
+        if event is None:
+            return
+        child, key = CHILD_TABLES[table]
+        items = [row for row in self.tables.get(child, []) if row.get(key) == event_id]
+        event.update(total_count=len(items), checked_count=sum(1 for row in items if row.get('is_checked')),
+                     updated_at=self._timestamp())
+
+    def _insert(self, table, row, upsert):
+        row = dict(row)
+        if table in SERIAL_TABLES and 'id' not in row:
+            self._next_id[table] += 1
+            row['id'] = self._next_id[table]
+        if table in ('events', 'events_archive'):
+            row = dict(EVENT_DEFAULTS, created_at=datetime.now(timezone.utc).isoformat(), **row)
+        if table in UPDATED_AT_TABLES:
+            row['updated_at'] = self._timestamp()
+        key = PRIMARY_KEYS.get(table)
+        rows = self.tables.setdefault(table, [])
+        if key:
+            existing = next((r for r in rows if all(r.get(k) == row.get(k) for k in key)), None)
+            if existing is not None:
+                if not upsert:
+                    raise RequestFailed(409, f'duplicate key value violates unique constraint on {table}')
+                existing.update(row)
+                return existing
+        rows.append(row)
+        if table in PARENT_TABLES:
+            self._recount(PARENT_TABLES[table], row.get('event_id'))
+        return row
+
+    def _project(self, rows, columns):
+        projected = []
+        for row in rows:
+            item = {}
+            for key, column in columns:
+                if isinstance(column, tuple):
+                    child, child_columns = column
+                    foreign_key = dict(CHILD_TABLES.values()).get(child, 'event_id')
+                    children = [r for r in self.tables.get(child, []) if r.get(foreign_key) == row.get('id')]
+                    item[key] = self._project(children, child_columns)
+                elif column == '*':
+                    item.update(row)
+                else:
+                    item[key] = row.get(column)
+            projected.append(item)
+        return projected
+
+    def _rpc(self, function, params):
+        if function == 'increment_usage':
+            row = self._insert('usage_tracking', {'user_id': params['p_user_id'], 'month_year': params['p_month_year']}, True)
+            row['analysis_count'] = row.get('analysis_count', 0) + 1
+            return row['analysis_count']
+        if function == 'replica_changes':
+            return self._replica_changes(params['p_user_id'], params.get('p_since'), params.get('p_id_tables') or [])
+        if function == 'sync_changes':
+            return self._sync_changes(params['p_user_id'], params.get('p_since'), params['p_details'], params['p_retention_days'])
+        raise RequestFailed(404, f'Could not find the function public.{function}')
+
+    def _replica_changes(self, user_id, since, id_tables):
+        """supabase_schema.sql 011 replica_changes와 같은 결과"""
+        def owned(table):
+            return [row for row in self.tables.get(table, []) if row.get('user_id') == user_id]
+
+        watermark = datetime.now(timezone.utc) - timedelta(milliseconds=self.watermark_overlap_ms)
+        tier = next((row['subscription_tier'] for row in owned('users')), None)
+        children = sorted(owned('children'), key=lambda row: (row.get('display_order') is None, row.get('display_order'), row['id']))
+        result = {
+            'watermark': watermark.isoformat(timespec='microseconds'),
+            'tier': tier,
+            'children': [{'name': row['name'], 'display_order': row.get('display_order')} for row in children],
+            'usage': [{'month_year': row['month_year'], 'analysis_count': row.get('analysis_count', 0)}
+                      for row in owned('usage_tracking')],
+            'counts': {},
+            'ids': {},
+        }
+        for table in REPLICA_TABLES:
+            rows = sorted(owned(table), key=lambda row: row['id'])
+            result[table] = [{k: v for k, v in row.items() if k != 'updated_at'}
+                             for row in rows if since is None or row['updated_at'] > since]
+            result['counts'][table] = len(rows)
+            if table in id_tables:
+                result['ids'][table] = [row['id'] for row in rows]
+        return result
+
+    def _sync_changes(self, user_id, since, details, retention_days):
+        """supabase_schema.sql 014 sync_changes와 같은 결과 (보관 기간이 지난 since는 전체, 지난 삭제 기록은 지움)"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat(timespec='microseconds')
+        self.tables['tombstones'] = [row for row in self.tables.get('tombstones', [])
+                                     if row.get('user_id') != user_id or row['deleted_at'] >= cutoff]
+        if since is not None and since < cutoff:
+            since = None
+
+        def changed(table, key, column='updated_at'):
+            rows = [row for row in self.tables.get(table, [])
+                    if row.get('user_id') == user_id and (since is None or row[column] > since)]
+            return sorted(rows, key=key)
+
+        hidden = {'updated_at', 'user_id'} | (set() if details else {'translation', 'cultural_context', 'tips'})
+        deleted = {}
+        for row in changed('tombstones', lambda row: (row['deleted_at'], row['id']), 'deleted_at'):
+            deleted.setdefault(row['entity'], []).append(row['entity_id'])
+        return {
+            'watermark': (datetime.now(timezone.utc) - timedelta(milliseconds=self.watermark_overlap_ms)).isoformat(timespec='microseconds'),
+            'full': since is None,
+            'events': [{k: v for k, v in row.items() if k not in hidden} for row in changed('events', lambda row: row['id'])],
+            'checklist_items': [
+                {k: row.get(k) for k in ('id', 'event_id', 'item_name', 'is_checked', 'position', 'metadata')}
+                for row in changed('checklist_items', lambda row: (row['event_id'], row.get('position') or 0, row['id']))
+            ],
+            'children': [
+                {k: row.get(k) for k in ('id', 'name', 'display_order')}
+                for row in changed('children', lambda row: (row.get('display_order') is None, row.get('display_order'), row['id']))
+            ],
+            'deleted': {} if since is None else deleted,
+        }
@@ -0,0 +1,158 @@
+"""
+공유 연결 동시성 스트레스 테스트
+
+ConnectionManager의 연결은 with 블록이 끝나면 다른 스레드가 씁니다.
+블록 안에서 만든 커서가 블록 밖에서 정리되면 캐시된 문장을 다른 스레드가 실행하는 도중에 리셋해
+"InterfaceError: bad parameter or other API misuse"가 나므로 다음을 확인합니다.
+- 블록 밖으로 나간 커서는 블록이 끝날 때 닫혀 있음 (그 뒤에 쓰면 ProgrammingError)
+- 커서를 늦게 놓는 스레드와 같은 문장을 오래 실행하는 스레드가 같은 쓰기 연결을 번갈아 써도 오류 없음
+- 여러 스레드가 저장/조회/수정/검색/동기화/복원을 섞어 호출해도 오류 없음
+- close() 때 빌려 간 읽기 연결은 반납하는 순간 닫힘
+CPU 부하 없이도 스레드 전환이 자주 일어나도록 switch interval을 줄여 실행합니다.
+
+실행: python benchmarks/stress_shared_connections.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from shared.sqlite_repository import SQLiteRepository, SQL_INSERT_CHECKLIST_ITEM
+
+THREADS = 16
+CALLS_PER_THREAD = 50
+LATE_RELEASES = 100
+USER_ID = 'stress_user'
+
+
+def run_threads(targets):
+    """targets의 함수를 각자의 스레드에서 동시에 시작, 발생한 예외 목록 반환"""
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(targets))
+
+    def wrap(target):
+        def worker():
+            barrier.wait()
+            try:
+                target()
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+        return worker
+
+    threads = [threading.Thread(target=wrap(target)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def check_escaped_cursors(repository):
+    with repository.db.writer() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        temporary = conn.execute('SELECT 1')
+    with repository.db.reader() as conn:
+        reader_cursor = conn.cursor()
+        reader_cursor.execute('SELECT 1')
+    for escaped in (cursor, temporary, reader_cursor):
+        try:
+            escaped.execute('SELECT 1')
+        except sqlite3.ProgrammingError:
+            continue
+        raise AssertionError('cursor outlived its block')
+    print('escaped cursors: closed when the block ends')
+
+
+def check_late_release(repository):
+    """예전 save_events처럼 커서를 블록 밖에서 놓는 스레드 vs 같은 INSERT를 오래 실행하는 스레드"""
+    event_id = repository.save_events(USER_ID, [{'event_name': 'late', 'event_date': '2026-01-01'}])[0]
+    db = repository.db
+    done = threading.Event()
+
+    def late_release():
+        try:
+            for _ in range(LATE_RELEASES):
+                with db.writer() as conn:
+                    cursor = conn.cursor()
+                    cursor.executemany(SQL_INSERT_CHECKLIST_ITEM, [(USER_ID, event_id, 'late', 0, None)] * 3)
+                time.sleep(0.0005)
+                del cursor
+        finally:
+            done.set()
+
+    def long_insert():
+        while not done.is_set():
+            with db.writer() as conn:
+                conn.executemany(SQL_INSERT_CHECKLIST_ITEM, [(USER_ID, event_id, 'long', i, None) for i in range(200)])
+                conn.execute('DELETE FROM checklist_items WHERE event_id = ?', (event_id,))
+
+    errors = run_threads([late_release, long_insert])
+    assert not errors, errors[:3]
+    print(f'late cursor release: {LATE_RELEASES} releases, 0 errors')
+
+
+def check_mixed_calls(repository):
+    def worker(n):
+        def run():
+            for i in range(CALLS_PER_THREAD):
+                event_ids = repository.save_events(USER_ID, [
+                    {'event_name': f'stress {n} {i}', 'event_date': f'2026-02-{i % 28 + 1:02d}', 'checklist': ['a', 'b']},
+                    {'event_name': f'stress {n} {i} b', 'event_date': '2025-01-01', 'checklist': ['c']},
+                ])
+                repository.get_events(USER_ID, limit=20)
+                repository.update_event(USER_ID, event_ids[0], {'event_name': f'updated {n} {i}', 'event_date': '2026-03-01'})
+                repository.search_events(USER_ID, ['stress'], 10)
+                repository.get_changes(USER_ID)
+                repository.get_archived_events(USER_ID, limit=10)
+                if i % 10 == 0:
+                    repository.archive_events(USER_ID, '2025-06-01', 50)
+                    repository.restore_backup_chunk(USER_ID, f'backup-{n}', i, [
+                        {'type': 'child', 'name': f'child {n}'},
+                        {'type': 'event', 'event_name': f'restored {n} {i}', 'event_date': '2026-04-01',
+                         'created_at': '2026-01-01 00:00:00', 'archived': False,
+                         'checklist': [{'name': 'x', 'checked': True}]},
+                    ])
+        return run
+
+    start = time.perf_counter()
+    errors = run_threads([worker(n) for n in range(THREADS)])
+    elapsed = time.perf_counter() - start
+    assert not errors, (len(errors), errors[:3])
+    print(f'mixed calls: {THREADS} threads x {CALLS_PER_THREAD} iterations, 0 errors ({elapsed:.1f}s)')
+
+
+def check_close_while_borrowed(path):
+    repository = SQLiteRepository(path)
+    with repository.db.reader() as conn:
+        repository.close()
+    try:
+        conn.execute('SELECT 1')
+    except sqlite3.ProgrammingError:
+        print('close(): borrowed reader closed on return')
+    else:
+        raise AssertionError('borrowed reader was returned to the pool after close()')
+
+
+def main():
+    sys.setswitchinterval(1e-4)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'stress.db')
+        repository = SQLiteRepository(path)
+        repository.init()
+        check_escaped_cursors(repository)
+        check_late_release(repository)
+        check_mixed_calls(repository)
+        repository.close()
+        check_close_while_borrowed(path)
+
+
+if __name__ == '__main__':
+    main()
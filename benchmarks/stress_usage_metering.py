@@ -0,0 +1,130 @@
+"""
+사용량 계량 동시성 스트레스 테스트
+
+여러 스레드가 같은 사용자의 분석 횟수를 동시에 차감할 때
+- consume_usage: 허용된 횟수 == 최종 사용량 == min(시도 횟수, 한도) (한도 초과/유실 없음)
+- increment_usage: 최종 사용량 == 시도 횟수 (유실 없음)
+- refund_usage: 차감한 만큼 정확히 되돌아감
+을 저장소별(memory / sqlite / sqlite_sharded)로 확인합니다.
+비교용으로 예전 방식(읽고 +1 해서 쓰기)이 같은 조건에서 잃어버리는 횟수도 출력합니다.
+
+실행: python benchmarks/stress_usage_metering.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 벤치마크는 항상 로컬 저장소로 실행
+os.environ['SENSE_COACH_STORAGE'] = 'sqlite'
+
+THREADS = 16
+CALLS_PER_THREAD = 50
+LIMITS = {'FREE': 300, 'PREMIUM': 9999}
+MONTH = '2026-01'
+
+
+def hammer(fn, user_id):
+    """THREADS개 스레드가 동시에 fn(user_id)를 CALLS_PER_THREAD번씩 호출, (결과 목록, 소요 시간) 반환"""
+    results = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def worker():
+        mine = []
+        barrier.wait()
+        for _ in range(CALLS_PER_THREAD):
+            mine.append(fn(user_id))
+        with lock:
+            results.extend(mine)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def legacy_increment(repository):
+    """예전 Supabase 방식: 현재 값을 읽고 +1 한 값을 따로 씀"""
+    db = repository.db
+
+    def increment(user_id):
+        current = repository.get_usage(user_id, MONTH)
+        time.sleep(0)   # 읽기와 쓰기 사이에 다른 스레드가 끼어들 수 있음
+        with db.writer() as conn:
+            conn.execute('INSERT OR REPLACE INTO usage_tracking (user_id, month_year, analysis_count) VALUES (?, ?, ?)',
+                         (user_id, MONTH, current + 1))
+    return increment
+
+
+def check(storage, repository):
+    attempts = THREADS * CALLS_PER_THREAD
+
+    results, elapsed = hammer(lambda user_id: repository.consume_usage(user_id, MONTH, LIMITS), 'free_user')
+    allowed = sum(1 for result in results if result['allowed'])
+    final = repository.get_usage('free_user', MONTH)
+    expected = min(attempts, LIMITS['FREE'])
+    assert allowed == final == expected, (storage, allowed, final, expected)
+    assert sorted(r['usage'] for r in results if r['allowed']) == list(range(1, expected + 1)), storage
+    assert all(r['usage'] == expected and r['limit'] == LIMITS['FREE'] for r in results if not r['allowed']), storage
+    print(f"{storage:>14} | consume   | {attempts:>8} | {allowed:>7} | {final:>5} | {attempts / elapsed:>8.0f}")
+
+    repository.get_user_tier('premium_user')
+    repository.update_user_tier('premium_user', 'PREMIUM')
+    results, elapsed = hammer(lambda user_id: repository.consume_usage(user_id, MONTH, LIMITS), 'premium_user')
+    final = repository.get_usage('premium_user', MONTH)
+    assert all(r['allowed'] for r in results) and final == attempts, (storage, final)
+    print(f"{storage:>14} | premium   | {attempts:>8} | {attempts:>7} | {final:>5} | {attempts / elapsed:>8.0f}")
+
+    results, elapsed = hammer(lambda user_id: repository.increment_usage(user_id, MONTH), 'counter_user')
+    final = repository.get_usage('counter_user', MONTH)
+    assert final == attempts and sorted(results) == list(range(1, attempts + 1)), (storage, final)
+    print(f"{storage:>14} | increment | {attempts:>8} | {attempts:>7} | {final:>5} | {attempts / elapsed:>8.0f}")
+
+    _, elapsed = hammer(lambda user_id: repository.refund_usage(user_id, MONTH), 'counter_user')
+    final = repository.get_usage('counter_user', MONTH)
+    assert final == 0, (storage, final)
+    print(f"{storage:>14} | refund    | {attempts:>8} | {attempts:>7} | {final:>5} | {attempts / elapsed:>8.0f}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        from shared import database_utils
+
+        print(f'{THREADS} threads x {CALLS_PER_THREAD} calls, FREE limit {LIMITS["FREE"]}')
+        print(f"{'storage':>14} | {'operation':<9} | {'attempts':>8} | {'counted':>7} | {'final':>5} | {'calls/s':>8}")
+        print('-' * 66)
+        for storage in ('memory', 'sqlite', 'sqlite_sharded'):
+            database_utils.configure(storage=storage)
+            database_utils.init_database()
+            check(storage, database_utils.get_repository())
+
+        database_utils.configure(storage='sqlite')
+        database_utils.init_database()
+        _, elapsed = hammer(legacy_increment(database_utils.get_repository()), 'legacy_user')
+        final = database_utils.get_repository().get_usage('legacy_user', MONTH)
+        print(f"{'sqlite':>14} | {'read+set':<9} | {THREADS * CALLS_PER_THREAD:>8} | {final:>7} | {final:>5} | "
+              f"{THREADS * CALLS_PER_THREAD / elapsed:>8.0f}  <- 예전 방식, {THREADS * CALLS_PER_THREAD - final}회 유실")
+
+        # 퍼사드: PLANS의 FREE 한도만큼만 허용
+        free_limit = database_utils.ANALYSIS_LIMITS['FREE']
+        results = [database_utils.consume_analysis('facade_user') for _ in range(free_limit + 2)]
+        assert [r['allowed'] for r in results] == [True] * free_limit + [False] * 2
+        assert database_utils.get_usage('facade_user') == free_limit
+        database_utils.refund_analysis('facade_user')
+        assert database_utils.get_usage('facade_user') == free_limit - 1
+        print(f'\nconsume_analysis: PLANS FREE 한도 {free_limit}회 확인')
+
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    main()
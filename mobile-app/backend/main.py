@@ -2,23 +2,45 @@
 FastAPI Backend for Sense Coach Mobile App
 """
 import os
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import sys
+from datetime import date
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Header, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Union, Dict, Any
 from PIL import Image
 import io
+import itertools
 from dotenv import load_dotenv
 
 # 환경 변수 로드
 load_dotenv()
 
-from database_utils import (
-    init_database, get_children, add_child, delete_child,
-    update_child_name, save_event, get_events, delete_event,
+# 데이터 접근 계층은 저장소 루트의 shared 패키지를 사용 (Streamlit 앱과 공용)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from shared.database_utils import (
+    close_db_connection, get_cache_stats, get_transport_stats, get_replica_status,
+    EVENTS_PAGE_SIZE, MAX_BATCH_EVENTS, StorageUnavailableError
+)
+from shared.signed_tokens import new_api_session, user_from_api_token
+from shared.replica_repository import ReadOnlyModeError, CIRCUIT_RESET
+from shared.request_context import RequestContext
+from shared.models import event_projection
+from shared.calendar_export import (
+    calendar_chunks, calendar_token, calendar_validators, is_not_modified, user_from_calendar_token
+)
+from shared.backup import export_chunks, import_lines, backup_filename, BACKUP_MEDIA_TYPE
+# 엔드포인트는 이벤트 루프를 막지 않도록 awaitable 버전(DB 전용 스레드 풀에서 실행)을 사용
+from shared.async_database_utils import (
+    init_database, shutdown_executor, run_db, iterate, get_children, add_child, delete_child,
+    update_child_name, save_event, save_events, get_events_page, get_event_by_id, delete_event,
+    archive_old_events, get_archived_events_page, search_events,
     update_checklist_item, update_event, add_checklist_item,
-    delete_checklist_item, update_checklist_item_name, reset_all_data,
-    get_user_tier, get_usage, increment_usage, update_user_tier
+    delete_checklist_item, reset_all_data, get_data_version, get_changes, user_etag,
+    get_user_tier, get_usage, increment_usage
 )
 from ai_logic import analyze_with_gemini, parse_analysis_result
 from payment_config import PLANS
@@ -39,17 +61,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 앱 시작 시 데이터베이스 초기화
+# 앱 시작 시 데이터베이스 초기화 (연결 관리자도 이때 생성되어 워커 수명 동안 재사용)
 @app.on_event("startup")
 async def startup_event():
-    init_database()
+    await init_database()
+
+# 앱 종료 시 DB 스레드 풀과 열린 SQLite 연결 정리
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executor()
+    close_db_connection()
+
+# 이벤트/아이/체크리스트는 사용자별 데이터 - 요청한 사용자는 POST /api/session이 발급한 서명 토큰
+# (Authorization: Bearer <token>)으로 식별하며, 토큰이 없거나 서명이 맞지 않으면 401
+# 사용자 구분 이전 데이터('local', 이전 앱의 'temp-user-001')는 운영자가 python -m shared.backup claim으로 옮김
+
+def _secret_or_500(func, *args):
+    try:
+        return func(*args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
+
+def current_user_id(authorization: Optional[str] = Header(None), x_user_id: Optional[str] = Header(None)) -> str:
+    token = _bearer_token(authorization)
+    if token is None:
+        raise HTTPException(status_code=401, detail="인증 토큰이 필요합니다.", headers={"WWW-Authenticate": "Bearer"})
+    user_id = _secret_or_500(user_from_api_token, token)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="인증 토큰이 올바르지 않습니다.", headers={"WWW-Authenticate": "Bearer"})
+    # 이전 버전 앱처럼 X-User-Id를 함께 보내면 토큰의 사용자와 같아야 함
+    if x_user_id and x_user_id != user_id:
+        raise HTTPException(status_code=403, detail="다른 사용자의 데이터에는 접근할 수 없습니다.")
+    return user_id
+
+def _request_user(request: Request) -> Optional[str]:
+    """로그/DB 호출 집계용 사용자 (토큰이 없거나 잘못됐으면 None - 인증은 current_user_id가 담당)"""
+    token = _bearer_token(request.headers.get("authorization"))
+    try:
+        return user_from_api_token(token) if token else None
+    except RuntimeError:
+        return None
+
+# 요청마다 DB 호출 수 집계 (응답 헤더 X-DB-Calls, 예산 초과는 SENSE_COACH_DB_CALL_BUDGET 기준으로 로그)
+# 헤더는 본문보다 먼저 나가므로 X-DB-Calls에는 스트리밍 본문(백업/캘린더)을 만드는 동안의 호출이 빠짐
+# 예산은 본문을 다 보낸 뒤 확인하므로 스트리밍 중 호출도 포함 (본문은 요청 컨텍스트를 복사한 태스크에서 실행되어 같은 ctx에 기록됨)
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    with RequestContext(_request_user(request), check_on_exit=False) as ctx:
+        try:
+            response = await call_next(request)
+        except BaseException:
+            ctx.check_budget(raise_error=False)
+            raise
+    response.headers["X-DB-Calls"] = str(ctx.db_call_count())
+    body = response.body_iterator
+
+    async def body_then_check_budget():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            ctx.check_budget(raise_error=False)
+
+    response.body_iterator = body_then_check_budget()
+    return response
+
+# 읽기 복제본(SENSE_COACH_STORAGE=supabase_replica)이 Supabase에 닿지 못해 읽기 전용으로 동작하는 동안의 쓰기
+@app.exception_handler(ReadOnlyModeError)
+async def read_only_mode_handler(request: Request, exc: ReadOnlyModeError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(int(CIRCUIT_RESET))})
+
+# 저장소(Supabase) 조회가 재시도 후에도 실패 - 빈 목록/기본값을 200으로 보내지 않고 (ETag도 붙이지 않음) 다시 시도하도록
+STORAGE_RETRY_AFTER = 5
+
+@app.exception_handler(StorageUnavailableError)
+async def storage_unavailable_handler(request: Request, exc: StorageUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(STORAGE_RETRY_AFTER)})
 
 # ==================== Pydantic 모델 ====================
 
 class AnalyzeRequest(BaseModel):
     text: Optional[str] = None
     country: str = "네덜란드"
-    user_id: str
 
 class ChildCreate(BaseModel):
     name: str
@@ -67,9 +168,14 @@ class EventCreate(BaseModel):
     translation: Optional[str] = ""
     cultural_context: Optional[str] = ""
     tips: Optional[str] = ""
-    checklist_items: Optional[List[str]] = []
+    # 항목은 이름 문자열 또는 {"name": ..., "metadata": {...}}
+    checklist_items: Optional[List[Union[str, Dict[str, Any]]]] = []
     memo: Optional[str] = ""
 
+class EventBatchCreate(BaseModel):
+    # 요청 하나가 쓰기 잠금을 오래 잡지 않도록 개수 제한 (넘으면 422)
+    events: List[EventCreate] = Field(..., max_length=MAX_BATCH_EVENTS)
+
 class EventUpdate(BaseModel):
     event_name: Optional[str] = None
     event_date: Optional[str] = None
@@ -89,33 +195,36 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "cache": get_cache_stats(), "supabase": get_transport_stats(),
+            "replica": get_replica_status()}
+
+# -------------------- 세션 API --------------------
+
+@app.post("/api/session")
+async def create_session():
+    """앱 설치마다 한 번: 새 사용자 id와 API 토큰 발급 (앱은 기기에 저장해 두고 Authorization: Bearer로 전송)"""
+    return _secret_or_500(new_api_session)
 
 # -------------------- 분석 API --------------------
 
 @app.post("/api/analyze")
-async def analyze_notice(request: AnalyzeRequest):
+async def analyze_notice(request: AnalyzeRequest, user_id: str = Depends(current_user_id)):
     """학교 알림장 텍스트 분석"""
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="API 키가 설정되지 않았습니다.")
     
-    # 사용량 확인 (무제한으로 변경)
-    tier = get_user_tier(request.user_id)
-    usage = get_usage(request.user_id)
-    # limit = PLANS.get(tier, {}).get("monthly_limit", 5)
-    
-    # if limit != -1 and usage >= limit:
-    #     raise HTTPException(status_code=403, detail="월간 사용량을 초과했습니다.")
+    # 사용량 제한 없음 (무제한으로 변경) - 한도를 다시 적용할 때는 분석 전에 consume_analysis로
+    # 확인과 차감을 한 번에 하고, 실패 시 refund_analysis로 되돌릴 것
     
     # 분석 실행
-    result = analyze_with_gemini(request.text, None, request.country, api_key)
+    result = await run_in_threadpool(analyze_with_gemini, request.text, None, request.country, api_key)
     
     if result.startswith("❌"):
         raise HTTPException(status_code=500, detail=result)
     
-    # 사용량 증가
-    increment_usage(request.user_id)
+    # 사용량 증가 (증가 후 사용량을 한 번의 문장으로 받음)
+    usage = await increment_usage(user_id)
     
     # 결과 파싱
     parsed_events = parse_analysis_result(result, request.country)
@@ -123,7 +232,7 @@ async def analyze_notice(request: AnalyzeRequest):
     return {
         "raw_result": result,
         "parsed_events": parsed_events,
-        "usage": usage + 1,
+        "usage": usage,
         "limit": -1  # 무제한
     }
 
@@ -131,33 +240,28 @@ async def analyze_notice(request: AnalyzeRequest):
 async def analyze_image(
     file: UploadFile = File(...),
     country: str = Form("네덜란드"),
-    user_id: str = Form(...)
+    user_id: str = Depends(current_user_id)
 ):
     """이미지 분석"""
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="API 키가 설정되지 않았습니다.")
     
-    # 사용량 확인 (무제한으로 변경)
-    tier = get_user_tier(user_id)
-    usage = get_usage(user_id)
-    # limit = PLANS.get(tier, {}).get("monthly_limit", 5)
-    
-    # if limit != -1 and usage >= limit:
-    #     raise HTTPException(status_code=403, detail="월간 사용량을 초과했습니다.")
+    # 사용량 제한 없음 (무제한으로 변경) - 한도를 다시 적용할 때는 분석 전에 consume_analysis로
+    # 확인과 차감을 한 번에 하고, 실패 시 refund_analysis로 되돌릴 것
     
     # 이미지 읽기
     image_data = await file.read()
     image = io.BytesIO(image_data)
     
     # 분석 실행
-    result = analyze_with_gemini(None, image, country, api_key)
+    result = await run_in_threadpool(analyze_with_gemini, None, image, country, api_key)
     
     if result.startswith("❌"):
         raise HTTPException(status_code=500, detail=result)
     
-    # 사용량 증가
-    increment_usage(user_id)
+    # 사용량 증가 (증가 후 사용량을 한 번의 문장으로 받음)
+    usage = await increment_usage(user_id)
     
     # 결과 파싱
     parsed_events = parse_analysis_result(result, country)
@@ -165,115 +269,311 @@ async def analyze_image(
     return {
         "raw_result": result,
         "parsed_events": parsed_events,
-        "usage": usage + 1,
+        "usage": usage,
         "limit": -1  # 무제한
     }
 
+# -------------------- 조건부 조회 --------------------
+# 목록/아이/멤버십 조회는 DB의 사용자 데이터 변경 번호(database_utils.user_etag, 어느 프로세스의 쓰기든 바로 바뀜)로
+# 강한 ETag를 붙이고, 앱이 If-None-Match로 같은 ETag를 보내면 변경 번호 한 행만 읽고 304
+# (화면 포커스/새로고침마다 다시 요청해도 거의 비용 없음)
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+async def _conditional(request: Request, response: Response, user_id: str) -> Optional[Response]:
+    """응답에 ETag를 붙이고, 클라이언트가 같은 ETag를 가지고 있으면 보낼 304 응답 (없으면 None - 조회해서 응답)
+
+    ETag는 조회 전에 만들어야 함 (조회 도중 쓰기가 있으면 다음 요청에서 버전이 달라 다시 조회)
+    경로와 쿼리(페이지, fields), 날짜(다가오는 일정, 이번 달 사용량)가 다르면 다른 ETag
+    """
+    etag = await user_etag(user_id, date.today().isoformat(), request.url.path, request.url.query)
+    # 앱/브라우저가 저장은 하되 매번 ETag로 다시 확인하도록, 사용자는 Authorization 헤더(토큰)로 구분
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 # -------------------- 아이 관리 API --------------------
 
 @app.get("/api/children")
-async def list_children():
-    """아이 목록 조회"""
-    return {"children": get_children()}
+async def list_children(request: Request, response: Response, user_id: str = Depends(current_user_id)):
+    """아이 목록 조회 (If-None-Match가 현재 ETag와 같으면 304)"""
+    not_modified = await _conditional(request, response, user_id)
+    if not_modified:
+        return not_modified
+    return {"children": await get_children(user_id)}
 
 @app.post("/api/children")
-async def create_child(child: ChildCreate):
+async def create_child(child: ChildCreate, user_id: str = Depends(current_user_id)):
     """아이 추가"""
-    success = add_child(child.name)
+    success = await add_child(user_id, child.name)
     if not success:
         raise HTTPException(status_code=400, detail="같은 이름의 아이가 이미 존재합니다.")
     return {"message": f"'{child.name}'이(가) 추가되었습니다."}
 
 @app.delete("/api/children/{name}")
-async def remove_child(name: str):
+async def remove_child(name: str, user_id: str = Depends(current_user_id)):
     """아이 삭제"""
-    delete_child(name)
+    await delete_child(user_id, name)
     return {"message": f"'{name}'이(가) 삭제되었습니다."}
 
 @app.put("/api/children")
-async def rename_child(child: ChildUpdate):
+async def rename_child(child: ChildUpdate, user_id: str = Depends(current_user_id)):
     """아이 이름 수정"""
-    success = update_child_name(child.old_name, child.new_name)
+    success = await update_child_name(user_id, child.old_name, child.new_name)
     if not success:
         raise HTTPException(status_code=400, detail="이름 변경에 실패했습니다.")
     return {"message": f"'{child.old_name}'이(가) '{child.new_name}'으로 변경되었습니다."}
 
 # -------------------- 이벤트 API --------------------
 
+def _projection(fields, checklists):
+    """목록 조회의 fields 파라미터를 (응답 필드 목록 - 없으면 전체, checklists, details)로 (모르는 필드는 ValueError)"""
+    if fields is None:
+        return None, checklists, True
+    names, wants_checklists, details = event_projection(fields)
+    return names, checklists and wants_checklists, details
+
 @app.get("/api/events")
-async def list_events(future_only: bool = False):
-    """이벤트 목록 조회"""
-    events = get_events(future_only=future_only)
-    return {"events": events}
+async def list_events(
+    request: Request,
+    response: Response,
+    future_only: bool = False,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = None,
+    checklists: bool = True,
+    fields: Optional[str] = None,
+    user_id: str = Depends(current_user_id)
+):
+    """이벤트 목록 조회 (날짜 범위 필터 + 커서 기반 페이지네이션, 다음 페이지는 next_cursor로 요청)
+
+    checklists=false이면 checklist_with_status 없이 준비물 개수(checked_count/total_count)만 반환
+    fields: 'summary'(목록 카드용, 번역/문화 설명/팁/체크리스트 항목 제외), 'detail'(전체) 또는 쉼표로 구분한 필드 이름
+    If-None-Match가 현재 ETag와 같으면 DB를 읽지 않고 304
+    """
+    not_modified = await _conditional(request, response, user_id)
+    if not_modified:
+        return not_modified
+    try:
+        names, checklists, details = _projection(fields, checklists)
+        page = await get_events_page(user_id, future_only=future_only, date_from=date_from, date_to=date_to,
+                               page_size=limit, cursor=cursor, checklists=checklists, details=details)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"events": [event.to_dict(names) for event in page['events']], "next_cursor": page['next_cursor']}
 
 @app.post("/api/events")
-async def create_event(event: EventCreate):
+async def create_event(event: EventCreate, user_id: str = Depends(current_user_id)):
     """이벤트 저장"""
-    event_id = save_event(event.dict())
+    event_id = await save_event(user_id, event.dict())
     return {"message": "이벤트가 저장되었습니다.", "event_id": event_id}
 
+@app.post("/api/events:batch")
+async def create_events(batch: EventBatchCreate, user_id: str = Depends(current_user_id)):
+    """여러 이벤트 일괄 저장 (분석 결과 전체를 한 번에 저장, 모두 저장되거나 모두 실패)"""
+    if not batch.events:
+        raise HTTPException(status_code=400, detail="저장할 이벤트가 없습니다.")
+    event_ids = await save_events(user_id, [event.dict() for event in batch.events])
+    return {"message": f"{len(event_ids)}개의 이벤트가 저장되었습니다.", "event_ids": event_ids}
+
+@app.get("/api/events/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    user_id: str = Depends(current_user_id)
+):
+    """이벤트 검색 (보관된 이벤트 포함, 관련도 순, 다음 페이지는 next_offset으로 요청)"""
+    page = await search_events(user_id, q, page_size=limit, offset=offset)
+    return {
+        "results": [
+            {"event": result['event'].to_dict(), "archived": result['archived'], "snippet": result['snippet']}
+            for result in page['results']
+        ],
+        "next_offset": page['next_offset']
+    }
+
+@app.get("/api/events/archive")
+async def list_archived_events(
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = None,
+    checklists: bool = True,
+    fields: Optional[str] = None,
+    user_id: str = Depends(current_user_id)
+):
+    """보관된 이벤트 목록 조회 (최근 날짜부터, 다음 페이지는 next_cursor로 요청, checklists / fields는 목록 조회와 같음)"""
+    try:
+        names, checklists, details = _projection(fields, checklists)
+        page = await get_archived_events_page(user_id, page_size=limit, cursor=cursor, checklists=checklists, details=details)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"events": [event.to_dict(names) for event in page['events']], "next_cursor": page['next_cursor']}
+
+@app.post("/api/events:archive")
+async def archive_events(user_id: str = Depends(current_user_id)):
+    """보관 기간(SENSE_COACH_ARCHIVE_AFTER_DAYS)이 지난 이벤트를 보관 테이블로 이동"""
+    archived = await archive_old_events(user_id)
+    return {"message": f"{archived}개의 이벤트를 보관했습니다.", "archived": archived}
+
 @app.get("/api/events/{event_id}")
-async def get_event(event_id: int):
+async def get_event(event_id: int, user_id: str = Depends(current_user_id)):
     """특정 이벤트 조회"""
-    events = get_events()
-    event = next((e for e in events if e['id'] == event_id), None)
+    event = await get_event_by_id(user_id, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="이벤트를 찾을 수 없습니다.")
-    return {"event": event}
+    return {"event": event.to_dict()}
 
 @app.put("/api/events/{event_id}")
-async def modify_event(event_id: int, event: EventUpdate):
+async def modify_event(event_id: int, event: EventUpdate, user_id: str = Depends(current_user_id)):
     """이벤트 수정"""
-    update_event(event_id, event.dict(exclude_none=True))
+    await update_event(user_id, event_id, event.dict(exclude_none=True))
     return {"message": "이벤트가 수정되었습니다."}
 
 @app.delete("/api/events/{event_id}")
-async def remove_event(event_id: int):
+async def remove_event(event_id: int, user_id: str = Depends(current_user_id)):
     """이벤트 삭제"""
-    delete_event(event_id)
+    await delete_event(user_id, event_id)
     return {"message": "이벤트가 삭제되었습니다."}
 
 # -------------------- 체크리스트 API --------------------
 
 @app.put("/api/checklist/{item_id}")
-async def update_checklist(item_id: int, item: ChecklistItemUpdate):
+async def update_checklist(item_id: int, item: ChecklistItemUpdate, user_id: str = Depends(current_user_id)):
     """체크리스트 항목 상태 업데이트"""
-    update_checklist_item(item_id, item.is_checked)
+    await update_checklist_item(user_id, item_id, item.is_checked)
     return {"message": "체크리스트가 업데이트되었습니다."}
 
 @app.post("/api/events/{event_id}/checklist")
-async def add_checklist(event_id: int, item_name: str = Form(...)):
+async def add_checklist(event_id: int, item_name: str = Form(...), user_id: str = Depends(current_user_id)):
     """체크리스트 항목 추가"""
-    add_checklist_item(event_id, item_name)
+    await add_checklist_item(user_id, event_id, item_name)
     return {"message": f"'{item_name}'이(가) 추가되었습니다."}
 
 @app.delete("/api/checklist/{item_id}")
-async def remove_checklist(item_id: int):
+async def remove_checklist(item_id: int, user_id: str = Depends(current_user_id)):
     """체크리스트 항목 삭제"""
-    delete_checklist_item(item_id)
+    await delete_checklist_item(user_id, item_id)
     return {"message": "체크리스트 항목이 삭제되었습니다."}
 
+# -------------------- 동기화 API --------------------
+# 앱은 since 없이 한 번 전체를 받아 로컬에 저장한 뒤, 응답의 token을 since로 보내 바뀐 것만 받음
+
+@app.get("/api/sync")
+async def sync(since: Optional[str] = None, fields: Optional[str] = None, user_id: str = Depends(current_user_id)):
+    """since 토큰 이후 바뀐 이벤트/체크리스트 항목/아이와 삭제된 id (full=true이면 가진 데이터를 응답으로 교체)
+
+    보관된 이벤트는 deleted로 내려가고, fields는 목록 조회와 같음 (이벤트는 체크리스트 없이, 항목은 checklist_items로 따로)
+    """
+    try:
+        names, _, details = _projection(fields, False)
+        changes = await get_changes(user_id, since, details)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "token": changes['token'],
+        "full": changes['full'],
+        "events": [event.to_dict(names) for event in changes['events']],
+        "checklist_items": changes['checklist_items'],
+        "children": changes['children'],
+        "deleted": changes['deleted'],
+    }
+
+# -------------------- 캘린더 API --------------------
+# .ics는 이벤트를 페이지 단위로 읽으며 스트리밍하고, 사용자 데이터 변경 번호로 ETag / Last-Modified를 붙임
+# (바뀐 것이 없으면 변경 번호 한 행만 읽고 304, 같은 번호의 피드는 캐시된 본문을 그대로 전송)
+
+async def _calendar_response(request: Request, user_id: str, filename: Optional[str] = None):
+    version = await get_data_version(user_id)
+    etag, last_modified = calendar_validators(version)
+    # 캘린더 앱/브라우저가 매번 ETag로 다시 확인하도록 (no-cache = 저장은 하되 재검증 후 사용)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if is_not_modified(version, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    # 첫 조각(첫 페이지까지 읽음)을 응답 전에 만들어 저장소 조회 실패가 200 + 빈 피드 대신 503이 되도록
+    chunks = calendar_chunks(user_id, version)
+    first = await run_db(next, chunks)
+    return StreamingResponse(iterate(itertools.chain([first], chunks)),
+                             media_type="text/calendar; charset=utf-8", headers=headers)
+
+@app.get("/api/calendar/export.ics")
+async def export_calendar(request: Request, user_id: str = Depends(current_user_id)):
+    """일정 전체를 iCalendar(.ics) 파일로 내려받기 (보관된 이벤트 제외)"""
+    return await _calendar_response(request, user_id, filename="sense-coach.ics")
+
+@app.get("/api/calendar/feed")
+async def get_calendar_feed(request: Request, user_id: str = Depends(current_user_id)):
+    """캘린더 앱에 등록할 구독 URL (사용자별 서명 토큰 포함, 헤더 없이 접근 가능하므로 공유하지 않도록 안내)"""
+    token = _secret_or_500(calendar_token, user_id)
+    url = str(request.url_for("calendar_feed", token=token))
+    return {"url": url, "webcal_url": "webcal://" + url.split("://", 1)[1]}
+
+@app.get("/api/calendar/{token}.ics", name="calendar_feed")
+async def calendar_feed(token: str, request: Request):
+    """구독 피드 (캘린더 앱이 주기적으로 요청, If-None-Match / If-Modified-Since가 최신이면 304)"""
+    user_id = _secret_or_500(user_from_calendar_token, token)
+    # 서명이 맞지 않거나 형식이 잘못된 토큰(ASCII가 아닌 문자 포함)은 모두 404 - 어떤 토큰이 있는지 알려 주지 않음
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="캘린더를 찾을 수 없습니다.")
+    return await _calendar_response(request, user_id)
+
 # -------------------- 사용자 API --------------------
 
 @app.get("/api/user/{user_id}/membership")
-async def get_membership(user_id: str):
-    """멤버십 정보 조회"""
-    tier = get_user_tier(user_id)
-    usage = get_usage(user_id)
+async def get_membership(user_id: str, request: Request, response: Response,
+                         current_user: str = Depends(current_user_id)):
+    """멤버십 정보 조회 (토큰의 사용자 것만, If-None-Match가 현재 ETag와 같으면 304)"""
+    if user_id != current_user:
+        raise HTTPException(status_code=403, detail="다른 사용자의 멤버십은 조회할 수 없습니다.")
+    not_modified = await _conditional(request, response, user_id)
+    if not_modified:
+        return not_modified
+    tier = await get_user_tier(user_id)
+    usage = await get_usage(user_id)
     plan = PLANS.get(tier, PLANS["FREE"])
     
     return {
         "user_id": user_id,
         "tier": tier,
         "usage": usage,
-        "limit": plan["monthly_limit"],
+        "limit": plan["max_analyses_per_month"],
         "plan_name": plan["name"]
     }
 
 # -------------------- 데이터 관리 API --------------------
 
 @app.delete("/api/data/reset")
-async def reset_data():
-    """모든 데이터 초기화 (주의!)"""
-    reset_all_data()
+async def reset_data(user_id: str = Depends(current_user_id)):
+    """사용자의 모든 데이터 초기화 (주의!)"""
+    await reset_all_data(user_id)
     return {"message": "모든 데이터가 초기화되었습니다."}
+
+@app.get("/api/data/export")
+async def export_data(user_id: str = Depends(current_user_id)):
+    """아이, 이벤트(보관 포함)와 체크리스트, 월별 사용량을 JSON Lines 백업 파일로 내려받기 (페이지 단위 스트리밍)"""
+    return StreamingResponse(iterate(export_chunks(user_id)), media_type=BACKUP_MEDIA_TYPE,
+                             headers={"Content-Disposition": f'attachment; filename="{backup_filename()}"'})
+
+@app.post("/api/data/import")
+async def import_data(file: UploadFile = File(...), user_id: str = Depends(current_user_id)):
+    """백업 파일 복원 (묶음 단위 트랜잭션, 실패한 복원은 같은 파일을 다시 올리면 이어서 진행)
+
+    업로드는 임시 파일에 받아 두고 DB 스레드 풀에서 한 줄씩 읽어 넣으므로 파일 전체를 메모리에 올리지 않음
+    """
+    try:
+        result = await run_db(import_lines, user_id, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await file.close()
+    return result
@@ -0,0 +1,4 @@
+// 네이티브 모듈이 없는 테스트 환경에서는 AsyncStorage를 메모리 구현으로 대체
+jest.mock('@react-native-async-storage/async-storage', () =>
+  require('@react-native-async-storage/async-storage/jest/async-storage-mock'),
+);
@@ -19,11 +19,14 @@ const DashboardScreen: React.FC<DashboardScreenProps> = ({ navigation }) => {
     const [events, setEvents] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
     const [refreshing, setRefreshing] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const fetchEvents = async () => {
         try {
-            const data = await getEvents(false); // 모든 일정 보기 (디버깅용)
+            const data = await getEvents(false, { fields: 'summary' }); // 모든 일정 보기 (디버깅용)
             setEvents(data.events || []);
+            setNextCursor(data.next_cursor || null);
         } catch (error) {
             console.error(error);
         } finally {
@@ -32,6 +35,20 @@ const DashboardScreen: React.FC<DashboardScreenProps> = ({ navigation }) => {
         }
     };
 
+    const fetchMoreEvents = async () => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const data = await getEvents(false, { cursor: nextCursor, fields: 'summary' });
+            setEvents((prev) => [...prev, ...(data.events || [])]);
+            setNextCursor(data.next_cursor || null);
+        } catch (error) {
+            console.error(error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useFocusEffect(
         useCallback(() => {
             fetchEvents();
@@ -86,7 +103,7 @@ const DashboardScreen: React.FC<DashboardScreenProps> = ({ navigation }) => {
         <View style={styles.container}>
             <View style={styles.header}>
                 <Text style={styles.title}>📅 다가오는 일정</Text>
-                <Text style={styles.subtitle}>{events.length}개의 일정</Text>
+                <Text style={styles.subtitle}>{events.length}{nextCursor ? '+' : ''}개의 일정</Text>
             </View>
 
             <ScrollView
@@ -142,21 +159,21 @@ const DashboardScreen: React.FC<DashboardScreenProps> = ({ navigation }) => {
                                             <Text style={styles.childBadgeText}>👶 {event.child_tag}</Text>
                                         </View>
                                     )}
-                                    {event.checklist_with_status && event.checklist_with_status.length > 0 && (
+                                    {event.total_count > 0 && (
                                         <View style={styles.progressRow}>
                                             <View style={styles.progressBarBg}>
                                                 <View
                                                     style={[
                                                         styles.progressBarFill,
                                                         {
-                                                            width: `${(event.checklist_with_status.filter((i: any) => i.is_checked).length / event.checklist_with_status.length) * 100}%`,
-                                                            backgroundColor: event.checklist_with_status.filter((i: any) => i.is_checked).length === event.checklist_with_status.length ? '#10B981' : '#F59E0B'
+                                                            width: `${(event.checked_count / event.total_count) * 100}%`,
+                                                            backgroundColor: event.checked_count === event.total_count ? '#10B981' : '#F59E0B'
                                                         }
                                                     ]}
                                                 />
                                             </View>
                                             <Text style={styles.progressText}>
-                                                {event.checklist_with_status.filter((i: any) => i.is_checked).length}/{event.checklist_with_status.length}
+                                                {event.checked_count}/{event.total_count}
                                             </Text>
                                         </View>
                                     )}
@@ -174,6 +191,17 @@ const DashboardScreen: React.FC<DashboardScreenProps> = ({ navigation }) => {
                         );
                     })
                 )}
+                {nextCursor && (
+                    <TouchableOpacity
+                        style={styles.loadMoreButton}
+                        onPress={fetchMoreEvents}
+                        disabled={loadingMore}
+                    >
+                        <Text style={styles.loadMoreText}>
+                            {loadingMore ? '불러오는 중...' : '더 보기'}
+                        </Text>
+                    </TouchableOpacity>
+                )}
             </ScrollView>
 
             <TouchableOpacity
@@ -239,6 +267,15 @@ const styles = StyleSheet.create({
         color: '#fff',
         fontWeight: 'bold',
     },
+    loadMoreButton: {
+        alignItems: 'center',
+        paddingVertical: 12,
+        marginBottom: 80,
+    },
+    loadMoreText: {
+        color: '#4ECDC4',
+        fontWeight: '600',
+    },
     eventCard: {
         backgroundColor: '#fff',
         borderRadius: 12,
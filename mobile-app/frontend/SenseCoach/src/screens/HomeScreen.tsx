@@ -85,15 +85,14 @@ const HomeScreen: React.FC<HomeScreenProps> = ({ navigation }) => {
 
         setLoading(true);
         try {
-            const userId = 'temp-user-001';
             let result;
 
             if (selectedImage) {
                 // 이미지 분석 (텍스트가 있으면 함께 전송)
-                result = await analyzeImage(selectedImage, country, userId, text);
+                result = await analyzeImage(selectedImage, country, text);
             } else {
                 // 텍스트만 분석
-                result = await analyzeNotice(text, country, userId);
+                result = await analyzeNotice(text, country);
             }
 
             navigation.navigate('Result', {
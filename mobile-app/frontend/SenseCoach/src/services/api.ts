@@ -1,3 +1,4 @@
+import AsyncStorage from '@react-native-async-storage/async-storage';
 import axios from 'axios';
 
 // 프로덕션 API URL (Render.com)
@@ -11,6 +12,77 @@ const api = axios.create({
     },
 });
 
+// 사용자 세션 (로그인 기능 전까지 설치마다 한 사용자)
+// 처음 실행할 때 서버에서 사용자 id와 서명 토큰을 발급받아 기기에 저장하고, 요청마다 Authorization 헤더로 전송
+// 일정/아이/체크리스트는 사용자별로 저장되며 서버는 토큰으로 사용자를 구분
+export interface Session {
+    user_id: string;
+    token: string;
+}
+
+const SESSION_KEY = 'sense-coach.session';
+let sessionPromise: Promise<Session> | null = null;
+
+const loadSession = async (): Promise<Session> => {
+    const stored = await AsyncStorage.getItem(SESSION_KEY);
+    if (stored) {
+        return JSON.parse(stored);
+    }
+    const response = await axios.post(`${API_BASE_URL}/api/session`, null, { timeout: 30000 });
+    const session: Session = { user_id: response.data.user_id, token: response.data.token };
+    await AsyncStorage.setItem(SESSION_KEY, JSON.stringify(session));
+    return session;
+};
+
+// 동시에 여러 요청이 나가도 세션은 한 번만 발급 (실패하면 다음 요청에서 다시 시도)
+export const getSession = (): Promise<Session> => {
+    if (!sessionPromise) {
+        sessionPromise = loadSession().catch((error) => {
+            sessionPromise = null;
+            throw error;
+        });
+    }
+    return sessionPromise;
+};
+
+api.interceptors.request.use(async (config) => {
+    const session = await getSession();
+    config.headers.set('Authorization', `Bearer ${session.token}`);
+    return config;
+});
+
+// 조건부 조회: GET 응답의 ETag와 본문을 URL별로 기억해 두었다가 If-None-Match로 보내고,
+// 서버가 304(바뀐 것 없음)로 답하면 기억해 둔 본문을 사용 (화면 포커스/새로고침마다 같은 목록을 다시 받지 않도록)
+const etagCache = new Map<string, { etag: string; data: any }>();
+
+const isGet = (method?: string) => (method || 'get').toLowerCase() === 'get';
+
+api.interceptors.request.use((config) => {
+    if (isGet(config.method)) {
+        const cached = etagCache.get(api.getUri(config));
+        if (cached) {
+            config.headers.set('If-None-Match', cached.etag);
+        }
+        config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304;
+    }
+    return config;
+});
+
+api.interceptors.response.use((response) => {
+    if (!isGet(response.config.method)) {
+        return response;
+    }
+    const key = api.getUri(response.config);
+    const cached = etagCache.get(key);
+    if (response.status === 304 && cached) {
+        return { ...response, status: 200, data: cached.data };
+    }
+    if (response.headers.etag) {
+        etagCache.set(key, { etag: response.headers.etag, data: response.data });
+    }
+    return response;
+});
+
 // 서버 상태 확인
 export const checkHealth = async () => {
     const response = await api.get('/api/health');
@@ -18,11 +90,10 @@ export const checkHealth = async () => {
 };
 
 // 알림장 텍스트 분석
-export const analyzeNotice = async (text: string, country: string, userId: string) => {
+export const analyzeNotice = async (text: string, country: string) => {
     const response = await api.post('/api/analyze', {
         text,
         country,
-        user_id: userId,
     });
     return response.data;
 };
@@ -31,7 +102,6 @@ export const analyzeNotice = async (text: string, country: string, userId: strin
 export const analyzeImage = async (
     imageUri: string,
     country: string,
-    userId: string,
     text?: string
 ) => {
     const formData = new FormData();
@@ -41,7 +111,6 @@ export const analyzeImage = async (
         name: 'notice.jpg',
     } as any);
     formData.append('country', country);
-    formData.append('user_id', userId);
     if (text) {
         formData.append('text', text);
     }
@@ -54,10 +123,30 @@ export const analyzeImage = async (
     return response.data;
 };
 
-// 이벤트 목록 조회
-export const getEvents = async (futureOnly: boolean = false) => {
+// 이벤트 목록 조회 옵션 (from/to: YYYY-MM-DD, cursor: 이전 응답의 next_cursor,
+// checklists: false이면 준비물 항목 없이 checked_count/total_count만 - 항목은 getEventById로 조회)
+export interface GetEventsOptions {
+    from?: string;
+    to?: string;
+    limit?: number;
+    cursor?: string | null;
+    checklists?: boolean;
+    // 'summary'면 목록 카드에 필요한 필드만 (긴 번역/설명/팁, 준비물 항목 제외)
+    fields?: 'summary' | 'detail' | string;
+}
+
+// 이벤트 목록 조회 (한 페이지씩, 다음 페이지가 있으면 next_cursor 반환)
+export const getEvents = async (futureOnly: boolean = false, options: GetEventsOptions = {}) => {
     const response = await api.get('/api/events', {
-        params: { future_only: futureOnly },
+        params: {
+            future_only: futureOnly,
+            from: options.from,
+            to: options.to,
+            limit: options.limit,
+            cursor: options.cursor || undefined,
+            checklists: options.checklists,
+            fields: options.fields,
+        },
     });
     return response.data;
 };
@@ -68,6 +157,12 @@ export const saveEvent = async (eventData: any) => {
     return response.data;
 };
 
+// 여러 이벤트 일괄 저장 (모두 저장되거나 모두 실패, event_ids 반환)
+export const saveEvents = async (events: any[]) => {
+    const response = await api.post('/api/events:batch', { events });
+    return response.data;
+};
+
 // 이벤트 삭제
 export const deleteEvent = async (eventId: number) => {
     const response = await api.delete(`/api/events/${eventId}`);
@@ -108,6 +203,16 @@ export const deleteChecklistItem = async (itemId: number) => {
     return response.data;
 };
 
+// 변경분 동기화 (처음에는 since 없이 전체, 이후에는 이전 응답의 token을 since로)
+// 응답: { token, full, events, checklist_items, children, deleted: { events, checklist_items, children } }
+// full이 true면 로컬 데이터를 응답으로 교체, 아니면 바뀐 행은 id로 덮어쓰고 deleted의 id는 지움 (지운 일정의 준비물도 함께)
+export const syncChanges = async (since?: string | null, fields?: 'summary' | 'detail' | string) => {
+    const response = await api.get('/api/sync', {
+        params: { since: since || undefined, fields },
+    });
+    return response.data;
+};
+
 // 아이 목록 조회
 export const getChildren = async () => {
     const response = await api.get('/api/children');
@@ -126,9 +231,10 @@ export const deleteChild = async (name: string) => {
     return response.data;
 };
 
-// 멤버십 정보 조회
-export const getMembership = async (userId: string) => {
-    const response = await api.get(`/api/user/${userId}/membership`);
+// 멤버십 정보 조회 (이 설치의 사용자)
+export const getMembership = async () => {
+    const { user_id } = await getSession();
+    const response = await api.get(`/api/user/${user_id}/membership`);
     return response.data;
 };
 
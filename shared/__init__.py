@@ -0,0 +1,4 @@
+"""
+Sense Coach 공유 모듈
+Streamlit 앱(루트 app.py)과 FastAPI 백엔드(mobile-app/backend)가 함께 사용하는 데이터 접근 계층입니다.
+"""
@@ -0,0 +1,102 @@
+"""
+Async Database Utilities
+database_utils의 동기 함수(sqlite3 / Supabase HTTP)를 awaitable로 감싼 버전입니다.
+
+async 엔드포인트에서 동기 DB 함수를 그대로 호출하면 응답이 올 때까지 이벤트 루프 전체가
+멈추므로, 크기가 제한된 전용 스레드 풀에서 실행하고 결과를 await 합니다.
+스레드 수는 읽기 연결 풀 크기(db_pool의 max_readers)와 같게 두어 풀 대기가 생기지 않도록 합니다.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import database_utils
+
+DB_WORKERS = int(os.getenv("SENSE_COACH_DB_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """DB 전용 스레드 풀 (처음 사용할 때 생성)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_executor():
+    """진행 중인 작업이 끝나길 기다린 뒤 스레드 풀 종료 (앱 종료 시 호출)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run_db(func, *args, **kwargs):
+    """동기 함수를 DB 스레드 풀에서 실행하고 결과를 반환
+
+    호출한 쪽의 contextvars(요청 컨텍스트 등)를 복사해 실행하므로 DB 호출 수가 요청에 합산됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+async def iterate(iterator):
+    """동기 이터레이터(페이지 단위 조회 등)를 DB 스레드 풀에서 한 항목씩 진행하는 async 이터레이터
+
+    StreamingResponse에 넘기면 항목마다 이벤트 루프를 막지 않고 DB 스레드 풀에서 다음 페이지를 읽습니다.
+    """
+    done = object()
+    while True:
+        item = await run_db(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def _awaitable(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+
+init_database = _awaitable(database_utils.init_database)
+get_children = _awaitable(database_utils.get_children)
+add_child = _awaitable(database_utils.add_child)
+delete_child = _awaitable(database_utils.delete_child)
+update_child_name = _awaitable(database_utils.update_child_name)
+save_event = _awaitable(database_utils.save_event)
+save_events = _awaitable(database_utils.save_events)
+get_events = _awaitable(database_utils.get_events)
+get_events_page = _awaitable(database_utils.get_events_page)
+get_event_by_id = _awaitable(database_utils.get_event_by_id)
+get_event_checklist = _awaitable(database_utils.get_event_checklist)
+get_data_version = _awaitable(database_utils.get_data_version)
+user_etag = _awaitable(database_utils.user_etag)
+get_changes = _awaitable(database_utils.get_changes)
+delete_event = _awaitable(database_utils.delete_event)
+archive_old_events = _awaitable(database_utils.archive_old_events)
+get_archived_events_page = _awaitable(database_utils.get_archived_events_page)
+search_events = _awaitable(database_utils.search_events)
+update_checklist_item = _awaitable(database_utils.update_checklist_item)
+update_event = _awaitable(database_utils.update_event)
+add_checklist_item = _awaitable(database_utils.add_checklist_item)
+delete_checklist_item = _awaitable(database_utils.delete_checklist_item)
+update_checklist_item_name = _awaitable(database_utils.update_checklist_item_name)
+reset_all_data = _awaitable(database_utils.reset_all_data)
+get_user_tier = _awaitable(database_utils.get_user_tier)
+get_usage = _awaitable(database_utils.get_usage)
+increment_usage = _awaitable(database_utils.increment_usage)
+consume_analysis = _awaitable(database_utils.consume_analysis)
+refund_analysis = _awaitable(database_utils.refund_analysis)
+update_user_tier = _awaitable(database_utils.update_user_tier)
@@ -0,0 +1,318 @@
+"""
+Backup / Restore
+사용자 데이터(아이, 이벤트와 체크리스트, 보관된 이벤트, 월별 사용량)를 JSON Lines 파일로 내보내고 다시 넣습니다.
+같은 형식이므로 SQLite 백업을 Supabase로 (또는 반대로) 옮길 때도 사용합니다.
+
+파일 형식 (한 줄에 JSON 하나, UTF-8):
+    {"type": "header", "format": "sense-coach-backup", "version": 1, "backup_id": ..., "user_id": ..., "created_at": ...}
+    {"type": "child", "name": "첫째"}
+    {"type": "event", "archived": false, "event_name": ..., ..., "created_at": ...,
+     "checklist": [{"name": "실내화", "checked": true}, ...]}
+    {"type": "usage", "month_year": "2026-01", "analysis_count": 3}
+    {"type": "end", "counts": {"children": 1, "events": 1, "checklist_items": 1, "usage": 1}}
+
+- 내보내기는 이벤트를 EXPORT_PAGE_SIZE개씩 키셋 페이지로 읽어 페이지마다 바로 내보내므로
+  이벤트 수와 상관없이 한 페이지만 메모리에 올립니다. (읽는 도중의 쓰기는 스냅샷으로 막지 않음)
+- 복원은 파일을 한 줄씩 읽어 IMPORT_CHUNK_ROWS행(이벤트 + 체크리스트 항목) 정도의 묶음마다 한 트랜잭션으로 넣고,
+  같은 트랜잭션에서 마지막으로 넣은 줄 번호를 기록합니다. 중간에 실패하면 같은 파일로 다시 실행해 이어서 넣을 수 있고,
+  끝까지 복원한 파일을 다시 넣어도 아무것도 중복되지 않습니다. 다른 백업 파일은 기존 데이터에 더해집니다.
+- 이벤트와 체크리스트 항목은 새 id를 받으며, 체크 상태와 생성 시각, 보관 여부는 그대로 복원됩니다.
+- 구독 등급은 백업하지 않고, 사용량은 기존 값보다 클 때만 반영합니다. (파일을 고쳐 한도를 늘릴 수 없도록)
+- claim_legacy_data는 같은 내보내기/복원으로 사용자별 저장 이전의 데이터('local' 등)를 운영자가 지정한 사용자에게 옮깁니다.
+
+사용법:
+    python -m shared.backup export <user_id> [파일]   # 파일을 생략하면 표준 출력
+    python -m shared.backup import <user_id> <파일>
+    python -m shared.backup claim <user_id> [이전 user_id]   # 이전 사용자(기본 'local')의 데이터를 user_id로 옮김
+    (저장소는 앱과 같은 환경 변수로 선택: SENSE_COACH_STORAGE, SUPABASE_URL, SUPABASE_KEY)
+"""
+import json
+import re
+import sys
+import uuid
+from datetime import datetime
+
+from . import database_utils
+
+BACKUP_FORMAT = 'sense-coach-backup'
+BACKUP_VERSION = 1
+EXPORT_PAGE_SIZE = 500
+IMPORT_CHUNK_ROWS = 2000   # 한 트랜잭션에 넣을 이벤트 + 체크리스트 항목 수 (대략, 이벤트 하나는 나누지 않음)
+BACKUP_MEDIA_TYPE = 'application/x-ndjson'
+
+EVENT_FIELDS = ('event_name', 'event_date', 'event_time', 'country', 'child_tag', 'translation', 'cultural_context',
+                'tips', 'memo')
+RECORD_COUNTS = ('children', 'events', 'checklist_items', 'usage')
+
+_MONTH = re.compile(r'\d{4}-\d{2}')
+
+
+def backup_filename():
+    return f"sense-coach-backup-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def _timestamp(value):
+    """생성 시각을 'YYYY-MM-DD HH:MM:SS'로 (Supabase의 ISO 형식과 SQLite 형식을 맞춤)"""
+    return str(value)[:19].replace('T', ' ') if value else None
+
+
+def event_record(event, archived=False):
+    """Event를 백업 레코드로 (id와 준비물 개수는 복원할 때 새로 정해지므로 넣지 않음)"""
+    record = {'type': 'event', 'archived': archived}
+    record.update((field, event[field]) for field in EVENT_FIELDS)
+    record['created_at'] = _timestamp(event['created_at'])
+    record['checklist'] = [
+        {'name': item['name'], 'checked': bool(item['checked']), **({'metadata': item['metadata']} if item.get('metadata') else {})}
+        for item in event['checklist_with_status'] or []
+    ]
+    return record
+
+
+# ==================== 내보내기 ====================
+
+def export_chunks(user_id, page_size=EXPORT_PAGE_SIZE, backup_id=None):
+    """사용자 데이터 전체의 백업 파일 내용을 bytes 조각으로 차례로 반환 (머리말, 이벤트 페이지마다 한 조각, 꼬리말)
+
+    backup_id: 생략하면 새로 만듦 (같은 id로 다시 복원하면 이어서 넣으므로, 다시 내보내도 같아야 할 때만 지정)
+    """
+    counts = dict.fromkeys(RECORD_COUNTS, 0)
+    header = {
+        'type': 'header', 'format': BACKUP_FORMAT, 'version': BACKUP_VERSION, 'backup_id': backup_id or uuid.uuid4().hex,
+        'user_id': user_id, 'created_at': f'{datetime.utcnow():%Y-%m-%d %H:%M:%S}',
+    }
+    children = database_utils.get_children(user_id)
+    counts['children'] = len(children)
+    yield (_line(header) + ''.join(_line({'type': 'child', 'name': name}) for name in children)).encode('utf-8')
+
+    for archived in (False, True):
+        for events in database_utils.iter_events(user_id, page_size, archived=archived):
+            records = [event_record(event, archived) for event in events]
+            counts['events'] += len(records)
+            counts['checklist_items'] += sum(len(record['checklist']) for record in records)
+            yield ''.join(_line(record) for record in records).encode('utf-8')
+
+    usage = database_utils.get_usage_history(user_id)
+    counts['usage'] = len(usage)
+    yield (''.join(_line({'type': 'usage', **row}) for row in usage)
+           + _line({'type': 'end', 'counts': counts})).encode('utf-8')
+
+
+# ==================== 복원 ====================
+
+def _text(value, line_no, field, required=False):
+    if value is None and not required:
+        return ''
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ValueError(f'{line_no}번째 줄: {field} 값이 올바르지 않습니다.')
+    return value
+
+
+def _checklist_item(item, line_no):
+    if not isinstance(item, dict):
+        raise ValueError(f'{line_no}번째 줄: 체크리스트 항목 형식이 올바르지 않습니다.')
+    entry = {'name': _text(item.get('name'), line_no, 'checklist.name', required=True), 'checked': bool(item.get('checked'))}
+    metadata = item.get('metadata')
+    if metadata:
+        if not isinstance(metadata, dict):
+            raise ValueError(f'{line_no}번째 줄: checklist.metadata 값이 올바르지 않습니다.')
+        entry['metadata'] = metadata
+    return entry
+
+
+def parse_record(line, line_no):
+    """백업 파일 한 줄을 검사해 저장소에 넘길 레코드로 (형식이 잘못됐으면 줄 번호가 담긴 ValueError)"""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ValueError(f'{line_no}번째 줄: JSON 형식이 아닙니다.')
+    kind = data.get('type') if isinstance(data, dict) else None
+    if kind == 'child':
+        return {'type': 'child', 'name': _text(data.get('name'), line_no, 'name', required=True)}
+    if kind == 'usage':
+        month_year, count = data.get('month_year'), data.get('analysis_count')
+        if not isinstance(month_year, str) or not _MONTH.fullmatch(month_year):
+            raise ValueError(f'{line_no}번째 줄: month_year 값이 올바르지 않습니다.')
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            raise ValueError(f'{line_no}번째 줄: analysis_count 값이 올바르지 않습니다.')
+        return {'type': 'usage', 'month_year': month_year, 'analysis_count': count}
+    if kind == 'event':
+        record = {'type': 'event', 'archived': bool(data.get('archived'))}
+        for field in EVENT_FIELDS:
+            record[field] = _text(data.get(field), line_no, field, required=field in ('event_name', 'event_date'))
+        record['child_tag'] = record['child_tag'] or '없음'
+        record['created_at'] = _text(data.get('created_at'), line_no, 'created_at') or None
+        checklist = data.get('checklist') or []
+        if not isinstance(checklist, list):
+            raise ValueError(f'{line_no}번째 줄: checklist 값이 올바르지 않습니다.')
+        record['checklist'] = [_checklist_item(item, line_no) for item in checklist]
+        return record
+    if kind == 'end':
+        counts = data.get('counts')
+        return {'type': 'end', 'counts': counts if isinstance(counts, dict) else {}}
+    raise ValueError(f'{line_no}번째 줄: 알 수 없는 레코드입니다.')
+
+
+def _decoded(lines):
+    for line in lines:
+        yield line.decode('utf-8') if isinstance(line, bytes) else line
+
+
+def _read_header(line):
+    try:
+        header = json.loads(line.lstrip('\ufeff')) if line else None
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('type') != 'header' or header.get('format') != BACKUP_FORMAT:
+        raise ValueError('눈치코치 백업 파일이 아닙니다.')
+    if not isinstance(header.get('version'), int) or header['version'] > BACKUP_VERSION:
+        raise ValueError('이 버전에서 읽을 수 없는 백업 파일입니다. 앱을 업데이트해 주세요.')
+    if not isinstance(header.get('backup_id'), str) or not header['backup_id']:
+        raise ValueError('백업 파일의 backup_id가 없습니다.')
+    return header
+
+
+def _count(record, counts):
+    """레코드를 종류별 개수에 더하고, 묶음 크기로 셀 행 수를 반환"""
+    if record['type'] == 'child':
+        counts['children'] += 1
+        return 1
+    if record['type'] == 'usage':
+        counts['usage'] += 1
+        return 1
+    counts['events'] += 1
+    counts['checklist_items'] += len(record['checklist'])
+    return 1 + len(record['checklist'])
+
+
+def import_lines(user_id, lines, chunk_rows=IMPORT_CHUNK_ROWS):
+    """백업 파일의 줄(str 또는 bytes 이터러블, 예: 열린 파일)을 읽어 사용자 데이터로 복원
+
+    같은 백업 파일(backup_id)을 이전에 넣다가 실패했으면 마지막으로 커밋된 줄 다음부터 이어서 넣습니다.
+    반환: {'backup_id', 'resumed_from': 건너뛴 줄 번호 (처음이면 0), 'imported': {종류: 이번에 넣은 개수},
+           'complete': 파일 끝(end 레코드)까지 읽었고 레코드 수가 맞는지}
+    형식이 잘못된 줄을 만나면 ValueError (그 앞의 묶음까지는 커밋되어 있음)
+    """
+    lines = _decoded(lines)
+    backup_id = _read_header(next(lines, ''))['backup_id']
+    resumed_from = database_utils.get_import_checkpoint(user_id, backup_id)
+    imported = dict.fromkeys(RECORD_COUNTS, 0)
+    seen = dict.fromkeys(RECORD_COUNTS, 0)
+    chunk, rows, end = [], 0, None
+
+    def flush(line_no):
+        nonlocal chunk, rows
+        if chunk:
+            database_utils.restore_backup_chunk(user_id, backup_id, line_no, chunk)
+            chunk, rows = [], 0
+
+    line_no = 1
+    for line_no, line in enumerate(lines, start=2):
+        if not line.strip():
+            continue
+        if end is not None:
+            raise ValueError(f'{line_no}번째 줄: end 레코드 뒤에 내용이 있습니다.')
+        record = parse_record(line, line_no)
+        if record['type'] == 'end':
+            end = record['counts']
+            continue
+        counted = _count(record, seen)
+        if line_no <= resumed_from:
+            continue
+        _count(record, imported)
+        chunk.append(record)
+        rows += counted
+        if rows >= chunk_rows:
+            flush(line_no)
+    flush(line_no)
+    return {'backup_id': backup_id, 'resumed_from': resumed_from, 'imported': imported,
+            'complete': end is not None and all(end.get(kind) == seen[kind] for kind in RECORD_COUNTS)}
+
+
+# ==================== 이전 데이터 옮기기 ====================
+
+def _chunk_lines(chunks):
+    pending = b''
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b'\n')
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _has_data(user_id):
+    return bool(database_utils.get_children(user_id)
+                or database_utils.get_events_page(user_id, page_size=1, checklists=False, details=False)['events']
+                or database_utils.get_archived_events_page(user_id, page_size=1, checklists=False, details=False)['events'])
+
+
+def claim_legacy_data(user_id, legacy_user_id=database_utils.DEFAULT_USER_ID):
+    """사용자별 저장 이전에 legacy_user_id(기본 'local')로 저장된 데이터를 user_id로 옮김 (운영자가 CLI로 한 번 실행)
+
+    옮긴 뒤 legacy_user_id의 아이/이벤트는 지워집니다. 내보내기 -> 복원과 같은 경로라 모든 저장소에서 동작하며,
+    중간에 실패하면 같은 user_id로 다시 실행해야 이어서 옮깁니다. (복원 진행 위치는 받는 사용자별로 기록되므로
+    다른 user_id로 다시 실행하면 처음부터 넣어 두 사용자에게 나뉘어 들어감) 동시에 두 번 실행하지 마세요.
+    반환: {종류: 옮긴 개수}, 옮길 데이터가 없으면 None
+    """
+    if user_id == legacy_user_id:
+        raise ValueError('같은 사용자에게는 데이터를 옮길 수 없습니다.')
+    if not _has_data(legacy_user_id):
+        return None
+    chunks = export_chunks(legacy_user_id, backup_id=f'claim:{legacy_user_id}')
+    result = import_lines(user_id, _chunk_lines(chunks))
+    if not result['complete']:
+        raise RuntimeError(f'{legacy_user_id}의 데이터를 끝까지 옮기지 못했습니다. 같은 user_id로 다시 실행하면 이어서 옮깁니다.')
+    database_utils.reset_all_data(legacy_user_id)
+    return result['imported']
+
+
+# ==================== CLI ====================
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2 or argv[0] not in ('export', 'import', 'claim') or (argv[0] == 'import' and len(argv) < 3):
+        print(__doc__)
+        return 1
+    command, user_id = argv[0], argv[1]
+    database_utils.init_database()
+    try:
+        if command == 'export':
+            out = open(argv[2], 'wb') if len(argv) > 2 else sys.stdout.buffer
+            try:
+                for chunk in export_chunks(user_id):
+                    out.write(chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+            return 0
+        if command == 'claim':
+            try:
+                claimed = claim_legacy_data(user_id, *argv[2:3])
+            except ValueError as e:
+                print(f'옮기기 실패: {e}')
+                return 1
+            print('옮길 데이터가 없습니다.' if claimed is None
+                  else '옮김: ' + ', '.join(f'{kind} {count}' for kind, count in claimed.items()))
+            return 0
+        with open(argv[2], 'rb') as backup_file:
+            try:
+                result = import_lines(user_id, backup_file)
+            except ValueError as e:
+                print(f'복원 실패: {e}')
+                return 1
+        if result['resumed_from']:
+            print(f"{result['resumed_from']}번째 줄까지 이미 복원되어 있어 그 다음부터 이어서 복원했습니다.")
+        print('복원됨: ' + ', '.join(f'{kind} {count}' for kind, count in result['imported'].items()))
+        if not result['complete']:
+            print('백업 파일이 끝까지 있지 않거나 레코드 수가 맞지 않습니다. 완전한 파일로 다시 복원하면 이어서 넣습니다.')
+            return 1
+        return 0
+    finally:
+        database_utils.close_db_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
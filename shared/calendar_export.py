@@ -0,0 +1,200 @@
+"""
+Calendar Export
+이벤트를 iCalendar(RFC 5545, .ics) 형식으로 내보냅니다. (파일 다운로드 / 캘린더 앱 구독 피드)
+
+- 이벤트를 CALENDAR_PAGE_SIZE개씩 키셋 페이지로 읽고 페이지마다 VEVENT 텍스트를 만들어 바로 내보내므로
+  일정이 많아도 전체 목록을 한 번에 불러오지 않고 첫 바이트가 곧바로 나갑니다.
+- ETag / Last-Modified는 사용자 데이터 변경 번호(data_versions)로 만들고, 같은 번호로 완성된 피드는 조회 캐시에 둡니다.
+  캘린더 앱이 15분마다 다시 받아도 바뀐 것이 없으면 기본 키 한 행 조회 후 304 또는 캐시된 본문으로 끝납니다.
+- 캘린더 앱은 헤더를 보낼 수 없으므로 구독 URL에 사용자 id와 HMAC 서명으로 된 토큰을 담습니다.
+  (서명 키: SENSE_COACH_CALENDAR_SECRET, 키를 바꾸면 기존 구독 URL은 모두 무효)
+- 시간은 시간대 없는 현지 시각(floating time)으로 내보냅니다. 알림장의 시간은 학교가 있는 나라의 현지 시각이므로
+  같은 나라에 사는 부모의 기기에서 적힌 시각 그대로 보입니다. 시간을 알 수 없는 일정은 종일 일정입니다.
+- 보관된(오래된) 이벤트는 포함하지 않습니다.
+"""
+import hashlib
+import itertools
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from . import database_utils, signed_tokens
+
+CALENDAR_PAGE_SIZE = 200
+CALENDAR_CACHE_TTL = 60 * 60   # 완성된 피드 캐시 (키에 변경 번호가 있어 데이터가 바뀌면 자연히 새 키)
+CALENDAR_NAME = '눈치코치 알림장'
+EVENT_DURATION = timedelta(hours=1)   # 끝나는 시간이 없는 일정의 길이
+REFRESH_INTERVAL = 'PT15M'
+
+PRODID = '-//Sense Coach//Sense Coach Calendar//KO'
+UID_DOMAIN = 'sensecoach.app'
+
+# '9:30', '09.30', '9시', '9시 30분', '오후 3:00' (분석 결과의 event_time은 'HH:MM' 또는 'N시')
+_TIME = re.compile(r'(\d{1,2})\s*(?:[:.]\s*(\d{2})|시(?:\s*(\d{1,2})\s*분)?)')
+_PM = re.compile(r'오후|pm', re.IGNORECASE)
+
+
+# ==================== 구독 토큰 ====================
+
+def _calendar_secret():
+    return signed_tokens.env_secret("SENSE_COACH_CALENDAR_SECRET", "캘린더 구독")
+
+
+def calendar_token(user_id):
+    """구독 URL용 토큰 ('<user_id base64>.<HMAC 서명>')"""
+    return signed_tokens.sign(user_id, _calendar_secret())
+
+
+def user_from_calendar_token(token):
+    """토큰의 user_id (형식이 잘못됐거나 ASCII가 아니거나 서명이 맞지 않으면 None - URL의 아무 문자열이나 받아도 예외 없음)"""
+    return signed_tokens.verify(token, _calendar_secret())
+
+
+# ==================== 조건부 요청 ====================
+
+def _updated_at(version):
+    return datetime.strptime(version['updated_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+def calendar_validators(version):
+    """데이터 변경 번호로 만든 (ETag, Last-Modified HTTP 날짜 - 변경이 없었으면 None)"""
+    if not version['updated_at']:
+        return f'"{version["version"]}"', None
+    updated_at = _updated_at(version)
+    return f'"{version["version"]}-{updated_at:%Y%m%d%H%M%S}"', format_datetime(updated_at, usegmt=True)
+
+
+def is_not_modified(version, if_none_match=None, if_modified_since=None):
+    """클라이언트가 가진 피드가 최신인지 (If-None-Match가 있으면 그것만, 없으면 If-Modified-Since로 판단)"""
+    etag, _ = calendar_validators(version)
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+    if not if_modified_since or not version['updated_at']:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return _updated_at(version) <= since
+
+
+# ==================== iCalendar 텍스트 ====================
+
+def _escape(text):
+    """TEXT 값 이스케이프 (백슬래시, 세미콜론, 쉼표, 줄바꿈)"""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """75옥텟을 넘는 줄을 CRLF + 공백으로 나눔 (UTF-8 문자 중간에서 자르지 않음)"""
+    if len(line.encode('utf-8')) <= 75:
+        return line + '\r\n'
+    parts, current, size, limit = [], [], 0, 75
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, 74   # 이어지는 줄은 앞의 공백 1옥텟 포함
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _event_day(event_date):
+    """event_date ('YYYY-MM-DD', 예전 분석 결과의 'DD/MM/YYYY')를 date로 (읽을 수 없으면 None)"""
+    for date_format in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(event_date, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _event_start(event_time):
+    """event_time 문자열의 시작 시각 (자정부터의 timedelta, 시간을 알 수 없으면 None)"""
+    match = _TIME.search(event_time or '')
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or match.group(3) or 0)
+    if _PM.search(event_time) and hour < 12:
+        hour += 12
+    if hour > 23 or minute > 59:
+        return None
+    return timedelta(hours=hour, minutes=minute)
+
+
+def _description(event):
+    lines = []
+    if event['total_count']:
+        lines.append(f"준비물 ({event['checked_count']}/{event['total_count']})")
+        lines.extend(f"{'☑' if item['checked'] else '☐'} {item['name']}" for item in event['checklist_with_status'] or [])
+    if event['memo']:
+        lines.extend(['', f"메모: {event['memo']}"] if lines else [f"메모: {event['memo']}"])
+    return '\n'.join(lines)
+
+
+def event_lines(event, uid_suffix, dtstamp):
+    """이벤트 하나의 VEVENT 콘텐츠 줄 목록 (날짜를 읽을 수 없는 이벤트는 빈 목록)"""
+    day = _event_day(event['event_date'])
+    if day is None:
+        return []
+    child_tag = event['child_tag'] if event['child_tag'] not in (None, '', '없음') else None
+    summary = f"[{child_tag}] {event['event_name']}" if child_tag else event['event_name']
+    lines = ['BEGIN:VEVENT', f"UID:{event['id']}-{uid_suffix}@{UID_DOMAIN}", f'DTSTAMP:{dtstamp}']
+    start = _event_start(event['event_time'])
+    if start is not None:
+        start += datetime.combine(day, datetime.min.time())
+        lines += [f'DTSTART:{start:%Y%m%dT%H%M%S}', f'DTEND:{start + EVENT_DURATION:%Y%m%dT%H%M%S}']
+    else:
+        lines += [f'DTSTART;VALUE=DATE:{day:%Y%m%d}', f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}']
+    lines.append(f'SUMMARY:{_escape(summary)}')
+    description = _description(event)
+    if description:
+        lines.append(f'DESCRIPTION:{_escape(description)}')
+    if child_tag:
+        lines.append(f'CATEGORIES:{_escape(child_tag)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_calendar(event_pages, user_id, version, name=CALENDAR_NAME):
+    """이벤트 페이지 목록(이터러블)을 .ics bytes 조각으로 (머리말, 페이지마다 한 조각, 꼬리말)"""
+    uid_suffix = hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:12]
+    # DTSTAMP를 변경 시각으로 고정해 같은 변경 번호면 항상 같은 본문 (ETag와 일치)
+    dtstamp = f'{_updated_at(version):%Y%m%dT%H%M%SZ}' if version['updated_at'] else '19700101T000000Z'
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}', f'X-PUBLISHED-TTL:{REFRESH_INTERVAL}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}',
+    ]).encode('utf-8')
+    for events in event_pages:
+        yield ''.join(_fold(line) for event in events for line in event_lines(event, uid_suffix, dtstamp)).encode('utf-8')
+    yield _fold('END:VCALENDAR').encode('utf-8')
+
+
+def calendar_chunks(user_id, version=None, name=CALENDAR_NAME):
+    """사용자 일정 전체의 .ics를 bytes 조각으로 차례로 반환
+
+    같은 변경 번호로 이미 만든 피드는 캐시에서 한 조각으로 돌려주고, 없으면 페이지 단위로 만들면서 내보낸 뒤
+    끝까지 만들어졌을 때 캐시에 저장합니다. version은 응답 헤더를 만들 때 읽은 get_data_version() 값을 넘길 것.
+    첫 페이지는 머리말보다 먼저 읽으므로 저장소 조회 실패는 첫 조각을 받을 때 올라갑니다 (응답 시작 전 503).
+    도중에 실패하면 캐시에 저장하지 않습니다 (빈 피드나 일부만 담긴 피드를 캐시하지 않음).
+    """
+    version = version or database_utils.get_data_version(user_id)
+    key = ('calendar', user_id, name, version['version'], version['updated_at'])
+    cached = database_utils.query_cache.peek(key)
+    if cached is not None:
+        yield cached
+        return
+    pages = database_utils.iter_events(user_id, CALENDAR_PAGE_SIZE, details=False)
+    pages = itertools.chain(list(itertools.islice(pages, 1)), pages)
+    chunks = []
+    for chunk in render_calendar(pages, user_id, version, name):
+        chunks.append(chunk)
+        yield chunk
+    database_utils.query_cache.put(key, b''.join(chunks), ttl=CALENDAR_CACHE_TTL)
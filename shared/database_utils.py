@@ -1,480 +1,573 @@
 """
-Database Utilities (Streamlit-Independent Version)
-공유 모듈 - FastAPI 및 기타 프레임워크에서 사용 가능
+Database Utilities
+Streamlit 앱과 FastAPI 백엔드가 함께 사용하는 데이터 접근 함수입니다.
+
+저장소(SQLite / Supabase / 메모리)는 시작 시 한 번 선택되며, 이 모듈의 함수는
+선택된 저장소에 위임하고 조회 결과 캐싱과 무효화를 담당합니다.
+
+저장소 선택 (SENSE_COACH_STORAGE 환경 변수 또는 configure()):
+    sqlite         - 로컬 SQLite 파일 (SENSE_COACH_DB_PATH, 기본값)
+    sqlite_sharded - 사용자마다 별도 SQLite 파일 (SENSE_COACH_SHARD_DIRS, sharded_sqlite_repository 참고)
+    supabase       - SUPABASE_URL / SUPABASE_KEY가 설정되어 있으면 기본으로 선택
+    supabase_replica - Supabase + 로컬 SQLite 읽기 복제본 (SENSE_COACH_REPLICA_PATH, replica_repository 참고)
+    memory         - 프로세스 메모리 (I/O 없는 벤치마크 기준선, 재시작 시 삭제)
+
+이벤트/체크리스트/아이는 사용자별로 분리되어 있어 모든 함수가 user_id를 첫 인자로 받습니다.
+저장소 호출은 모두 _db()를 거치며, 진행 중인 요청 컨텍스트(request_context)의 DB 호출 수에 기록됩니다.
 """
-import sqlite3
+import base64
+import functools
+import hashlib
 import json
 import os
-from datetime import datetime, date
-from functools import lru_cache
+import re
+import threading
+from datetime import datetime, date, timedelta
+
+from .payment_config import PLANS
+from .query_cache import QueryCache
+from .repository import DEFAULT_USER_ID, StorageUnavailableError, safe_json_loads
+from .request_context import record_db_call
+from .sqlite_repository import SQLiteRepository, QUERY_CATALOG
+from .memory_repository import MemoryRepository
 
 # Supabase는 선택적 의존성 (설치되지 않아도 SQLite로 작동)
+# 요청은 연결 풀 / 타임아웃 / 읽기 재시도를 하는 전송 계층을 거침 (supabase_transport 참고)
 try:
-    from supabase import create_client, Client
+    from .supabase_transport import create_client, transport_metrics
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    Client = None
 
-# Supabase 설정 (환경 변수에서 가져옴)
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = None
+STORAGE_BACKENDS = ('sqlite', 'sqlite_sharded', 'supabase', 'supabase_replica', 'memory')
+
+# ==================== 저장소 선택 ====================
+
+_settings = {
+    'storage': os.getenv("SENSE_COACH_STORAGE"),
+    'supabase_url': os.getenv("SUPABASE_URL"),
+    'supabase_key': os.getenv("SUPABASE_KEY"),
+    'on_error': print,
+}
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def configure(storage=None, supabase_url=None, supabase_key=None, on_error=None):
+    """저장소 설정 변경 (첫 사용 전에 호출, 주어진 값만 덮어씀)
+
+    Streamlit 앱은 st.secrets의 Supabase 설정과 오류 표시용 st.error를 넘깁니다.
+    이미 만들어진 저장소가 있으면 닫고 다음 사용 시 새 설정으로 다시 만듭니다.
+    """
+    for name, value in (('storage', storage), ('supabase_url', supabase_url),
+                        ('supabase_key', supabase_key), ('on_error', on_error)):
+        if value is not None:
+            _settings[name] = value
+    close_db_connection()
+
+
+def create_repository(storage=None):
+    """설정에 맞는 저장소 생성 (storage를 생략하면 Supabase 설정 여부로 결정)"""
+    storage = storage or _settings['storage']
+    supabase_ready = SUPABASE_AVAILABLE and _settings['supabase_url'] and _settings['supabase_key']
+    if storage is None:
+        storage = 'supabase' if supabase_ready else 'sqlite'
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"알 수 없는 저장소입니다: {storage} (가능: {', '.join(STORAGE_BACKENDS)})")
+
+    if storage in ('supabase', 'supabase_replica'):
+        if not supabase_ready:
+            raise RuntimeError("Supabase 저장소를 사용하려면 supabase 패키지와 SUPABASE_URL / SUPABASE_KEY가 필요합니다.")
+        client = create_client(_settings['supabase_url'], _settings['supabase_key'])
+        if storage == 'supabase_replica':
+            from .replica_repository import ReplicaRepository
+            return ReplicaRepository(client, on_error=_settings['on_error'], on_change=_invalidate_replicated_user)
+        from .supabase_repository import SupabaseRepository
+        return SupabaseRepository(client, on_error=_settings['on_error'])
+    if storage == 'sqlite_sharded':
+        from .sharded_sqlite_repository import ShardedSQLiteRepository
+        return ShardedSQLiteRepository()
+    if storage == 'memory':
+        return MemoryRepository()
+    return SQLiteRepository()
+
+
+def get_repository():
+    """현재 저장소 (처음 호출될 때 생성, 프로세스 내 싱글톤)"""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = create_repository()
+    return _repository
+
+
+def _db(method, *args):
+    """저장소 메서드 호출 (진행 중인 요청 컨텍스트가 있으면 DB 호출 수에 기록)"""
+    record_db_call(method)
+    return getattr(get_repository(), method)(*args)
 
-use_supabase = SUPABASE_AVAILABLE and SUPABASE_URL and SUPABASE_KEY
+def get_db_connection():
+    """SQLite 연결 관리자 반환 (reader()/writer() 컨텍스트로 사용, SQLite 저장소가 아니면 None, 읽기 복제본은 복제본 파일)"""
+    repository = get_repository()
+    if repository.name == 'supabase_replica':
+        return repository.replica.db
+    return repository.db if isinstance(repository, SQLiteRepository) else None
+
+
+def close_db_connection():
+    """저장소 연결 닫기 (서버 종료 시), 다음 사용 시 다시 생성"""
+    global _repository
+    with _repository_lock:
+        if _repository is not None:
+            _repository.close()
+            _repository = None
+    query_cache.clear()
+    with _seen_versions_lock:
+        _seen_versions.clear()
+
+
+# ==================== 조회 캐시 ====================
+# 키: ('children', user_id), ('events', user_id, 기준일, date_from, date_to, limit, cursor, checklists, details),
+#     ('event', user_id, id), ('checklist', user_id, id), ('archive', user_id, limit, cursor, checklists, details),
+#     ('tier', user_id), ('usage', user_id, 'YYYY-MM'),
+#     ('calendar', user_id, 이름, 변경 번호, 변경 시각) - 완성된 .ics (calendar_export, 키에 데이터 버전이 있어 무효화 불필요)
+# 이벤트 관련 항목에는 포함된 행의 태그('event:<user>:<id>', 'item:<user>:<id>')를 달아 쓰기 시 해당 항목만 무효화
+# (샤딩 모드에서는 id가 사용자 파일마다 따로 매겨지므로 태그에 user_id 포함)
+
+query_cache = QueryCache(default_ttl=30)
+
+def get_cache_stats():
+    """조회 캐시 적중/미스 통계"""
+    return query_cache.stats()
+
+def get_transport_stats():
+    """Supabase 테이블(RPC)별 요청 수, 재시도, 오류, 왕복 시간 (Supabase를 쓰지 않으면 빈 dict)"""
+    return transport_metrics.stats() if SUPABASE_AVAILABLE else {}
+
+def get_replica_status():
+    """읽기 복제본의 차단기 상태, 다시 보낼 쓰기 수, 동기화 통계 (복제본 저장소가 아니면 빈 dict)"""
+    repository = get_repository()
+    return repository.status() if repository.name == 'supabase_replica' else {}
+
+# ==================== 사용자 버전 (조건부 조회) ====================
+# 조회 응답의 ETag는 DB의 사용자 데이터 변경 번호(data_versions - 일정/체크리스트/아이/사용량/등급이 바뀔 때마다 트리거가
+# 올림)로 만듦 -> 기본 키 한 행만 읽고, 클라이언트가 보낸 If-None-Match가 같으면 목록은 읽지 않고 304
+# 다른 프로세스(Streamlit 앱, 다른 워커)의 쓰기도 다음 요청에서 바로 새 ETag가 되며, 그 쓰기 전의 본문이 이 프로세스의
+# 조회 캐시에 남아 있을 수 있으므로 번호가 마지막으로 본 것과 다르면 그 사용자의 조회 캐시를 비우고 DB에서 다시 읽음
+
+_seen_versions = {}          # user_id -> 마지막으로 본 (변경 번호, 변경 시각)
+_MAX_SEEN_VERSIONS = 4096    # 넘으면 모두 비움 (다음 요청에서 한 번씩 캐시를 비울 뿐)
+_seen_versions_lock = threading.Lock()
+
+def user_etag(user_id, *scope):
+    """사용자 데이터 변경 번호와 scope(경로, 쿼리 등 응답을 가르는 값)로 만든 강한 ETag (변경 번호 한 행 조회)
+
+    조회 전에 만들어야 조회 도중의 쓰기가 오래된 응답에 새 ETag를 붙이지 않음
+    (변경 시각도 넣어 DB를 새로 만들어 번호가 1부터 다시 시작해도 이전 ETag와 겹치지 않도록)
+    """
+    version = get_data_version(user_id)
+    seen = (version['version'], str(version['updated_at']))
+    with _seen_versions_lock:
+        if _seen_versions.get(user_id) != seen:
+            if len(_seen_versions) >= _MAX_SEEN_VERSIONS:
+                _seen_versions.clear()
+            _seen_versions[user_id] = seen
+            _invalidate_user(user_id, *_USER_ENTITIES)
+    key = '\n'.join(str(part) for part in (user_id,) + seen + scope)
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+def _event_tag(user_id, event_id):
+    return f"event:{user_id}:{event_id}"
+
+def _item_tag(user_id, item_id):
+    return f"item:{user_id}:{item_id}"
+
+def _event_tags(user_id, events):
+    """이벤트 목록 캐시 항목의 태그 (포함된 이벤트와 체크리스트 항목, 요약 목록은 이벤트만)"""
+    tags = []
+    for event in events:
+        tags.append(_event_tag(user_id, event['id']))
+        tags.extend(_item_tag(user_id, item['id']) for item in event['checklist_with_status'] or [])
+    return tags
+
+def _invalidate_event_ranges(user_id, *sort_keys):
+    """사용자의 목록 캐시 중 (event_date, event_time, id) 위치에 새로 들어가는 이벤트가 포함될 수 있는 항목 무효화"""
+    def covers(key):
+        if key[0] != 'events' or key[1] != user_id:
+            return False
+        _, _, today, date_from, date_to, _, cursor_key, _, _ = key
+        return any(
+            (today is None or k[0] >= today)
+            and (date_from is None or k[0] >= date_from)
+            and (date_to is None or k[0] <= date_to)
+            and (cursor_key is None or k > cursor_key)
+            for k in sort_keys
+        )
+    query_cache.invalidate_where(covers)
+
+def _invalidates(invalidate):
+    """쓰기 함수가 끝나면 (실패해도) invalidate(*args, **kwargs)로 영향받는 캐시 항목 무효화"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidate(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# 사용자별 조회 캐시 항목 종류 (키의 첫 값)
+_USER_ENTITIES = ('children', 'events', 'event', 'checklist', 'archive', 'tier', 'usage')
+
+def _invalidate_user(user_id, *entities):
+    """사용자의 entities 캐시 항목 모두 무효화"""
+    query_cache.invalidate_where(lambda key: key[0] in entities and key[1] == user_id)
+
+def _invalidate_replicated_user(user_id):
+    """읽기 복제본이 다른 곳(다른 서버, 다른 기기)의 변경을 받아 오면 그 사용자의 조회 캐시 모두 무효화"""
+    _invalidate_user(user_id, *_USER_ENTITIES)
+
+def _invalidate_event(user_id, event_id, event_data=None):
+    query_cache.invalidate_tags(_event_tag(user_id, event_id))
+    if event_data and event_data.get('event_date'):
+        # 날짜가 바뀌면 새 날짜 범위의 목록에도 나타남
+        _invalidate_event_ranges(user_id, (event_data['event_date'], event_data.get('event_time') or '', event_id))
+
+def _invalidate_new_events(user_id, event_ids, events_data):
+    query_cache.invalidate_tags(*(_event_tag(user_id, event_id) for event_id in event_ids))
+    _invalidate_event_ranges(user_id, *(
+        (event_data['event_date'], event_data.get('event_time') or '', event_id)
+        for event_id, event_data in zip(event_ids, events_data)
+    ))
 
-if use_supabase:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ==================== 초기화 ====================
 
-# 데이터베이스 연결 (싱글톤 패턴)
-_db_connection = None
+def init_database():
+    """데이터베이스 초기화 (SQLite는 마이그레이션 적용, Supabase는 대시보드에서 테이블 생성)"""
+    get_repository().init()
 
-def get_db_connection():
-    """데이터베이스 연결 반환 (싱글톤)"""
-    global _db_connection
-    if use_supabase:
-        return None
-    if _db_connection is None:
-        _db_connection = sqlite3.connect('school_events.db', check_same_thread=False)
-    return _db_connection
+# ==================== 아이 ====================
 
-def init_database():
-    """데이터베이스 초기화 및 테이블 생성"""
-    if use_supabase:
-        return
-    
-    conn = sqlite3.connect('school_events.db', check_same_thread=False)
-    c = conn.cursor()
-    
-    # 이벤트 테이블 생성
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_name TEXT NOT NULL,
-            event_date DATE NOT NULL,
-            event_time TEXT,
-            country TEXT,
-            child_tag TEXT,
-            translation TEXT,
-            cultural_context TEXT,
-            tips TEXT,
-            checklist_items TEXT,
-            memo TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    try:
-        c.execute('ALTER TABLE events ADD COLUMN memo TEXT')
-    except sqlite3.OperationalError:
-        pass
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS checklist_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            item_name TEXT NOT NULL,
-            is_checked INTEGER DEFAULT 0,
-            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
-        )
-    ''')
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS children (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            display_order INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id TEXT PRIMARY KEY,
-            subscription_tier TEXT DEFAULT 'FREE',
-            expiry_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS usage_tracking (
-            user_id TEXT,
-            month_year TEXT,
-            analysis_count INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, month_year)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def get_children():
-    """저장된 아이 목록 조회"""
-    if use_supabase:
-        try:
-            response = supabase.table("children").select("name").order("display_order").execute()
-            return [row["name"] for row in response.data] if response.data else []
-        except Exception as e:
-            print(f"Supabase Error (get_children): {e}")
-            return []
-            
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT name FROM children ORDER BY display_order ASC, id ASC')
-    return [row[0] for row in c.fetchall()]
-
-def add_child(name):
-    """아이 추가"""
-    if use_supabase:
-        try:
-            response = supabase.table("children").select("display_order").order("display_order", desc=True).limit(1).execute()
-            max_order = response.data[0]["display_order"] if response.data else 0
-            supabase.table("children").insert({"name": name, "display_order": max_order + 1}).execute()
-            return True
-        except Exception as e:
-            print(f"Supabase Error (add_child): {e}")
-            return False
+def get_children(user_id):
+    """저장된 아이 목록 조회 (캐싱됨)"""
+    return query_cache.get_or_load(('children', user_id), lambda: _db('get_children', user_id), ttl=60)
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        c.execute('SELECT MAX(display_order) FROM children')
-        max_order = c.fetchone()[0] or 0
-        c.execute('INSERT INTO children (name, display_order) VALUES (?, ?)', (name, max_order + 1))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        return False
-
-def delete_child(name):
-    """아이 삭제"""
-    if use_supabase:
-        supabase.table("children").delete().eq("name", name).execute()
-        return
+@_invalidates(lambda user_id, name: query_cache.invalidate(('children', user_id)))
+def add_child(user_id, name):
+    """아이 추가 (같은 이름이 있으면 False)"""
+    return _db('add_child', user_id, name)
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM children WHERE name = ?', (name,))
-    conn.commit()
+@_invalidates(lambda user_id, name: query_cache.invalidate(('children', user_id)))
+def delete_child(user_id, name):
+    """아이 삭제"""
+    _db('delete_child', user_id, name)
 
-def update_child_name(old_name, new_name):
+# 이벤트의 child_tag도 함께 바뀌므로 사용자의 이벤트 캐시 전체 무효화
+@_invalidates(lambda user_id, old_name, new_name: _invalidate_user(user_id, 'children', 'events', 'event', 'archive'))
+def update_child_name(user_id, old_name, new_name):
     """아이 이름 수정"""
-    if use_supabase:
-        try:
-            supabase.table("children").update({"name": new_name}).eq("name", old_name).execute()
-            supabase.table("events").update({"child_tag": new_name}).eq("child_tag", old_name).execute()
-            return True
-        except:
-            return False
+    return _db('update_child_name', user_id, old_name, new_name)
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        c.execute('UPDATE children SET name = ? WHERE name = ?', (new_name, old_name))
-        c.execute('UPDATE events SET child_tag = ? WHERE child_tag = ?', (new_name, old_name))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        return False
-
-def save_event(event_data):
+# ==================== 이벤트 ====================
+
+def save_event(user_id, event_data):
     """이벤트 저장"""
-    if use_supabase:
-        try:
-            new_event = {
-                "event_name": event_data['event_name'],
-                "event_date": event_data['event_date'],
-                "event_time": event_data.get('event_time', ''),
-                "country": event_data.get('country', ''),
-                "child_tag": event_data.get('child_tag', '없음'),
-                "translation": event_data.get('translation', ''),
-                "cultural_context": event_data.get('cultural_context', ''),
-                "tips": event_data.get('tips', ''),
-                "checklist_items": json.dumps(event_data.get('checklist_items', []), ensure_ascii=False),
-                "memo": event_data.get('memo', '')
-            }
-            response = supabase.table("events").insert(new_event).execute()
-            event_id = response.data[0]["id"]
-            
-            valid_items = event_data.get('checklist_items', [])
-            if valid_items:
-                checklist_rows = [{"event_id": event_id, "item_name": item, "is_checked": 0} for item in valid_items]
-                supabase.table("checklist_items").insert(checklist_rows).execute()
-            
-            return event_id
-        except Exception as e:
-            raise e
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO events 
-        (event_name, event_date, event_time, country, child_tag, translation, cultural_context, tips, checklist_items, memo)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        event_data['event_name'],
-        event_data['event_date'],
-        event_data.get('event_time', ''),
-        event_data.get('country', ''),
-        event_data.get('child_tag', '없음'),
-        event_data.get('translation', ''),
-        event_data.get('cultural_context', ''),
-        event_data.get('tips', ''),
-        json.dumps(event_data.get('checklist_items', []), ensure_ascii=False),
-        event_data.get('memo', '')
-    ))
-    event_id = c.lastrowid
-    for item in event_data.get('checklist_items', []):
-        c.execute('INSERT INTO checklist_items (event_id, item_name, is_checked) VALUES (?, ?, 0)', (event_id, item))
-    conn.commit()
-    return event_id
-
-def safe_json_loads(data):
-    """문자열이면 JSON 파싱, 이미 객체면 그대로 반환"""
-    if data is None:
-        return []
-    if isinstance(data, (list, dict)):
-        return data
-    try:
-        return json.loads(data) if isinstance(data, str) else []
-    except:
+    return save_events(user_id, [event_data])[0]
+
+# API 요청 하나로 저장할 수 있는 이벤트 수 (SQLite 쓰기 잠금 / PostgREST 일괄 insert 크기 제한)
+MAX_BATCH_EVENTS = 50
+
+def save_events(user_id, events_data):
+    """여러 이벤트와 체크리스트를 한 번에 저장하고 새 이벤트 id 목록을 입력 순서대로 반환
+
+    SQLite: 하나의 쓰기 트랜잭션 (체크리스트는 executemany)
+    Supabase: 이벤트 일괄 insert 1회 + 체크리스트 일괄 insert 1회, 체크리스트 저장 실패 시 이벤트도 삭제
+    """
+    if not events_data:
         return []
+    event_ids = _db('save_events', user_id, events_data)
+    _invalidate_new_events(user_id, event_ids, events_data)
+    return event_ids
 
-def get_events(future_only=False):
-    """이벤트 조회"""
-    if use_supabase:
-        try:
-            query = supabase.table("events").select("*, checklist_rel:checklist_items(id, item_name, is_checked)")
-            if future_only:
-                query = query.gte("event_date", date.today().isoformat())
-            
-            response = query.order("event_date").order("event_time").execute()
-            events = []
-            for row in response.data:
-                event = {
-                    'id': row['id'],
-                    'event_name': row['event_name'],
-                    'event_date': row['event_date'],
-                    'event_time': row['event_time'],
-                    'country': row['country'],
-                    'child_tag': row['child_tag'],
-                    'translation': row['translation'],
-                    'cultural_context': row['cultural_context'],
-                    'tips': row['tips'],
-                    'checklist_items': safe_json_loads(row['checklist_items']),
-                    'created_at': row['created_at'],
-                    'memo': row.get('memo', ''),
-                    'checklist_with_status': [
-                        {'id': item['id'], 'name': item['item_name'], 'checked': bool(item['is_checked'])}
-                        for item in row.get('checklist_rel', [])
-                    ]
-                }
-                events.append(event)
-            return events
-        except Exception as e:
-            print(f"Supabase Error (get_events): {e}")
-            return []
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    if future_only:
-        c.execute('SELECT * FROM events WHERE event_date >= ? ORDER BY event_date ASC, event_time ASC', (date.today().isoformat(),))
-    else:
-        c.execute('SELECT * FROM events ORDER BY event_date ASC, event_time ASC')
-    
-    events = []
-    for row in c.fetchall():
-        event = {
-            'id': row[0], 'event_name': row[1], 'event_date': row[2], 'event_time': row[3],
-            'country': row[4], 'child_tag': row[5], 'translation': row[6], 'cultural_context': row[7],
-            'tips': row[8], 'checklist_items': json.loads(row[9]) if row[9] else [],
-            'created_at': row[10], 'memo': row[11] if len(row) > 11 else ''
-        }
-        c.execute('SELECT id, item_name, is_checked FROM checklist_items WHERE event_id = ? ORDER BY id ASC', (event['id'],))
-        event['checklist_with_status'] = [
-            {'id': i_row[0], 'name': i_row[1], 'checked': bool(i_row[2])}
-            for i_row in c.fetchall()
-        ]
-        events.append(event)
-    return events
-
-def delete_event(event_id):
-    """이벤트 삭제"""
-    if use_supabase:
-        supabase.table("events").delete().eq("id", event_id).execute()
-        return
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM events WHERE id = ?', (event_id,))
-    conn.commit()
-
-def update_checklist_item(item_id, is_checked):
-    """체크리스트 항목 상태 업데이트"""
-    if use_supabase:
-        supabase.table("checklist_items").update({"is_checked": 1 if is_checked else 0}).eq("id", item_id).execute()
-        return
+# ==================== 페이지네이션 ====================
+
+EVENTS_PAGE_SIZE = 50
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('UPDATE checklist_items SET is_checked = ? WHERE id = ?', (1 if is_checked else 0, item_id))
-    conn.commit()
+def encode_cursor(event):
+    """이벤트의 정렬 키 (event_date, event_time, id)를 불투명한 커서 문자열로 변환"""
+    key = [event['event_date'], event.get('event_time') or '', event['id']]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode('utf-8')).decode('ascii')
 
-def update_event(event_id, event_data):
+def decode_cursor(cursor):
+    """커서 문자열을 (event_date, event_time, id)로 복원 (형식 오류 시 ValueError)"""
+    try:
+        event_date, event_time, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(event_date), str(event_time), int(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"잘못된 페이지 커서입니다: {cursor}") from e
+
+def get_events(user_id, future_only=False, date_from=None, date_to=None, limit=None, cursor=None, checklists=True,
+               details=True):
+    """이벤트 조회 (캐싱됨)
+
+    date_from/date_to: 'YYYY-MM-DD' 범위 (양끝 포함)
+    limit/cursor: (event_date, event_time, id) 기준 키셋 페이지네이션 - 다음 페이지는 get_events_page 사용
+    checklists: False이면 체크리스트 행 없이 준비물 개수(checked_count/total_count)만 - 카드/목록 화면용,
+                항목은 상세 화면에서 get_event_checklist로 조회
+    details: False이면 긴 설명(번역/문화 설명/팁) 없이 - 목록 카드용 (해당 필드는 None, 상세는 get_event_by_id)
+    """
+    cursor_key = decode_cursor(cursor) if cursor else None
+    # future_only 결과는 날짜가 바뀌면 달라지므로 기준일을 키에 포함
+    today = date.today().isoformat() if future_only else None
+    key = ('events', user_id, today, date_from, date_to, limit, cursor_key, checklists, details)
+    if today:
+        date_from = max(date_from, today) if date_from else today
+    return query_cache.get_or_load(
+        key, lambda: _db('get_events', user_id, date_from, date_to, limit, cursor_key, checklists, details),
+        tags=lambda events: _event_tags(user_id, events)
+    )
+
+def get_event_by_id(user_id, event_id):
+    """이벤트 한 건을 체크리스트와 함께 기본 키로 조회 (없거나 다른 사용자의 이벤트면 None, 캐싱됨)"""
+    return query_cache.get_or_load(
+        ('event', user_id, event_id), lambda: _db('get_event_by_id', user_id, event_id),
+        tags=lambda event: [_event_tag(user_id, event_id)] + (_event_tags(user_id, [event]) if event else [])
+    )
+
+def get_event_checklist(user_id, event_id):
+    """이벤트 한 건(보관된 이벤트 포함)의 체크리스트 항목 목록 (캐싱됨, 상세 화면을 열 때만 조회)"""
+    return query_cache.get_or_load(
+        ('checklist', user_id, event_id), lambda: _db('get_checklist', user_id, event_id),
+        tags=lambda items: [_event_tag(user_id, event_id)] + [_item_tag(user_id, item['id']) for item in items]
+    )
+
+def get_events_page(user_id, future_only=False, date_from=None, date_to=None, page_size=EVENTS_PAGE_SIZE, cursor=None,
+                    checklists=True, details=True):
+    """이벤트 한 페이지와 다음 페이지 커서 조회 (마지막 페이지면 next_cursor는 None)"""
+    events = get_events(user_id, future_only=future_only, date_from=date_from, date_to=date_to, limit=page_size + 1,
+                        cursor=cursor, checklists=checklists, details=details)
+    return _page(events, page_size)
+
+def _page(events, page_size):
+    """page_size + 1개로 조회한 목록을 한 페이지와 다음 페이지 커서로 나눔"""
+    has_more = len(events) > page_size
+    events = events[:page_size]
+    return {
+        'events': events,
+        'next_cursor': encode_cursor(events[-1]) if has_more else None
+    }
+
+def iter_events(user_id, page_size=EVENTS_PAGE_SIZE, checklists=True, archived=False, details=True):
+    """사용자의 이벤트 전체를 페이지(이벤트 목록) 단위로 차례로 조회 (내보내기용, 캐시를 거치지 않음)
+
+    한 페이지씩만 메모리에 올리며, 다음 페이지는 앞 페이지의 마지막 정렬 키 뒤부터 읽습니다.
+    archived: True이면 보관된 이벤트 (최근 날짜부터), checklists / details: get_events와 같음
+    """
+    cursor_key = None
+    while True:
+        if archived:
+            events = _db('get_archived_events', user_id, page_size, cursor_key, checklists, details)
+        else:
+            events = _db('get_events', user_id, None, None, page_size, cursor_key, checklists, details)
+        if events:
+            yield events
+        if len(events) < page_size:
+            return
+        last = events[-1]
+        cursor_key = (last['event_date'], last['event_time'] or '', last['id'])
+
+def get_data_version(user_id):
+    """사용자 일정 데이터의 변경 번호 {'version', 'updated_at'} (캐싱하지 않음 - 다른 프로세스의 쓰기도 바로 반영)"""
+    return _db('get_data_version', user_id)
+
+# ==================== 앱 동기화 ====================
+# 앱은 since 없이 한 번 전체를 받은 뒤, 응답의 token을 다음 요청의 since로 보내 그 뒤 바뀐 행과 삭제된 id만 받음
+
+def encode_sync_token(watermark):
+    """저장소의 동기화 기준(watermark)을 불투명한 토큰으로 (저장소 이름을 함께 넣어 저장소가 바뀌면 전체 동기화)"""
+    payload = [get_repository().name, watermark]
+    return base64.urlsafe_b64encode(json.dumps(payload, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+def decode_sync_token(token):
+    """토큰을 watermark로 복원 (다른 저장소의 토큰이면 None = 전체 동기화, 형식 오류 시 ValueError)"""
+    try:
+        storage, watermark = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if not isinstance(watermark, (str, int)):
+            raise TypeError(watermark)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"잘못된 동기화 토큰입니다: {token}") from e
+    return watermark if storage == get_repository().name else None
+
+def get_changes(user_id, since=None, details=True):
+    """since 토큰 이후 바뀐 이벤트/체크리스트 항목/아이와 삭제된 id (캐싱하지 않음 - 매번 기준 시각이 다름)
+
+    반환: {'token': 다음 요청의 since, 'full': True면 전체 (받는 쪽은 가진 데이터를 교체),
+           'events', 'checklist_items', 'children', 'deleted'} (형식은 repository.get_changes 참고)
+    """
+    changes = _db('get_changes', user_id, decode_sync_token(since) if since else None, details)
+    changes['token'] = encode_sync_token(changes.pop('watermark'))
+    return changes
+
+@_invalidates(lambda user_id, event_id: _invalidate_event(user_id, event_id))
+def delete_event(user_id, event_id):
+    """이벤트 삭제 (보관된 이벤트도 삭제)"""
+    _db('delete_event', user_id, event_id)
+
+@_invalidates(_invalidate_event)
+def update_event(user_id, event_id, event_data):
     """이벤트 정보 업데이트"""
-    if use_supabase:
-        supabase.table("events").update({
-            "event_name": event_data.get('event_name', ''),
-            "event_date": event_data.get('event_date', ''),
-            "event_time": event_data.get('event_time', ''),
-            "country": event_data.get('country', ''),
-            "child_tag": event_data.get('child_tag', '없음'),
-            "memo": event_data.get('memo', '')
-        }).eq("id", event_id).execute()
-        return
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('''
-        UPDATE events 
-        SET event_name = ?, event_date = ?, event_time = ?, country = ?, child_tag = ?, memo = ?
-        WHERE id = ?
-    ''', (
-        event_data.get('event_name', ''), event_data.get('event_date', ''),
-        event_data.get('event_time', ''), event_data.get('country', ''),
-        event_data.get('child_tag', '없음'), event_data.get('memo', ''),
-        event_id
-    ))
-    conn.commit()
+    _db('update_event', user_id, event_id, event_data)
+
+# ==================== 보관 ====================
+# 오래된 이벤트는 events_archive로 옮겨 대시보드/future_only 조회가 활성 이벤트만 읽도록 함
+# 보관된 이벤트는 읽기 전용이며 (삭제만 가능) 요청할 때만 페이지 단위로 조회
+
+# 오늘로부터 이 일수보다 오래된 이벤트를 보관 (0이면 보관하지 않음)
+ARCHIVE_AFTER_DAYS = int(os.getenv("SENSE_COACH_ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = 500
+
+def archive_horizon(after_days=ARCHIVE_AFTER_DAYS):
+    """이 날짜('YYYY-MM-DD')보다 이전 이벤트가 보관 대상"""
+    return (date.today() - timedelta(days=after_days)).isoformat()
+
+def archive_old_events(user_id, after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """보관 기간이 지난 이벤트를 체크리스트와 함께 보관 테이블로 옮기고 옮긴 개수 반환
+
+    batch_size개씩 각자의 트랜잭션으로 옮기므로 오래 쌓인 사용자도 쓰기 잠금을 길게 잡지 않습니다.
+    """
+    if after_days <= 0:
+        return 0
+    moved = _db('archive_events', user_id, archive_horizon(after_days), batch_size)
+    if moved:
+        _invalidate_user(user_id, 'events', 'event', 'archive')
+    return moved
+
+def get_archived_events_page(user_id, page_size=EVENTS_PAGE_SIZE, cursor=None, checklists=True, details=True):
+    """보관된 이벤트 한 페이지 (최근 날짜부터)와 다음 페이지 커서 (캐싱됨, checklists / details는 get_events와 같음)"""
+    cursor_key = decode_cursor(cursor) if cursor else None
+    events = query_cache.get_or_load(
+        ('archive', user_id, page_size + 1, cursor_key, checklists, details),
+        lambda: _db('get_archived_events', user_id, page_size + 1, cursor_key, checklists, details),
+        tags=lambda events: _event_tags(user_id, events)
+    )
+    return _page(events, page_size)
+
+# ==================== 검색 ====================
+# 저장소의 전문 검색 색인(SQLite FTS5 / Supabase tsvector)을 사용하며, 검색어 조합이 다양하고 색인 조회가
+# 충분히 빠르므로 조회 캐시를 거치지 않음
+
+SEARCH_MAX_TERMS = 8
+
+def search_terms(query):
+    """검색 문자열을 검색어 목록으로 분리 (단어 문자만, 소문자, 최대 SEARCH_MAX_TERMS개)"""
+    return re.findall(r'\w+', (query or '').lower())[:SEARCH_MAX_TERMS]
+
+def search_events(user_id, query, page_size=EVENTS_PAGE_SIZE, offset=0):
+    """검색어가 모두 들어 있는 이벤트(보관된 이벤트 포함)를 관련도 순으로 한 페이지 조회
+
+    검색 대상은 이벤트 이름, 번역, 문화 설명, 팁, 메모, 체크리스트 항목 이름이며 검색어는 단어 앞부분과 일치합니다.
+    반환: {'results': [{'event', 'archived', 'snippet'}, ...], 'next_offset': 다음 페이지 offset (마지막 페이지면 None)}
+    """
+    terms = search_terms(query)
+    if not terms:
+        return {'results': [], 'next_offset': None}
+    results = _db('search_events', user_id, terms, page_size + 1, offset)
+    return {
+        'results': results[:page_size],
+        'next_offset': offset + page_size if len(results) > page_size else None
+    }
+
+# ==================== 체크리스트 ====================
+# 항목 상태 변경/삭제는 이벤트의 준비물 개수도 바꾸므로, 항목이 없는 요약 목록까지 이벤트 태그로 무효화
+
+def _invalidate_item_event(user_id, event_id):
+    if event_id is not None:
+        query_cache.invalidate_tags(_event_tag(user_id, event_id))
+
+@_invalidates(lambda user_id, item_id, is_checked: query_cache.invalidate_tags(_item_tag(user_id, item_id)))
+def update_checklist_item(user_id, item_id, is_checked):
+    """체크리스트 항목 상태 업데이트"""
+    _invalidate_item_event(user_id, _db('update_checklist_item', user_id, item_id, is_checked))
 
-def add_checklist_item(event_id, item_name):
+@_invalidates(lambda user_id, event_id, item_name: _invalidate_event(user_id, event_id))
+def add_checklist_item(user_id, event_id, item_name):
     """체크리스트 항목 추가"""
-    if use_supabase:
-        supabase.table("checklist_items").insert({"event_id": event_id, "item_name": item_name.strip(), "is_checked": 0}).execute()
-        return
+    _db('add_checklist_item', user_id, event_id, item_name)
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('INSERT INTO checklist_items (event_id, item_name, is_checked) VALUES (?, ?, 0)', (event_id, item_name.strip()))
-    conn.commit()
-
-def delete_checklist_item(item_id):
+@_invalidates(lambda user_id, item_id: query_cache.invalidate_tags(_item_tag(user_id, item_id)))
+def delete_checklist_item(user_id, item_id):
     """체크리스트 항목 삭제"""
-    if use_supabase:
-        supabase.table("checklist_items").delete().eq("id", item_id).execute()
-        return
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM checklist_items WHERE id = ?', (item_id,))
-    conn.commit()
+    _invalidate_item_event(user_id, _db('delete_checklist_item', user_id, item_id))
 
-def update_checklist_item_name(item_id, new_name):
+@_invalidates(lambda user_id, item_id, new_name: query_cache.invalidate_tags(_item_tag(user_id, item_id)))
+def update_checklist_item_name(user_id, item_id, new_name):
     """체크리스트 항목 이름 수정"""
-    if use_supabase:
-        supabase.table("checklist_items").update({"item_name": new_name.strip()}).eq("id", item_id).execute()
-        return
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('UPDATE checklist_items SET item_name = ? WHERE id = ?', (new_name.strip(), item_id))
-    conn.commit()
-
-def reset_all_data():
-    """모든 데이터 삭제"""
-    if use_supabase:
-        supabase.table("events").delete().neq("id", 0).execute()
-        supabase.table("children").delete().neq("id", 0).execute()
-        return
-
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('DELETE FROM events')
-    c.execute('DELETE FROM checklist_items')
-    c.execute('DELETE FROM children')
-    conn.commit()
+    _db('update_checklist_item_name', user_id, item_id, new_name)
+
+@_invalidates(lambda user_id: _invalidate_user(user_id, 'children', 'events', 'event', 'checklist', 'archive'))
+def reset_all_data(user_id):
+    """사용자의 이벤트, 체크리스트, 아이 모두 삭제"""
+    _db('reset_all_data', user_id)
+
+# ==================== 백업 복원 ====================
+# 백업 파일 읽기/검사와 묶음 나누기는 backup.py에서, 여기서는 묶음 하나를 저장소에 넣고 캐시를 무효화
+
+@_invalidates(lambda user_id, backup_id, line_no, records: _invalidate_user(
+    user_id, 'children', 'events', 'event', 'checklist', 'archive', 'usage'))
+def restore_backup_chunk(user_id, backup_id, line_no, records):
+    """백업 레코드 묶음을 한 트랜잭션으로 넣고 복원 진행 위치(line_no)를 함께 기록"""
+    _db('restore_backup_chunk', user_id, backup_id, line_no, records)
+
+def get_import_checkpoint(user_id, backup_id):
+    """backup_id 복원이 마지막으로 커밋한 줄 번호 (없으면 0, 캐싱하지 않음)"""
+    return _db('get_import_checkpoint', user_id, backup_id)
+
+# ==================== 사용자 ====================
+
+def _current_month():
+    return datetime.now().strftime('%Y-%m')
 
 def get_user_tier(user_id):
-    """사용자 구독 등급 조회"""
-    if use_supabase:
-        try:
-            response = supabase.table("users").select("subscription_tier").eq("user_id", user_id).execute()
-            if response.data:
-                return response.data[0]["subscription_tier"]
-            supabase.table("users").insert({"user_id": user_id, "subscription_tier": "FREE"}).execute()
-            return "FREE"
-        except:
-            return "FREE"
-
-    conn = sqlite3.connect('school_events.db')
-    c = conn.cursor()
-    c.execute('SELECT subscription_tier FROM users WHERE user_id = ?', (user_id,))
-    row = c.fetchone()
-    if row:
-        tier = row[0]
-    else:
-        c.execute('INSERT INTO users (user_id, subscription_tier) VALUES (?, ?)', (user_id, 'FREE'))
-        conn.commit()
-        tier = 'FREE'
-    conn.close()
-    return tier
+    """사용자 구독 등급 조회 (캐싱됨, 없으면 FREE로 생성)"""
+    return query_cache.get_or_load(('tier', user_id), lambda: _db('get_user_tier', user_id))
 
 def get_usage(user_id):
-    """현재 달의 사용량 조회"""
-    month_year = datetime.now().strftime('%Y-%m')
-    if use_supabase:
-        try:
-            response = supabase.table("usage_tracking").select("analysis_count").eq("user_id", user_id).eq("month_year", month_year).execute()
-            return response.data[0]["analysis_count"] if response.data else 0
-        except:
-            return 0
-
-    conn = sqlite3.connect('school_events.db')
-    c = conn.cursor()
-    c.execute('SELECT analysis_count FROM usage_tracking WHERE user_id = ? AND month_year = ?', (user_id, month_year))
-    row = c.fetchone()
-    count = row[0] if row else 0
-    conn.close()
-    return count
+    """현재 달의 사용량 조회 (캐싱됨)"""
+    month_year = _current_month()
+    return query_cache.get_or_load(('usage', user_id, month_year), lambda: _db('get_usage', user_id, month_year))
+
+def get_usage_history(user_id):
+    """월별 사용량 [{'month_year', 'analysis_count'}, ...] (백업용, 캐싱하지 않음)"""
+    return _db('get_usage_history', user_id)
+
+# 등급별 월 분석 한도 (저장소가 사용자 등급에 맞는 값을 골라 확인과 증가를 한 번에 처리)
+ANALYSIS_LIMITS = {tier: plan["max_analyses_per_month"] for tier, plan in PLANS.items()}
 
+def _invalidate_usage(user_id):
+    query_cache.invalidate_where(lambda key: key[0] == 'usage' and key[1] == user_id)
+
+@_invalidates(_invalidate_usage)
 def increment_usage(user_id):
-    """사용량 1 증가"""
-    month_year = datetime.now().strftime('%Y-%m')
-    if use_supabase:
-        try:
-            current = get_usage(user_id)
-            supabase.table("usage_tracking").upsert({
-                "user_id": user_id, 
-                "month_year": month_year, 
-                "analysis_count": current + 1
-            }).execute()
-            return True
-        except:
-            return False
+    """사용량 1 증가 (한도 확인 없음), 증가 후 사용량 반환"""
+    return _db('increment_usage', user_id, _current_month())
+
+@_invalidates(_invalidate_usage)
+def consume_analysis(user_id):
+    """플랜 한도 안에서 이번 달 분석 1회 차감 (한도 확인 + 증가가 하나의 원자적 문장)
 
-    conn = sqlite3.connect('school_events.db')
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO usage_tracking (user_id, month_year, analysis_count) VALUES (?, ?, ?)', (user_id, month_year, 0))
-    c.execute('UPDATE usage_tracking SET analysis_count = analysis_count + 1 WHERE user_id = ? AND month_year = ?', (user_id, month_year))
-    conn.commit()
-    conn.close()
-    return True
+    반환: {'allowed': 차감 여부, 'usage': 처리 후 사용량, 'limit': 월 한도}
+    분석이 실패하면 refund_analysis()로 되돌립니다.
+    """
+    return _db('consume_usage', user_id, _current_month(), ANALYSIS_LIMITS)
 
+@_invalidates(_invalidate_usage)
+def refund_analysis(user_id):
+    """consume_analysis로 차감한 1회 반환"""
+    _db('refund_usage', user_id, _current_month())
+
+@_invalidates(lambda user_id, new_tier: query_cache.invalidate(('tier', user_id)))
 def update_user_tier(user_id, new_tier):
     """사용자 구독 등급 업데이트"""
-    if use_supabase:
-        try:
-            supabase.table("users").upsert({"user_id": user_id, "subscription_tier": new_tier}).execute()
-            return True
-        except:
-            return False
-
-    conn = sqlite3.connect('school_events.db')
-    c = conn.cursor()
-    c.execute('UPDATE users SET subscription_tier = ? WHERE user_id = ?', (new_tier, user_id))
-    conn.commit()
-    conn.close()
-    return True
+    return _db('update_user_tier', user_id, new_tier)
@@ -0,0 +1,194 @@
+"""
+SQLite Connection Manager
+읽기 연결 풀 + 단일 쓰기 연결을 관리합니다.
+
+- 모든 연결은 생성 시 한 번만 PRAGMA(WAL, synchronous 등)를 적용합니다.
+- 읽기는 풀에서 연결을 빌려 사용하므로 여러 스레드가 동시에 읽을 수 있습니다.
+- 쓰기는 하나의 연결을 잠금으로 직렬화하고 BEGIN IMMEDIATE로 시작하여
+  "database is locked" 오류(읽기 → 쓰기 잠금 승격 충돌)를 피합니다.
+- 연결은 with 블록이 끝나면 다른 스레드가 쓰므로 커서를 블록 밖으로 가져가면 안 됩니다.
+  블록 안에서 만든 커서(conn.execute가 돌려준 커서 포함)는 블록을 나갈 때 닫히고,
+  그 뒤에 쓰면 sqlite3.ProgrammingError가 납니다. 결과는 블록 안에서 fetchall() 등으로 다 읽으세요.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+DB_PATH = os.getenv("SENSE_COACH_DB_PATH", "school_events.db")
+
+# 연결마다 적용되는 PRAGMA (journal_mode=WAL은 파일에 영구 저장됨)
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "mmap_size": 256 * 1024 * 1024,   # 256MB
+    "cache_size": -16000,             # 약 16MB (음수 = KiB 단위)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,             # ms
+}
+
+
+class TrackedConnection(sqlite3.Connection):
+    """만든 커서를 기억했다가 close_cursors()로 한 번에 닫는 연결
+
+    블록 밖으로 나간 커서가 나중에(다른 스레드가 같은 연결을 쓰는 중에) 정리되면서
+    캐시된 문장을 리셋하면 그 스레드에서 InterfaceError가 나므로, 연결을 돌려주기 전에 닫습니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+
+    def cursor(self, factory=sqlite3.Cursor):
+        cursor = super().cursor(factory)
+        self._cursors.add(cursor)
+        return cursor
+
+    # Connection.execute/executemany는 C에서 커서를 만들어 cursor()를 거치지 않으므로 직접 연결
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close_cursors(self):
+        for cursor in list(self._cursors):
+            cursor.close()
+        self._cursors.clear()
+
+
+class ConnectionManager:
+    """스레드 안전한 SQLite 연결 관리자"""
+
+    def __init__(self, path=DB_PATH, max_readers=8, pragmas=None):
+        self.path = path
+        self.max_readers = max_readers
+        self.pragmas = dict(PRAGMAS, **(pragmas or {}))
+        self._idle_readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = threading.local()   # 이 스레드에서 열려 있는 writer() 중첩 수
+        self._closed = False
+
+    def _connect(self):
+        """PRAGMA가 적용된 새 연결 생성 (autocommit 모드, 트랜잭션은 직접 관리)"""
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=self.pragmas["busy_timeout"] / 1000,
+            factory=TrackedConnection,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire_reader(self):
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._reader_lock:
+                    self._reader_count -= 1
+                raise
+        # 풀이 가득 찼으면 반납될 때까지 대기
+        return self._idle_readers.get()
+
+    @contextmanager
+    def reader(self):
+        """읽기 전용 연결 (하나의 읽기 트랜잭션 안에서 일관된 스냅샷 제공, 블록 안에서 만든 커서는 나갈 때 닫힘)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("ConnectionManager is closed")
+        conn = self._acquire_reader()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.close_cursors()
+                conn.execute("COMMIT")
+        finally:
+            with self._reader_lock:
+                # 빌려 간 사이에 close()가 불렸으면 풀에 돌려놓지 않고 닫음
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle_readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """쓰기 연결 (잠금으로 직렬화, 성공 시 커밋 / 예외 시 롤백, 블록 안에서 만든 커서는 바깥 블록을 나갈 때 닫힘)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("ConnectionManager is closed")
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            depth = getattr(self._writer_depth, 'value', 0)
+            if depth:
+                # 같은 스레드에서 중첩 호출된 경우 이 관리자가 연 바깥 트랜잭션에 합류
+                self._writer_depth.value = depth + 1
+                try:
+                    yield conn
+                finally:
+                    self._writer_depth.value = depth
+                return
+            if conn.in_transaction:
+                # 이 관리자가 열지 않은 트랜잭션(직접 실행한 BEGIN 등)이 남아 있으면 합류하지 않고 버림
+                conn.execute("ROLLBACK")
+            conn.execute("BEGIN IMMEDIATE")
+            self._writer_depth.value = 1
+            try:
+                try:
+                    yield conn
+                finally:
+                    conn.close_cursors()
+            except BaseException:
+                self._rollback(conn)
+                raise
+            else:
+                try:
+                    conn.execute("COMMIT")
+                except BaseException:
+                    # COMMIT 실패(SQLITE_BUSY, SQLITE_FULL 등) 시 트랜잭션이 열린 채 남지 않도록
+                    self._rollback(conn)
+                    raise
+            finally:
+                self._writer_depth.value = 0
+
+    @staticmethod
+    def _rollback(conn):
+        """열려 있는 트랜잭션 롤백 (SQLite가 오류로 이미 롤백했으면 아무것도 하지 않음)"""
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+
+    def close(self):
+        """모든 연결 닫기 (앱 종료 시 호출, 사용 중인 읽기 연결은 reader()가 반납할 때 닫음)"""
+        with self._reader_lock:
+            self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._reader_lock:
+            while True:
+                try:
+                    self._idle_readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
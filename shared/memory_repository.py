@@ -0,0 +1,446 @@
+"""
+Memory Repository
+프로세스 메모리에만 저장하는 저장소 구현입니다 (재시작하면 사라짐).
+
+디스크/네트워크 I/O가 전혀 없으므로 벤치마크에서 저장소 비용을 뺀 나머지 스택(캐시, API 직렬화 등)의
+기준선으로 쓰거나, DB 없이 앱을 띄워 볼 때 사용합니다. (SENSE_COACH_STORAGE=memory)
+"""
+import copy
+import itertools
+import re
+import threading
+from datetime import datetime, timedelta
+
+from .models import Event, EVENT_DETAIL_TEXT_FIELDS
+from .repository import (
+    Repository, checklist_entries, checklist_item, changed_item, SYNC_ENTITIES, TOMBSTONE_RETENTION_DAYS
+)
+
+# 검색 대상 필드 (SQLite events_fts 컬럼과 같음, 체크리스트 항목 이름은 따로 추가)
+SEARCH_FIELDS = ('event_name', 'translation', 'cultural_context', 'tips', 'memo')
+
+
+def _search_snippet(text, terms):
+    """검색어로 시작하는 단어를 '**'로 강조한 텍스트"""
+    return re.sub(r'\w+', lambda m: f'**{m.group(0)}**' if m.group(0).lower().startswith(terms) else m.group(0), text)
+
+
+class MemoryRepository(Repository):
+    """dict 기반 저장소 (잠금 하나로 모든 접근을 직렬화)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id는 SQLite AUTOINCREMENT처럼 초기화 후에도 재사용하지 않음
+        self._child_ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self._item_ids = itertools.count(1)
+        self._children = {}
+        self._events = {}
+        self._user_events = {}  # user_id -> {event_id: event} (조회가 해당 사용자 이벤트만 훑도록)
+        self._archived = {}     # user_id -> {event_id: event} (보관된 이벤트, 체크리스트는 _items에 그대로)
+        self._items = {}        # item_id -> {'id', 'name', 'checked'(, 'metadata')}
+        self._item_event = {}   # item_id -> event_id
+        self._checklists = {}   # event_id -> [item_id, ...] (목록 순서 = position 순)
+        self._users = {}   # user_id -> subscription_tier
+        self._usage = {}   # (user_id, month_year) -> analysis_count
+        self._versions = {}  # user_id -> {'version', 'updated_at'} (SQLite data_versions 트리거와 같은 시점에 증가)
+        self._import_checkpoints = {}  # (user_id, backup_id) -> 마지막으로 복원한 줄 번호
+        # 앱 동기화: 이벤트/아이 dict의 'updated_at'과 _item_changes는 시각 대신 변경 순번 (get_changes의 watermark)
+        self._change_seq = 0
+        self._item_changes = {}  # item_id -> 마지막 변경 순번
+        self._tombstones = {}    # user_id -> [(순번, 삭제 시각, entity, id), ...]
+        self._pruned = {}        # user_id -> 보관 기간이 지나 지운 삭제 기록의 마지막 순번 (이보다 이전 since는 전체 동기화)
+
+    # -------------------- 아이 --------------------
+
+    def _user_children(self, user_id):
+        return [child for child in self._children.values() if child['user_id'] == user_id]
+
+    def _user_event(self, user_id, event_id):
+        return self._user_events.get(user_id, {}).get(event_id)
+
+    def _bump_version(self, user_id):
+        version = self._versions.get(user_id, {}).get('version', 0) + 1
+        self._versions[user_id] = {'version': version, 'updated_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
+
+    def _touch(self, record):
+        self._change_seq += 1
+        record['updated_at'] = self._change_seq
+
+    def _touch_item(self, item_id):
+        self._change_seq += 1
+        self._item_changes[item_id] = self._change_seq
+
+    def _tombstone(self, user_id, entity, entity_id):
+        """삭제 기록 추가 (보관 기간이 지난 기록은 이때 정리 - SQLite/Supabase는 get_changes에서 같은 기간으로)"""
+        self._change_seq += 1
+        now = datetime.utcnow()
+        tombstones = self._tombstones.setdefault(user_id, [])
+        expired = [t for t in tombstones if now - t[1] > timedelta(days=TOMBSTONE_RETENTION_DAYS)]
+        if expired:
+            self._pruned[user_id] = expired[-1][0]
+            del tombstones[:len(expired)]
+        tombstones.append((self._change_seq, now, entity, entity_id))
+
+    def _user_item(self, user_id, item_id):
+        item_event = self._item_event.get(item_id)
+        return self._items[item_id] if item_event and self._user_event(user_id, item_event) else None
+
+    def get_children(self, user_id):
+        with self._lock:
+            children = sorted(self._user_children(user_id), key=lambda c: (c['display_order'], c['id']))
+            return [child['name'] for child in children]
+
+    def add_child(self, user_id, name):
+        with self._lock:
+            children = self._user_children(user_id)
+            if any(child['name'] == name for child in children):
+                return False
+            child_id = next(self._child_ids)
+            max_order = max((child['display_order'] for child in children), default=0)
+            self._children[child_id] = {'id': child_id, 'user_id': user_id, 'name': name, 'display_order': max_order + 1}
+            self._touch(self._children[child_id])
+            self._bump_version(user_id)
+            return True
+
+    def delete_child(self, user_id, name):
+        with self._lock:
+            for child in self._user_children(user_id):
+                if child['name'] == name:
+                    del self._children[child['id']]
+                    self._tombstone(user_id, 'children', child['id'])
+                    self._bump_version(user_id)
+
+    def update_child_name(self, user_id, old_name, new_name):
+        with self._lock:
+            children = self._user_children(user_id)
+            if any(child['name'] == new_name for child in children):
+                return False
+            for child in children:
+                if child['name'] == old_name:
+                    child['name'] = new_name
+                    self._touch(child)
+            for events in (self._user_events.get(user_id, {}), self._archived.get(user_id, {})):
+                for event in events.values():
+                    if event['child_tag'] == old_name:
+                        event['child_tag'] = new_name
+                        self._touch(event)
+            self._bump_version(user_id)
+            return True
+
+    # -------------------- 이벤트 --------------------
+
+    def save_events(self, user_id, events_data):
+        with self._lock:
+            event_ids = []
+            for event_data in events_data:
+                event_id = self._add_event(user_id, event_data)
+                for name, metadata in checklist_entries(event_data):
+                    self._add_item(event_id, name, metadata)
+                event_ids.append(event_id)
+            self._bump_version(user_id)
+            return event_ids
+
+    def _add_event(self, user_id, event_data, created_at=None):
+        event_id = next(self._event_ids)
+        self._events[event_id] = self._user_events.setdefault(user_id, {})[event_id] = {
+            'id': event_id,
+            'user_id': user_id,
+            'event_name': event_data['event_name'],
+            'event_date': event_data['event_date'],
+            'event_time': event_data.get('event_time') or '',
+            'country': event_data.get('country', ''),
+            'child_tag': event_data.get('child_tag', '없음'),
+            'translation': event_data.get('translation', ''),
+            'cultural_context': event_data.get('cultural_context', ''),
+            'tips': event_data.get('tips', ''),
+            'created_at': created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'memo': event_data.get('memo', ''),
+        }
+        self._touch(self._events[event_id])
+        return event_id
+
+    def _add_item(self, event_id, item_name, metadata=None):
+        item_id = next(self._item_ids)
+        self._items[item_id] = checklist_item(item_id, item_name, False, copy.deepcopy(metadata))
+        self._item_event[item_id] = event_id
+        self._checklists.setdefault(event_id, []).append(item_id)
+        self._touch_item(item_id)
+        self._touch(self._events[event_id])   # 준비물 개수가 바뀜
+
+    def _event_with_checklist(self, event, checklists=True, details=True):
+        # 준비물 개수는 저장해 두지 않고 조회할 때 항목에서 계산 (SQLite/Supabase는 트리거가 관리)
+        event = Event.from_mapping(event)
+        if not details:
+            for field in EVENT_DETAIL_TEXT_FIELDS:
+                event[field] = None
+        items = [self._items[item_id] for item_id in self._checklists.get(event.id, [])]
+        event.checked_count = sum(1 for item in items if item.checked)
+        event.total_count = len(items)
+        event.checklist_with_status = [copy.deepcopy(item) for item in items] if checklists else None
+        return event
+
+    def get_events(self, user_id, date_from=None, date_to=None, limit=None, cursor_key=None, checklists=True, details=True):
+        with self._lock:
+            events = sorted(self._user_events.get(user_id, {}).values(), key=lambda e: (e['event_date'], e['event_time'], e['id']))
+            events = [
+                e for e in events
+                if (not date_from or e['event_date'] >= date_from)
+                and (not date_to or e['event_date'] <= date_to)
+                and (not cursor_key or (e['event_date'], e['event_time'], e['id']) > tuple(cursor_key))
+            ]
+            if limit:
+                events = events[:limit]
+            return [self._event_with_checklist(e, checklists, details) for e in events]
+
+    def get_event_by_id(self, user_id, event_id):
+        with self._lock:
+            event = self._user_event(user_id, event_id)
+            return self._event_with_checklist(event) if event else None
+
+    def get_checklist(self, user_id, event_id):
+        with self._lock:
+            if not (self._user_event(user_id, event_id) or event_id in self._archived.get(user_id, {})):
+                return []
+            return [copy.deepcopy(self._items[item_id]) for item_id in self._checklists.get(event_id, [])]
+
+    def _delete_event(self, event_id):
+        event = self._events.pop(event_id)
+        if self._user_events[event['user_id']].pop(event_id, None):
+            self._tombstone(event['user_id'], 'events', event_id)   # 보관된 이벤트는 보관할 때 기록됨
+        self._archived.get(event['user_id'], {}).pop(event_id, None)
+        for item_id in self._checklists.pop(event_id, []):
+            del self._items[item_id]
+            del self._item_event[item_id]
+            self._item_changes.pop(item_id, None)
+
+    def delete_event(self, user_id, event_id):
+        with self._lock:
+            if self._user_event(user_id, event_id) or event_id in self._archived.get(user_id, {}):
+                self._delete_event(event_id)
+                self._bump_version(user_id)
+
+    # -------------------- 보관 --------------------
+
+    def archive_events(self, user_id, before_date, batch_size):
+        moved = 0
+        while True:
+            with self._lock:
+                events = self._user_events.get(user_id, {})
+                batch = sorted((e for e in events.values() if e['event_date'] < before_date),
+                               key=lambda e: (e['event_date'], e['event_time'], e['id']))[:batch_size]
+                for event in batch:
+                    self._archived.setdefault(user_id, {})[event['id']] = events.pop(event['id'])
+                    self._tombstone(user_id, 'events', event['id'])
+                if batch:
+                    self._bump_version(user_id)
+            moved += len(batch)
+            if len(batch) < batch_size:
+                return moved
+
+    def get_archived_events(self, user_id, limit=None, cursor_key=None, checklists=True, details=True):
+        with self._lock:
+            events = sorted(self._archived.get(user_id, {}).values(),
+                            key=lambda e: (e['event_date'], e['event_time'], e['id']), reverse=True)
+            if cursor_key:
+                events = [e for e in events if (e['event_date'], e['event_time'], e['id']) < tuple(cursor_key)]
+            if limit:
+                events = events[:limit]
+            return [self._event_with_checklist(e, checklists, details) for e in events]
+
+    def update_event(self, user_id, event_id, event_data):
+        with self._lock:
+            event = self._user_event(user_id, event_id)
+            if event:
+                event.update({
+                    'event_name': event_data.get('event_name', ''),
+                    'event_date': event_data.get('event_date', ''),
+                    'event_time': event_data.get('event_time') or '',
+                    'country': event_data.get('country', ''),
+                    'child_tag': event_data.get('child_tag', '없음'),
+                    'memo': event_data.get('memo', ''),
+                })
+                self._touch(event)
+                self._bump_version(user_id)
+
+    # -------------------- 검색 --------------------
+
+    def search_events(self, user_id, terms, limit, offset=0):
+        # 색인 없이 사용자 이벤트를 모두 훑음 (일치한 단어 수가 많은 순, 같으면 최근 id부터)
+        terms = tuple(term.lower() for term in terms)
+        hits = []
+        with self._lock:
+            for archived, events in ((False, self._user_events.get(user_id, {})), (True, self._archived.get(user_id, {}))):
+                for event in events.values():
+                    texts = [event[field] or '' for field in SEARCH_FIELDS]
+                    texts += [self._items[item_id]['name'] for item_id in self._checklists.get(event['id'], [])]
+                    words = [word.lower() for text in texts for word in re.findall(r'\w+', text)]
+                    if all(any(word.startswith(term) for word in words) for term in terms):
+                        score = sum(1 for word in words if word.startswith(terms))
+                        snippet = next(text for text in texts if any(w.lower().startswith(terms) for w in re.findall(r'\w+', text)))
+                        hits.append((-score, -event['id'], event, archived, _search_snippet(snippet, terms)))
+            hits.sort(key=lambda hit: hit[:2])
+            return [
+                {'event': self._event_with_checklist(event), 'archived': archived, 'snippet': snippet}
+                for _, _, event, archived, snippet in hits[offset:offset + limit]
+            ]
+
+    # -------------------- 체크리스트 --------------------
+
+    def update_checklist_item(self, user_id, item_id, is_checked):
+        with self._lock:
+            item = self._user_item(user_id, item_id)
+            if item:
+                if item['checked'] != bool(is_checked):
+                    item['checked'] = bool(is_checked)
+                    self._touch_item(item_id)
+                    self._touch(self._events[self._item_event[item_id]])
+                    self._bump_version(user_id)
+                return self._item_event[item_id]
+            return None
+
+    def add_checklist_item(self, user_id, event_id, item_name):
+        with self._lock:
+            if self._user_event(user_id, event_id):
+                self._add_item(event_id, item_name.strip())
+                self._bump_version(user_id)
+
+    def delete_checklist_item(self, user_id, item_id):
+        with self._lock:
+            if self._user_item(user_id, item_id):
+                del self._items[item_id]
+                event_id = self._item_event.pop(item_id)
+                self._checklists[event_id].remove(item_id)
+                self._item_changes.pop(item_id, None)
+                self._tombstone(user_id, 'checklist_items', item_id)
+                self._touch(self._events[event_id])
+                self._bump_version(user_id)
+                return event_id
+            return None
+
+    def update_checklist_item_name(self, user_id, item_id, new_name):
+        with self._lock:
+            item = self._user_item(user_id, item_id)
+            if item:
+                item['name'] = new_name.strip()
+                self._touch_item(item_id)
+                self._bump_version(user_id)
+
+    def reset_all_data(self, user_id):
+        with self._lock:
+            for event_id in [*self._user_events.get(user_id, {}), *self._archived.get(user_id, {})]:
+                self._delete_event(event_id)
+            for child in self._user_children(user_id):
+                del self._children[child['id']]
+                self._tombstone(user_id, 'children', child['id'])
+            self._bump_version(user_id)
+
+    def get_data_version(self, user_id):
+        with self._lock:
+            return dict(self._versions.get(user_id, {'version': 0, 'updated_at': None}))
+
+    def get_changes(self, user_id, since=None, details=True):
+        with self._lock:
+            full = since is None or since < self._pruned.get(user_id, 0)
+            since = 0 if full else since
+            events = sorted(self._user_events.get(user_id, {}).values(), key=lambda e: e['id'])
+            items = [
+                changed_item(item_id, event['id'], self._items[item_id].name, self._items[item_id].checked, position,
+                             copy.deepcopy(self._items[item_id].metadata))
+                for event in events
+                for position, item_id in enumerate(self._checklists.get(event['id'], []))
+                if self._item_changes[item_id] > since
+            ]
+            children = sorted(self._user_children(user_id), key=lambda c: (c['display_order'], c['id']))
+            deleted = {entity: [] for entity in SYNC_ENTITIES}
+            if not full:
+                for seq, _, entity, entity_id in self._tombstones.get(user_id, []):
+                    if seq > since:
+                        deleted[entity].append(entity_id)
+            return {
+                'watermark': self._change_seq,
+                'full': full,
+                'events': [self._event_with_checklist(e, False, details) for e in events if e['updated_at'] > since],
+                'checklist_items': items,
+                'children': [{'id': c['id'], 'name': c['name'], 'display_order': c['display_order']}
+                             for c in children if c['updated_at'] > since],
+                'deleted': deleted,
+            }
+
+    # -------------------- 백업 복원 --------------------
+
+    def restore_backup_chunk(self, user_id, backup_id, line_no, records):
+        with self._lock:
+            for record in records:
+                if record['type'] == 'child':
+                    children = self._user_children(user_id)
+                    if not any(child['name'] == record['name'] for child in children):
+                        child_id = next(self._child_ids)
+                        max_order = max((child['display_order'] for child in children), default=0)
+                        self._children[child_id] = {'id': child_id, 'user_id': user_id, 'name': record['name'],
+                                                    'display_order': max_order + 1}
+                        self._touch(self._children[child_id])
+                elif record['type'] == 'usage':
+                    key = (user_id, record['month_year'])
+                    self._usage[key] = max(self._usage.get(key, 0), record['analysis_count'])
+                else:
+                    event_id = self._add_event(user_id, record, record['created_at'])
+                    for item in record['checklist']:
+                        self._add_item(event_id, item['name'], item.get('metadata'))
+                        self._items[self._checklists[event_id][-1]]['checked'] = bool(item['checked'])
+                    if record['archived']:
+                        self._archived.setdefault(user_id, {})[event_id] = self._user_events[user_id].pop(event_id)
+                        self._tombstone(user_id, 'events', event_id)
+            if records:
+                self._bump_version(user_id)
+            self._import_checkpoints[(user_id, backup_id)] = line_no
+
+    def get_import_checkpoint(self, user_id, backup_id):
+        with self._lock:
+            return self._import_checkpoints.get((user_id, backup_id), 0)
+
+    # -------------------- 사용자 --------------------
+
+    def get_user_tier(self, user_id):
+        with self._lock:
+            return self._users.setdefault(user_id, 'FREE')
+
+    def get_usage(self, user_id, month_year):
+        with self._lock:
+            return self._usage.get((user_id, month_year), 0)
+
+    def get_usage_history(self, user_id):
+        with self._lock:
+            return [{'month_year': month_year, 'analysis_count': count}
+                    for (owner, month_year), count in sorted(self._usage.items()) if owner == user_id]
+
+    def increment_usage(self, user_id, month_year):
+        with self._lock:
+            self._usage[(user_id, month_year)] = self._usage.get((user_id, month_year), 0) + 1
+            self._bump_version(user_id)
+            return self._usage[(user_id, month_year)]
+
+    def consume_usage(self, user_id, month_year, limits):
+        with self._lock:
+            limit = limits.get(self._users.get(user_id, 'FREE'), limits['FREE'])
+            usage = self._usage.get((user_id, month_year), 0)
+            allowed = usage < limit
+            if allowed:
+                usage = self._usage[(user_id, month_year)] = usage + 1
+                self._bump_version(user_id)
+            return {'allowed': allowed, 'usage': usage, 'limit': limit}
+
+    def refund_usage(self, user_id, month_year):
+        with self._lock:
+            if self._usage.get((user_id, month_year), 0) > 0:
+                self._usage[(user_id, month_year)] -= 1
+                self._bump_version(user_id)
+
+    def update_user_tier(self, user_id, new_tier):
+        with self._lock:
+            if self._users.get(user_id, new_tier) != new_tier:
+                self._users[user_id] = new_tier
+                self._bump_version(user_id)
+            return True
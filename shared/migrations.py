@@ -0,0 +1,612 @@
+"""
+SQLite Schema Migrations
+번호가 매겨진 마이그레이션을 순서대로 적용하고 schema_version 테이블에 기록합니다.
+
+사용법:
+    python -m shared.migrations migrate # 대기 중인 마이그레이션 적용 (sqlite_sharded: 디스크의 모든 샤드)
+    python -m shared.migrations status  # 현재 스키마 버전 및 대기 목록
+    python -m shared.migrations explain # 데이터 접근 함수별 EXPLAIN QUERY PLAN 출력
+"""
+import sys
+
+
+def _column_names(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _initial_schema(conn):
+    """기존 init_database가 만들던 테이블 (기존 DB에서도 안전하게 재실행됨)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_name TEXT NOT NULL,
+            event_date DATE NOT NULL,
+            event_time TEXT,
+            country TEXT,
+            child_tag TEXT,
+            translation TEXT,
+            cultural_context TEXT,
+            tips TEXT,
+            checklist_items TEXT,
+            memo TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # memo 컬럼이 없던 초기 버전 DB 대응
+    if 'memo' not in _column_names(conn, 'events'):
+        conn.execute('ALTER TABLE events ADD COLUMN memo TEXT')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS checklist_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            is_checked INTEGER DEFAULT 0,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS children (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            display_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            subscription_tier TEXT DEFAULT 'FREE',
+            expiry_date DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usage_tracking (
+            user_id TEXT,
+            month_year TEXT,
+            analysis_count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, month_year)
+        )
+    ''')
+
+
+def _hot_query_indexes(conn):
+    """database_utils의 조회 패턴에 맞춘 인덱스"""
+    # get_events: WHERE event_date >= ? ORDER BY event_date, event_time
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_date_time ON events (event_date, event_time)')
+    # update_child_name: WHERE child_tag = ?
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_child_tag ON events (child_tag)')
+    # 체크리스트 일괄 조회: event_id로 찾고 (event_id, id) 순 정렬, 테이블 접근 없이 인덱스만으로 응답
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_checklist_items_event ON checklist_items (event_id, id, item_name, is_checked)')
+    # get_children: ORDER BY display_order, id (name까지 포함한 커버링 인덱스), add_child의 MAX(display_order)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_children_order ON children (display_order, id, name)')
+
+
+def _non_null_event_time(conn):
+    """키셋 페이지네이션의 (event_date, event_time, id) 비교가 NULL에서 동작하지 않으므로 빈 문자열로 통일"""
+    conn.execute("UPDATE events SET event_time = '' WHERE event_time IS NULL")
+
+
+def _user_partitioning(conn):
+    """이벤트/체크리스트/아이를 사용자별로 분리하고 events, children 인덱스를 user_id로 시작하도록 교체
+
+    기존 행은 모두 'local' 사용자(repository.DEFAULT_USER_ID)에게 배정됩니다.
+    """
+    for table in ('events', 'checklist_items'):
+        if 'user_id' not in _column_names(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN user_id TEXT NOT NULL DEFAULT 'local'")
+
+    # children.name의 UNIQUE 제약을 (user_id, name)으로 바꾸려면 테이블을 다시 만들어야 함
+    conn.execute('''
+        CREATE TABLE children_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL DEFAULT 'local',
+            name TEXT NOT NULL,
+            display_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (user_id, name)
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO children_new (id, name, display_order, created_at)
+        SELECT id, name, display_order, created_at FROM children
+    ''')
+    conn.execute('DROP TABLE children')
+    conn.execute('ALTER TABLE children_new RENAME TO children')
+
+    for index in ('idx_events_date_time', 'idx_events_child_tag'):
+        conn.execute(f'DROP INDEX IF EXISTS {index}')
+    # get_events: WHERE user_id = ? AND event_date >= ? ORDER BY event_date, event_time, id
+    conn.execute('CREATE INDEX idx_events_user_date_time ON events (user_id, event_date, event_time)')
+    # update_child_name: WHERE user_id = ? AND child_tag = ?
+    conn.execute('CREATE INDEX idx_events_user_child_tag ON events (user_id, child_tag)')
+    # checklist_items는 사용자별로 조회된 이벤트의 id로 찾으므로 기존 (event_id, ...) 인덱스를 유지
+    # (이벤트 한 건 조회의 JOIN, ON DELETE CASCADE도 이 인덱스 사용), 항목 단위 수정은 id + user_id 조건
+    # get_children: WHERE user_id = ? ORDER BY display_order, id, add_child의 MAX(display_order)
+    conn.execute('CREATE INDEX idx_children_user_order ON children (user_id, display_order, id, name)')
+
+
+def _normalized_checklists(conn):
+    """checklist_items 테이블을 체크리스트의 유일한 저장 위치로 만들고 events.checklist_items JSON 컬럼 제거
+
+    - 항목 순서(position)와 항목별 부가 정보(metadata, JSON) 컬럼 추가, 기존 행은 id 순서대로 position 부여
+    - 체크리스트 행이 하나도 없는 이벤트(체크리스트 테이블 이전에 저장된 이벤트)는 JSON 목록으로 행을 채움
+    """
+    columns = _column_names(conn, 'checklist_items')
+    if 'position' not in columns:
+        conn.execute('ALTER TABLE checklist_items ADD COLUMN position INTEGER NOT NULL DEFAULT 0')
+    if 'metadata' not in columns:
+        conn.execute('ALTER TABLE checklist_items ADD COLUMN metadata TEXT')
+    conn.execute('''
+        UPDATE checklist_items SET position = ranked.position
+        FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY event_id ORDER BY id) - 1 AS position FROM checklist_items) AS ranked
+        WHERE checklist_items.id = ranked.id
+    ''')
+
+    if 'checklist_items' in _column_names(conn, 'events'):
+        conn.execute('''
+            INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position)
+            SELECT e.user_id, e.id, j.value, 0, j.key
+            FROM events e,
+                 json_each(CASE WHEN json_valid(e.checklist_items) AND json_type(e.checklist_items) = 'array'
+                                THEN e.checklist_items ELSE '[]' END) j
+            WHERE j.type = 'text' AND NOT EXISTS (SELECT 1 FROM checklist_items ci WHERE ci.event_id = e.id)
+            ORDER BY e.id, j.key
+        ''')
+        conn.execute('ALTER TABLE events DROP COLUMN checklist_items')
+
+    # 체크리스트 일괄 조회: event_id로 찾고 (position, id) 순 정렬, 테이블 접근 없이 인덱스만으로 응답
+    conn.execute('DROP INDEX IF EXISTS idx_checklist_items_event')
+    conn.execute('''
+        CREATE INDEX idx_checklist_items_event_order
+        ON checklist_items (event_id, position, id, item_name, is_checked, metadata)
+    ''')
+
+
+def _events_archive(conn):
+    """보관 기간이 지난 이벤트를 옮겨 둘 events_archive / checklist_items_archive 테이블
+
+    옮길 때 이벤트와 체크리스트 항목의 id를 그대로 유지합니다. (events의 AUTOINCREMENT로 id가 재사용되지 않음)
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            event_name TEXT NOT NULL,
+            event_date DATE NOT NULL,
+            event_time TEXT NOT NULL DEFAULT '',
+            country TEXT,
+            child_tag TEXT,
+            translation TEXT,
+            cultural_context TEXT,
+            tips TEXT,
+            memo TEXT,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS checklist_items_archive (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            event_id INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            is_checked INTEGER DEFAULT 0,
+            position INTEGER NOT NULL DEFAULT 0,
+            metadata TEXT,
+            FOREIGN KEY (event_id) REFERENCES events_archive(id) ON DELETE CASCADE
+        )
+    ''')
+    # get_archived_events: WHERE user_id = ? ORDER BY event_date DESC, event_time DESC, id DESC
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_archive_user_date_time ON events_archive (user_id, event_date, event_time)')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_checklist_items_archive_event_order
+        ON checklist_items_archive (event_id, position, id, item_name, is_checked, metadata)
+    ''')
+
+
+# 검색 색인 한 행 다시 만들기: {event_id}의 이벤트가 events에 있으면 그 내용, 없으면 events_archive의 내용
+# (보관 중에는 잠시 두 테이블에 모두 있으므로 events를 우선하며, 둘 다 없으면 색인에서 빠짐)
+_SEARCH_REFRESH = '''
+    DELETE FROM events_fts WHERE rowid = {event_id};
+    INSERT INTO events_fts (rowid, user_id, event_name, translation, cultural_context, tips, memo, checklist)
+    SELECT id, user_id, event_name, translation, cultural_context, tips, memo,
+           (SELECT group_concat(item_name, ' ') FROM checklist_items WHERE event_id = events.id)
+    FROM events WHERE id = {event_id}
+    UNION ALL
+    SELECT id, user_id, event_name, translation, cultural_context, tips, memo,
+           (SELECT group_concat(item_name, ' ') FROM checklist_items_archive WHERE event_id = events_archive.id)
+    FROM events_archive WHERE id = {event_id} AND NOT EXISTS (SELECT 1 FROM events WHERE id = {event_id});
+'''
+
+# (트리거 이름, 트리거 조건, 다시 만들 이벤트 id)
+_SEARCH_TRIGGERS = [
+    ('events_fts_event_insert', 'AFTER INSERT ON events', 'new.id'),
+    ('events_fts_event_update', 'AFTER UPDATE OF event_name, translation, cultural_context, tips, memo ON events', 'new.id'),
+    # 보관(events -> events_archive 이동)은 내용이 그대로이므로 색인을 다시 만들지 않음
+    ('events_fts_event_delete', 'AFTER DELETE ON events '
+                                'WHEN NOT EXISTS (SELECT 1 FROM events_archive WHERE id = old.id)', 'old.id'),
+    ('events_fts_item_insert', 'AFTER INSERT ON checklist_items', 'new.event_id'),
+    ('events_fts_item_rename', 'AFTER UPDATE OF item_name ON checklist_items', 'new.event_id'),
+    # 이벤트 삭제로 함께 지워지는 항목(ON DELETE CASCADE)은 이벤트 트리거가 이미 처리
+    ('events_fts_item_delete', 'AFTER DELETE ON checklist_items '
+                               'WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id)', 'old.event_id'),
+    ('events_fts_archive_insert', 'AFTER INSERT ON events_archive '
+                                  'WHEN NOT EXISTS (SELECT 1 FROM events WHERE id = new.id)', 'new.id'),
+    ('events_fts_archive_delete', 'AFTER DELETE ON events_archive', 'old.id'),
+    ('events_fts_archive_item_insert', 'AFTER INSERT ON checklist_items_archive '
+                                       'WHEN NOT EXISTS (SELECT 1 FROM events WHERE id = new.event_id)', 'new.event_id'),
+]
+
+
+def _event_search_index(conn):
+    """이벤트 전문 검색 색인 (FTS5) - 이벤트/체크리스트/보관 테이블의 트리거로 자동 갱신
+
+    - rowid = 이벤트 id (events와 events_archive의 id는 겹치지 않음), user_id는 검색 후 사용자 필터용 (색인 안 함)
+    - unicode61 토크나이저 + 2/3글자 접두어 색인: '시험'으로 '시험을', '시험지'도 찾음 (조사가 붙은 한국어 대응)
+    - 기본 rank = 열 가중치를 준 bm25 (이름 > 체크리스트 > 메모 > 번역 > 나머지). ORDER BY rank는 FTS5 안에서 정렬해
+      snippet()을 결과 페이지 행에만 계산하므로 ORDER BY bm25(...)보다 빠름
+    """
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+            user_id UNINDEXED, event_name, translation, cultural_context, tips, memo, checklist,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    ''')
+    conn.execute("INSERT INTO events_fts (events_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 2.0, 1.0, 1.0, 3.0, 4.0)')")
+    for name, timing, event_id in _SEARCH_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'CREATE TRIGGER {name} {timing} BEGIN {_SEARCH_REFRESH.format(event_id=event_id)} END')
+
+    conn.execute('DELETE FROM events_fts')
+    conn.execute('''
+        INSERT INTO events_fts (rowid, user_id, event_name, translation, cultural_context, tips, memo, checklist)
+        SELECT e.id, e.user_id, e.event_name, e.translation, e.cultural_context, e.tips, e.memo, ci.names
+        FROM events e LEFT JOIN (
+            SELECT event_id, group_concat(item_name, ' ') AS names FROM checklist_items GROUP BY event_id
+        ) ci ON ci.event_id = e.id
+        UNION ALL
+        SELECT a.id, a.user_id, a.event_name, a.translation, a.cultural_context, a.tips, a.memo, ci.names
+        FROM events_archive a LEFT JOIN (
+            SELECT event_id, group_concat(item_name, ' ') AS names FROM checklist_items_archive GROUP BY event_id
+        ) ci ON ci.event_id = a.id
+    ''')
+
+
+# 체크리스트 항목이 바뀔 때 부모 이벤트의 준비물 개수 갱신 (이벤트 삭제로 함께 지워지는 항목은 갱신할 행이 없어 무시됨)
+_CHECKLIST_COUNT_TRIGGERS = [
+    ('checklist_counts_insert', 'AFTER INSERT ON checklist_items', '''
+        UPDATE events SET total_count = total_count + 1, checked_count = checked_count + (IFNULL(new.is_checked, 0) != 0)
+        WHERE id = new.event_id;
+    '''),
+    ('checklist_counts_delete', 'AFTER DELETE ON checklist_items', '''
+        UPDATE events SET total_count = total_count - 1, checked_count = checked_count - (IFNULL(old.is_checked, 0) != 0)
+        WHERE id = old.event_id;
+    '''),
+    ('checklist_counts_check', 'AFTER UPDATE OF is_checked ON checklist_items '
+                               'WHEN (IFNULL(new.is_checked, 0) != 0) != (IFNULL(old.is_checked, 0) != 0)', '''
+        UPDATE events SET checked_count = checked_count + (IFNULL(new.is_checked, 0) != 0) - (IFNULL(old.is_checked, 0) != 0)
+        WHERE id = new.event_id;
+    '''),
+]
+
+
+def _checklist_counts(conn):
+    """이벤트별 준비물 개수 (checked_count / total_count) - 목록 조회가 체크리스트 행을 읽지 않고 진행률을 표시하도록
+
+    보관된 이벤트는 체크리스트가 바뀌지 않으므로 보관할 때 개수를 그대로 복사합니다. (SQL_COPY_TO_ARCHIVE)
+    """
+    for table, items in (('events', 'checklist_items'), ('events_archive', 'checklist_items_archive')):
+        columns = _column_names(conn, table)
+        for column in ('checked_count', 'total_count'):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+        conn.execute(f'''
+            UPDATE {table} SET
+                checked_count = (SELECT COUNT(*) FROM {items} WHERE event_id = {table}.id AND IFNULL(is_checked, 0) != 0),
+                total_count = (SELECT COUNT(*) FROM {items} WHERE event_id = {table}.id)
+        ''')
+    for name, timing, body in _CHECKLIST_COUNT_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'CREATE TRIGGER {name} {timing} BEGIN {body} END')
+
+
+# 사용자의 일정 데이터가 바뀔 때마다 data_versions의 번호를 1 올리고 변경 시각(UTC) 기록
+_BUMP_DATA_VERSION = '''
+    INSERT INTO data_versions (user_id, version, updated_at) VALUES ({user_id}, 1, strftime('%Y-%m-%d %H:%M:%S', 'now'))
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+'''
+
+# (트리거 이름, 트리거 조건, 바뀐 데이터의 user_id)
+# 체크리스트 항목 추가/삭제/체크는 008의 개수 트리거가 이벤트 행을 갱신하므로 이벤트 UPDATE 트리거가 함께 처리
+_DATA_VERSION_TRIGGERS = [
+    ('data_version_event_insert', 'AFTER INSERT ON events', 'new.user_id'),
+    ('data_version_event_update', 'AFTER UPDATE ON events', 'new.user_id'),
+    ('data_version_event_delete', 'AFTER DELETE ON events', 'old.user_id'),
+    ('data_version_item_rename', 'AFTER UPDATE OF item_name ON checklist_items', 'new.user_id'),
+]
+
+
+def _data_versions(conn):
+    """사용자별 일정 데이터 변경 번호 (캘린더 피드의 ETag / Last-Modified)
+
+    events / checklist_items 트리거가 올리므로 다른 프로세스(Streamlit 앱)의 쓰기도 반영되며,
+    피드 요청은 기본 키 한 행만 읽고 바뀌지 않았으면 304로 응답합니다. 보관(events에서 삭제)도 변경으로 셉니다.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    for name, timing, user_id in _DATA_VERSION_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'CREATE TRIGGER {name} {timing} BEGIN {_BUMP_DATA_VERSION.format(user_id=user_id)} END')
+    conn.execute('''
+        INSERT OR IGNORE INTO data_versions (user_id, version, updated_at)
+        SELECT user_id, 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM events GROUP BY user_id
+    ''')
+
+
+def _import_checkpoints(conn):
+    """백업 복원 진행 위치 (shared/backup.py)
+
+    복원은 백업 파일을 청크 단위 트랜잭션으로 넣으며, 같은 트랜잭션에서 (사용자, 백업 id)별로 마지막에 넣은 줄 번호를
+    기록합니다. 중간에 실패한 복원을 같은 파일로 다시 실행하면 기록된 줄 다음부터 이어서 넣고 중복으로 넣지 않습니다.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            user_id TEXT NOT NULL,
+            backup_id TEXT NOT NULL,
+            line_no INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, backup_id)
+        )
+    ''')
+
+
+def _replica_state(conn):
+    """Supabase 읽기 복제본의 동기화 상태 (shared/replica_repository.py, SENSE_COACH_STORAGE=supabase_replica)
+
+    replica_state에는 사용자별로 마지막으로 받은 변경분의 기준 시각(Supabase 서버 시각)을 두고,
+    replay_queue에는 Supabase에 닿지 못하는 동안 로컬에만 반영한 쓰기를 넣어 두었다가 회복되면 순서대로 다시 보냅니다.
+    다른 저장소에서는 빈 테이블로 남습니다.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS replica_state (
+            user_id TEXT PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS replay_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            method TEXT NOT NULL,
+            args TEXT NOT NULL,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_replay_queue_user ON replay_queue (user_id)')
+
+
+# 변경 시각은 밀리초까지 (같은 초에 여러 번 바뀌어도 동기화 기준 시각과 구분되도록), 문자열 비교 = 시각 비교
+_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# ALTER TABLE로 추가한 컬럼은 상수 기본값만 가능하므로 updated_at은 트리거로 채움 (recursive_triggers가 꺼져 있어
+# 트리거 안의 UPDATE가 같은 트리거를 다시 실행하지 않고, updated_at을 직접 바꾼 UPDATE와 같은 밀리초 안의 UPDATE는 건너뜀)
+# 체크리스트 항목 추가/삭제/체크는 008의 개수 트리거가 이벤트 행을 갱신하므로 이벤트의 updated_at도 함께 바뀜
+_TOUCH_TRIGGERS = [
+    (f'{table}_touch_insert', f'AFTER INSERT ON {table}', table) for table in ('events', 'checklist_items', 'children')
+] + [
+    (f'{table}_touch_update', f'AFTER UPDATE ON {table} WHEN new.updated_at IS old.updated_at AND new.updated_at IS NOT {_NOW_MS}',
+     table)
+    for table in ('events', 'checklist_items', 'children')
+]
+
+# (트리거 이름, 트리거 조건, 삭제 기록의 entity)
+_TOMBSTONE_TRIGGERS = [
+    ('events_tombstone', 'AFTER DELETE ON events', 'events'),
+    # 이벤트 삭제로 함께 지워지는 항목(ON DELETE CASCADE)은 이벤트의 삭제 기록으로 충분
+    ('checklist_items_tombstone', 'AFTER DELETE ON checklist_items '
+                                  'WHEN EXISTS (SELECT 1 FROM events WHERE id = old.event_id)', 'checklist_items'),
+    ('children_tombstone', 'AFTER DELETE ON children', 'children'),
+]
+
+
+def _sync_changes(conn):
+    """앱 변경분 동기화 (GET /api/sync) - 이벤트/체크리스트 항목/아이의 마지막 변경 시각과 삭제 기록
+
+    updated_at은 트리거가 유지하고, 삭제된 행은 tombstones에 (사용자, 테이블, id, 삭제 시각)으로 남깁니다.
+    보관(events에서 삭제)도 앱 목록에서 빠지므로 삭제로 기록합니다. 보관 기간보다 오래된 토큰으로 요청하면 전체를 다시 보냅니다.
+    (이 트리거의 기간 정리는 014에서 빠짐 - 보관 기간은 repository.TOMBSTONE_RETENTION_DAYS 하나로)
+    """
+    for table in ('events', 'checklist_items', 'children'):
+        if 'updated_at' not in _column_names(conn, table):
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN updated_at TEXT')
+    # updated_at만 채우는 UPDATE는 데이터 변경이 아니므로 009의 변경 번호를 올리지 않도록 (아래 채우기와 touch 트리거)
+    conn.execute('DROP TRIGGER IF EXISTS data_version_event_update')
+    conn.execute(f'''
+        CREATE TRIGGER data_version_event_update AFTER UPDATE ON events WHEN new.updated_at IS old.updated_at
+        BEGIN {_BUMP_DATA_VERSION.format(user_id='new.user_id')} END
+    ''')
+    for table in ('events', 'checklist_items', 'children'):
+        conn.execute(f'UPDATE {table} SET updated_at = {_NOW_MS} WHERE updated_at IS NULL')
+        # get_changes: WHERE user_id = ? AND updated_at > ?
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_user_updated ON {table} (user_id, updated_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tombstones (
+            user_id TEXT NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            deleted_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted ON tombstones (user_id, deleted_at)')
+    for name, timing, table in _TOUCH_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'CREATE TRIGGER {name} {timing} BEGIN UPDATE {table} SET updated_at = {_NOW_MS} WHERE id = new.id; END')
+    for name, timing, entity in _TOMBSTONE_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'''
+            CREATE TRIGGER {name} {timing} BEGIN
+                DELETE FROM tombstones WHERE user_id = old.user_id AND deleted_at < strftime('%Y-%m-%d %H:%M:%f', 'now', '-30 days');
+                INSERT INTO tombstones (user_id, entity, entity_id, deleted_at) VALUES (old.user_id, '{entity}', old.id, {_NOW_MS});
+            END
+        ''')
+
+
+# (트리거 이름, 트리거 조건, 바뀐 데이터의 user_id) - 009의 변경 번호를 보관된 이벤트 / 아이 / 사용량 / 등급에도 적용
+# 아이 이름 변경 뒤 012의 touch 트리거가 updated_at만 채우는 UPDATE는 세지 않음 (이벤트 UPDATE 트리거와 같은 조건)
+# 등급 행은 처음 조회할 때 기본값(FREE)으로 만들어지므로 INSERT가 아니라 등급이 바뀔 때만
+# 보관된 이벤트는 삭제만 가능하므로 (보관으로 옮겨질 때는 events 삭제 트리거가 셈) 삭제만
+_USER_DATA_VERSION_TRIGGERS = [
+    ('data_version_archived_event_delete', 'AFTER DELETE ON events_archive', 'old.user_id'),
+    ('data_version_child_insert', 'AFTER INSERT ON children', 'new.user_id'),
+    ('data_version_child_update', 'AFTER UPDATE ON children WHEN new.updated_at IS old.updated_at', 'new.user_id'),
+    ('data_version_child_delete', 'AFTER DELETE ON children', 'old.user_id'),
+    ('data_version_usage_insert', 'AFTER INSERT ON usage_tracking', 'new.user_id'),
+    ('data_version_usage_update', 'AFTER UPDATE OF analysis_count ON usage_tracking '
+                                  'WHEN new.analysis_count IS NOT old.analysis_count', 'new.user_id'),
+    ('data_version_tier_update', 'AFTER UPDATE OF subscription_tier ON users '
+                                 'WHEN new.subscription_tier IS NOT old.subscription_tier', 'new.user_id'),
+]
+
+
+def _user_data_versions(conn):
+    """아이 / 월별 사용량 / 구독 등급 / 보관된 이벤트 삭제도 변경 번호를 올림 (앱 조회의 ETag, database_utils.user_etag)
+
+    목록/아이/멤버십 조회의 ETag를 이 번호로 만들므로, 다른 프로세스(Streamlit 앱, 다른 워커)의 쓰기도
+    다음 조회에서 바로 새 ETag가 됩니다.
+    """
+    for name, timing, user_id in _USER_DATA_VERSION_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'CREATE TRIGGER {name} {timing} BEGIN {_BUMP_DATA_VERSION.format(user_id=user_id)} END')
+
+
+def _tombstone_retention_from_app(conn):
+    """012의 삭제 기록 트리거는 기록만 하고, 보관 기간이 지난 기록은 get_changes가 정리
+
+    트리거에 적힌 기간('-30 days')과 repository.TOMBSTONE_RETENTION_DAYS가 따로 바뀌지 않도록
+    보관 기간은 파이썬 상수 하나로만 정합니다 (sqlite_repository의 SQL_PURGE_TOMBSTONES).
+    """
+    for name, timing, entity in _TOMBSTONE_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(f'''
+            CREATE TRIGGER {name} {timing} BEGIN
+                INSERT INTO tombstones (user_id, entity, entity_id, deleted_at) VALUES (old.user_id, '{entity}', old.id, {_NOW_MS});
+            END
+        ''')
+
+
+# (버전, 설명, 적용 함수) - 한 번 배포된 마이그레이션은 수정하지 말고 새 번호를 추가할 것
+MIGRATIONS = [
+    (1, 'initial schema', _initial_schema),
+    (2, 'indexes for hot queries', _hot_query_indexes),
+    (3, 'non-null event_time for keyset pagination', _non_null_event_time),
+    (4, 'per-user data partitioning', _user_partitioning),
+    (5, 'checklist_items as the only checklist storage', _normalized_checklists),
+    (6, 'events archive tables', _events_archive),
+    (7, 'full-text event search index', _event_search_index),
+    (8, 'checklist progress counters on events', _checklist_counts),
+    (9, 'per-user data versions', _data_versions),
+    (10, 'backup import checkpoints', _import_checkpoints),
+    (11, 'supabase read replica state', _replica_state),
+    (12, 'updated_at and tombstones for app sync', _sync_changes),
+    (13, 'data versions for archive, children, usage and tier', _user_data_versions),
+    (14, 'tombstone retention from the application', _tombstone_retention_from_app),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def get_schema_version(db):
+    """적용된 마지막 마이그레이션 번호 (없으면 0)"""
+    with db.writer() as conn:
+        _ensure_version_table(conn)
+        row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def pending_migrations(db):
+    current = get_schema_version(db)
+    return [m for m in MIGRATIONS if m[0] > current]
+
+
+def migrate(db):
+    """대기 중인 마이그레이션을 하나씩 각자의 트랜잭션으로 적용, 적용된 번호 목록 반환"""
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        with db.writer() as conn:
+            _ensure_version_table(conn)
+            # 다른 프로세스가 먼저 적용했을 수 있으므로 쓰기 잠금 안에서 다시 확인
+            if conn.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,)).fetchone():
+                continue
+            apply(conn)
+            conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+        applied.append(version)
+    return applied
+
+
+def explain_queries(db, catalog):
+    """catalog의 각 쿼리에 대한 EXPLAIN QUERY PLAN 결과를 (함수명, SQL, 계획) 목록으로 반환"""
+    results = []
+    with db.reader() as conn:
+        for func_name, sql, params in catalog:
+            plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+            results.append((func_name, sql, plan))
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'status'
+
+    from . import database_utils
+    from .sqlite_repository import QUERY_CATALOG
+    repository = database_utils.get_repository()
+    if repository.name == 'sqlite_sharded' and command == 'migrate':
+        # 샤드는 처음 사용할 때 마이그레이션되지만, 배포 직후 한 번에 적용해 둘 수도 있음
+        print(f'마이그레이션 적용된 샤드: {repository.migrate_all()}개')
+        return 0
+    db = database_utils.get_db_connection()
+    if db is None:
+        print('SQLite 저장소에서만 로컬 마이그레이션을 사용합니다.')
+        return 1
+
+    if command == 'migrate':
+        applied = migrate(db)
+        print(f'적용됨: {applied}' if applied else '이미 최신 상태입니다.')
+    elif command == 'status':
+        print(f'현재 스키마 버전: {get_schema_version(db)}')
+        for version, description, _ in pending_migrations(db):
+            print(f'  대기 중: {version:03d} {description}')
+    elif command == 'explain':
+        migrate(db)
+        for func_name, sql, plan in explain_queries(db, QUERY_CATALOG):
+            print(f'-- {func_name}')
+            print(f'   {" ".join(sql.split())}')
+            for step in plan:
+                print(f'   => {step}')
+            print()
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Event / ChecklistItem Models
+저장소가 반환하는 이벤트와 체크리스트 항목의 __slots__ 기반 레코드입니다.
+
+행마다 dict를 만드는 대신 고정된 슬롯에 값을 담아 이벤트 목록을 캐시/세션에 둘 때의 메모리를 줄입니다.
+기존 코드가 event['event_name'], event.get('memo', '') 처럼 dict로 다루던 접근은 그대로 동작하며,
+JSON 응답 등 진짜 dict가 필요한 곳(API 경계)에서만 to_dict()로 변환합니다.
+(Python 3.9 배포 이미지도 지원하도록 dataclass(slots=True) 대신 __slots__를 직접 선언)
+"""
+import copy
+
+
+class _Record:
+    """슬롯 이름을 키로 쓰는 읽기/쓰기 가능한 매핑 인터페이스"""
+
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def keys(self):
+        return list(self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self._fields]
+
+    def __eq__(self, other):
+        if isinstance(other, (_Record, dict)):
+            return self.to_dict() == (other if isinstance(other, dict) else other.to_dict())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class ChecklistItem(_Record):
+    """체크리스트 항목 (dict 변환 시 metadata는 있을 때만 포함)"""
+
+    __slots__ = ('id', 'name', 'checked', 'metadata')
+    _fields = ('id', 'name', 'checked')
+
+    def __init__(self, id, name, checked, metadata=None):
+        self.id = id
+        self.name = name
+        self.checked = bool(checked)
+        self.metadata = metadata or None
+
+    def __getitem__(self, key):
+        if key == 'metadata' and self.metadata is not None:
+            return self.metadata
+        return _Record.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key == 'metadata':
+            return default if self.metadata is None else self.metadata
+        return _Record.get(self, key, default)
+
+    def __contains__(self, key):
+        return key in self._fields or (key == 'metadata' and self.metadata is not None)
+
+    def keys(self):
+        return list(self._fields) + (['metadata'] if self.metadata is not None else [])
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        item = {'id': self.id, 'name': self.name, 'checked': self.checked}
+        if self.metadata is not None:
+            item['metadata'] = copy.deepcopy(self.metadata)
+        return item
+
+    def __deepcopy__(self, memo):
+        return ChecklistItem(self.id, self.name, self.checked, copy.deepcopy(self.metadata, memo))
+
+
+# 목록 조회에서 빼면 응답이 크게 줄어드는 긴 설명 텍스트 (분석 결과의 번역/문화 설명/팁, 이벤트 한 건에 수 KB)
+EVENT_DETAIL_TEXT_FIELDS = ('translation', 'cultural_context', 'tips')
+
+
+class Event(_Record):
+    """이벤트 한 건 (필드 순서는 SQLite SQL_EVENT_COLUMNS와 같고 마지막에 체크리스트 목록)
+
+    checked_count / total_count: 체크된 항목 수 / 전체 항목 수 (DB 트리거가 관리, 목록 조회에서도 항상 채워짐)
+    checklist_with_status: 항목 목록, 요약 조회(checklists=False)에서는 None (dict 변환 시에도 빠짐)
+    translation / cultural_context / tips: 설명 없이 조회(details=False)하면 None
+    """
+
+    __slots__ = ('id', 'event_name', 'event_date', 'event_time', 'country', 'child_tag', 'translation',
+                 'cultural_context', 'tips', 'created_at', 'memo', 'checked_count', 'total_count',
+                 'checklist_with_status')
+    _fields = __slots__
+
+    def __init__(self, id, event_name, event_date, event_time, country, child_tag, translation,
+                 cultural_context, tips, created_at, memo, checked_count=0, total_count=0, checklist_with_status=None):
+        self.id = id
+        self.event_name = event_name
+        self.event_date = event_date
+        self.event_time = event_time
+        self.country = country
+        self.child_tag = child_tag
+        self.translation = translation
+        self.cultural_context = cultural_context
+        self.tips = tips
+        self.created_at = created_at
+        self.memo = memo or ''
+        self.checked_count = checked_count or 0
+        self.total_count = total_count or 0
+        self.checklist_with_status = checklist_with_status
+
+    @classmethod
+    def from_mapping(cls, data):
+        """이벤트 dict(또는 Event)에서 생성, 체크리스트 항목도 ChecklistItem으로 변환"""
+        items = data.get('checklist_with_status')
+        return cls(*(data.get(field) for field in cls._fields[:-1]), None if items is None else [
+            item if isinstance(item, ChecklistItem)
+            else ChecklistItem(item['id'], item['name'], item['checked'], item.get('metadata'))
+            for item in items
+        ])
+
+    def progress(self):
+        """(체크된 항목 수, 전체 항목 수, 완료율 %)"""
+        percentage = int(self.checked_count * 100 / self.total_count) if self.total_count else 0
+        return self.checked_count, self.total_count, percentage
+
+    def to_dict(self, fields=None):
+        """dict로 변환 (fields: 포함할 필드 목록 - API의 projection, 없으면 전체)"""
+        event = {field: getattr(self, field) for field in (fields or self._fields) if field != 'checklist_with_status'}
+        if self.checklist_with_status is not None and (fields is None or 'checklist_with_status' in fields):
+            event['checklist_with_status'] = [item.to_dict() for item in self.checklist_with_status]
+        return event
+
+    def __deepcopy__(self, memo):
+        items = self.checklist_with_status
+        return Event(*(getattr(self, field) for field in self._fields[:-1]),
+                     None if items is None else [item.__deepcopy__(memo) for item in items])
+
+
+# 이벤트 projection: summary는 목록 카드(이름, 날짜, 시간, 아이, 메모, 준비물 진행률), detail은 전체
+EVENT_PROJECTIONS = {
+    'summary': ('id', 'event_name', 'event_date', 'event_time', 'country', 'child_tag', 'created_at', 'memo',
+                'checked_count', 'total_count'),
+    'detail': Event._fields,
+}
+
+
+def event_projection(fields):
+    """fields 파라미터('summary', 'detail' 또는 쉼표로 구분한 필드 이름)를 (필드 목록, checklists, details)로
+
+    checklists / details는 저장소 조회에 넘길 값 (필요한 필드가 없으면 체크리스트 항목이나 긴 설명을 읽지 않음)
+    id는 항상 포함하며, 모르는 필드 이름이 있으면 ValueError
+    """
+    if fields in EVENT_PROJECTIONS:
+        names = EVENT_PROJECTIONS[fields]
+    else:
+        names = [name.strip() for name in (fields or '').split(',') if name.strip()]
+        unknown = [name for name in names if name not in Event._fields]
+        if unknown or not names:
+            raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown) or fields}")
+        names = ('id', *(name for name in Event._fields if name in names and name != 'id'))
+    return (tuple(names), 'checklist_with_status' in names,
+            any(name in EVENT_DETAIL_TEXT_FIELDS for name in names))
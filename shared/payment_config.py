@@ -24,7 +24,7 @@ PLANS = {
             "무제한 AI 분석",
             "자녀 관리 무제한",
             "고급 문화 맥락 통찰",
-            "캘린더 내보내기 (준비 중)",
+            "캘린더 내보내기 및 구독",
             "광고 및 제한 없음"
         ]
     }
@@ -0,0 +1,122 @@
+"""
+Query Cache
+데이터 접근 함수의 조회 결과를 명시적인 키로 캐싱하고, 쓰기 시 영향받는 항목만 무효화합니다.
+
+- 키는 튜플이며 첫 요소가 엔티티 이름입니다. 예: ('events', ...), ('event', 3), ('usage', user_id, '2026-01')
+- 항목마다 태그(예: 'event:3', 'item:12')를 달아 두면 해당 행을 바꾸는 쓰기가 그 태그만 무효화합니다.
+- 같은 프로세스 안에서는 쓰기 직후 무효화되어 read-your-writes가 보장되고,
+  다른 프로세스가 쓴 변경은 TTL이 지나면 반영됩니다.
+- Streamlit / FastAPI에 의존하지 않으므로 두 앱이 같은 방식으로 사용합니다.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """스레드 안전한 TTL + LRU 캐시 (태그 기반 무효화, 적중/미스 카운터)"""
+
+    def __init__(self, default_ttl=30, max_entries=512):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (만료 시각, 값, 태그)
+        self._lock = threading.Lock()
+        # 무효화될 때마다 증가: 조회 도중 쓰기가 일어났으면 그 조회 결과는 저장하지 않음
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader, ttl=None, tags=None):
+        """캐시된 값을 반환하고, 없거나 만료됐으면 loader()로 조회해 저장
+
+        tags: 조회 결과를 받아 이 항목의 태그 목록을 돌려주는 함수
+        반환값은 복사본이므로 호출하는 쪽에서 수정해도 캐시에 영향이 없음
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        entry_tags = frozenset(tags(value)) if tags else frozenset()
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (expires_at, copy.deepcopy(value), entry_tags)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """만료되지 않은 캐시 값 (없으면 None, 적중/미스 통계에 포함)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            return None
+
+    def put(self, key, value, ttl=None, tags=()):
+        """값을 직접 저장 (스트리밍하면서 만든 결과처럼 loader 한 번으로 얻을 수 없는 값)
+
+        조회 도중 쓰기를 확인하지 않으므로, 키에 데이터 버전이 들어 있어 오래된 값이 다시 쓰일 수 없는 항목에만 사용
+        """
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(value), frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _remove(self, keys):
+        for key in keys:
+            del self._entries[key]
+        self._generation += 1
+        self.invalidations += len(keys)
+
+    def invalidate(self, *keys):
+        """지정한 키 무효화"""
+        with self._lock:
+            self._remove([key for key in keys if key in self._entries])
+
+    def invalidate_tags(self, *tags):
+        """태그 중 하나라도 가진 항목 무효화"""
+        tags = set(tags)
+        with self._lock:
+            self._remove([key for key, entry in self._entries.items() if entry[2] & tags])
+
+    def invalidate_where(self, predicate):
+        """predicate(key)가 참인 항목 무효화"""
+        with self._lock:
+            self._remove([key for key in self._entries if predicate(key)])
+
+    def invalidate_entities(self, *entities):
+        """엔티티(키의 첫 요소)가 일치하는 항목 모두 무효화"""
+        self.invalidate_where(lambda key: key[0] in entities)
+
+    def clear(self):
+        with self._lock:
+            self._remove(list(self._entries))
+
+    def stats(self):
+        """적중/미스/무효화 횟수와 현재 항목 수"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,362 @@
+"""
+Supabase Read Replica Repository
+Supabase를 원본으로 두고 사용자 데이터를 로컬 SQLite 파일에 복제해, 읽기를 네트워크 왕복 없이 처리하는 저장소입니다.
+(SENSE_COACH_STORAGE=supabase_replica)
+
+- 읽기: 항상 로컬 복제본에서. 이 프로세스에서 처음 읽는 사용자는 먼저 동기화한 뒤 응답 (복제본에 없으면 전체를 받아 옴)
+- 동기화: 백그라운드 스레드가 REPLICA_SYNC_INTERVAL초마다, 최근 REPLICA_ACTIVE_WINDOW초 안에 읽은 사용자별로
+  마지막 기준 시각(watermark) 이후 바뀐 행만 replica_changes RPC(supabase_schema.sql 011) 한 번으로 받아 반영.
+  삭제는 테이블별 행 수가 서버와 다를 때만 id 목록을 받아 맞추고, 그래도 다르면 다음 동기화에서 전체를 다시 받음
+- 회로 차단기: Supabase 호출이 연속 CIRCUIT_FAILURES번 Supabase에 닿지 못하면 CIRCUIT_RESET초 동안 호출하지 않고(열림),
+  그 뒤 호출 하나로 회복을 확인 (반열림, 성공하면 닫힘). 열려 있는 동안 읽기는 로컬 데이터로 계속 응답
+- 쓰기:
+  · 대상이 id/이름으로 정해져 다시 보내도 결과가 같은 쓰기(REPLAYABLE_WRITES)는 Supabase에 보낸 뒤 로컬에도 반영.
+    Supabase에 닿지 못하면 replay_queue에 넣고 로컬에만 반영했다가, 회복되면 들어온 순서대로 다시 보냄
+    (그사이 다른 기기가 같은 행을 바꿨으면 나중에 보낸 쪽이 남음). 큐에 쓰기가 남은 사용자는 동기화를 미룸
+  · 그 밖의 쓰기(이벤트 저장, 준비물 추가, 보관, 복원, 초기화, 사용량, 등급)는 서버가 id나 한도를 정하므로
+    Supabase에서 처리한 뒤 그 사용자를 바로 동기화하고, Supabase에 닿지 못하면 ReadOnlyModeError (API는 503)
+- 동기화로 행이 바뀐 사용자는 on_change(user_id)로 알림 (database_utils가 조회 캐시를 무효화)
+
+설정 (환경 변수):
+    SENSE_COACH_REPLICA_PATH           - 복제본 SQLite 파일, 기본 supabase_replica.db
+    SENSE_COACH_REPLICA_SYNC_INTERVAL  - 백그라운드 동기화 주기(초), 기본 30 (0이면 스레드 없이 읽기/쓰기 때만 동기화)
+"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from .repository import Repository
+from .sqlite_repository import SQLiteRepository, REPLICA_TABLES
+from .supabase_repository import SupabaseRepository
+from .supabase_transport import is_unavailable
+
+REPLICA_PATH = os.getenv("SENSE_COACH_REPLICA_PATH", "supabase_replica.db")
+REPLICA_SYNC_INTERVAL = float(os.getenv("SENSE_COACH_REPLICA_SYNC_INTERVAL", "30"))
+REPLICA_ACTIVE_WINDOW = 3600   # 이만큼(초) 읽지 않은 사용자는 백그라운드 동기화에서 빼고 다음 읽기 때 동기화
+CIRCUIT_FAILURES = 3
+CIRCUIT_RESET = 15.0
+
+# 다시 보내도 결과가 같은 쓰기 (Supabase에 닿지 못하면 큐에 넣음)
+REPLAYABLE_WRITES = (
+    'add_child', 'delete_child', 'update_child_name', 'update_event', 'delete_event',
+    'update_checklist_item', 'delete_checklist_item', 'update_checklist_item_name',
+)
+
+
+class ReadOnlyModeError(RuntimeError):
+    """Supabase에 닿지 못해 처리할 수 없는 쓰기 (복제본으로 읽기만 가능한 상태)"""
+
+
+class CircuitBreaker:
+    """연속 failures번 실패하면 열리고, reset_timeout초마다 호출 하나만 시험(반열림), 성공하면 닫힘 (스레드 안전)"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failures=CIRCUIT_FAILURES, reset_timeout=CIRCUIT_RESET, clock=time.monotonic):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.opened = 0   # 열린 횟수
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # 시험 호출이 결과를 남기지 못했더라도 reset_timeout이 지나면 다시 하나를 허용
+            if self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failures:
+                self.opened += 1 if self.state != self.OPEN else 0
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+def _read(name):
+    """로컬 복제본에서 읽기 (이 프로세스에서 처음 읽는 사용자면 먼저 동기화)"""
+    def method(self, user_id, *args, **kwargs):
+        self._ensure_synced(user_id)
+        return getattr(self.replica, name)(user_id, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _replayable(name):
+    """Supabase에 보내고 로컬에도 반영, Supabase에 닿지 못하면 큐에 넣고 로컬에만 반영"""
+    def method(self, user_id, *args):
+        with self._user_lock(user_id):
+            # 큐에 앞선 쓰기가 남아 있으면 순서가 바뀌지 않도록 뒤에 넣음
+            if not self.replica.count_replays(user_id):
+                try:
+                    result = self._call_primary(name, user_id, *args)
+                except ReadOnlyModeError:
+                    pass
+                else:
+                    if result is not False:
+                        getattr(self.replica, name)(user_id, *args)
+                    return result
+            with self.replica.db.writer():
+                result = getattr(self.replica, name)(user_id, *args)
+                if result is not False:
+                    self.replica.enqueue_replay(user_id, name, args)
+            return result
+    method.__name__ = name
+    return method
+
+
+def _primary_write(name):
+    """Supabase에서 처리한 뒤 그 사용자를 바로 동기화 (Supabase에 닿지 못하면 ReadOnlyModeError)"""
+    def method(self, user_id, *args):
+        with self._user_lock(user_id):
+            result = self._call_primary(name, user_id, *args)
+            self._sync_quietly(user_id)
+            self._active[user_id] = time.monotonic()
+        return result
+    method.__name__ = name
+    return method
+
+
+class ReplicaRepository(Repository):
+    """Supabase + 로컬 SQLite 읽기 복제본
+
+    client: supabase_transport.create_client로 만든 PostgREST 클라이언트
+    on_error: 오류를 알리는 함수 (기본 print), on_change: 동기화로 데이터가 바뀐 user_id를 받는 함수
+    """
+
+    name = 'supabase_replica'
+
+    def __init__(self, client, path=REPLICA_PATH, sync_interval=REPLICA_SYNC_INTERVAL, breaker=None,
+                 on_error=print, on_change=None):
+        self.primary = SupabaseRepository(client, on_error=self._primary_error)
+        self.replica = SQLiteRepository(path)
+        self.sync_interval = sync_interval
+        self.breaker = breaker or CircuitBreaker()
+        self.on_error = on_error
+        self.on_change = on_change
+        self.sync_stats = {'syncs': 0, 'full_syncs': 0, 'rows_applied': 0, 'replayed': 0, 'dropped': 0, 'failed_syncs': 0}
+        self._active = {}         # user_id -> 마지막으로 읽은 시각 (백그라운드 동기화 대상)
+        self._needs_full = set()  # 다음 동기화에서 전체를 다시 받을 사용자
+        self._errors = threading.local()
+        self._user_locks = defaultdict(threading.RLock)
+        self._locks_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init(self):
+        self.replica.init()
+        if self.sync_interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sync_loop, name='replica-sync', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.primary.close()
+        self.replica.close()
+
+    # -------------------- Supabase 호출 --------------------
+
+    def _primary_error(self, message):
+        # SupabaseRepository가 오류를 삼키고 빈 값/False를 돌려주는 메서드도 원인을 알 수 있도록
+        # 예외 처리 중에 호출되므로 sys.exc_info()가 원래 오류 (Supabase에 닿지 못한 경우는 ReadOnlyModeError로 알림)
+        self._errors.error = sys.exc_info()[1]
+        if not is_unavailable(self._errors.error):
+            self.on_error(message)
+
+    def _call_primary(self, name, *args):
+        """Supabase 저장소 메서드 호출 + 차단기 기록 (차단기가 열려 있거나 Supabase에 닿지 못하면 ReadOnlyModeError)"""
+        if not self.breaker.allow():
+            raise ReadOnlyModeError(f"Supabase 연결이 복구될 때까지 읽기 전용입니다. ({name})")
+        self._errors.error = None
+        result, raised = None, None
+        try:
+            result = getattr(self.primary, name)(*args)
+        except Exception as e:
+            raised = e
+        error = raised or self._errors.error
+        if error is not None and is_unavailable(error):
+            self.breaker.record_failure()
+            raise ReadOnlyModeError(f"Supabase에 연결할 수 없습니다. ({name})") from error
+        # 서버가 응답했으면 (요청을 거절했더라도) 연결은 정상
+        self.breaker.record_success()
+        if raised is not None:
+            raise raised
+        return result
+
+    # -------------------- 동기화 --------------------
+
+    def _user_lock(self, user_id):
+        """사용자별 잠금 (같은 사용자의 동기화와 쓰기가 섞이지 않도록)"""
+        with self._locks_lock:
+            return self._user_locks[user_id]
+
+    def _count(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.sync_stats[key] += value
+
+    def sync_user(self, user_id, full=False):
+        """사용자 한 명의 Supabase 변경분을 복제본에 반영하고 바뀐 행 수 반환 (다시 보낼 쓰기가 큐에 남아 있으면 0)"""
+        with self._user_lock(user_id):
+            # 로컬에만 반영한 쓰기를 서버의 이전 상태로 덮어쓰지 않도록 다시 보낸 뒤에 동기화
+            if self.replica.count_replays(user_id):
+                return 0
+            since = None if full or user_id in self._needs_full else self.replica.get_replica_watermark(user_id)
+            changes = self._call_primary('get_replica_changes', user_id, since, REPLICA_TABLES if since is None else ())
+            counts, changed = self.replica.apply_replica_changes(user_id, changes)
+            mismatched = [table for table in REPLICA_TABLES if counts[table] != changes['counts'][table]]
+            if mismatched:
+                # 서버에서 삭제된 행 (또는 놓친 행): 해당 테이블의 id 목록으로 맞춤
+                changes = self._call_primary('get_replica_changes', user_id, changes['watermark'], mismatched)
+                counts, more = self.replica.apply_replica_changes(user_id, changes)
+                changed += more
+                mismatched = [table for table in REPLICA_TABLES if counts[table] != changes['counts'][table]]
+            if mismatched:
+                self._needs_full.add(user_id)
+            else:
+                self._needs_full.discard(user_id)
+        self._count(syncs=1, full_syncs=1 if since is None else 0, rows_applied=changed)
+        if changed and self.on_change:
+            self.on_change(user_id)
+        return changed
+
+    def _sync_quietly(self, user_id):
+        try:
+            return self.sync_user(user_id)
+        except ReadOnlyModeError:
+            return 0   # 로컬 데이터로 계속 (차단기가 닫히면 백그라운드 동기화가 따라잡음)
+        except Exception as e:
+            self._count(failed_syncs=1)
+            self.on_error(f"Replica sync failed ({user_id}): {e}")
+            return 0
+
+    def _ensure_synced(self, user_id):
+        """이 프로세스에서 처음 읽는 사용자면 먼저 동기화 (Supabase에 닿지 못하면 복제본에 있는 데이터로 응답)"""
+        if user_id not in self._active:
+            with self._user_lock(user_id):
+                if user_id not in self._active:
+                    self._sync_quietly(user_id)
+                    self._active[user_id] = time.monotonic()
+        self._active[user_id] = time.monotonic()
+
+    def replay_pending(self):
+        """replay_queue의 쓰기를 들어온 순서대로 Supabase에 다시 보내고 보낸 수 반환 (Supabase에 닿지 못하면 멈춤)"""
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            replayed = 0
+            while True:
+                entry = self.replica.next_replay()
+                if entry is None:
+                    return replayed
+                replay_id, user_id, name, args = entry
+                with self._user_lock(user_id):
+                    try:
+                        result = self._call_primary(name, user_id, *args)
+                    except ReadOnlyModeError as e:
+                        self.replica.fail_replay(replay_id, e)
+                        return replayed
+                    except Exception as e:
+                        result = False
+                        self.on_error(f"Replica replay rejected ({name}): {e}")
+                    if result is False:
+                        # 서버가 거절한 쓰기는 다시 보내도 같으므로 버리고, 로컬에만 남은 내용은 전체 동기화로 되돌림
+                        self._needs_full.add(user_id)
+                        self._count(dropped=1)
+                    self.replica.finish_replay(replay_id)
+                replayed += 1
+                self._count(replayed=1)
+        finally:
+            self._replay_lock.release()
+
+    def sync_once(self):
+        """큐의 쓰기를 다시 보내고 최근에 읽은 사용자를 동기화 -> 바뀐 행 수 (백그라운드 스레드가 주기마다 호출)"""
+        self.replay_pending()
+        changed, now = 0, time.monotonic()
+        for user_id, last_read in list(self._active.items()):
+            if now - last_read > REPLICA_ACTIVE_WINDOW:
+                self._active.pop(user_id, None)
+                continue
+            try:
+                changed += self.sync_user(user_id)
+            except ReadOnlyModeError:
+                break
+            except Exception as e:
+                self._count(failed_syncs=1)
+                self.on_error(f"Replica sync failed ({user_id}): {e}")
+        return changed
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.on_error(f"Replica sync failed: {e}")
+
+    def status(self):
+        """차단기 상태, 다시 보낼 쓰기 수, 동기화 대상 사용자 수, 동기화 통계"""
+        with self._stats_lock:
+            stats = dict(self.sync_stats)
+        return dict(stats, circuit=self.breaker.state, circuit_opened=self.breaker.opened,
+                    queued_writes=self.replica.count_replays(), active_users=len(self._active))
+
+    # -------------------- 읽기 (로컬) --------------------
+
+    get_children = _read('get_children')
+    get_events = _read('get_events')
+    get_event_by_id = _read('get_event_by_id')
+    get_checklist = _read('get_checklist')
+    get_archived_events = _read('get_archived_events')
+    search_events = _read('search_events')
+    get_data_version = _read('get_data_version')
+    get_changes = _read('get_changes')
+    get_user_tier = _read('get_user_tier')
+    get_usage = _read('get_usage')
+    get_usage_history = _read('get_usage_history')
+
+    # -------------------- 쓰기 --------------------
+
+    add_child = _replayable('add_child')
+    delete_child = _replayable('delete_child')
+    update_child_name = _replayable('update_child_name')
+    update_event = _replayable('update_event')
+    delete_event = _replayable('delete_event')
+    update_checklist_item = _replayable('update_checklist_item')
+    delete_checklist_item = _replayable('delete_checklist_item')
+    update_checklist_item_name = _replayable('update_checklist_item_name')
+
+    save_events = _primary_write('save_events')
+    add_checklist_item = _primary_write('add_checklist_item')
+    archive_events = _primary_write('archive_events')
+    reset_all_data = _primary_write('reset_all_data')
+    restore_backup_chunk = _primary_write('restore_backup_chunk')
+    increment_usage = _primary_write('increment_usage')
+    consume_usage = _primary_write('consume_usage')
+    refund_usage = _primary_write('refund_usage')
+    update_user_tier = _primary_write('update_user_tier')
+
+    def get_import_checkpoint(self, user_id, backup_id):
+        # 복원 진행 위치는 복원을 처리하는 Supabase 쪽에만 있음
+        return self._call_primary('get_import_checkpoint', user_id, backup_id)
@@ -0,0 +1,267 @@
+"""
+Storage Repository Interface
+저장소 구현(SQLite / Supabase / 메모리)이 공통으로 제공하는 메서드 정의입니다.
+
+캐싱, 커서 인코딩, future_only 같은 날짜 계산은 database_utils에서 처리하고
+저장소는 요청받은 그대로 읽고 쓰기만 합니다.
+
+이벤트/체크리스트/아이는 사용자별로 분리되어 있으며 모든 메서드는 user_id를 첫 인자로 받아
+해당 사용자의 데이터만 읽고 씁니다. 다른 사용자의 id를 넘기면 없는 것처럼 동작합니다.
+
+이벤트 형식 (get_events / get_event_by_id 반환값, models.Event - dict처럼 읽을 수 있고 to_dict()로 변환):
+    id, event_name, event_date, event_time, country, child_tag, translation, cultural_context,
+    tips, created_at, memo,
+    checked_count, total_count: 체크된 / 전체 준비물 개수 (체크리스트 행을 읽지 않고 진행률 표시)
+    checklist_with_status: [ChecklistItem{'id', 'name', 'checked'(, 'metadata')}, ...] (position, id 순)
+                           목록을 checklists=False로 조회하면 None (상세 화면에서 get_checklist로 따로 조회)
+    translation, cultural_context, tips: 목록을 details=False로 조회하면 None (목록 카드에는 필요 없는 긴 텍스트)
+
+체크리스트는 checklist_items 테이블에만 저장됩니다. (마이그레이션 005에서 events.checklist_items JSON 컬럼 제거)
+저장할 때 event_data['checklist_items']의 항목은 문자열 또는 {'name': ..., 'metadata': {...}} dict입니다.
+"""
+import json
+
+from .models import ChecklistItem
+
+# 사용자 구분이 생기기 전에 저장된 데이터의 소유자 (마이그레이션 004에서 배정)
+DEFAULT_USER_ID = 'local'
+
+# 앱 동기화(get_changes)가 돌려주는 테이블 (삭제 기록의 키도 같은 이름)
+SYNC_ENTITIES = ('events', 'checklist_items', 'children')
+# 삭제 기록(tombstones) 보관 기간 - 이보다 오래된 since로 요청하면 삭제를 놓칠 수 있으므로 전체를 다시 보냄
+# 지난 기록은 get_changes가 이 기간으로 정리 (SQLite는 파이썬에서, Supabase는 sync_changes RPC에 p_retention_days로 넘김)
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+class StorageUnavailableError(RuntimeError):
+    """저장소에서 읽지 못함 (재시도까지 실패) - 빈 목록이나 기본값으로 대신하지 않음
+
+    백엔드는 503 + Retry-After로 응답하고, Streamlit 앱은 on_error(st.error)로 표시된 뒤 화면 그리기를 멈춤
+    """
+
+
+def event_insert_values(user_id, event_data):
+    """저장할 이벤트 컬럼 값 (SQL_INSERT_EVENT 컬럼 순서와 동일한 dict)"""
+    return {
+        "user_id": user_id,
+        "event_name": event_data['event_name'],
+        "event_date": event_data['event_date'],
+        "event_time": event_data.get('event_time') or '',
+        "country": event_data.get('country', ''),
+        "child_tag": event_data.get('child_tag', '없음'),
+        "translation": event_data.get('translation', ''),
+        "cultural_context": event_data.get('cultural_context', ''),
+        "tips": event_data.get('tips', ''),
+        "memo": event_data.get('memo', '')
+    }
+
+
+def checklist_entries(event_data):
+    """저장할 체크리스트 항목 [(이름, metadata dict 또는 None), ...] (position은 목록 순서)"""
+    entries = []
+    for item in event_data.get('checklist_items', []):
+        if isinstance(item, (dict, ChecklistItem)):
+            entries.append((item.get('name', ''), item.get('metadata') or None))
+        else:
+            entries.append((item, None))
+    return entries
+
+
+def checklist_item(item_id, name, checked, metadata=None):
+    """checklist_with_status 항목 (metadata는 있을 때만 포함)"""
+    return ChecklistItem(item_id, name, checked, metadata)
+
+
+def changed_item(item_id, event_id, name, checked, position, metadata=None):
+    """get_changes의 체크리스트 항목 (checklist_with_status 항목 + 부모 event_id와 position)"""
+    return {'event_id': event_id, 'position': position, **checklist_item(item_id, name, checked, metadata).to_dict()}
+
+
+def safe_json_loads(data):
+    """문자열이면 JSON 파싱, 이미 객체면 그대로 반환"""
+    if data is None:
+        return []
+    if isinstance(data, (list, dict)):
+        return data
+    try:
+        return json.loads(data) if isinstance(data, str) else []
+    except:
+        return []
+
+
+class Repository:
+    """저장소 인터페이스 (구현 클래스가 모든 메서드를 재정의)"""
+
+    name = None
+
+    def init(self):
+        """스키마 준비 (SQLite는 마이그레이션 적용)"""
+
+    def close(self):
+        """열린 연결 정리"""
+
+    # -------------------- 아이 --------------------
+
+    def get_children(self, user_id):
+        """아이 이름 목록 (display_order, id 순)"""
+        raise NotImplementedError
+
+    def add_child(self, user_id, name):
+        """아이 추가, 같은 이름이 있으면 False"""
+        raise NotImplementedError
+
+    def delete_child(self, user_id, name):
+        raise NotImplementedError
+
+    def update_child_name(self, user_id, old_name, new_name):
+        """아이 이름과 이벤트의 child_tag를 함께 변경, 실패 시 False"""
+        raise NotImplementedError
+
+    # -------------------- 이벤트 --------------------
+
+    def save_events(self, user_id, events_data):
+        """이벤트와 체크리스트를 한 번에 저장하고 새 id 목록을 입력 순서대로 반환"""
+        raise NotImplementedError
+
+    def get_events(self, user_id, date_from=None, date_to=None, limit=None, cursor_key=None, checklists=True, details=True):
+        """(event_date, event_time, id) 순 이벤트 목록
+
+        date_from/date_to: 양끝 포함 날짜 범위, cursor_key: 이 정렬 키보다 뒤의 이벤트만, limit: 최대 개수
+        checklists: False이면 체크리스트 항목 없이 준비물 개수만 (checklist_with_status는 None)
+        details: False이면 긴 설명(models.EVENT_DETAIL_TEXT_FIELDS)을 읽지 않음 (해당 필드는 None)
+        """
+        raise NotImplementedError
+
+    def get_event_by_id(self, user_id, event_id):
+        """이벤트 한 건 (없으면 None)"""
+        raise NotImplementedError
+
+    def get_checklist(self, user_id, event_id):
+        """이벤트 한 건의 체크리스트 항목 목록 (보관된 이벤트 포함, 없으면 빈 목록)"""
+        raise NotImplementedError
+
+    def delete_event(self, user_id, event_id):
+        """이벤트 삭제 (보관된 이벤트도 삭제)"""
+        raise NotImplementedError
+
+    def update_event(self, user_id, event_id, event_data):
+        raise NotImplementedError
+
+    # -------------------- 보관 --------------------
+
+    def archive_events(self, user_id, before_date, batch_size):
+        """event_date가 before_date보다 이전인 이벤트를 체크리스트와 함께 보관 영역으로 이동, 옮긴 개수 반환
+
+        batch_size개씩 각자의 트랜잭션으로 옮기며 id는 그대로 유지합니다.
+        보관된 이벤트는 get_events / get_event_by_id에 나타나지 않고 get_archived_events로만 조회됩니다.
+        """
+        raise NotImplementedError
+
+    def get_archived_events(self, user_id, limit=None, cursor_key=None, checklists=True, details=True):
+        """보관된 이벤트 목록 ((event_date, event_time, id) 역순 - 최근 날짜부터)
+
+        cursor_key: 이 정렬 키보다 앞의 이벤트만, limit: 최대 개수, checklists / details: get_events와 같음
+        """
+        raise NotImplementedError
+
+    # -------------------- 검색 --------------------
+
+    def search_events(self, user_id, terms, limit, offset=0):
+        """검색어(terms)가 모두 들어 있는 이벤트를 보관된 이벤트까지 관련도 순으로 검색
+
+        검색 대상: 이벤트 이름, 번역, 문화 설명, 팁, 메모, 체크리스트 항목 이름 (검색어는 단어의 앞부분과 일치)
+        반환: [{'event': Event, 'archived': 보관 여부, 'snippet': 일치 부분 ('**'로 강조)}, ...]
+        """
+        raise NotImplementedError
+
+    # -------------------- 체크리스트 --------------------
+
+    def update_checklist_item(self, user_id, item_id, is_checked):
+        """항목 체크 상태 변경, 항목이 속한 이벤트 id 반환 (없으면 None)"""
+        raise NotImplementedError
+
+    def add_checklist_item(self, user_id, event_id, item_name):
+        raise NotImplementedError
+
+    def delete_checklist_item(self, user_id, item_id):
+        """항목 삭제, 항목이 속했던 이벤트 id 반환 (없으면 None)"""
+        raise NotImplementedError
+
+    def update_checklist_item_name(self, user_id, item_id, new_name):
+        raise NotImplementedError
+
+    def reset_all_data(self, user_id):
+        """사용자의 이벤트, 체크리스트, 아이 모두 삭제"""
+        raise NotImplementedError
+
+    def get_data_version(self, user_id):
+        """사용자 일정 데이터(이벤트/체크리스트)의 변경 번호
+
+        이벤트나 체크리스트가 바뀔 때마다 커지며 (보관 포함), 다른 프로세스의 쓰기도 반영됩니다.
+        반환: {'version': 변경 번호 (변경이 없었으면 0), 'updated_at': 마지막 변경 시각 'YYYY-MM-DD HH:MM:SS' UTC 또는 None}
+        """
+        raise NotImplementedError
+
+    def get_changes(self, user_id, since=None, details=True):
+        """since(이전 호출이 돌려준 watermark) 이후 바뀐 이벤트/체크리스트 항목/아이와 삭제된 id (앱 변경분 동기화)
+
+        반환: {'watermark': 다음 호출의 since (형식은 저장소마다 다름 - database_utils가 토큰으로 감쌈),
+               'full': True이면 변경분이 아니라 전체 (since가 없거나 TOMBSTONE_RETENTION_DAYS보다 오래됨),
+               'events': [Event] (checklist_with_status 없음, details=False면 긴 설명도 None),
+               'checklist_items': [changed_item], 'children': [{'id', 'name', 'display_order'}],
+               'deleted': {SYNC_ENTITIES의 이름: [id, ...]} (full이면 빈 목록)}
+        준비물이 바뀐 이벤트는 준비물 개수가 바뀌므로 이벤트도 함께 포함됩니다. 보관된 이벤트는 삭제로 나타납니다.
+        같은 행이 두 번 연속 호출에 포함될 수 있으므로 (기준 시각을 몇 초 겹침) 받는 쪽은 id로 덮어씁니다.
+        """
+        raise NotImplementedError
+
+    # -------------------- 백업 복원 --------------------
+
+    def restore_backup_chunk(self, user_id, backup_id, line_no, records):
+        """백업 레코드 묶음을 한 트랜잭션으로 넣고 (backup_id, line_no)를 복원 진행 위치로 기록
+
+        records: shared/backup.py가 검사한 레코드 목록
+            {'type': 'child', 'name'}: 같은 이름이 없을 때만 목록 끝에 추가
+            {'type': 'usage', 'month_year', 'analysis_count'}: 기존 사용량보다 클 때만 반영 (사용량을 줄이지 않음)
+            {'type': 'event', 'archived', 이벤트 필드..., 'created_at', 'checklist': [{'name', 'checked'(, 'metadata')}]}:
+                새 id로 추가하고 체크 상태를 그대로 복원, archived면 보관 영역으로
+        레코드와 진행 위치가 함께 커밋되므로 실패 후 다시 복원해도 같은 레코드가 두 번 들어가지 않습니다.
+        """
+        raise NotImplementedError
+
+    def get_import_checkpoint(self, user_id, backup_id):
+        """backup_id 복원이 마지막으로 커밋한 줄 번호 (없으면 0)"""
+        raise NotImplementedError
+
+    # -------------------- 사용자 --------------------
+
+    def get_user_tier(self, user_id):
+        """구독 등급 (사용자가 없으면 FREE로 생성)"""
+        raise NotImplementedError
+
+    def get_usage(self, user_id, month_year):
+        raise NotImplementedError
+
+    def get_usage_history(self, user_id):
+        """월별 사용량 [{'month_year', 'analysis_count'}, ...] (month_year 순)"""
+        raise NotImplementedError
+
+    def increment_usage(self, user_id, month_year):
+        """사용량 1 증가 (한도 확인 없음), 증가 후 사용량 반환 (실패 시 None)"""
+        raise NotImplementedError
+
+    def consume_usage(self, user_id, month_year, limits):
+        """등급별 한도(limits: {등급: 월 최대 횟수}) 안에서만 사용량 1 증가
+
+        한도 확인과 증가를 하나의 원자적 문장/RPC로 처리하므로 동시에 요청해도 한도를 넘거나 횟수를 잃지 않습니다.
+        반환: {'allowed': 증가 여부, 'usage': 처리 후 사용량, 'limit': 적용된 한도}
+        """
+        raise NotImplementedError
+
+    def refund_usage(self, user_id, month_year):
+        """consume_usage로 차감한 1회 반환 (분석 실패 시, 0 아래로 내려가지 않음)"""
+        raise NotImplementedError
+
+    def update_user_tier(self, user_id, new_tier):
+        """구독 등급 변경, 성공 여부 반환"""
+        raise NotImplementedError
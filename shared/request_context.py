@@ -0,0 +1,124 @@
+"""
+Request Context
+Streamlit 재실행 한 번 / API 요청 하나 동안 쓰는 사용자 데이터를 한 번씩만 불러오고,
+그동안 저장소(DB)를 몇 번 호출했는지 셉니다.
+
+    with RequestContext(user_id) as ctx:
+        ctx.children()      # 처음 호출할 때만 조회, 이후에는 같은 값
+        ctx.tier(); ctx.usage(); ctx.future_events()
+        ctx.db_call_count() # 이 컨텍스트 안에서 저장소를 호출한 횟수 (캐시 적중은 제외)
+
+- DB 호출 수는 database_utils가 저장소 메서드를 부를 때마다 record_db_call()로 기록합니다.
+  (async_database_utils의 스레드 풀에서 실행된 호출도 요청 컨텍스트에 합산)
+- budget(SENSE_COACH_DB_CALL_BUDGET)을 넘으면 컨텍스트가 끝날 때 on_over_budget으로 알리고,
+  strict=True이면 DBCallBudgetExceeded를 발생시킵니다. (개발/벤치마크에서 회귀 확인용)
+  스트리밍 응답처럼 컨텍스트가 끝난 뒤에도 호출이 이어지면 check_on_exit=False로 만들고 다 끝난 뒤 check_budget()을 부릅니다.
+"""
+import contextvars
+import os
+import threading
+from collections import Counter
+
+DB_CALL_BUDGET = int(os.getenv("SENSE_COACH_DB_CALL_BUDGET", "0")) or None
+
+_current = contextvars.ContextVar("sense_coach_request_context", default=None)
+
+
+class DBCallBudgetExceeded(RuntimeError):
+    """요청 하나의 DB 호출 수가 예산을 넘음 (strict 모드)"""
+
+
+def current_context():
+    """진행 중인 요청 컨텍스트 (없으면 None)"""
+    return _current.get()
+
+
+def record_db_call(method):
+    """진행 중인 요청 컨텍스트에 저장소 호출 1회 기록 (컨텍스트 밖이면 무시)"""
+    context = _current.get()
+    if context is not None:
+        context.record_db_call(method)
+
+
+class RequestContext:
+    """요청 하나 동안의 사용자 데이터 (처음 쓸 때 한 번만 조회) + DB 호출 집계
+
+    user_id: 요청한 사용자
+    budget: 허용 DB 호출 수 (None이면 확인하지 않음)
+    strict: 예산 초과 시 예외 발생 여부
+    on_over_budget: 예산 초과를 알리는 함수 (기본 print)
+    check_on_exit: 컨텍스트가 끝날 때 예산 확인 여부 (False이면 호출한 쪽이 check_budget()을 직접 부름)
+    """
+
+    def __init__(self, user_id, budget=DB_CALL_BUDGET, strict=False, on_over_budget=print, check_on_exit=True):
+        self.user_id = user_id
+        self.budget = budget
+        self.strict = strict
+        self.on_over_budget = on_over_budget
+        self.check_on_exit = check_on_exit
+        self.db_calls = Counter()   # 저장소 메서드 이름 -> 호출 수
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self._token = None
+        # 다른 예외(st.rerun/st.stop 포함)로 끝나는 중이면 알리기만 하고 원래 예외를 그대로 전달
+        if self.check_on_exit:
+            self.check_budget(raise_error=exc_type is None)
+        return False
+
+    def record_db_call(self, method):
+        with self._lock:
+            self.db_calls[method] += 1
+
+    def db_call_count(self):
+        """지금까지 저장소를 호출한 횟수"""
+        with self._lock:
+            return sum(self.db_calls.values())
+
+    def check_budget(self, raise_error=True):
+        """예산을 넘었으면 알리고 (strict이면 예외), 예산 안이면 True"""
+        count = self.db_call_count()
+        if self.budget is None or count <= self.budget:
+            return True
+        message = f"DB 호출 예산 초과: {count}회 (예산 {self.budget}회) {dict(self.db_calls)}"
+        if self.strict and raise_error:
+            raise DBCallBudgetExceeded(message)
+        self.on_over_budget(message)
+        return False
+
+    def once(self, name, loader):
+        """name의 값을 이 컨텍스트에서 처음 요청할 때만 loader()로 불러옴"""
+        if name not in self._loaded:
+            self._loaded[name] = loader()
+        return self._loaded[name]
+
+    def forget(self, *names):
+        """같은 요청 안에서 쓰기 후 다시 불러와야 하는 값 지우기"""
+        for name in names:
+            self._loaded.pop(name, None)
+
+    # -------------------- 자주 쓰는 사용자 데이터 --------------------
+
+    def children(self):
+        from . import database_utils
+        return self.once('children', lambda: database_utils.get_children(self.user_id))
+
+    def tier(self):
+        from . import database_utils
+        return self.once('tier', lambda: database_utils.get_user_tier(self.user_id))
+
+    def usage(self):
+        from . import database_utils
+        return self.once('usage', lambda: database_utils.get_usage(self.user_id))
+
+    def future_events(self):
+        """다가오는 이벤트 요약 (준비물 개수만, 체크리스트 항목은 get_event_checklist로 따로 조회)"""
+        from . import database_utils
+        return self.once('future_events', lambda: database_utils.get_events(self.user_id, future_only=True, checklists=False))
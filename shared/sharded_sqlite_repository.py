@@ -0,0 +1,197 @@
+"""
+Sharded SQLite Repository
+사용자(가족)마다 별도의 SQLite 파일을 쓰는 저장소 구현입니다. (SENSE_COACH_STORAGE=sqlite_sharded)
+
+- 파일 위치: <샤드 디렉터리>/<해시 앞 2자리>/<sha1(user_id)>.db
+  샤드 디렉터리를 여러 개 지정하면 (SENSE_COACH_SHARD_DIRS, os.pathsep 구분) 해시로 나눠 배치하므로
+  디렉터리마다 다른 볼륨을 마운트할 수 있습니다. 디렉터리 목록과 순서는 운영 중에 바꾸지 말 것.
+- 샤드는 처음 사용할 때 열고 스키마/마이그레이션을 적용하며, 열린 샤드 수는 LRU로 제한합니다.
+- 쓰기 잠금이 파일마다 따로 있으므로 서로 다른 가족의 쓰기가 하나의 잠금에 줄 서지 않습니다.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .migrations import migrate, pending_migrations
+from .repository import Repository
+from .sqlite_repository import SQLiteRepository
+
+SHARD_DIRS = [d for d in os.getenv("SENSE_COACH_SHARD_DIRS", "shards").split(os.pathsep) if d]
+MAX_OPEN_SHARDS = int(os.getenv("SENSE_COACH_SHARD_MAX_OPEN", "64"))
+
+# 샤드 하나는 한 가족의 데이터만 담으므로 연결/메모리를 작게 잡음 (열린 샤드 수만큼 곱해짐)
+SHARD_MAX_READERS = 2
+SHARD_PRAGMAS = {
+    "mmap_size": 0,
+    "cache_size": -2000,   # 약 2MB
+}
+
+
+def shard_path(user_id, shard_dirs=SHARD_DIRS):
+    """user_id의 SQLite 파일 경로 (같은 user_id는 항상 같은 경로)"""
+    digest = hashlib.sha1(user_id.encode('utf-8')).hexdigest()
+    root = shard_dirs[zlib.crc32(digest.encode('ascii')) % len(shard_dirs)]
+    return os.path.join(root, digest[:2], f'{digest}.db')
+
+
+class _Shard:
+    """열린 샤드 하나 (사용 중인 요청 수를 세어 LRU에서 밀려나도 사용이 끝난 뒤에 닫음)"""
+
+    def __init__(self, path):
+        self.repository = SQLiteRepository(path, max_readers=SHARD_MAX_READERS, pragmas=SHARD_PRAGMAS)
+        self.leases = 0
+        self.evicted = False
+
+
+def _on_shard(name):
+    """user_id의 샤드를 열어 같은 이름의 SQLiteRepository 메서드로 위임"""
+    def method(self, user_id, *args, **kwargs):
+        with self.shard(user_id) as repository:
+            return getattr(repository, name)(user_id, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+class ShardedSQLiteRepository(Repository):
+    """user_id별 SQLite 파일 저장소
+
+    shard_dirs: 샤드 파일을 나눠 둘 디렉터리 목록
+    max_open: 동시에 열어 둘 샤드 수 (넘으면 가장 오래 안 쓴 샤드부터 닫음)
+    """
+
+    name = 'sqlite_sharded'
+
+    def __init__(self, shard_dirs=None, max_open=MAX_OPEN_SHARDS):
+        self.shard_dirs = list(shard_dirs or SHARD_DIRS)
+        self.max_open = max_open
+        self._open = OrderedDict()   # path -> _Shard (최근 사용 순)
+        self._lock = threading.Lock()
+
+    def init(self):
+        for root in self.shard_dirs:
+            os.makedirs(root, exist_ok=True)
+
+    def close(self):
+        with self._lock:
+            shards = list(self._open.values())
+            self._open.clear()
+        for shard in shards:
+            self._release(shard, evict=True)
+
+    def open_shards(self):
+        """현재 열려 있는 샤드 수"""
+        return len(self._open)
+
+    @contextmanager
+    def shard(self, user_id):
+        """user_id 샤드의 SQLiteRepository (처음 열 때 디렉터리 생성 + 마이그레이션)"""
+        path = shard_path(user_id, self.shard_dirs)
+        with self._lock:
+            shard = self._open.get(path)
+            if shard is not None:
+                self._open.move_to_end(path)
+                shard.leases += 1
+        if shard is None:
+            shard = self._open_shard(path)
+        try:
+            yield shard.repository
+        finally:
+            self._release(shard)
+
+    def _open_shard(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shard = _Shard(path)
+        # 같은 샤드를 여러 스레드가 동시에 처음 열어도 마이그레이션은 쓰기 잠금 안에서 한 번만 적용됨
+        if pending_migrations(shard.repository.db):
+            migrate(shard.repository.db)
+
+        evicted = []
+        with self._lock:
+            existing = self._open.get(path)
+            if existing is not None:
+                # 다른 스레드가 먼저 열었으면 그 샤드를 사용
+                self._open.move_to_end(path)
+                existing.leases += 1
+                duplicate, shard = shard, existing
+            else:
+                duplicate = None
+                shard.leases += 1
+                self._open[path] = shard
+                while len(self._open) > self.max_open:
+                    _, old = self._open.popitem(last=False)
+                    evicted.append(old)
+        if duplicate is not None:
+            duplicate.repository.close()
+        for old in evicted:
+            self._release(old, evict=True)
+        return shard
+
+    def _release(self, shard, evict=False):
+        """사용 종료 또는 LRU 제거 - 둘 다 끝난 샤드만 실제로 닫음"""
+        with self._lock:
+            if evict:
+                shard.evicted = True
+            else:
+                shard.leases -= 1
+            close = shard.evicted and shard.leases == 0
+        if close:
+            shard.repository.close()
+
+    def migrate_all(self):
+        """디스크에 있는 모든 샤드에 대기 중인 마이그레이션 적용, 적용한 샤드 수 반환"""
+        migrated = 0
+        for root in self.shard_dirs:
+            if not os.path.isdir(root):
+                continue
+            for sub in sorted(os.listdir(root)):
+                sub_dir = os.path.join(root, sub)
+                if not os.path.isdir(sub_dir):
+                    continue
+                for file_name in sorted(os.listdir(sub_dir)):
+                    if not file_name.endswith('.db'):
+                        continue
+                    repository = SQLiteRepository(os.path.join(sub_dir, file_name), max_readers=1, pragmas=SHARD_PRAGMAS)
+                    try:
+                        if migrate(repository.db):
+                            migrated += 1
+                    finally:
+                        repository.close()
+        return migrated
+
+    get_children = _on_shard('get_children')
+    add_child = _on_shard('add_child')
+    delete_child = _on_shard('delete_child')
+    update_child_name = _on_shard('update_child_name')
+
+    save_events = _on_shard('save_events')
+    get_events = _on_shard('get_events')
+    get_event_by_id = _on_shard('get_event_by_id')
+    get_checklist = _on_shard('get_checklist')
+    delete_event = _on_shard('delete_event')
+    update_event = _on_shard('update_event')
+
+    archive_events = _on_shard('archive_events')
+    get_archived_events = _on_shard('get_archived_events')
+    search_events = _on_shard('search_events')
+
+    update_checklist_item = _on_shard('update_checklist_item')
+    add_checklist_item = _on_shard('add_checklist_item')
+    delete_checklist_item = _on_shard('delete_checklist_item')
+    update_checklist_item_name = _on_shard('update_checklist_item_name')
+    reset_all_data = _on_shard('reset_all_data')
+    get_data_version = _on_shard('get_data_version')
+    get_changes = _on_shard('get_changes')
+
+    restore_backup_chunk = _on_shard('restore_backup_chunk')
+    get_import_checkpoint = _on_shard('get_import_checkpoint')
+
+    get_user_tier = _on_shard('get_user_tier')
+    get_usage = _on_shard('get_usage')
+    get_usage_history = _on_shard('get_usage_history')
+    increment_usage = _on_shard('increment_usage')
+    consume_usage = _on_shard('consume_usage')
+    refund_usage = _on_shard('refund_usage')
+    update_user_tier = _on_shard('update_user_tier')
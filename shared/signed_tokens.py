@@ -0,0 +1,70 @@
+"""
+Signed Tokens
+서버만 만들 수 있는 '<값 base64>.<HMAC 서명>' 토큰 (캘린더 구독 URL, 앱 API 세션)
+
+- 서명은 HMAC-SHA256의 앞 18바이트를 URL에 쓸 수 있는 base64로 (토큰을 URL 경로에도 그대로 넣을 수 있음)
+- scope를 서명에 함께 넣으므로 같은 키를 써도 캘린더 구독 토큰을 API 토큰으로 쓸 수 없음
+- 앱 API 토큰의 서명 키: SENSE_COACH_API_SECRET (키를 바꾸면 발급된 토큰은 모두 무효, 앱은 새 세션을 받아야 함)
+"""
+import base64
+import hashlib
+import hmac
+import os
+import uuid
+
+API_SECRET_ENV = 'SENSE_COACH_API_SECRET'
+API_SCOPE = 'api'
+
+
+def env_secret(name, purpose):
+    """환경 변수의 서명 키 (없으면 RuntimeError - 백엔드는 500으로 응답)"""
+    secret = os.getenv(name)
+    if not secret:
+        raise RuntimeError(f"{purpose}을 사용하려면 {name}이 필요합니다.")
+    return secret.encode('utf-8')
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _signature(payload, secret, scope=''):
+    message = f'{scope}:{payload}' if scope else payload
+    return _b64(hmac.new(secret, message.encode('ascii'), hashlib.sha256).digest()[:18])
+
+
+def sign(value, secret, scope=''):
+    """value를 담은 토큰 ('<value base64>.<HMAC 서명>')"""
+    payload = _b64(value.encode('utf-8'))
+    return f'{payload}.{_signature(payload, secret, scope)}'
+
+
+def verify(token, secret, scope=''):
+    """토큰에 담긴 값 (형식이 잘못됐거나 서명이 맞지 않으면 None, 헤더/URL에서 온 아무 문자열이나 받아도 예외 없음)"""
+    if not token.isascii():
+        return None
+    payload, _, signature = token.partition('.')
+    if not payload or not hmac.compare_digest(signature, _signature(payload, secret, scope)):
+        return None
+    try:
+        return base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)).decode('utf-8')
+    except ValueError:
+        return None
+
+
+# ==================== 앱 API 세션 ====================
+
+def api_token(user_id):
+    """앱이 Authorization: Bearer로 보낼 토큰"""
+    return sign(user_id, env_secret(API_SECRET_ENV, 'API 인증'), API_SCOPE)
+
+
+def user_from_api_token(token):
+    """토큰의 user_id (잘못된 토큰이면 None)"""
+    return verify(token, env_secret(API_SECRET_ENV, 'API 인증'), API_SCOPE)
+
+
+def new_api_session():
+    """새 사용자 id와 그 토큰 (앱 설치마다 한 번)"""
+    user_id = str(uuid.uuid4())
+    return {'user_id': user_id, 'token': api_token(user_id)}
@@ -0,0 +1,796 @@
+"""
+SQLite Repository
+ConnectionManager(읽기 풀 + 단일 쓰기 연결) 위에서 동작하는 저장소 구현입니다.
+"""
+import json
+import sqlite3
+from contextlib import closing
+
+from .db_pool import ConnectionManager, DB_PATH
+from .migrations import migrate
+from .models import Event
+from .repository import (
+    Repository, event_insert_values, checklist_entries, checklist_item, changed_item, SYNC_ENTITIES, TOMBSTONE_RETENTION_DAYS
+)
+
+# ==================== SQLite 쿼리 ====================
+# 아래 쿼리는 QUERY_CATALOG에도 등록되어 `python -m shared.migrations explain`으로 실행 계획을 확인할 수 있음
+
+SQL_SELECT_CHILDREN = 'SELECT name FROM children WHERE user_id = ? ORDER BY display_order ASC, id ASC'
+SQL_MAX_CHILD_ORDER = 'SELECT MAX(display_order) FROM children WHERE user_id = ?'
+SQL_INSERT_CHILD = 'INSERT INTO children (user_id, name, display_order) VALUES (?, ?, ?)'
+SQL_DELETE_CHILD = 'DELETE FROM children WHERE user_id = ? AND name = ?'
+SQL_RENAME_CHILD = 'UPDATE children SET name = ? WHERE user_id = ? AND name = ?'
+SQL_RENAME_CHILD_TAG = 'UPDATE events SET child_tag = ? WHERE user_id = ? AND child_tag = ?'
+SQL_RENAME_ARCHIVED_CHILD_TAG = 'UPDATE events_archive SET child_tag = ? WHERE user_id = ? AND child_tag = ?'
+# memo는 ALTER TABLE로 추가된 DB와 새로 만든 DB에서 위치가 다르므로 SELECT * 대신 컬럼 순서를 고정
+# checked_count / total_count는 체크리스트 트리거가 관리하는 준비물 개수 (요약 조회는 체크리스트 행을 읽지 않음)
+SQL_EVENT_COLUMNS = (
+    'id, event_name, event_date, event_time, country, child_tag, translation, cultural_context, tips, created_at, memo, '
+    'checked_count, total_count'
+)
+# 긴 설명(translation, cultural_context, tips) 없이 조회할 때의 컬럼 (같은 위치에 NULL을 두어 행 변환을 공유)
+SQL_EVENT_SUMMARY_COLUMNS = (
+    'id, event_name, event_date, event_time, country, child_tag, NULL, NULL, NULL, created_at, memo, '
+    'checked_count, total_count'
+)
+# 정렬 키 (event_date, event_time, id)는 키셋 페이지네이션 커서와 동일 (LIMIT -1 = 제한 없음)
+# {where}는 항상 user_id 조건으로 시작 (idx_events_user_date_time 사용)
+SQL_SELECT_EVENTS = 'SELECT ' + SQL_EVENT_COLUMNS + ' FROM events WHERE {where} ORDER BY event_date ASC, event_time ASC, id ASC LIMIT ?'
+SQL_SELECT_EVENT_SUMMARIES = SQL_SELECT_EVENTS.replace(SQL_EVENT_COLUMNS, SQL_EVENT_SUMMARY_COLUMNS, 1)
+# 이벤트 한 건 + 체크리스트를 한 번에 조회 (체크리스트가 없으면 ci.* 가 NULL인 한 행)
+SQL_SELECT_EVENT_BY_ID = '''
+    SELECT e.id, e.event_name, e.event_date, e.event_time, e.country, e.child_tag, e.translation,
+           e.cultural_context, e.tips, e.created_at, e.memo, e.checked_count, e.total_count,
+           ci.id, ci.item_name, ci.is_checked, ci.metadata
+    FROM events e LEFT JOIN checklist_items ci ON ci.event_id = e.id
+    WHERE e.id = ? AND e.user_id = ?
+    ORDER BY ci.position ASC, ci.id ASC
+'''
+SQL_SELECT_EVENT_CHECKLISTS = '''
+    SELECT event_id, id, item_name, is_checked, metadata FROM checklist_items
+    WHERE event_id IN ({placeholders})
+    ORDER BY event_id ASC, position ASC, id ASC
+'''
+# 이벤트 한 건의 체크리스트만 (상세 화면에서 필요할 때 조회, 보관된 이벤트는 보관 테이블에서)
+SQL_SELECT_CHECKLIST = '''
+    SELECT id, item_name, is_checked, metadata, position FROM checklist_items WHERE event_id = ? AND user_id = ?
+    UNION ALL
+    SELECT id, item_name, is_checked, metadata, position FROM checklist_items_archive WHERE event_id = ? AND user_id = ?
+    ORDER BY position ASC, id ASC
+'''
+SQL_WHERE_USER = 'user_id = ?'
+SQL_WHERE_DATE_FROM = 'event_date >= ?'
+SQL_WHERE_DATE_TO = 'event_date <= ?'
+SQL_WHERE_AFTER_CURSOR = '(event_date, event_time, id) > (?, ?, ?)'
+SQL_WHERE_BEFORE_CURSOR = '(event_date, event_time, id) < (?, ?, ?)'
+SQL_INSERT_EVENT = '''
+    INSERT INTO events
+    (user_id, event_name, event_date, event_time, country, child_tag, translation, cultural_context, tips, memo)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_CHECKLIST_ITEM = '''
+    INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position, metadata) VALUES (?, ?, ?, 0, ?, ?)
+'''
+# 이벤트가 해당 사용자 것일 때만 목록 끝에 추가
+SQL_ADD_CHECKLIST_ITEM = '''
+    INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position)
+    SELECT user_id, id, ?, 0, COALESCE((SELECT MAX(position) + 1 FROM checklist_items WHERE event_id = events.id), 0)
+    FROM events WHERE id = ? AND user_id = ?
+'''
+SQL_DELETE_EVENT = 'DELETE FROM events WHERE id = ? AND user_id = ?'
+SQL_DELETE_ARCHIVED_EVENT = 'DELETE FROM events_archive WHERE id = ? AND user_id = ?'
+# 항목 상태 변경/삭제는 항목의 event_id를 반환 (캐시된 요약 목록의 준비물 개수 무효화용)
+SQL_SET_ITEM_CHECKED = 'UPDATE checklist_items SET is_checked = ? WHERE id = ? AND user_id = ? RETURNING event_id'
+SQL_UPDATE_EVENT = '''
+    UPDATE events
+    SET event_name = ?, event_date = ?, event_time = ?, country = ?, child_tag = ?, memo = ?
+    WHERE id = ? AND user_id = ?
+'''
+SQL_DELETE_ITEM = 'DELETE FROM checklist_items WHERE id = ? AND user_id = ? RETURNING event_id'
+SQL_RENAME_ITEM = 'UPDATE checklist_items SET item_name = ? WHERE id = ? AND user_id = ?'
+# 체크리스트는 events 삭제 시 ON DELETE CASCADE로 함께 삭제
+SQL_RESET_USER_DATA = [
+    'DELETE FROM events WHERE user_id = ?',
+    'DELETE FROM events_archive WHERE user_id = ?',
+    'DELETE FROM children WHERE user_id = ?',
+]
+# 보관: 기준일 이전 이벤트를 오래된 순서로 한 배치씩 골라 체크리스트와 함께 복사한 뒤 events에서 삭제
+SQL_SELECT_ARCHIVE_BATCH = '''
+    SELECT id FROM events WHERE user_id = ? AND event_date < ?
+    ORDER BY event_date ASC, event_time ASC, id ASC LIMIT ?
+'''
+SQL_COPY_TO_ARCHIVE = '''
+    INSERT INTO events_archive (user_id, ''' + SQL_EVENT_COLUMNS + ''')
+    SELECT user_id, ''' + SQL_EVENT_COLUMNS + ''' FROM events WHERE id IN ({placeholders})
+'''
+SQL_COPY_CHECKLISTS_TO_ARCHIVE = '''
+    INSERT INTO checklist_items_archive (id, user_id, event_id, item_name, is_checked, position, metadata)
+    SELECT id, user_id, event_id, item_name, is_checked, position, metadata FROM checklist_items WHERE event_id IN ({placeholders})
+'''
+SQL_DELETE_ARCHIVED_FROM_EVENTS = 'DELETE FROM events WHERE id IN ({placeholders})'
+# 보관된 이벤트는 최근 날짜부터 (다음 페이지는 커서보다 앞의 이벤트)
+SQL_SELECT_ARCHIVED_EVENTS = (
+    'SELECT ' + SQL_EVENT_COLUMNS + ' FROM events_archive WHERE {where} '
+    'ORDER BY event_date DESC, event_time DESC, id DESC LIMIT ?'
+)
+SQL_SELECT_ARCHIVED_EVENT_SUMMARIES = SQL_SELECT_ARCHIVED_EVENTS.replace(SQL_EVENT_COLUMNS, SQL_EVENT_SUMMARY_COLUMNS, 1)
+SQL_SELECT_ARCHIVED_CHECKLISTS = '''
+    SELECT event_id, id, item_name, is_checked, metadata FROM checklist_items_archive
+    WHERE event_id IN ({placeholders})
+    ORDER BY event_id ASC, position ASC, id ASC
+'''
+# 검색: FTS5 색인에서 관련도(rank = 마이그레이션 007에서 설정한 열 가중치 bm25) 순으로 id와 일치 부분을 찾은 뒤 이벤트를 id로 조회
+SQL_SEARCH_EVENTS = '''
+    SELECT rowid, snippet(events_fts, -1, '**', '**', '…', 12) FROM events_fts
+    WHERE events_fts MATCH ? AND user_id = ?
+    ORDER BY rank LIMIT ? OFFSET ?
+'''
+SQL_SELECT_EVENTS_BY_IDS = 'SELECT ' + SQL_EVENT_COLUMNS + ' FROM events WHERE user_id = ? AND id IN ({placeholders})'
+SQL_SELECT_ARCHIVED_EVENTS_BY_IDS = 'SELECT ' + SQL_EVENT_COLUMNS + ' FROM events_archive WHERE user_id = ? AND id IN ({placeholders})'
+# 사용자 일정 데이터 변경 번호 (마이그레이션 009의 트리거가 관리)
+SQL_SELECT_DATA_VERSION = 'SELECT version, updated_at FROM data_versions WHERE user_id = ?'
+# 앱 동기화: updated_at / tombstones는 마이그레이션 012의 트리거가 관리 (밀리초까지의 UTC 문자열이라 문자열 비교 = 시각 비교)
+# 다음 기준 시각은 SYNC_OVERLAP만큼 앞당김 (커밋 전에 변경 시각을 기록한 쓰기 트랜잭션을 놓치지 않도록),
+# since가 삭제 기록 보관 기간보다 오래됐으면 만료 (전체를 다시 보냄), 보관 기간이 지난 삭제 기록이 있으면 정리
+# (보관 기간은 TOMBSTONE_RETENTION_DAYS 하나로만 - 마이그레이션 014부터 트리거는 기록만 함)
+SYNC_OVERLAP = '-5 seconds'
+SQL_TOMBSTONE_CUTOFF = f"strftime('%Y-%m-%d %H:%M:%f', 'now', '-{TOMBSTONE_RETENTION_DAYS} days')"
+SQL_SYNC_WATERMARK = f'''
+    SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', '{SYNC_OVERLAP}'), ? < {SQL_TOMBSTONE_CUTOFF},
+           EXISTS (SELECT 1 FROM tombstones WHERE user_id = ? AND deleted_at < {SQL_TOMBSTONE_CUTOFF})
+'''
+SQL_PURGE_TOMBSTONES = f'DELETE FROM tombstones WHERE user_id = ? AND deleted_at < {SQL_TOMBSTONE_CUTOFF}'
+SQL_SELECT_CHANGED_EVENTS = 'SELECT ' + SQL_EVENT_COLUMNS + ' FROM events WHERE user_id = ? AND updated_at > ? ORDER BY id ASC'
+SQL_SELECT_CHANGED_EVENT_SUMMARIES = SQL_SELECT_CHANGED_EVENTS.replace(SQL_EVENT_COLUMNS, SQL_EVENT_SUMMARY_COLUMNS, 1)
+SQL_SELECT_CHANGED_ITEMS = '''
+    SELECT id, event_id, item_name, is_checked, position, metadata FROM checklist_items
+    WHERE user_id = ? AND updated_at > ? ORDER BY event_id ASC, position ASC, id ASC
+'''
+SQL_SELECT_CHANGED_CHILDREN = '''
+    SELECT id, name, display_order FROM children WHERE user_id = ? AND updated_at > ? ORDER BY display_order ASC, id ASC
+'''
+SQL_SELECT_TOMBSTONES = 'SELECT entity, entity_id FROM tombstones WHERE user_id = ? AND deleted_at > ? ORDER BY deleted_at ASC'
+# 백업 복원: 이벤트는 원래 생성 시각과 체크 상태 그대로, 아이는 같은 이름이 없을 때만 목록 끝에,
+# 사용량은 기존 값보다 클 때만 (백업 파일을 고쳐 사용량을 줄일 수 없도록)
+SQL_RESTORE_EVENT = '''
+    INSERT INTO events
+    (user_id, event_name, event_date, event_time, country, child_tag, translation, cultural_context, tips, memo, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+SQL_RESTORE_CHECKLIST_ITEM = '''
+    INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position, metadata) VALUES (?, ?, ?, ?, ?, ?)
+'''
+SQL_RESTORE_CHILD = '''
+    INSERT OR IGNORE INTO children (user_id, name, display_order)
+    SELECT ?, ?, COALESCE(MAX(display_order), 0) + 1 FROM children WHERE user_id = ?
+'''
+SQL_RESTORE_USAGE = '''
+    INSERT INTO usage_tracking (user_id, month_year, analysis_count) VALUES (?, ?, ?)
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = MAX(analysis_count, excluded.analysis_count)
+'''
+SQL_SELECT_IMPORT_CHECKPOINT = 'SELECT line_no FROM import_checkpoints WHERE user_id = ? AND backup_id = ?'
+SQL_SAVE_IMPORT_CHECKPOINT = '''
+    INSERT INTO import_checkpoints (user_id, backup_id, line_no) VALUES (?, ?, ?)
+    ON CONFLICT (user_id, backup_id) DO UPDATE SET line_no = excluded.line_no, updated_at = CURRENT_TIMESTAMP
+'''
+SQL_SELECT_TIER = 'SELECT subscription_tier FROM users WHERE user_id = ?'
+SQL_INSERT_USER = 'INSERT OR IGNORE INTO users (user_id, subscription_tier) VALUES (?, ?)'
+SQL_UPDATE_TIER = 'UPDATE users SET subscription_tier = ? WHERE user_id = ?'
+SQL_SELECT_USAGE = 'SELECT analysis_count FROM usage_tracking WHERE user_id = ? AND month_year = ?'
+SQL_SELECT_USAGE_HISTORY = 'SELECT month_year, analysis_count FROM usage_tracking WHERE user_id = ? ORDER BY month_year ASC'
+SQL_INCREMENT_USAGE = '''
+    INSERT INTO usage_tracking (user_id, month_year, analysis_count) VALUES (?, ?, 1)
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = analysis_count + 1
+    RETURNING analysis_count
+'''
+# 사용자 등급의 한도 (:limits는 {등급: 월 최대 횟수} JSON, 사용자가 없거나 모르는 등급이면 FREE 한도)
+SQL_USAGE_LIMIT = '''COALESCE(
+        json_extract(:limits, '$.' || COALESCE((SELECT subscription_tier FROM users WHERE user_id = :user_id), 'FREE')),
+        json_extract(:limits, '$.FREE'))'''
+# 한도 확인 + 증가를 한 문장으로 (한도에 도달했으면 행이 반환되지 않음)
+SQL_CONSUME_USAGE = f'''
+    INSERT INTO usage_tracking (user_id, month_year, analysis_count)
+    SELECT :user_id, :month_year, 1 WHERE {SQL_USAGE_LIMIT} > 0
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = analysis_count + 1
+    WHERE usage_tracking.analysis_count < {SQL_USAGE_LIMIT}
+    RETURNING analysis_count, {SQL_USAGE_LIMIT}
+'''
+SQL_DENIED_USAGE = f'''
+    SELECT COALESCE((SELECT analysis_count FROM usage_tracking WHERE user_id = :user_id AND month_year = :month_year), 0),
+           {SQL_USAGE_LIMIT}
+'''
+SQL_REFUND_USAGE = '''
+    UPDATE usage_tracking SET analysis_count = analysis_count - 1
+    WHERE user_id = ? AND month_year = ? AND analysis_count > 0
+'''
+
+# 읽기 복제본 (replica_repository): Supabase replica_changes RPC(supabase_schema.sql 011)로 받은 행을 id 그대로 반영
+# - INSERT OR REPLACE는 행을 지웠다 다시 넣어 ON DELETE CASCADE로 체크리스트까지 지우므로 ON CONFLICT DO UPDATE
+# - 값이 같은 행은 갱신하지 않음 (변경분은 앞 동기화와 몇 초씩 겹치므로 검색 색인/데이터 버전 트리거가 헛돌지 않도록)
+# - {table}: events / events_archive, 체크리스트 항목은 부모 이벤트({events})가 복제본에 있을 때만
+REPLICA_TABLES = ('events', 'checklist_items', 'events_archive', 'checklist_items_archive')
+REPLICA_EVENT_DEFAULTS = {
+    'id': None, 'user_id': None, 'event_name': '', 'event_date': None, 'event_time': '', 'country': '',
+    'child_tag': '없음', 'translation': '', 'cultural_context': '', 'tips': '', 'memo': '', 'created_at': None,
+    'checked_count': 0, 'total_count': 0,
+}
+SQL_REPLICA_UPSERT_EVENT = '''
+    INSERT INTO {table} (id, user_id, event_name, event_date, event_time, country, child_tag, translation,
+                         cultural_context, tips, memo, created_at, checked_count, total_count)
+    VALUES (:id, :user_id, :event_name, :event_date, :event_time, :country, :child_tag, :translation,
+            :cultural_context, :tips, :memo, :created_at, :checked_count, :total_count)
+    ON CONFLICT (id) DO UPDATE SET
+        event_name = excluded.event_name, event_date = excluded.event_date, event_time = excluded.event_time,
+        country = excluded.country, child_tag = excluded.child_tag, translation = excluded.translation,
+        cultural_context = excluded.cultural_context, tips = excluded.tips, memo = excluded.memo,
+        checked_count = excluded.checked_count, total_count = excluded.total_count
+    WHERE (event_name, event_date, event_time, country, child_tag, translation, cultural_context, tips, memo,
+           checked_count, total_count)
+       IS NOT (excluded.event_name, excluded.event_date, excluded.event_time, excluded.country, excluded.child_tag,
+               excluded.translation, excluded.cultural_context, excluded.tips, excluded.memo,
+               excluded.checked_count, excluded.total_count)
+'''
+SQL_REPLICA_UPSERT_ITEM = '''
+    INSERT INTO {table} (id, user_id, event_id, item_name, is_checked, position, metadata)
+    SELECT :id, :user_id, :event_id, :item_name, :is_checked, :position, :metadata
+    WHERE EXISTS (SELECT 1 FROM {events} WHERE id = :event_id)
+    ON CONFLICT (id) DO UPDATE SET
+        event_id = excluded.event_id, item_name = excluded.item_name, is_checked = excluded.is_checked,
+        position = excluded.position, metadata = excluded.metadata
+    WHERE (event_id, item_name, is_checked, position, metadata)
+       IS NOT (excluded.event_id, excluded.item_name, excluded.is_checked, excluded.position, excluded.metadata)
+'''
+# 항목을 반영하면 008의 개수 트리거가 서버에서 받은 개수에 다시 더하므로, 바뀐 이벤트는 반영 후 로컬 체크리스트로 다시 셈
+SQL_REPLICA_RECOUNT = '''
+    UPDATE events SET
+        checked_count = (SELECT COUNT(*) FROM checklist_items WHERE event_id = events.id AND IFNULL(is_checked, 0) != 0),
+        total_count = (SELECT COUNT(*) FROM checklist_items WHERE event_id = events.id)
+    WHERE id IN ({placeholders})
+'''
+# 삭제는 변경분에 나타나지 않으므로 행 수가 다른 테이블만 서버 id 목록과 비교해 없는 행을 지움
+# (체크리스트 항목은 부모 이벤트의 user_id 인덱스로 찾음, 두 번째 값은 개수를 다시 셀 이벤트 id)
+SQL_REPLICA_IDS = {
+    'events': 'SELECT id, id FROM events WHERE user_id = ?',
+    'checklist_items': 'SELECT ci.id, ci.event_id FROM events e JOIN checklist_items ci ON ci.event_id = e.id WHERE e.user_id = ?',
+    'events_archive': 'SELECT id, id FROM events_archive WHERE user_id = ?',
+    'checklist_items_archive': '''
+        SELECT ci.id, ci.event_id FROM events_archive e JOIN checklist_items_archive ci ON ci.event_id = e.id WHERE e.user_id = ?
+    ''',
+}
+SQL_REPLICA_DELETE = 'DELETE FROM {table} WHERE id IN ({placeholders})'
+SQL_REPLICA_COUNTS = '''
+    SELECT (SELECT COUNT(*) FROM events WHERE user_id = :user_id),
+           (SELECT COUNT(*) FROM events e JOIN checklist_items ci ON ci.event_id = e.id WHERE e.user_id = :user_id),
+           (SELECT COUNT(*) FROM events_archive WHERE user_id = :user_id),
+           (SELECT COUNT(*) FROM events_archive e JOIN checklist_items_archive ci ON ci.event_id = e.id WHERE e.user_id = :user_id)
+'''
+# 아이/사용량/등급은 서버 값으로 덮어씀 (아이는 목록이 다를 때만 통째로 바꿈, 로컬 id는 쓰지 않음)
+SQL_REPLICA_SELECT_CHILDREN = 'SELECT name, display_order FROM children WHERE user_id = ? ORDER BY display_order ASC, id ASC'
+SQL_REPLICA_DELETE_CHILDREN = 'DELETE FROM children WHERE user_id = ?'
+SQL_REPLICA_UPSERT_USAGE = '''
+    INSERT INTO usage_tracking (user_id, month_year, analysis_count) VALUES (?, ?, ?)
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = excluded.analysis_count
+    WHERE analysis_count IS NOT excluded.analysis_count
+'''
+SQL_REPLICA_UPSERT_TIER = '''
+    INSERT INTO users (user_id, subscription_tier) VALUES (?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET subscription_tier = excluded.subscription_tier
+    WHERE subscription_tier IS NOT excluded.subscription_tier
+'''
+SQL_SELECT_REPLICA_WATERMARK = 'SELECT watermark FROM replica_state WHERE user_id = ?'
+SQL_SAVE_REPLICA_WATERMARK = '''
+    INSERT INTO replica_state (user_id, watermark) VALUES (?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET watermark = excluded.watermark, synced_at = CURRENT_TIMESTAMP
+'''
+# Supabase에 닿지 못하는 동안 로컬에만 반영한 쓰기 (들어온 순서대로 다시 보냄)
+SQL_ENQUEUE_REPLAY = 'INSERT INTO replay_queue (user_id, method, args) VALUES (?, ?, ?)'
+SQL_SELECT_NEXT_REPLAY = 'SELECT id, user_id, method, args FROM replay_queue ORDER BY id ASC LIMIT 1'
+SQL_DELETE_REPLAY = 'DELETE FROM replay_queue WHERE id = ?'
+SQL_FAIL_REPLAY = 'UPDATE replay_queue SET attempts = attempts + 1, last_error = ? WHERE id = ?'
+SQL_COUNT_USER_REPLAYS = 'SELECT COUNT(*) FROM replay_queue WHERE user_id = ?'
+SQL_COUNT_REPLAYS = 'SELECT COUNT(*) FROM replay_queue'
+
+# (함수명, SQL, 예시 파라미터)
+QUERY_CATALOG = [
+    ('get_children', SQL_SELECT_CHILDREN, ('user',)),
+    ('add_child', SQL_MAX_CHILD_ORDER, ('user',)),
+    ('delete_child', SQL_DELETE_CHILD, ('user', '첫째')),
+    ('update_child_name', SQL_RENAME_CHILD, ('둘째', 'user', '첫째')),
+    ('update_child_name', SQL_RENAME_CHILD_TAG, ('둘째', 'user', '첫째')),
+    ('update_child_name (archive)', SQL_RENAME_ARCHIVED_CHILD_TAG, ('둘째', 'user', '첫째')),
+    ('get_events(future_only=False)', SQL_SELECT_EVENTS.format(where=SQL_WHERE_USER), ('user', -1)),
+    ('get_events(future_only=True)', SQL_SELECT_EVENTS.format(where=f'{SQL_WHERE_USER} AND {SQL_WHERE_DATE_FROM}'), ('user', '2026-01-01', -1)),
+    ('get_events_page(date_from, date_to, cursor)',
+     SQL_SELECT_EVENTS.format(where=f'{SQL_WHERE_USER} AND {SQL_WHERE_DATE_FROM} AND {SQL_WHERE_DATE_TO} AND {SQL_WHERE_AFTER_CURSOR}'),
+     ('user', '2025-09-01', '2026-07-31', '2025-10-01', '10:00', 1, 51)),
+    ('get_events(details=False)', SQL_SELECT_EVENT_SUMMARIES.format(where=SQL_WHERE_USER), ('user', 51)),
+    ('get_events (checklists)', SQL_SELECT_EVENT_CHECKLISTS.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    ('get_event_by_id', SQL_SELECT_EVENT_BY_ID, (1, 'user')),
+    ('get_checklist', SQL_SELECT_CHECKLIST, (1, 'user', 1, 'user')),
+    ('delete_event', SQL_DELETE_EVENT, (1, 'user')),
+    ('delete_event (archive)', SQL_DELETE_ARCHIVED_EVENT, (1, 'user')),
+    ('archive_events', SQL_SELECT_ARCHIVE_BATCH, ('user', '2025-01-01', 500)),
+    ('archive_events (copy)', SQL_COPY_TO_ARCHIVE.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    ('archive_events (checklists)', SQL_COPY_CHECKLISTS_TO_ARCHIVE.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    ('archive_events (delete)', SQL_DELETE_ARCHIVED_FROM_EVENTS.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    ('get_archived_events', SQL_SELECT_ARCHIVED_EVENTS.format(where=SQL_WHERE_USER), ('user', 51)),
+    ('get_archived_events(cursor)', SQL_SELECT_ARCHIVED_EVENTS.format(where=f'{SQL_WHERE_USER} AND {SQL_WHERE_BEFORE_CURSOR}'),
+     ('user', '2024-03-01', '10:00', 1, 51)),
+    ('get_archived_events (checklists)', SQL_SELECT_ARCHIVED_CHECKLISTS.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    ('update_checklist_item', SQL_SET_ITEM_CHECKED, (1, 1, 'user')),
+    ('add_checklist_item', SQL_ADD_CHECKLIST_ITEM, ('준비물', 1, 'user')),
+    ('update_event', SQL_UPDATE_EVENT, ('', '2026-01-01', '', '', '', '', 1, 'user')),
+    ('delete_checklist_item', SQL_DELETE_ITEM, (1, 'user')),
+    ('update_checklist_item_name', SQL_RENAME_ITEM, ('', 1, 'user')),
+    *(('reset_all_data', sql, ('user',)) for sql in SQL_RESET_USER_DATA),
+    ('search_events', SQL_SEARCH_EVENTS, ('"시험"*', 'user', 21, 0)),
+    ('search_events (events)', SQL_SELECT_EVENTS_BY_IDS.format(placeholders='?, ?, ?'), ('user', 1, 2, 3)),
+    ('search_events (archive)', SQL_SELECT_ARCHIVED_EVENTS_BY_IDS.format(placeholders='?, ?, ?'), ('user', 1, 2, 3)),
+    ('get_data_version', SQL_SELECT_DATA_VERSION, ('user',)),
+    ('get_changes (watermark)', SQL_SYNC_WATERMARK, ('2026-01-01 00:00:00.000', 'user')),
+    ('get_changes (purge tombstones)', SQL_PURGE_TOMBSTONES, ('user',)),
+    ('get_changes (events)', SQL_SELECT_CHANGED_EVENTS, ('user', '2026-01-01 00:00:00.000')),
+    ('get_changes(details=False)', SQL_SELECT_CHANGED_EVENT_SUMMARIES, ('user', '2026-01-01 00:00:00.000')),
+    ('get_changes (checklist_items)', SQL_SELECT_CHANGED_ITEMS, ('user', '2026-01-01 00:00:00.000')),
+    ('get_changes (children)', SQL_SELECT_CHANGED_CHILDREN, ('user', '2026-01-01 00:00:00.000')),
+    ('get_changes (tombstones)', SQL_SELECT_TOMBSTONES, ('user', '2026-01-01 00:00:00.000')),
+    ('restore_backup_chunk (child)', SQL_RESTORE_CHILD, ('user', '첫째', 'user')),
+    ('restore_backup_chunk (usage)', SQL_RESTORE_USAGE, ('user', '2026-01', 3)),
+    ('restore_backup_chunk (checkpoint)', SQL_SAVE_IMPORT_CHECKPOINT, ('user', 'backup', 10)),
+    ('get_import_checkpoint', SQL_SELECT_IMPORT_CHECKPOINT, ('user', 'backup')),
+    ('get_user_tier', SQL_SELECT_TIER, ('user',)),
+    ('update_user_tier', SQL_UPDATE_TIER, ('FREE', 'user')),
+    ('get_usage', SQL_SELECT_USAGE, ('user', '2026-01')),
+    ('get_usage_history', SQL_SELECT_USAGE_HISTORY, ('user',)),
+    ('increment_usage', SQL_INCREMENT_USAGE, ('user', '2026-01')),
+    ('consume_usage', SQL_CONSUME_USAGE, {'user_id': 'user', 'month_year': '2026-01', 'limits': '{"FREE": 5}'}),
+    ('consume_usage (denied)', SQL_DENIED_USAGE, {'user_id': 'user', 'month_year': '2026-01', 'limits': '{"FREE": 5}'}),
+    ('refund_usage', SQL_REFUND_USAGE, ('user', '2026-01')),
+    ('apply_replica_changes (event)', SQL_REPLICA_UPSERT_EVENT.format(table='events'), dict.fromkeys(REPLICA_EVENT_DEFAULTS, 1)),
+    ('apply_replica_changes (item)', SQL_REPLICA_UPSERT_ITEM.format(table='checklist_items', events='events'),
+     {'id': 1, 'user_id': 'user', 'event_id': 1, 'item_name': '', 'is_checked': 0, 'position': 0, 'metadata': None}),
+    ('apply_replica_changes (recount)', SQL_REPLICA_RECOUNT.format(placeholders='?, ?, ?'), (1, 2, 3)),
+    *((f'apply_replica_changes (ids: {table})', SQL_REPLICA_IDS[table], ('user',)) for table in REPLICA_TABLES),
+    ('apply_replica_changes (counts)', SQL_REPLICA_COUNTS, {'user_id': 'user'}),
+    ('get_replica_watermark', SQL_SELECT_REPLICA_WATERMARK, ('user',)),
+    ('next_replay', SQL_SELECT_NEXT_REPLAY, ()),
+    ('count_replays(user_id)', SQL_COUNT_USER_REPLAYS, ('user',)),
+]
+
+SQLITE_MAX_IN_PARAMS = 500  # IN (...) 한 번에 넘기는 id 수 (SQLite 변수 개수 제한 대비)
+
+
+def _event_from_row(row, checklists=True):
+    """SQL_EVENT_COLUMNS 순서의 행을 Event로 변환 (체크리스트는 호출하는 쪽에서 채움, 요약 조회면 None)"""
+    return Event(*row[:13], [] if checklists else None)
+
+
+def _attach_checklists(c, events, sql=SQL_SELECT_EVENT_CHECKLISTS):
+    """조회된 이벤트의 체크리스트를 id로 묶어 한 번에 조회한 뒤 event_id 기준으로 분배 (이벤트별 쿼리 방지)"""
+    events_by_id = {event.id: event for event in events}
+    event_ids = list(events_by_id)
+    for start in range(0, len(event_ids), SQLITE_MAX_IN_PARAMS):
+        batch = event_ids[start:start + SQLITE_MAX_IN_PARAMS]
+        c.execute(sql.format(placeholders=', '.join('?' * len(batch))), batch)
+        for event_id, item_id, item_name, is_checked, metadata in c.fetchall():
+            events_by_id[event_id].checklist_with_status.append(
+                checklist_item(item_id, item_name, is_checked, json.loads(metadata) if metadata else None))
+    return events
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def fts_match_query(terms):
+    """검색어 목록을 FTS5 MATCH 식으로 변환 (각 검색어를 따옴표로 감싼 접두어 검색, 모두 포함 = AND)"""
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+def _event_filters(user_id, date_from, date_to, cursor_key):
+    """WHERE 절과 파라미터 생성 (항상 user_id 조건으로 시작)"""
+    clauses, params = [SQL_WHERE_USER], [user_id]
+    if date_from:
+        clauses.append(SQL_WHERE_DATE_FROM)
+        params.append(date_from)
+    if date_to:
+        clauses.append(SQL_WHERE_DATE_TO)
+        params.append(date_to)
+    if cursor_key:
+        clauses.append(SQL_WHERE_AFTER_CURSOR)
+        params.extend(cursor_key)
+    return ' AND '.join(clauses), params
+
+
+def _replica_event_params(row):
+    """Supabase 이벤트 행 -> SQL_REPLICA_UPSERT_EVENT 파라미터 (비어 있는 값은 저장할 때의 기본값)"""
+    return {column: default if row.get(column) is None else row[column] for column, default in REPLICA_EVENT_DEFAULTS.items()}
+
+
+def _replica_item_params(row):
+    """Supabase 체크리스트 행 -> SQL_REPLICA_UPSERT_ITEM 파라미터 (metadata는 JSONB이므로 로컬 저장 형식인 JSON 문자열로)"""
+    metadata = row.get('metadata')
+    if metadata is not None and not isinstance(metadata, str):
+        metadata = json.dumps(metadata, ensure_ascii=False) if metadata else None
+    return {
+        'id': row['id'], 'user_id': row['user_id'], 'event_id': row['event_id'], 'item_name': row['item_name'],
+        'is_checked': row.get('is_checked') or 0, 'position': row.get('position') or 0, 'metadata': metadata,
+    }
+
+
+class SQLiteRepository(Repository):
+    """로컬 SQLite 파일 저장소"""
+
+    name = 'sqlite'
+
+    def __init__(self, path=DB_PATH, max_readers=8, pragmas=None):
+        self.db = ConnectionManager(path, max_readers=max_readers, pragmas=pragmas)
+
+    def init(self):
+        # 번호가 매겨진 마이그레이션을 순서대로 적용 (migrations.py 참고)
+        migrate(self.db)
+
+    def close(self):
+        self.db.close()
+
+    # -------------------- 아이 --------------------
+
+    def get_children(self, user_id):
+        with self.db.reader() as conn:
+            return [row[0] for row in conn.execute(SQL_SELECT_CHILDREN, (user_id,))]
+
+    def add_child(self, user_id, name):
+        try:
+            with self.db.writer() as conn:
+                max_order = conn.execute(SQL_MAX_CHILD_ORDER, (user_id,)).fetchone()[0] or 0
+                conn.execute(SQL_INSERT_CHILD, (user_id, name, max_order + 1))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def delete_child(self, user_id, name):
+        with self.db.writer() as conn:
+            conn.execute(SQL_DELETE_CHILD, (user_id, name))
+
+    def update_child_name(self, user_id, old_name, new_name):
+        try:
+            with self.db.writer() as conn:
+                conn.execute(SQL_RENAME_CHILD, (new_name, user_id, old_name))
+                conn.execute(SQL_RENAME_CHILD_TAG, (new_name, user_id, old_name))
+                conn.execute(SQL_RENAME_ARCHIVED_CHILD_TAG, (new_name, user_id, old_name))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    # -------------------- 이벤트 --------------------
+
+    def save_events(self, user_id, events_data):
+        # 하나의 쓰기 트랜잭션, 체크리스트는 executemany
+        event_ids = []
+        with self.db.writer() as conn, closing(conn.cursor()) as c:
+            for event_data in events_data:
+                c.execute(SQL_INSERT_EVENT, tuple(event_insert_values(user_id, event_data).values()))
+                event_ids.append(c.lastrowid)
+            c.executemany(SQL_INSERT_CHECKLIST_ITEM, [
+                (user_id, event_id, name, position, json.dumps(metadata, ensure_ascii=False) if metadata else None)
+                for event_id, event_data in zip(event_ids, events_data)
+                for position, (name, metadata) in enumerate(checklist_entries(event_data))
+            ])
+        return event_ids
+
+    def get_events(self, user_id, date_from=None, date_to=None, limit=None, cursor_key=None, checklists=True, details=True):
+        with self.db.reader() as conn, closing(conn.cursor()) as c:
+            where, params = _event_filters(user_id, date_from, date_to, cursor_key)
+            sql = SQL_SELECT_EVENTS if details else SQL_SELECT_EVENT_SUMMARIES
+            c.execute(sql.format(where=where), (*params, limit or -1))
+            events = [_event_from_row(row, checklists) for row in c.fetchall()]
+            return _attach_checklists(c, events) if checklists else events
+
+    def get_event_by_id(self, user_id, event_id):
+        with self.db.reader() as conn:
+            rows = conn.execute(SQL_SELECT_EVENT_BY_ID, (event_id, user_id)).fetchall()
+        if not rows:
+            return None
+        event = _event_from_row(rows[0])
+        event.checklist_with_status = [
+            checklist_item(item_id, item_name, is_checked, json.loads(metadata) if metadata else None)
+            for *_, item_id, item_name, is_checked, metadata in rows
+            if item_id is not None
+        ]
+        return event
+
+    def get_checklist(self, user_id, event_id):
+        with self.db.reader() as conn:
+            rows = conn.execute(SQL_SELECT_CHECKLIST, (event_id, user_id, event_id, user_id)).fetchall()
+        return [
+            checklist_item(item_id, item_name, is_checked, json.loads(metadata) if metadata else None)
+            for item_id, item_name, is_checked, metadata, _ in rows
+        ]
+
+    def delete_event(self, user_id, event_id):
+        # 보관된 이벤트도 같은 id로 삭제 (id는 두 테이블에서 겹치지 않음)
+        with self.db.writer() as conn:
+            conn.execute(SQL_DELETE_EVENT, (event_id, user_id))
+            conn.execute(SQL_DELETE_ARCHIVED_EVENT, (event_id, user_id))
+
+    def update_event(self, user_id, event_id, event_data):
+        with self.db.writer() as conn:
+            conn.execute(SQL_UPDATE_EVENT, (
+                event_data.get('event_name', ''), event_data.get('event_date', ''),
+                event_data.get('event_time') or '', event_data.get('country', ''),
+                event_data.get('child_tag', '없음'), event_data.get('memo', ''),
+                event_id, user_id
+            ))
+
+    # -------------------- 보관 --------------------
+
+    def archive_events(self, user_id, before_date, batch_size):
+        # 배치마다 별도의 짧은 쓰기 트랜잭션 (쓰기 잠금을 오래 잡지 않음)
+        batch_size = min(batch_size, SQLITE_MAX_IN_PARAMS)
+        moved = 0
+        while True:
+            with self.db.writer() as conn:
+                ids = [row[0] for row in conn.execute(SQL_SELECT_ARCHIVE_BATCH, (user_id, before_date, batch_size))]
+                if not ids:
+                    return moved
+                conn.execute(SQL_COPY_TO_ARCHIVE.format(placeholders=_placeholders(ids)), ids)
+                conn.execute(SQL_COPY_CHECKLISTS_TO_ARCHIVE.format(placeholders=_placeholders(ids)), ids)
+                conn.execute(SQL_DELETE_ARCHIVED_FROM_EVENTS.format(placeholders=_placeholders(ids)), ids)
+            moved += len(ids)
+            if len(ids) < batch_size:
+                return moved
+
+    def get_archived_events(self, user_id, limit=None, cursor_key=None, checklists=True, details=True):
+        where, params = SQL_WHERE_USER, [user_id]
+        if cursor_key:
+            where = f'{SQL_WHERE_USER} AND {SQL_WHERE_BEFORE_CURSOR}'
+            params.extend(cursor_key)
+        with self.db.reader() as conn, closing(conn.cursor()) as c:
+            sql = SQL_SELECT_ARCHIVED_EVENTS if details else SQL_SELECT_ARCHIVED_EVENT_SUMMARIES
+            c.execute(sql.format(where=where), (*params, limit or -1))
+            events = [_event_from_row(row, checklists) for row in c.fetchall()]
+            return _attach_checklists(c, events, SQL_SELECT_ARCHIVED_CHECKLISTS) if checklists else events
+
+    # -------------------- 검색 --------------------
+
+    def search_events(self, user_id, terms, limit, offset=0):
+        with self.db.reader() as conn, closing(conn.cursor()) as c:
+            hits = c.execute(SQL_SEARCH_EVENTS, (fts_match_query(terms), user_id, limit, offset)).fetchall()
+            ids = [event_id for event_id, _ in hits]
+            if not ids:
+                return []
+            found = {}
+            for sql, checklists_sql, archived in ((SQL_SELECT_EVENTS_BY_IDS, SQL_SELECT_EVENT_CHECKLISTS, False),
+                                                  (SQL_SELECT_ARCHIVED_EVENTS_BY_IDS, SQL_SELECT_ARCHIVED_CHECKLISTS, True)):
+                missing = [event_id for event_id in ids if event_id not in found]
+                if not missing:
+                    break
+                c.execute(sql.format(placeholders=_placeholders(missing)), (user_id, *missing))
+                for event in _attach_checklists(c, [_event_from_row(row) for row in c.fetchall()], checklists_sql):
+                    found[event.id] = (event, archived)
+        return [
+            {'event': found[event_id][0], 'archived': found[event_id][1], 'snippet': snippet}
+            for event_id, snippet in hits if event_id in found
+        ]
+
+    # -------------------- 체크리스트 --------------------
+
+    def update_checklist_item(self, user_id, item_id, is_checked):
+        with self.db.writer() as conn:
+            row = conn.execute(SQL_SET_ITEM_CHECKED, (1 if is_checked else 0, item_id, user_id)).fetchone()
+        return row[0] if row else None
+
+    def add_checklist_item(self, user_id, event_id, item_name):
+        with self.db.writer() as conn:
+            conn.execute(SQL_ADD_CHECKLIST_ITEM, (item_name.strip(), event_id, user_id))
+
+    def delete_checklist_item(self, user_id, item_id):
+        with self.db.writer() as conn:
+            row = conn.execute(SQL_DELETE_ITEM, (item_id, user_id)).fetchone()
+        return row[0] if row else None
+
+    def update_checklist_item_name(self, user_id, item_id, new_name):
+        with self.db.writer() as conn:
+            conn.execute(SQL_RENAME_ITEM, (new_name.strip(), item_id, user_id))
+
+    def reset_all_data(self, user_id):
+        with self.db.writer() as conn:
+            for sql in SQL_RESET_USER_DATA:
+                conn.execute(sql, (user_id,))
+
+    def get_data_version(self, user_id):
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_DATA_VERSION, (user_id,)).fetchone()
+        return {'version': row[0], 'updated_at': row[1]} if row else {'version': 0, 'updated_at': None}
+
+    def get_changes(self, user_id, since=None, details=True):
+        with self.db.reader() as conn, closing(conn.cursor()) as c:
+            watermark, expired, purge = c.execute(SQL_SYNC_WATERMARK, (since, user_id)).fetchone()
+            full = since is None or bool(expired)
+            since = '' if full else since
+            c.execute(SQL_SELECT_CHANGED_EVENTS if details else SQL_SELECT_CHANGED_EVENT_SUMMARIES, (user_id, since))
+            events = [_event_from_row(row, checklists=False) for row in c.fetchall()]
+            items = [
+                changed_item(item_id, event_id, item_name, is_checked, position, json.loads(metadata) if metadata else None)
+                for item_id, event_id, item_name, is_checked, position, metadata
+                in c.execute(SQL_SELECT_CHANGED_ITEMS, (user_id, since)).fetchall()
+            ]
+            children = [
+                {'id': child_id, 'name': name, 'display_order': display_order}
+                for child_id, name, display_order in c.execute(SQL_SELECT_CHANGED_CHILDREN, (user_id, since)).fetchall()
+            ]
+            deleted = {entity: [] for entity in SYNC_ENTITIES}
+            if not full:
+                for entity, entity_id in c.execute(SQL_SELECT_TOMBSTONES, (user_id, since)).fetchall():
+                    deleted[entity].append(entity_id)
+        if purge:
+            # 정리할 기록이 있을 때만 쓰기 (보관 기간이 지난 기록은 위에서 읽지 않으므로 읽은 뒤에 지워도 됨)
+            with self.db.writer() as conn:
+                conn.execute(SQL_PURGE_TOMBSTONES, (user_id,))
+        return {'watermark': watermark, 'full': full, 'events': events, 'checklist_items': items, 'children': children,
+                'deleted': deleted}
+
+    # -------------------- 백업 복원 --------------------
+
+    def restore_backup_chunk(self, user_id, backup_id, line_no, records):
+        # 레코드와 진행 위치를 하나의 쓰기 트랜잭션으로 (보관할 이벤트는 events에 넣은 뒤 archive_events와 같은 SQL로 옮김)
+        with self.db.writer() as conn, closing(conn.cursor()) as c:
+            items, archived_ids = [], []
+            for record in records:
+                if record['type'] == 'child':
+                    c.execute(SQL_RESTORE_CHILD, (user_id, record['name'], user_id))
+                elif record['type'] == 'usage':
+                    c.execute(SQL_RESTORE_USAGE, (user_id, record['month_year'], record['analysis_count']))
+                else:
+                    c.execute(SQL_RESTORE_EVENT, (*event_insert_values(user_id, record).values(), record['created_at']))
+                    items.extend(
+                        (user_id, c.lastrowid, item['name'], 1 if item['checked'] else 0, position,
+                         json.dumps(item['metadata'], ensure_ascii=False) if item.get('metadata') else None)
+                        for position, item in enumerate(record['checklist'])
+                    )
+                    if record['archived']:
+                        archived_ids.append(c.lastrowid)
+            c.executemany(SQL_RESTORE_CHECKLIST_ITEM, items)
+            for start in range(0, len(archived_ids), SQLITE_MAX_IN_PARAMS):
+                ids = archived_ids[start:start + SQLITE_MAX_IN_PARAMS]
+                c.execute(SQL_COPY_TO_ARCHIVE.format(placeholders=_placeholders(ids)), ids)
+                c.execute(SQL_COPY_CHECKLISTS_TO_ARCHIVE.format(placeholders=_placeholders(ids)), ids)
+                c.execute(SQL_DELETE_ARCHIVED_FROM_EVENTS.format(placeholders=_placeholders(ids)), ids)
+            c.execute(SQL_SAVE_IMPORT_CHECKPOINT, (user_id, backup_id, line_no))
+
+    def get_import_checkpoint(self, user_id, backup_id):
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_IMPORT_CHECKPOINT, (user_id, backup_id)).fetchone()
+        return row[0] if row else 0
+
+    # -------------------- 사용자 --------------------
+
+    def get_user_tier(self, user_id):
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_TIER, (user_id,)).fetchone()
+        if row:
+            return row[0]
+        with self.db.writer() as conn:
+            conn.execute(SQL_INSERT_USER, (user_id, 'FREE'))
+        return 'FREE'
+
+    def get_usage(self, user_id, month_year):
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_USAGE, (user_id, month_year)).fetchone()
+        return row[0] if row else 0
+
+    def get_usage_history(self, user_id):
+        with self.db.reader() as conn:
+            rows = conn.execute(SQL_SELECT_USAGE_HISTORY, (user_id,)).fetchall()
+        return [{'month_year': month_year, 'analysis_count': count} for month_year, count in rows]
+
+    def increment_usage(self, user_id, month_year):
+        with self.db.writer() as conn:
+            return conn.execute(SQL_INCREMENT_USAGE, (user_id, month_year)).fetchone()[0]
+
+    def consume_usage(self, user_id, month_year, limits):
+        params = {'user_id': user_id, 'month_year': month_year, 'limits': json.dumps(limits)}
+        with self.db.writer() as conn:
+            row = conn.execute(SQL_CONSUME_USAGE, params).fetchone()
+            allowed = row is not None
+            if not allowed:
+                row = conn.execute(SQL_DENIED_USAGE, params).fetchone()
+        return {'allowed': allowed, 'usage': row[0], 'limit': row[1]}
+
+    def refund_usage(self, user_id, month_year):
+        with self.db.writer() as conn:
+            conn.execute(SQL_REFUND_USAGE, (user_id, month_year))
+
+    def update_user_tier(self, user_id, new_tier):
+        with self.db.writer() as conn:
+            conn.execute(SQL_UPDATE_TIER, (new_tier, user_id))
+        return True
+
+    # -------------------- 읽기 복제본 (replica_repository) --------------------
+
+    def apply_replica_changes(self, user_id, changes):
+        """replica_changes RPC 결과를 한 트랜잭션으로 반영 -> (테이블별 로컬 행 수, 바뀐 행 수)
+
+        서버 id 목록(changes['ids'])이 온 테이블은 목록에 없는 행을 먼저 지우고, 바뀐 행이 있는 이벤트의 준비물 개수는
+        마지막에 로컬 체크리스트로 다시 셉니다. 다음 동기화 기준 시각(watermark)도 같은 트랜잭션에 저장합니다.
+        """
+        with self.db.writer() as conn, closing(conn.cursor()) as c:
+            changed, recount = 0, set()
+            for table in ('checklist_items', 'checklist_items_archive', 'events', 'events_archive'):
+                live = (changes.get('ids') or {}).get(table)
+                if live is None:
+                    continue
+                live = set(live)
+                missing = [(row_id, event_id) for row_id, event_id in c.execute(SQL_REPLICA_IDS[table], (user_id,)).fetchall()
+                           if row_id not in live]
+                for start in range(0, len(missing), SQLITE_MAX_IN_PARAMS):
+                    ids = [row_id for row_id, _ in missing[start:start + SQLITE_MAX_IN_PARAMS]]
+                    c.execute(SQL_REPLICA_DELETE.format(table=table, placeholders=_placeholders(ids)), ids)
+                changed += len(missing)
+                if table == 'checklist_items':
+                    recount.update(event_id for _, event_id in missing)
+
+            for events, items in (('events', 'checklist_items'), ('events_archive', 'checklist_items_archive')):
+                for row in changes.get(events) or []:
+                    c.execute(SQL_REPLICA_UPSERT_EVENT.format(table=events), _replica_event_params(row))
+                    if c.rowcount > 0:
+                        changed += 1
+                        if events == 'events':
+                            recount.add(row['id'])
+                for row in changes.get(items) or []:
+                    c.execute(SQL_REPLICA_UPSERT_ITEM.format(table=items, events=events), _replica_item_params(row))
+                    if c.rowcount > 0:
+                        changed += 1
+                        if items == 'checklist_items':
+                            recount.add(row['event_id'])
+            recount = list(recount)
+            for start in range(0, len(recount), SQLITE_MAX_IN_PARAMS):
+                ids = recount[start:start + SQLITE_MAX_IN_PARAMS]
+                c.execute(SQL_REPLICA_RECOUNT.format(placeholders=_placeholders(ids)), ids)
+
+            children = [(child['name'], child.get('display_order')) for child in changes.get('children') or []]
+            if children != c.execute(SQL_REPLICA_SELECT_CHILDREN, (user_id,)).fetchall():
+                c.execute(SQL_REPLICA_DELETE_CHILDREN, (user_id,))
+                c.executemany(SQL_INSERT_CHILD, [(user_id, name, order) for name, order in children])
+                changed += len(children) or 1
+            for usage in changes.get('usage') or []:
+                c.execute(SQL_REPLICA_UPSERT_USAGE, (user_id, usage['month_year'], usage['analysis_count']))
+                changed += max(c.rowcount, 0)
+            if changes.get('tier'):
+                c.execute(SQL_REPLICA_UPSERT_TIER, (user_id, changes['tier']))
+                changed += max(c.rowcount, 0)
+
+            c.execute(SQL_SAVE_REPLICA_WATERMARK, (user_id, changes['watermark']))
+            counts = dict(zip(REPLICA_TABLES, c.execute(SQL_REPLICA_COUNTS, {'user_id': user_id}).fetchone()))
+        return counts, changed
+
+    def get_replica_watermark(self, user_id):
+        """마지막으로 반영한 변경분의 기준 시각 (한 번도 동기화하지 않았으면 None)"""
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_REPLICA_WATERMARK, (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def enqueue_replay(self, user_id, method, args):
+        with self.db.writer() as conn:
+            conn.execute(SQL_ENQUEUE_REPLAY, (user_id, method, json.dumps(list(args), ensure_ascii=False)))
+
+    def next_replay(self):
+        """가장 먼저 들어온 쓰기 (replay_id, user_id, 메서드 이름, 인자 목록), 없으면 None"""
+        with self.db.reader() as conn:
+            row = conn.execute(SQL_SELECT_NEXT_REPLAY).fetchone()
+        return (row[0], row[1], row[2], json.loads(row[3])) if row else None
+
+    def finish_replay(self, replay_id):
+        with self.db.writer() as conn:
+            conn.execute(SQL_DELETE_REPLAY, (replay_id,))
+
+    def fail_replay(self, replay_id, error):
+        with self.db.writer() as conn:
+            conn.execute(SQL_FAIL_REPLAY, (str(error), replay_id))
+
+    def count_replays(self, user_id=None):
+        with self.db.reader() as conn:
+            if user_id is None:
+                return conn.execute(SQL_COUNT_REPLAYS).fetchone()[0]
+            return conn.execute(SQL_COUNT_USER_REPLAYS, (user_id,)).fetchone()[0]
@@ -0,0 +1,388 @@
+"""
+Supabase Repository
+Supabase(PostgREST) 테이블을 사용하는 저장소 구현입니다.
+요청은 supabase_transport의 연결 풀 / 타임아웃 / 읽기 재시도 계층을 거칩니다.
+"""
+from .models import Event
+from .repository import (
+    Repository, StorageUnavailableError, event_insert_values, checklist_entries, checklist_item, changed_item, SYNC_ENTITIES,
+    TOMBSTONE_RETENTION_DAYS,
+)
+
+# 목록 카드용 select (긴 설명 없이, 체크리스트 대신 트리거가 관리하는 준비물 개수 - supabase_schema.sql 008)
+EVENT_LIST_SELECT = "id, event_name, event_date, event_time, country, child_tag, created_at, memo, checked_count, total_count"
+
+# 요약 조회용 select (긴 설명 포함, 체크리스트 항목 없이)
+EVENT_SUMMARY_SELECT = EVENT_LIST_SELECT + ", translation, cultural_context, tips"
+
+# 이벤트 조회 시 체크리스트를 함께 가져오는 select (응답 필드명이 저장 입력의 checklist_items와 겹치지 않도록 별칭 사용)
+CHECKLIST_REL_SELECT = "checklist_rel:checklist_items(id, item_name, is_checked, position, metadata)"
+ARCHIVED_CHECKLIST_REL_SELECT = "checklist_rel:checklist_items_archive(id, item_name, is_checked, position, metadata)"
+EVENT_SELECT = EVENT_SUMMARY_SELECT + ", " + CHECKLIST_REL_SELECT
+
+# 보관된 이벤트 조회용 select (events_archive + checklist_items_archive)
+ARCHIVED_EVENT_SELECT = EVENT_SUMMARY_SELECT + ", " + ARCHIVED_CHECKLIST_REL_SELECT
+
+CHECKLIST_SELECT = "id, item_name, is_checked, position, metadata"
+
+
+def _checklist_from_rows(rows):
+    """체크리스트 행을 position, id 순 ChecklistItem 목록으로 변환"""
+    return [
+        checklist_item(item['id'], item['item_name'], item['is_checked'], item.get('metadata'))
+        for item in sorted(rows, key=lambda item: (item.get('position') or 0, item['id']))
+    ]
+
+
+def _postgrest_quote(value):
+    """PostgREST or() 필터 값 인용 (쉼표/괄호가 들어간 시간 문자열 대비)"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _list_select(checklists, details, archived=False):
+    """get_events / get_archived_events의 select (필요한 컬럼과 관계만 요청해 응답 크기를 줄임)"""
+    select = EVENT_SUMMARY_SELECT if details else EVENT_LIST_SELECT
+    if checklists:
+        select += ", " + (ARCHIVED_CHECKLIST_REL_SELECT if archived else CHECKLIST_REL_SELECT)
+    return select
+
+
+def _event_from_row(row):
+    """Supabase 응답 행을 Event로 변환 (checklist_rel이 없는 요약 행이면 checklist_with_status는 None,
+    긴 설명 없이 조회한 행이면 해당 필드는 None)"""
+    return Event(
+        row['id'], row['event_name'], row['event_date'], row['event_time'], row['country'], row['child_tag'],
+        row.get('translation'), row.get('cultural_context'), row.get('tips'), row['created_at'], row.get('memo', ''),
+        row.get('checked_count', 0), row.get('total_count', 0),
+        _checklist_from_rows(row['checklist_rel']) if 'checklist_rel' in row else None
+    )
+
+
+class SupabaseRepository(Repository):
+    """Supabase 저장소
+
+    on_error: 조회 실패를 알리는 함수 (기본 print, Streamlit 앱은 st.error)
+    조회 실패는 on_error로 알린 뒤 StorageUnavailableError - 빈 목록/기본값으로 대신하면 그 값이 캐시되고
+    ETag까지 붙어 정상 응답처럼 보이므로 (재시도는 supabase_transport가 담당)
+    """
+
+    name = 'supabase'
+
+    def __init__(self, client, on_error=print):
+        self.client = client
+        self.on_error = on_error
+
+    def _table(self, name):
+        return self.client.table(name)
+
+    def _read_failed(self, method, error):
+        """조회 실패를 on_error로 알리고 올릴 예외"""
+        self.on_error(f"Supabase Error ({method}): {error}")
+        return StorageUnavailableError(f"저장소에서 읽지 못했습니다. 잠시 후 다시 시도해 주세요. ({method})")
+
+    def close(self):
+        self.client.session.close()
+
+    # -------------------- 아이 --------------------
+
+    def get_children(self, user_id):
+        try:
+            response = self._table("children").select("name").eq("user_id", user_id).order("display_order").order("id").execute()
+            return [row["name"] for row in response.data] if response.data else []
+        except Exception as e:
+            raise self._read_failed("get_children", e) from e
+
+    def add_child(self, user_id, name):
+        try:
+            response = self._table("children").select("display_order").eq("user_id", user_id).order("display_order", desc=True).limit(1).execute()
+            max_order = response.data[0]["display_order"] if response.data else 0
+            self._table("children").insert({"user_id": user_id, "name": name, "display_order": max_order + 1}).execute()
+            return True
+        except Exception as e:
+            self.on_error(f"Supabase Error (add_child): {e}")
+            return False
+
+    def delete_child(self, user_id, name):
+        self._table("children").delete().eq("user_id", user_id).eq("name", name).execute()
+
+    def update_child_name(self, user_id, old_name, new_name):
+        try:
+            self._table("children").update({"name": new_name}).eq("user_id", user_id).eq("name", old_name).execute()
+            self._table("events").update({"child_tag": new_name}).eq("user_id", user_id).eq("child_tag", old_name).execute()
+            self._table("events_archive").update({"child_tag": new_name}).eq("user_id", user_id).eq("child_tag", old_name).execute()
+            return True
+        except Exception as e:
+            self.on_error(f"Supabase Error (update_child_name): {e}")
+            return False
+
+    # -------------------- 이벤트 --------------------
+
+    def save_events(self, user_id, events_data):
+        # 이벤트 일괄 insert 1회 + 체크리스트 일괄 insert 1회 (체크리스트 저장 실패 시 이벤트도 삭제)
+        try:
+            response = self._table("events").insert([event_insert_values(user_id, e) for e in events_data]).execute()
+            event_ids = [row["id"] for row in response.data]
+
+            checklist_rows = [
+                {"user_id": user_id, "event_id": event_id, "item_name": name, "is_checked": 0,
+                 "position": position, "metadata": metadata}
+                for event_id, event_data in zip(event_ids, events_data)
+                for position, (name, metadata) in enumerate(checklist_entries(event_data))
+            ]
+            if checklist_rows:
+                try:
+                    self._table("checklist_items").insert(checklist_rows).execute()
+                except Exception:
+                    self._table("events").delete().in_("id", event_ids).execute()
+                    raise
+            return event_ids
+        except Exception as e:
+            self.on_error(f"Supabase Error (save_events): {e}")
+            raise
+
+    def get_events(self, user_id, date_from=None, date_to=None, limit=None, cursor_key=None, checklists=True, details=True):
+        try:
+            query = self._table("events").select(_list_select(checklists, details)).eq("user_id", user_id)
+            if date_from:
+                query = query.gte("event_date", date_from)
+            if date_to:
+                query = query.lte("event_date", date_to)
+            if cursor_key:
+                c_date, c_time, c_id = (_postgrest_quote(v) for v in cursor_key)
+                query = query.or_(
+                    f"event_date.gt.{c_date},"
+                    f"and(event_date.eq.{c_date},event_time.gt.{c_time}),"
+                    f"and(event_date.eq.{c_date},event_time.eq.{c_time},id.gt.{c_id})"
+                )
+            query = query.order("event_date").order("event_time").order("id")
+            if limit:
+                query = query.limit(limit)
+            response = query.execute()
+            return [_event_from_row(row) for row in response.data]
+        except Exception as e:
+            raise self._read_failed("get_events", e) from e
+
+    def get_event_by_id(self, user_id, event_id):
+        try:
+            response = self._table("events").select(EVENT_SELECT).eq("id", event_id).eq("user_id", user_id).limit(1).execute()
+            return _event_from_row(response.data[0]) if response.data else None
+        except Exception as e:
+            raise self._read_failed("get_event_by_id", e) from e
+
+    def get_checklist(self, user_id, event_id):
+        # 활성 이벤트의 항목이 없으면 보관된 이벤트의 항목 조회
+        try:
+            for table in ("checklist_items", "checklist_items_archive"):
+                response = self._table(table).select(CHECKLIST_SELECT).eq("event_id", event_id).eq("user_id", user_id).execute()
+                if response.data:
+                    return _checklist_from_rows(response.data)
+            return []
+        except Exception as e:
+            raise self._read_failed("get_checklist", e) from e
+
+    def delete_event(self, user_id, event_id):
+        self._table("events").delete().eq("id", event_id).eq("user_id", user_id).execute()
+        self._table("events_archive").delete().eq("id", event_id).eq("user_id", user_id).execute()
+
+    def update_event(self, user_id, event_id, event_data):
+        self._table("events").update({
+            "event_name": event_data.get('event_name', ''),
+            "event_date": event_data.get('event_date', ''),
+            "event_time": event_data.get('event_time') or '',
+            "country": event_data.get('country', ''),
+            "child_tag": event_data.get('child_tag', '없음'),
+            "memo": event_data.get('memo', '')
+        }).eq("id", event_id).eq("user_id", user_id).execute()
+
+    # -------------------- 보관 --------------------
+
+    def archive_events(self, user_id, before_date, batch_size):
+        # 배치 하나를 RPC 한 번(한 트랜잭션)으로 옮김 (supabase_schema.sql 006)
+        moved = 0
+        while True:
+            response = self.client.rpc("archive_events", {
+                "p_user_id": user_id, "p_before": before_date, "p_batch_size": batch_size,
+            }).execute()
+            count = response.data or 0
+            moved += count
+            if count < batch_size:
+                return moved
+
+    def get_archived_events(self, user_id, limit=None, cursor_key=None, checklists=True, details=True):
+        try:
+            query = self._table("events_archive").select(_list_select(checklists, details, archived=True)).eq("user_id", user_id)
+            if cursor_key:
+                c_date, c_time, c_id = (_postgrest_quote(v) for v in cursor_key)
+                query = query.or_(
+                    f"event_date.lt.{c_date},"
+                    f"and(event_date.eq.{c_date},event_time.lt.{c_time}),"
+                    f"and(event_date.eq.{c_date},event_time.eq.{c_time},id.lt.{c_id})"
+                )
+            query = query.order("event_date", desc=True).order("event_time", desc=True).order("id", desc=True)
+            if limit:
+                query = query.limit(limit)
+            response = query.execute()
+            return [_event_from_row(row) for row in response.data]
+        except Exception as e:
+            raise self._read_failed("get_archived_events", e) from e
+
+    # -------------------- 검색 --------------------
+
+    def search_events(self, user_id, terms, limit, offset=0):
+        # search_events RPC(supabase_schema.sql 007)로 관련도 순 id/일치 부분을 찾은 뒤 이벤트를 id로 조회
+        try:
+            hits = self.client.rpc("search_events", {
+                "p_user_id": user_id, "p_terms": list(terms), "p_limit": limit, "p_offset": offset,
+            }).execute().data or []
+            found = {}
+            for table, select, archived in (("events", EVENT_SELECT, False), ("events_archive", ARCHIVED_EVENT_SELECT, True)):
+                ids = [hit["event_id"] for hit in hits if hit["archived"] == archived]
+                if ids:
+                    response = self._table(table).select(select).eq("user_id", user_id).in_("id", ids).execute()
+                    found.update({row["id"]: (_event_from_row(row), archived) for row in response.data})
+            return [
+                {'event': found[hit["event_id"]][0], 'archived': found[hit["event_id"]][1], 'snippet': hit["snippet"]}
+                for hit in hits if hit["event_id"] in found
+            ]
+        except Exception as e:
+            raise self._read_failed("search_events", e) from e
+
+    # -------------------- 체크리스트 --------------------
+
+    def update_checklist_item(self, user_id, item_id, is_checked):
+        response = self._table("checklist_items").update({"is_checked": 1 if is_checked else 0}).eq("id", item_id).eq("user_id", user_id).execute()
+        return response.data[0]["event_id"] if response.data else None
+
+    def add_checklist_item(self, user_id, event_id, item_name):
+        # 이벤트가 해당 사용자 것일 때만 목록 끝에 추가
+        response = self._table("events").select("id, checklist_rel:checklist_items(position)").eq("id", event_id).eq("user_id", user_id).limit(1).execute()
+        if response.data:
+            positions = [item["position"] or 0 for item in response.data[0].get("checklist_rel", [])]
+            self._table("checklist_items").insert({
+                "user_id": user_id, "event_id": event_id, "item_name": item_name.strip(), "is_checked": 0,
+                "position": max(positions) + 1 if positions else 0,
+            }).execute()
+
+    def delete_checklist_item(self, user_id, item_id):
+        response = self._table("checklist_items").delete().eq("id", item_id).eq("user_id", user_id).execute()
+        return response.data[0]["event_id"] if response.data else None
+
+    def update_checklist_item_name(self, user_id, item_id, new_name):
+        self._table("checklist_items").update({"item_name": new_name.strip()}).eq("id", item_id).eq("user_id", user_id).execute()
+
+    def reset_all_data(self, user_id):
+        # 체크리스트는 events 삭제 시 ON DELETE CASCADE로 함께 삭제
+        self._table("events").delete().eq("user_id", user_id).execute()
+        self._table("events_archive").delete().eq("user_id", user_id).execute()
+        self._table("children").delete().eq("user_id", user_id).execute()
+
+    def get_data_version(self, user_id):
+        # data_versions는 supabase_schema.sql 009의 트리거가 관리 (updated_at은 UTC timestamptz)
+        try:
+            response = self._table("data_versions").select("version, updated_at").eq("user_id", user_id).execute()
+            if not response.data:
+                return {'version': 0, 'updated_at': None}
+            row = response.data[0]
+            return {'version': row['version'], 'updated_at': row['updated_at'][:19].replace('T', ' ')}
+        except Exception as e:
+            raise self._read_failed("get_data_version", e) from e
+
+    def get_changes(self, user_id, since=None, details=True):
+        # 네 테이블의 변경분과 서버 시각(watermark)을 한 번에 받도록 RPC 하나로 (supabase_schema.sql 014)
+        # 삭제 기록 보관 기간도 함께 넘겨 전체 여부 판단과 지난 기록 정리에 씀 (SQL에 기간을 따로 적지 않음)
+        try:
+            changes = self.client.rpc("sync_changes", {
+                "p_user_id": user_id, "p_since": since, "p_details": details, "p_retention_days": TOMBSTONE_RETENTION_DAYS,
+            }).execute().data
+            deleted = changes.get('deleted') or {}
+            return {
+                'watermark': changes['watermark'],
+                'full': changes['full'],
+                'events': [_event_from_row(row) for row in changes['events']],
+                'checklist_items': [
+                    changed_item(row['id'], row['event_id'], row['item_name'], row['is_checked'], row['position'], row.get('metadata'))
+                    for row in changes['checklist_items']
+                ],
+                'children': changes['children'],
+                'deleted': {entity: deleted.get(entity, []) for entity in SYNC_ENTITIES},
+            }
+        except Exception as e:
+            raise self._read_failed("get_changes", e) from e
+
+    # -------------------- 백업 복원 --------------------
+
+    def restore_backup_chunk(self, user_id, backup_id, line_no, records):
+        # PostgREST 요청 여러 번은 한 트랜잭션이 아니므로 묶음 하나를 RPC 한 번으로 넣음 (supabase_schema.sql 010)
+        self.client.rpc("restore_backup_chunk", {
+            "p_user_id": user_id, "p_backup_id": backup_id, "p_line_no": line_no, "p_records": records,
+        }).execute()
+
+    def get_import_checkpoint(self, user_id, backup_id):
+        try:
+            response = self._table("import_checkpoints").select("line_no").eq("user_id", user_id).eq("backup_id", backup_id).execute()
+            return response.data[0]["line_no"] if response.data else 0
+        except Exception as e:
+            raise self._read_failed("get_import_checkpoint", e) from e
+
+    # -------------------- 읽기 복제본 --------------------
+
+    def get_replica_changes(self, user_id, since=None, id_tables=()):
+        """since(서버 시각) 이후 바뀐 행, 테이블별 행 수, id_tables의 id 목록 (supabase_schema.sql 011, replica_repository가 사용)"""
+        response = self.client.rpc("replica_changes", {
+            "p_user_id": user_id, "p_since": since, "p_id_tables": list(id_tables),
+        }).execute()
+        return response.data
+
+    # -------------------- 사용자 --------------------
+
+    def get_user_tier(self, user_id):
+        try:
+            response = self._table("users").select("subscription_tier").eq("user_id", user_id).execute()
+            if response.data:
+                return response.data[0]["subscription_tier"]
+            self._table("users").insert({"user_id": user_id, "subscription_tier": "FREE"}).execute()
+            return "FREE"
+        except Exception as e:
+            raise self._read_failed("get_user_tier", e) from e
+
+    def get_usage(self, user_id, month_year):
+        try:
+            response = self._table("usage_tracking").select("analysis_count").eq("user_id", user_id).eq("month_year", month_year).execute()
+            return response.data[0]["analysis_count"] if response.data else 0
+        except Exception as e:
+            raise self._read_failed("get_usage", e) from e
+
+    def get_usage_history(self, user_id):
+        try:
+            response = self._table("usage_tracking").select("month_year, analysis_count").eq("user_id", user_id).order("month_year").execute()
+            return [{'month_year': row['month_year'], 'analysis_count': row['analysis_count']} for row in response.data or []]
+        except Exception as e:
+            raise self._read_failed("get_usage_history", e) from e
+
+    def increment_usage(self, user_id, month_year):
+        # 읽고 upsert하면 동시 요청 시 횟수를 잃으므로 한 번의 RPC로 증가 (supabase_schema.sql의 usage metering RPC)
+        try:
+            response = self.client.rpc("increment_usage", {"p_user_id": user_id, "p_month_year": month_year}).execute()
+            return response.data
+        except Exception as e:
+            self.on_error(f"Supabase Error (increment_usage): {e}")
+            return None
+
+    def consume_usage(self, user_id, month_year, limits):
+        response = self.client.rpc("consume_usage", {
+            "p_user_id": user_id, "p_month_year": month_year, "p_limits": limits,
+        }).execute()
+        row = response.data[0]
+        return {'allowed': row['allowed'], 'usage': row['usage'], 'limit': row['usage_limit']}
+
+    def refund_usage(self, user_id, month_year):
+        self.client.rpc("refund_usage", {"p_user_id": user_id, "p_month_year": month_year}).execute()
+
+    def update_user_tier(self, user_id, new_tier):
+        try:
+            # Upsert 사용: 사용자가 없으면 생성하고, 있으면 업데이트
+            self._table("users").upsert({"user_id": user_id, "subscription_tier": new_tier}).execute()
+            return True
+        except Exception as e:
+            self.on_error(f"Supabase Error (update_user_tier): {e}")
+            return False
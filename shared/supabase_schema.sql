@@ -0,0 +1,622 @@
+-- Supabase 스키마 변경
+-- SQLite는 shared/migrations.py가 자동으로 적용하지만 Supabase는 대시보드의 SQL Editor에서 직접 실행합니다.
+-- 각 블록은 여러 번 실행해도 안전하도록 작성되어 있으며, 스키마 변경 블록의 번호는 migrations.py의 버전과 맞춥니다.
+-- 번호 없는 RPC 블록은 SQLite에서는 SQL 문으로 처리되어 대응하는 마이그레이션이 없습니다.
+
+-- 004 per-user data partitioning
+-- 기존 행은 모두 'local' 사용자(shared/repository.py의 DEFAULT_USER_ID)에게 배정됩니다.
+ALTER TABLE events ADD COLUMN IF NOT EXISTS user_id TEXT NOT NULL DEFAULT 'local';
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS user_id TEXT NOT NULL DEFAULT 'local';
+ALTER TABLE children ADD COLUMN IF NOT EXISTS user_id TEXT NOT NULL DEFAULT 'local';
+
+ALTER TABLE children DROP CONSTRAINT IF EXISTS children_name_key;
+CREATE UNIQUE INDEX IF NOT EXISTS children_user_name_key ON children (user_id, name);
+
+DROP INDEX IF EXISTS idx_events_date_time;
+DROP INDEX IF EXISTS idx_events_child_tag;
+CREATE INDEX IF NOT EXISTS idx_events_user_date_time ON events (user_id, event_date, event_time, id);
+CREATE INDEX IF NOT EXISTS idx_events_user_child_tag ON events (user_id, child_tag);
+CREATE INDEX IF NOT EXISTS idx_children_user_order ON children (user_id, display_order, id);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_event ON checklist_items (event_id, id);
+
+-- 005 checklist_items as the only checklist storage
+-- 체크리스트 행이 없는 이벤트는 events.checklist_items JSON 목록으로 행을 채운 뒤 JSON 컬럼을 제거합니다.
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS position INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS metadata JSONB;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'events' AND column_name = 'checklist_items') THEN
+        UPDATE checklist_items AS ci SET position = ranked.position
+        FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY event_id ORDER BY id) - 1 AS position FROM checklist_items) AS ranked
+        WHERE ci.id = ranked.id;
+
+        INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position)
+        SELECT e.user_id, e.id, item.value, 0, item.ordinality - 1
+        FROM events e,
+             jsonb_array_elements_text(CASE WHEN jsonb_typeof(e.checklist_items::jsonb) = 'array'
+                                            THEN e.checklist_items::jsonb ELSE '[]'::jsonb END)
+                 WITH ORDINALITY AS item(value, ordinality)
+        WHERE NOT EXISTS (SELECT 1 FROM checklist_items ci WHERE ci.event_id = e.id);
+
+        ALTER TABLE events DROP COLUMN checklist_items;
+    END IF;
+END $$;
+
+DROP INDEX IF EXISTS idx_checklist_items_event;
+CREATE INDEX IF NOT EXISTS idx_checklist_items_event_order ON checklist_items (event_id, position, id);
+
+-- 006 events archive tables
+-- 보관 기간이 지난 이벤트와 체크리스트를 id 그대로 옮겨 두는 테이블과, 한 배치를 한 트랜잭션으로 옮기는 RPC
+-- (shared/supabase_repository.py의 archive_events가 옮길 이벤트가 없을 때까지 반복 호출)
+CREATE TABLE IF NOT EXISTS events_archive (
+    id BIGINT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    event_time TEXT NOT NULL DEFAULT '',
+    country TEXT,
+    child_tag TEXT,
+    translation TEXT,
+    cultural_context TEXT,
+    tips TEXT,
+    memo TEXT,
+    created_at TIMESTAMPTZ,
+    archived_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS checklist_items_archive (
+    id BIGINT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    event_id BIGINT NOT NULL REFERENCES events_archive(id) ON DELETE CASCADE,
+    item_name TEXT NOT NULL,
+    is_checked INTEGER DEFAULT 0,
+    position INTEGER NOT NULL DEFAULT 0,
+    metadata JSONB
+);
+CREATE INDEX IF NOT EXISTS idx_events_archive_user_date_time ON events_archive (user_id, event_date, event_time, id);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_archive_event_order ON checklist_items_archive (event_id, position, id);
+
+CREATE OR REPLACE FUNCTION archive_events(p_user_id TEXT, p_before DATE, p_batch_size INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_ids BIGINT[];
+BEGIN
+    SELECT ARRAY(
+        SELECT id FROM events WHERE user_id = p_user_id AND event_date < p_before
+        ORDER BY event_date, event_time, id LIMIT p_batch_size
+    ) INTO v_ids;
+
+    INSERT INTO events_archive (id, user_id, event_name, event_date, event_time, country, child_tag,
+                                translation, cultural_context, tips, memo, created_at)
+    SELECT id, user_id, event_name, event_date, event_time, country, child_tag,
+           translation, cultural_context, tips, memo, created_at
+    FROM events WHERE id = ANY(v_ids);
+
+    INSERT INTO checklist_items_archive (id, user_id, event_id, item_name, is_checked, position, metadata)
+    SELECT id, user_id, event_id, item_name, is_checked, position, metadata
+    FROM checklist_items WHERE event_id = ANY(v_ids);
+
+    DELETE FROM events WHERE id = ANY(v_ids);
+    RETURN COALESCE(array_length(v_ids, 1), 0);
+END;
+$$;
+
+-- 007 full-text event search index
+-- 이벤트/보관된 이벤트마다 검색 문서(event_search) 한 행을 트리거로 유지하고 GIN 색인으로 검색합니다.
+-- ('simple' 설정 = 형태소 분석 없이 소문자 단어 단위, 검색어는 단어 앞부분과 일치)
+CREATE TABLE IF NOT EXISTS event_search (
+    event_id BIGINT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    archived BOOLEAN NOT NULL DEFAULT FALSE,
+    body TEXT NOT NULL,
+    document TSVECTOR NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_event_search_document ON event_search USING GIN (document);
+CREATE INDEX IF NOT EXISTS idx_event_search_user ON event_search (user_id);
+
+-- 이벤트가 events에 있으면 그 내용, 없으면 events_archive의 내용으로 검색 문서를 다시 만듦 (둘 다 없으면 삭제)
+CREATE OR REPLACE FUNCTION refresh_event_search(p_event_id BIGINT)
+RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM event_search WHERE event_id = p_event_id;
+    INSERT INTO event_search (event_id, user_id, archived, body, document)
+    SELECT doc.id, doc.user_id, doc.archived,
+           concat_ws(' ', doc.event_name, doc.translation, doc.cultural_context, doc.tips, doc.memo, doc.checklist),
+           setweight(to_tsvector('simple', coalesce(doc.event_name, '')), 'A') ||
+           setweight(to_tsvector('simple', coalesce(doc.checklist, '')), 'B') ||
+           setweight(to_tsvector('simple', concat_ws(' ', doc.translation, doc.cultural_context, doc.tips, doc.memo)), 'C')
+    FROM (
+        SELECT e.id, e.user_id, FALSE AS archived, e.event_name, e.translation, e.cultural_context, e.tips, e.memo,
+               (SELECT string_agg(item_name, ' ' ORDER BY position, id) FROM checklist_items WHERE event_id = e.id) AS checklist
+        FROM events e WHERE e.id = p_event_id
+        UNION ALL
+        SELECT a.id, a.user_id, TRUE, a.event_name, a.translation, a.cultural_context, a.tips, a.memo,
+               (SELECT string_agg(item_name, ' ' ORDER BY position, id) FROM checklist_items_archive WHERE event_id = a.id)
+        FROM events_archive a WHERE a.id = p_event_id AND NOT EXISTS (SELECT 1 FROM events WHERE id = p_event_id)
+    ) AS doc;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION event_search_event_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM refresh_event_search(CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END);
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION event_search_item_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM refresh_event_search(CASE WHEN TG_OP = 'DELETE' THEN OLD.event_id ELSE NEW.event_id END);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS event_search_events ON events;
+CREATE TRIGGER event_search_events
+    AFTER INSERT OR DELETE OR UPDATE OF event_name, translation, cultural_context, tips, memo ON events
+    FOR EACH ROW EXECUTE FUNCTION event_search_event_trigger();
+DROP TRIGGER IF EXISTS event_search_checklist_items ON checklist_items;
+CREATE TRIGGER event_search_checklist_items
+    AFTER INSERT OR DELETE OR UPDATE OF item_name ON checklist_items
+    FOR EACH ROW EXECUTE FUNCTION event_search_item_trigger();
+DROP TRIGGER IF EXISTS event_search_events_archive ON events_archive;
+CREATE TRIGGER event_search_events_archive
+    AFTER INSERT OR DELETE ON events_archive
+    FOR EACH ROW EXECUTE FUNCTION event_search_event_trigger();
+DROP TRIGGER IF EXISTS event_search_checklist_items_archive ON checklist_items_archive;
+CREATE TRIGGER event_search_checklist_items_archive
+    AFTER INSERT ON checklist_items_archive
+    FOR EACH ROW EXECUTE FUNCTION event_search_item_trigger();
+
+SELECT refresh_event_search(id) FROM events;
+SELECT refresh_event_search(id) FROM events_archive;
+
+-- p_terms의 검색어를 모두 포함하는 이벤트를 관련도 순으로 (shared/supabase_repository.py의 search_events)
+CREATE OR REPLACE FUNCTION search_events(p_user_id TEXT, p_terms TEXT[], p_limit INTEGER, p_offset INTEGER)
+RETURNS TABLE (event_id BIGINT, archived BOOLEAN, snippet TEXT, rank REAL)
+LANGUAGE sql STABLE AS $$
+    WITH q AS (
+        SELECT to_tsquery('simple', string_agg(quote_literal(lower(term)) || ':*', ' & ')) AS query
+        FROM unnest(p_terms) AS term
+    )
+    SELECT s.event_id, s.archived,
+           ts_headline('simple', s.body, q.query, 'StartSel=**, StopSel=**, MaxWords=12, MinWords=4'),
+           ts_rank(s.document, q.query)
+    FROM event_search s, q
+    WHERE s.user_id = p_user_id AND s.document @@ q.query
+    ORDER BY 4 DESC, s.event_id DESC
+    LIMIT p_limit OFFSET p_offset;
+$$;
+
+-- 008 checklist progress counters on events
+-- 이벤트별 준비물 개수(checked_count / total_count)를 체크리스트 트리거로 유지해 목록 조회가 체크리스트 행을 읽지 않도록 합니다.
+-- 보관된 이벤트는 체크리스트가 바뀌지 않으므로 archive_events가 개수를 그대로 복사합니다. (006의 RPC를 다시 정의)
+ALTER TABLE events ADD COLUMN IF NOT EXISTS checked_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS total_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events_archive ADD COLUMN IF NOT EXISTS checked_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events_archive ADD COLUMN IF NOT EXISTS total_count INTEGER NOT NULL DEFAULT 0;
+
+-- 이벤트 삭제로 함께 지워지는 항목(ON DELETE CASCADE)은 갱신할 이벤트 행이 없어 무시됨
+CREATE OR REPLACE FUNCTION checklist_counts_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE events SET total_count = total_count + 1,
+                          checked_count = checked_count + (COALESCE(NEW.is_checked, 0) <> 0)::INTEGER
+        WHERE id = NEW.event_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE events SET total_count = total_count - 1,
+                          checked_count = checked_count - (COALESCE(OLD.is_checked, 0) <> 0)::INTEGER
+        WHERE id = OLD.event_id;
+    ELSIF (COALESCE(NEW.is_checked, 0) <> 0) <> (COALESCE(OLD.is_checked, 0) <> 0) THEN
+        UPDATE events SET checked_count = checked_count + (COALESCE(NEW.is_checked, 0) <> 0)::INTEGER
+                                                        - (COALESCE(OLD.is_checked, 0) <> 0)::INTEGER
+        WHERE id = NEW.event_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS checklist_counts ON checklist_items;
+CREATE TRIGGER checklist_counts
+    AFTER INSERT OR DELETE OR UPDATE OF is_checked ON checklist_items
+    FOR EACH ROW EXECUTE FUNCTION checklist_counts_trigger();
+
+UPDATE events e SET
+    checked_count = (SELECT COUNT(*) FROM checklist_items WHERE event_id = e.id AND COALESCE(is_checked, 0) <> 0),
+    total_count = (SELECT COUNT(*) FROM checklist_items WHERE event_id = e.id);
+UPDATE events_archive a SET
+    checked_count = (SELECT COUNT(*) FROM checklist_items_archive WHERE event_id = a.id AND COALESCE(is_checked, 0) <> 0),
+    total_count = (SELECT COUNT(*) FROM checklist_items_archive WHERE event_id = a.id);
+
+CREATE OR REPLACE FUNCTION archive_events(p_user_id TEXT, p_before DATE, p_batch_size INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_ids BIGINT[];
+BEGIN
+    SELECT ARRAY(
+        SELECT id FROM events WHERE user_id = p_user_id AND event_date < p_before
+        ORDER BY event_date, event_time, id LIMIT p_batch_size
+    ) INTO v_ids;
+
+    INSERT INTO events_archive (id, user_id, event_name, event_date, event_time, country, child_tag,
+                                translation, cultural_context, tips, memo, created_at, checked_count, total_count)
+    SELECT id, user_id, event_name, event_date, event_time, country, child_tag,
+           translation, cultural_context, tips, memo, created_at, checked_count, total_count
+    FROM events WHERE id = ANY(v_ids);
+
+    INSERT INTO checklist_items_archive (id, user_id, event_id, item_name, is_checked, position, metadata)
+    SELECT id, user_id, event_id, item_name, is_checked, position, metadata
+    FROM checklist_items WHERE event_id = ANY(v_ids);
+
+    DELETE FROM events WHERE id = ANY(v_ids);
+    RETURN COALESCE(array_length(v_ids, 1), 0);
+END;
+$$;
+
+-- 009 per-user data versions
+-- 이벤트/체크리스트가 바뀔 때마다 사용자의 변경 번호를 올려 캘린더 피드가 ETag / Last-Modified로 재사용되도록 합니다.
+-- 체크리스트 항목 추가/삭제/체크는 008 트리거가 events를 갱신하므로 events 트리거가 함께 처리합니다.
+CREATE TABLE IF NOT EXISTS data_versions (
+    user_id TEXT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO data_versions AS v (user_id, version, updated_at)
+    VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END, 1, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, updated_at = NOW();
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS data_version_events ON events;
+CREATE TRIGGER data_version_events
+    AFTER INSERT OR UPDATE OR DELETE ON events
+    FOR EACH ROW EXECUTE FUNCTION bump_data_version_trigger();
+
+DROP TRIGGER IF EXISTS data_version_item_rename ON checklist_items;
+CREATE TRIGGER data_version_item_rename
+    AFTER UPDATE OF item_name ON checklist_items
+    FOR EACH ROW EXECUTE FUNCTION bump_data_version_trigger();
+
+INSERT INTO data_versions (user_id, version)
+SELECT DISTINCT user_id, 1 FROM events
+ON CONFLICT (user_id) DO NOTHING;
+
+-- 010 backup import checkpoints
+-- 백업 복원(shared/backup.py)은 레코드 묶음마다 restore_backup_chunk RPC를 한 번 호출하고, 같은 트랜잭션에서
+-- 마지막으로 넣은 줄 번호를 기록합니다. 실패한 복원을 같은 파일로 다시 실행하면 기록된 줄 다음부터 이어서 넣습니다.
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    user_id TEXT NOT NULL,
+    backup_id TEXT NOT NULL,
+    line_no BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, backup_id)
+);
+
+-- p_records 형식은 shared/repository.py의 restore_backup_chunk 참고
+-- (아이는 같은 이름이 없을 때만, 사용량은 기존 값보다 클 때만, 보관된 이벤트는 넣은 뒤 archive_events처럼 옮김)
+CREATE OR REPLACE FUNCTION restore_backup_chunk(p_user_id TEXT, p_backup_id TEXT, p_line_no BIGINT, p_records JSONB)
+RETURNS VOID
+LANGUAGE plpgsql AS $$
+DECLARE
+    r JSONB;
+    v_event_id BIGINT;
+BEGIN
+    FOR r IN SELECT value FROM jsonb_array_elements(p_records) LOOP
+        IF r->>'type' = 'child' THEN
+            INSERT INTO children (user_id, name, display_order)
+            SELECT p_user_id, r->>'name', COALESCE(MAX(display_order), 0) + 1 FROM children WHERE user_id = p_user_id
+            ON CONFLICT (user_id, name) DO NOTHING;
+        ELSIF r->>'type' = 'usage' THEN
+            INSERT INTO usage_tracking AS t (user_id, month_year, analysis_count)
+            VALUES (p_user_id, r->>'month_year', (r->>'analysis_count')::INTEGER)
+            ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = GREATEST(t.analysis_count, EXCLUDED.analysis_count);
+        ELSE
+            INSERT INTO events (user_id, event_name, event_date, event_time, country, child_tag,
+                                translation, cultural_context, tips, memo, created_at)
+            VALUES (p_user_id, r->>'event_name', (r->>'event_date')::DATE, COALESCE(r->>'event_time', ''), r->>'country',
+                    r->>'child_tag', r->>'translation', r->>'cultural_context', r->>'tips', r->>'memo',
+                    COALESCE((r->>'created_at')::TIMESTAMPTZ, NOW()))
+            RETURNING id INTO v_event_id;
+
+            INSERT INTO checklist_items (user_id, event_id, item_name, is_checked, position, metadata)
+            SELECT p_user_id, v_event_id, item.value->>'name', CASE WHEN (item.value->>'checked')::BOOLEAN THEN 1 ELSE 0 END,
+                   item.ordinality - 1, NULLIF(item.value->'metadata', 'null'::JSONB)
+            FROM jsonb_array_elements(r->'checklist') WITH ORDINALITY AS item(value, ordinality);
+
+            IF (r->>'archived')::BOOLEAN THEN
+                INSERT INTO events_archive (id, user_id, event_name, event_date, event_time, country, child_tag,
+                                            translation, cultural_context, tips, memo, created_at, checked_count, total_count)
+                SELECT id, user_id, event_name, event_date, event_time, country, child_tag,
+                       translation, cultural_context, tips, memo, created_at, checked_count, total_count
+                FROM events WHERE id = v_event_id;
+
+                INSERT INTO checklist_items_archive (id, user_id, event_id, item_name, is_checked, position, metadata)
+                SELECT id, user_id, event_id, item_name, is_checked, position, metadata
+                FROM checklist_items WHERE event_id = v_event_id;
+
+                DELETE FROM events WHERE id = v_event_id;
+            END IF;
+        END IF;
+    END LOOP;
+
+    INSERT INTO import_checkpoints AS c (user_id, backup_id, line_no)
+    VALUES (p_user_id, p_backup_id, p_line_no)
+    ON CONFLICT (user_id, backup_id) DO UPDATE SET line_no = EXCLUDED.line_no, updated_at = NOW();
+END;
+$$;
+
+-- 011 supabase read replica
+-- 로컬 SQLite 읽기 복제본(shared/replica_repository.py, SENSE_COACH_STORAGE=supabase_replica)이 바뀐 행만 받아 가도록
+-- 이벤트/체크리스트 행마다 마지막 변경 시각(updated_at)을 트리거로 유지하고, 사용자 한 명의 변경분을 RPC 한 번으로 돌려줍니다.
+-- (아이, 사용량, 등급은 사용자당 몇 행뿐이라 매번 전체를 보냄)
+CREATE OR REPLACE FUNCTION touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['events', 'checklist_items', 'events_archive', 'checklist_items_archive'] LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()', t);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (user_id, updated_at)', 'idx_' || t || '_user_updated', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS touch_updated_at ON %I', t);
+        EXECUTE format('CREATE TRIGGER touch_updated_at BEFORE UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION touch_updated_at()', t);
+    END LOOP;
+END;
+$$;
+
+-- p_since 이후 바뀐 행 (NULL이면 전체)과 테이블별 행 수를 돌려줌. 삭제된 행은 변경분에 나타나지 않으므로 복제본은
+-- 행 수가 다른 테이블만 p_id_tables로 다시 요청해 id 목록을 받아 서버에 없는 행을 지움
+-- watermark는 다음 호출의 p_since (아직 커밋되지 않은 트랜잭션의 행을 놓치지 않도록 5초 겹치게)
+CREATE OR REPLACE FUNCTION replica_changes(p_user_id TEXT, p_since TIMESTAMPTZ, p_id_tables TEXT[] DEFAULT '{}')
+RETURNS JSONB
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    t TEXT;
+    v_rows JSONB;
+    v_count BIGINT;
+    v_counts JSONB := '{}';
+    v_ids JSONB := '{}';
+    v_result JSONB;
+BEGIN
+    v_result := jsonb_build_object(
+        'watermark', NOW() - INTERVAL '5 seconds',
+        'tier', (SELECT subscription_tier FROM users WHERE user_id = p_user_id),
+        'children', COALESCE((SELECT jsonb_agg(jsonb_build_object('name', name, 'display_order', display_order)
+                                               ORDER BY display_order, id)
+                              FROM children WHERE user_id = p_user_id), '[]'),
+        'usage', COALESCE((SELECT jsonb_agg(jsonb_build_object('month_year', month_year, 'analysis_count', analysis_count))
+                           FROM usage_tracking WHERE user_id = p_user_id), '[]')
+    );
+    FOREACH t IN ARRAY ARRAY['events', 'checklist_items', 'events_archive', 'checklist_items_archive'] LOOP
+        EXECUTE format('SELECT COALESCE(jsonb_agg(to_jsonb(r) - ''updated_at'' ORDER BY r.id), ''[]'') FROM %I r
+                        WHERE r.user_id = $1 AND ($2 IS NULL OR r.updated_at > $2)', t)
+            INTO v_rows USING p_user_id, p_since;
+        EXECUTE format('SELECT COUNT(*) FROM %I WHERE user_id = $1', t) INTO v_count USING p_user_id;
+        v_result := v_result || jsonb_build_object(t, v_rows);
+        v_counts := v_counts || jsonb_build_object(t, v_count);
+        IF t = ANY(p_id_tables) THEN
+            EXECUTE format('SELECT COALESCE(jsonb_agg(id), ''[]'') FROM %I WHERE user_id = $1', t) INTO v_rows USING p_user_id;
+            v_ids := v_ids || jsonb_build_object(t, v_rows);
+        END IF;
+    END LOOP;
+    RETURN v_result || jsonb_build_object('counts', v_counts, 'ids', v_ids);
+END;
+$$;
+
+-- 012 updated_at and tombstones for app sync
+-- 앱 변경분 동기화(GET /api/sync)용: 아이에도 updated_at을 두고 (이벤트/체크리스트는 011), 삭제된 행을 tombstones에 기록합니다.
+-- 보관(events에서 삭제)도 앱 목록에서 빠지므로 삭제로 기록하고, 이벤트와 함께 지워지는 체크리스트 항목은 기록하지 않습니다.
+-- 삭제 기록은 30일 뒤 같은 사용자의 다음 삭제 때 지웁니다 (014부터는 보관 기간을 앱이 sync_changes에 넘기고 그때 정리).
+ALTER TABLE children ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_children_user_updated ON children (user_id, updated_at);
+DROP TRIGGER IF EXISTS touch_updated_at ON children;
+CREATE TRIGGER touch_updated_at BEFORE UPDATE ON children FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE TABLE IF NOT EXISTS tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    entity_id BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_user_deleted ON tombstones (user_id, deleted_at);
+
+CREATE OR REPLACE FUNCTION record_tombstone_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'checklist_items' AND NOT EXISTS (SELECT 1 FROM events WHERE id = OLD.event_id) THEN
+        RETURN NULL;
+    END IF;
+    DELETE FROM tombstones WHERE user_id = OLD.user_id AND deleted_at < NOW() - INTERVAL '30 days';
+    INSERT INTO tombstones (user_id, entity, entity_id) VALUES (OLD.user_id, TG_TABLE_NAME, OLD.id);
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['events', 'checklist_items', 'children'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS record_tombstone ON %I', t);
+        EXECUTE format('CREATE TRIGGER record_tombstone AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION record_tombstone_trigger()', t);
+    END LOOP;
+END;
+$$;
+
+-- p_since 이후 바뀐 이벤트/체크리스트 항목/아이와 삭제된 id (p_since가 NULL이거나 삭제 기록 보관 기간보다 오래됐으면 전체, full = true)
+-- watermark는 다음 호출의 p_since (아직 커밋되지 않은 트랜잭션의 행을 놓치지 않도록 5초 겹치게, 011과 같음)
+CREATE OR REPLACE FUNCTION sync_changes(p_user_id TEXT, p_since TIMESTAMPTZ, p_details BOOLEAN DEFAULT TRUE)
+RETURNS JSONB
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    v_full BOOLEAN := p_since IS NULL OR p_since < NOW() - INTERVAL '30 days';
+    v_since TIMESTAMPTZ := CASE WHEN p_since IS NULL OR p_since < NOW() - INTERVAL '30 days' THEN '-infinity' ELSE p_since END;
+BEGIN
+    RETURN jsonb_build_object(
+        'watermark', NOW() - INTERVAL '5 seconds',
+        'full', v_full,
+        'events', COALESCE((
+            SELECT jsonb_agg(CASE WHEN p_details THEN to_jsonb(e) ELSE to_jsonb(e) - 'translation' - 'cultural_context' - 'tips' END
+                             - 'updated_at' - 'user_id' ORDER BY e.id)
+            FROM events e WHERE e.user_id = p_user_id AND e.updated_at > v_since), '[]'),
+        'checklist_items', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'event_id', event_id, 'item_name', item_name, 'is_checked', is_checked,
+                                                'position', position, 'metadata', metadata) ORDER BY event_id, position, id)
+            FROM checklist_items WHERE user_id = p_user_id AND updated_at > v_since), '[]'),
+        'children', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'name', name, 'display_order', display_order) ORDER BY display_order, id)
+            FROM children WHERE user_id = p_user_id AND updated_at > v_since), '[]'),
+        'deleted', COALESCE((
+            SELECT jsonb_object_agg(entity, ids) FROM (
+                SELECT entity, jsonb_agg(entity_id ORDER BY deleted_at, id) AS ids FROM tombstones
+                WHERE user_id = p_user_id AND NOT v_full AND deleted_at > v_since GROUP BY entity
+            ) d), '{}')
+    );
+END;
+$$;
+
+-- RPC: atomic usage metering
+-- 한도 확인과 증가를 한 문장으로 처리하는 RPC (shared/supabase_repository.py의 consume_usage/increment_usage/refund_usage)
+-- p_limits는 {등급: 월 최대 횟수} (payment_config.PLANS의 max_analyses_per_month)
+CREATE OR REPLACE FUNCTION consume_usage(p_user_id TEXT, p_month_year TEXT, p_limits JSONB)
+RETURNS TABLE (allowed BOOLEAN, usage INTEGER, usage_limit INTEGER)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_tier TEXT;
+    v_limit INTEGER;
+    v_count INTEGER;
+BEGIN
+    SELECT subscription_tier INTO v_tier FROM users WHERE user_id = p_user_id;
+    v_limit := COALESCE((p_limits ->> COALESCE(v_tier, 'FREE'))::INTEGER, (p_limits ->> 'FREE')::INTEGER);
+
+    -- 충돌한 행은 잠긴 상태에서 WHERE를 다시 평가하므로 동시 요청도 한도를 넘지 않음
+    INSERT INTO usage_tracking AS t (user_id, month_year, analysis_count)
+    SELECT p_user_id, p_month_year, 1 WHERE v_limit > 0
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = t.analysis_count + 1
+    WHERE t.analysis_count < v_limit
+    RETURNING t.analysis_count INTO v_count;
+
+    IF v_count IS NOT NULL THEN
+        RETURN QUERY SELECT TRUE, v_count, v_limit;
+    ELSE
+        SELECT COALESCE(MAX(analysis_count), 0) INTO v_count
+        FROM usage_tracking WHERE user_id = p_user_id AND month_year = p_month_year;
+        RETURN QUERY SELECT FALSE, v_count, v_limit;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION increment_usage(p_user_id TEXT, p_month_year TEXT)
+RETURNS INTEGER
+LANGUAGE sql AS $$
+    INSERT INTO usage_tracking AS t (user_id, month_year, analysis_count)
+    VALUES (p_user_id, p_month_year, 1)
+    ON CONFLICT (user_id, month_year) DO UPDATE SET analysis_count = t.analysis_count + 1
+    RETURNING t.analysis_count;
+$$;
+
+CREATE OR REPLACE FUNCTION refund_usage(p_user_id TEXT, p_month_year TEXT)
+RETURNS VOID
+LANGUAGE sql AS $$
+    UPDATE usage_tracking SET analysis_count = analysis_count - 1
+    WHERE user_id = p_user_id AND month_year = p_month_year AND analysis_count > 0;
+$$;
+
+-- 013 data versions for archive, children, usage and tier
+-- 009의 변경 번호를 보관된 이벤트 삭제 / 아이 / 월별 사용량 / 구독 등급에도 적용합니다.
+-- 앱 조회(목록/아이/멤버십)의 ETag를 이 번호로 만들므로 다른 서버나 Streamlit 앱의 쓰기도 다음 조회에서 바로 새 ETag가 됩니다.
+-- 등급 행은 처음 조회할 때 FREE로 만들어지므로 등급이 바뀔 때만 셉니다.
+DROP TRIGGER IF EXISTS data_version_archived_events ON events_archive;
+CREATE TRIGGER data_version_archived_events
+    AFTER DELETE ON events_archive
+    FOR EACH ROW EXECUTE FUNCTION bump_data_version_trigger();
+
+DROP TRIGGER IF EXISTS data_version_children ON children;
+CREATE TRIGGER data_version_children
+    AFTER INSERT OR UPDATE OR DELETE ON children
+    FOR EACH ROW EXECUTE FUNCTION bump_data_version_trigger();
+
+DROP TRIGGER IF EXISTS data_version_usage ON usage_tracking;
+CREATE TRIGGER data_version_usage
+    AFTER INSERT OR UPDATE OF analysis_count ON usage_tracking
+    FOR EACH ROW EXECUTE FUNCTION bump_data_version_trigger();
+
+DROP TRIGGER IF EXISTS data_version_tier ON users;
+CREATE TRIGGER data_version_tier
+    AFTER UPDATE OF subscription_tier ON users
+    FOR EACH ROW WHEN (OLD.subscription_tier IS DISTINCT FROM NEW.subscription_tier)
+    EXECUTE FUNCTION bump_data_version_trigger();
+
+-- 014 tombstone retention from the application
+-- 삭제 기록 보관 기간을 shared/repository.py의 TOMBSTONE_RETENTION_DAYS 하나로 정합니다 (SQL에 기간을 적지 않음).
+-- 트리거는 기록만 하고, sync_changes가 앱이 넘긴 p_retention_days로 전체 여부를 정하며 지난 기록을 지웁니다.
+-- 012의 3인자 sync_changes는 지우므로 이 블록을 실행한 뒤 새 버전의 서버를 배포할 것.
+CREATE OR REPLACE FUNCTION record_tombstone_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'checklist_items' AND NOT EXISTS (SELECT 1 FROM events WHERE id = OLD.event_id) THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO tombstones (user_id, entity, entity_id) VALUES (OLD.user_id, TG_TABLE_NAME, OLD.id);
+    RETURN NULL;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS sync_changes(TEXT, TIMESTAMPTZ, BOOLEAN);
+CREATE OR REPLACE FUNCTION sync_changes(p_user_id TEXT, p_since TIMESTAMPTZ, p_details BOOLEAN, p_retention_days INTEGER)
+RETURNS JSONB
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_cutoff TIMESTAMPTZ := NOW() - make_interval(days => p_retention_days);
+    v_full BOOLEAN := p_since IS NULL OR p_since < v_cutoff;
+    v_since TIMESTAMPTZ := CASE WHEN p_since IS NULL OR p_since < v_cutoff THEN '-infinity' ELSE p_since END;
+BEGIN
+    -- 보관 기간이 지난 기록은 아래에서 읽지 않으므로 먼저 지워도 됨
+    DELETE FROM tombstones WHERE user_id = p_user_id AND deleted_at < v_cutoff;
+    RETURN jsonb_build_object(
+        'watermark', NOW() - INTERVAL '5 seconds',
+        'full', v_full,
+        'events', COALESCE((
+            SELECT jsonb_agg(CASE WHEN p_details THEN to_jsonb(e) ELSE to_jsonb(e) - 'translation' - 'cultural_context' - 'tips' END
+                             - 'updated_at' - 'user_id' ORDER BY e.id)
+            FROM events e WHERE e.user_id = p_user_id AND e.updated_at > v_since), '[]'),
+        'checklist_items', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'event_id', event_id, 'item_name', item_name, 'is_checked', is_checked,
+                                                'position', position, 'metadata', metadata) ORDER BY event_id, position, id)
+            FROM checklist_items WHERE user_id = p_user_id AND updated_at > v_since), '[]'),
+        'children', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'name', name, 'display_order', display_order) ORDER BY display_order, id)
+            FROM children WHERE user_id = p_user_id AND updated_at > v_since), '[]'),
+        'deleted', COALESCE((
+            SELECT jsonb_object_agg(entity, ids) FROM (
+                SELECT entity, jsonb_agg(entity_id ORDER BY deleted_at, id) AS ids FROM tombstones
+                WHERE user_id = p_user_id AND NOT v_full AND deleted_at > v_since GROUP BY entity
+            ) d), '{}')
+    );
+END;
+$$;
@@ -0,0 +1,195 @@
+"""
+Supabase Transport
+Supabase(PostgREST) 요청을 보내는 HTTP 연결 관리 계층입니다.
+
+- 연결 풀: keep-alive 연결을 DB 작업 스레드 수만큼 유지해 요청마다 TCP/TLS 연결을 새로 맺지 않습니다.
+- 호출별 타임아웃: 기본 SUPABASE_TIMEOUT초, 오래 걸리는 RPC(보관, 복원)는 SLOW_CALL_TIMEOUT초
+  (응답이 없는 서버 때문에 DB 작업 스레드가 무한정 묶이지 않음)
+- 재시도: 읽기(GET/HEAD, 읽기 전용 RPC)는 일시적 오류(연결 실패, 타임아웃, 429/502/503/504)에
+  지터를 넣은 지수 백오프로 SUPABASE_RETRIES번까지 다시 보냅니다.
+  쓰기는 서버가 처리했는지 알 수 없으므로 요청이 보내지지 않은 연결 실패일 때만 다시 보냅니다.
+  (postgrest-py 2.2x 이상은 GET 503을 1초부터 기다리며 다시 보내는데, 여기서 재시도가 모두 실패했을 때만 해당)
+- 측정: 테이블(RPC는 'rpc/<이름>')별 호출 수, 재시도, 오류, 왕복 시간(평균, p50, p95, 최대)
+
+설정 (환경 변수):
+    SENSE_COACH_SUPABASE_TIMEOUT  - 요청 하나의 타임아웃(초), 기본 10
+    SENSE_COACH_SUPABASE_RETRIES  - 읽기 재시도 횟수, 기본 3
+    SENSE_COACH_SUPABASE_POOL     - 연결 풀 크기, 기본 SENSE_COACH_DB_WORKERS (8)
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+SUPABASE_TIMEOUT = float(os.getenv("SENSE_COACH_SUPABASE_TIMEOUT", "10"))
+SUPABASE_RETRIES = int(os.getenv("SENSE_COACH_SUPABASE_RETRIES", "3"))
+SUPABASE_POOL_SIZE = int(os.getenv("SENSE_COACH_SUPABASE_POOL", os.getenv("SENSE_COACH_DB_WORKERS", "8")))
+CONNECT_TIMEOUT = 3.0
+SLOW_CALL_TIMEOUT = 60.0
+KEEPALIVE_EXPIRY = 30.0
+BACKOFF_BASE = 0.1   # 첫 재시도 대기 상한(초), 재시도마다 두 배
+BACKOFF_MAX = 2.0
+LATENCY_SAMPLES = 1024   # 호출 이름별로 최근 왕복 시간을 이만큼 보관해 백분위 계산
+
+# 여러 배치를 한 번에 옮기거나 사용자 데이터 전체를 보낼 수 있는 RPC (supabase_schema.sql 006, 010, 011)
+SLOW_CALLS = frozenset({'rpc/archive_events', 'rpc/restore_backup_chunk', 'rpc/replica_changes'})
+# POST로 보내지만 데이터를 바꾸지 않아 다시 보내도 되는 RPC (supabase_schema.sql 007, 011)
+READ_ONLY_RPCS = frozenset({'rpc/search_events', 'rpc/replica_changes'})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# PostgREST가 데이터베이스에 연결하지 못했을 때의 오류 코드
+UNAVAILABLE_CODES = frozenset({'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'})
+# 요청이 서버에 전달되지 않았음이 확실한 오류 (쓰기도 다시 보내도 안전)
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def call_name(request):
+    """요청의 측정용 이름 ('/rest/v1/events' -> 'events', '/rest/v1/rpc/search_events' -> 'rpc/search_events')"""
+    path = request.url.path
+    marker = path.find('/rest/v1/')
+    name = path[marker + len('/rest/v1/'):] if marker >= 0 else path.lstrip('/')
+    return name.rstrip('/') or '/'
+
+
+def is_idempotent(request, name):
+    return request.method in ('GET', 'HEAD') or name in READ_ONLY_RPCS
+
+
+def is_unavailable(error):
+    """Supabase에 닿지 못했거나 일시적으로 처리하지 못한 오류인지 (거절된 요청과 달리 나중에 같은 요청을 다시 보내면 되는 오류)
+
+    postgrest의 APIError는 PostgREST가 아닌 곳(게이트웨이 등)의 오류 응답이면 code에 HTTP 상태 코드(int)가 들어 있음
+    """
+    while error is not None:
+        if isinstance(error, httpx.TransportError):
+            return True
+        code = getattr(error, 'code', None)
+        if code in UNAVAILABLE_CODES or (isinstance(code, int) and (code in RETRY_STATUSES or code >= 500)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def backoff_delay(attempt, retry_after=None):
+    """attempt번째 재시도 전 대기 시간 (full jitter, 서버가 Retry-After를 주면 그보다 짧지 않게)"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, min(BACKOFF_MAX, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+
+class TransportMetrics:
+    """호출 이름별 왕복 시간과 재시도/오류 횟수 (스레드 안전)"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.samples = samples
+        self._calls = {}   # 이름 -> {'calls', 'retries', 'errors', 'total_ms', 'max_ms', 'recent'}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed_ms, retries, error):
+        with self._lock:
+            entry = self._calls.get(name)
+            if entry is None:
+                entry = self._calls[name] = {'calls': 0, 'retries': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                             'recent': deque(maxlen=self.samples)}
+            entry['calls'] += 1
+            entry['retries'] += retries
+            entry['errors'] += 1 if error else 0
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['recent'].append(elapsed_ms)
+
+    def stats(self):
+        """이름별 호출 수, 재시도, 오류, 왕복 시간 ms (평균 / 최근 호출의 p50, p95 / 최대)"""
+        with self._lock:
+            entries = {name: dict(entry, recent=sorted(entry['recent'])) for name, entry in self._calls.items()}
+        return {
+            name: {
+                'calls': entry['calls'],
+                'retries': entry['retries'],
+                'errors': entry['errors'],
+                'avg_ms': round(entry['total_ms'] / entry['calls'], 2),
+                'p50_ms': round(_percentile(entry['recent'], 0.5), 2),
+                'p95_ms': round(_percentile(entry['recent'], 0.95), 2),
+                'max_ms': round(entry['max_ms'], 2),
+            }
+            for name, entry in sorted(entries.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+transport_metrics = TransportMetrics()
+
+
+class ManagedTransport(httpx.BaseTransport):
+    """연결 풀 + 호출별 타임아웃 + 읽기 재시도 + 왕복 시간 측정을 하는 httpx 전송 계층"""
+
+    def __init__(self, pool_size=SUPABASE_POOL_SIZE, timeout=SUPABASE_TIMEOUT, retries=SUPABASE_RETRIES,
+                 metrics=transport_metrics, transport=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.metrics = metrics
+        self._transport = transport or httpx.HTTPTransport(limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=KEEPALIVE_EXPIRY))
+
+    def _timeouts(self, name):
+        read = SLOW_CALL_TIMEOUT if name in SLOW_CALLS else self.timeout
+        return {'connect': min(CONNECT_TIMEOUT, read), 'read': read, 'write': read, 'pool': min(CONNECT_TIMEOUT, read)}
+
+    def handle_request(self, request):
+        name = call_name(request)
+        request.extensions = dict(request.extensions, timeout=self._timeouts(name))
+        idempotent = is_idempotent(request, name)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+                response.read()   # 본문까지 받아야 왕복 시간이고, 다 읽으면 연결이 풀로 돌아감
+            except httpx.TransportError as e:
+                if attempt < self.retries and (idempotent or isinstance(e, NOT_SENT_ERRORS)):
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                self.metrics.record(name, (time.perf_counter() - start) * 1000, attempt, True)
+                raise
+            if idempotent and response.status_code in RETRY_STATUSES and attempt < self.retries:
+                time.sleep(backoff_delay(attempt, response.headers.get('Retry-After')))
+                attempt += 1
+                continue
+            self.metrics.record(name, (time.perf_counter() - start) * 1000, attempt, response.status_code >= 400)
+            return response
+
+    def close(self):
+        self._transport.close()
+
+
+def create_client(supabase_url, supabase_key, transport=None):
+    """ManagedTransport를 쓰는 PostgREST 클라이언트 (저장소는 table()과 rpc()만 사용)
+
+    supabase.create_client가 만드는 클라이언트의 PostgREST 부분과 같은 요청을 보내며,
+    인증/스토리지/실시간 클라이언트는 만들지 않습니다.
+    """
+    rest_url = f"{supabase_url.rstrip('/')}/rest/v1"
+    client = SyncPostgrestClient(rest_url, headers={"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"})
+    client.session.close()
+    # postgrest 버전에 따라 요청 경로가 상대 경로이므로 base_url과 기본 헤더를 세션에 둠
+    client.session = SyncClient(base_url=rest_url, headers=client.headers, transport=transport or ManagedTransport(),
+                                timeout=SUPABASE_TIMEOUT, follow_redirects=True)
+    return client
@@ -1,6 +1,6 @@
 import streamlit as st
 import uuid
-from database_utils import get_user_tier, get_usage, increment_usage, update_user_tier
+from database_utils import get_user_tier, get_usage, update_user_tier, consume_analysis, refund_analysis
 from payment_config import PLANS
 
 # 결제 성공 시 리다이렉트될 URL (Streamlit Cloud URL로 변경 필요)
@@ -17,7 +17,9 @@ def get_or_create_user_id():
         else:
             # 2. 새로운 랜덤 ID 생성 (실제 앱에서는 기기 ID 등을 활용하거나 로그인을 유도)
             st.session_state.user_id = str(uuid.uuid4())
-    
+            # 일정/아이 데이터가 사용자별로 저장되므로 새로고침/북마크 후에도 같은 ID를 쓰도록 주소에 유지
+            st.query_params['uid'] = st.session_state.user_id
+
     # --- 결제 성공 처리 ---
     params = st.query_params
     if params.get("payment_success") == "true" and "uid" in params:
@@ -28,6 +30,7 @@ def get_or_create_user_id():
         # 가장 쉬운 구현을 위해 URL 파라미터 기반으로 업데이트 진행
         if update_user_tier(target_uid, "PREMIUM"):
             st.query_params.clear() # 파라미터 즉시 제거
+            st.query_params['uid'] = target_uid # 사용자 ID는 계속 유지
             st.success(f"🎉 결제가 성공적으로 완료되었습니다! (ID: {target_uid})")
             st.balloons() # 축하 효과
             st.session_state.user_id = target_uid # 세션 ID 동기화
@@ -37,24 +40,22 @@ def get_or_create_user_id():
 
     return st.session_state.user_id
 
-def check_can_analyze():
-    """AI 분석 가능 여부 확인"""
-    user_id = get_or_create_user_id()
-    tier = get_user_tier(user_id)
-    plan = PLANS.get(tier, PLANS["FREE"])
-    
-    current_usage = get_usage(user_id)
-    max_usage = plan["max_analyses_per_month"]
-    
-    can_analyze = current_usage < max_usage
-    return can_analyze, current_usage, max_usage, tier
+def reserve_analysis():
+    """AI 분석 1회 차감 (한도 확인과 차감을 한 번에 처리해 동시에 눌러도 한도를 넘지 않음)
 
-def get_membership_info():
-    """멤버십 정보 요약"""
+    반환: {'allowed': 분석 가능 여부, 'usage': 차감 후 사용량, 'limit': 월 한도}
+    """
     user_id = get_or_create_user_id()
-    tier = get_user_tier(user_id)
+    return consume_analysis(user_id)
+
+def get_membership_info(ctx=None):
+    """멤버십 정보 요약 (ctx: 이번 재실행의 RequestContext, 있으면 등급/사용량을 한 번만 조회)"""
+    if ctx is not None:
+        tier, current_usage = ctx.tier(), ctx.usage()
+    else:
+        user_id = get_or_create_user_id()
+        tier, current_usage = get_user_tier(user_id), get_usage(user_id)
     plan = PLANS.get(tier, PLANS["FREE"])
-    current_usage = get_usage(user_id)
     
     return {
         "tier": tier,
@@ -64,14 +65,14 @@ def get_membership_info():
         "features": plan["features"]
     }
 
-def process_analysis_usage():
-    """분석 완료 시 사용량 기록"""
+def cancel_analysis():
+    """분석 실패 시 reserve_analysis로 차감한 횟수 반환"""
     user_id = get_or_create_user_id()
-    increment_usage(user_id)
+    refund_analysis(user_id)
 
-def render_membership_sidebar():
+def render_membership_sidebar(ctx=None):
     """사이드바에 멤버십 정보 표시"""
-    info = get_membership_info()
+    info = get_membership_info(ctx)
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"### 💎 멤버십: {info['tier_name']}")
     # 디버깅/테스트용 ID 표시 (멤버십 제목 바로 아래에 작게 배치)